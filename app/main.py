@@ -7,6 +7,7 @@ from fastapi.exceptions import RequestValidationError
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from pathlib import Path
+import asyncio
 import os
 from app.routes.debug import router as debug_router
 from app.routes import roles, email, calendar, team_fit, analytics_journey, assessment_builder, reference_checks, compliance, talent_pool, attrition, branding
@@ -14,7 +15,7 @@ import logging
 
 import epq_core
 from report_generator import generate_pdf_report
-from app.services import db
+from app.services import db, db_pool
 
 from app.auth import router as auth_router
 from app.routes.employer import router as employer_router
@@ -152,6 +153,45 @@ def startup():
     else:
         logger.info(f"Database: SQLite at {db.DB_PATH}")
 
+    # Recompute persisted applicant scores written by an older scorer version
+    if os.environ.get("SCORE_BACKFILL_ON_STARTUP", "true").lower() == "true":
+        import threading
+        from app.services import applicant_scores
+
+        def _backfill():
+            try:
+                applicant_scores.backfill_stale_scores()
+            except Exception as e:
+                logger.warning(f"Score backfill failed: {e}")
+
+        threading.Thread(target=_backfill, name="score-backfill", daemon=True).start()
+
+    # In-process job worker (PDFs); set JOB_WORKER_EMBEDDED=false when running `python -m app.worker`
+    from app import worker
+    worker.start_embedded()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    from app import worker
+    from app.services import pdf_renderer
+    from app.services import event_ingest
+    worker.stop_embedded()
+    pdf_renderer.shutdown_renderer()
+
+    # Write journey events still held in the ingest buffer
+    event_ingest.shutdown()
+
+    # Release pooled database connections
+    db_pool.close_pool()
+
+
+@app.on_event("shutdown")
+async def shutdown_webhooks():
+    # Close the outbox sender's HTTP client and background loop (embedded worker)
+    from app.services import webhooks
+    await asyncio.get_running_loop().run_in_executor(None, webhooks.shutdown)
+
 
 # Health check endpoints
 @app.get("/health")
@@ -160,6 +200,29 @@ def health_check():
     return {"status": "healthy", "environment": ENVIRONMENT}
 
 
+@app.get("/health/jobs")
+def health_check_jobs():
+    """Background job queue depth (queued / leased / done / dead per kind) and webhook outbox"""
+    from app.services import job_queue, pdf_renderer, webhook_outbox
+    try:
+        return {
+            "status": "healthy",
+            **job_queue.stats(),
+            "renderer": pdf_renderer.stats(),
+            "webhook_outbox": webhook_outbox.stats(),
+        }
+    except Exception as e:
+        logger.error(f"Job queue health check failed: {e}")
+        return JSONResponse(status_code=503, content={"status": "unhealthy", "error": str(e)})
+
+
+@app.get("/health/events")
+def health_check_events():
+    """Journey event ingest buffer: queue depth, written / dropped / failed counters"""
+    from app.services import event_ingest
+    return {"status": "healthy", "buffer": event_ingest.get_buffer().stats()}
+
+
 @app.get("/health/db")
 def health_check_db():
     """Database connectivity health check"""
@@ -181,7 +244,8 @@ def health_check_db():
             return {
                 "status": "healthy",
                 "database": "PostgreSQL" if database_url else "SQLite",
-                "connection": "OK"
+                "connection": "OK",
+                "pool": db.pool_stats()
             }
     except Exception as e:
         logger.error(f"Database health check failed: {e}")
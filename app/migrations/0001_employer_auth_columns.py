@@ -0,0 +1,21 @@
+# app/migrations/0001_employer_auth_columns.py
+"""
+Auth / subscription columns on employers.
+
+Replaces the ALTER TABLE loops in init_db and auth_db.ensure_auth_columns that
+ignored every failure: columns are only added when actually missing, so a
+real error now stops the migration.
+"""
+from app.services.migrations import add_column_if_missing
+
+def upgrade(cur, dialect: str):
+    for column_name, column_def in [
+        ("password_hash", "TEXT"),
+        ("email_verified", "INTEGER DEFAULT 0"),
+        ("verification_token", "TEXT"),
+        ("verification_token_expires", "TEXT"),
+        ("reset_token", "TEXT"),
+        ("reset_token_expires", "TEXT"),
+        ("subscription_status", "TEXT DEFAULT 'trial'"),
+    ]:
+        add_column_if_missing(cur, dialect, "employers", column_name, column_def)
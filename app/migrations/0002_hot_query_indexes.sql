@@ -0,0 +1,26 @@
+-- app/migrations/0002_hot_query_indexes.sql
+-- Secondary indexes for the hottest lookups (see app.services.migrations.TOP_QUERIES).
+
+-- list_assessments_for_employer, submission feed join
+CREATE INDEX IF NOT EXISTS idx_assessments_employer
+    ON assessments (employer_id);
+
+-- list_applicants_for_assessment, submission feed (keyset on submitted_utc, candidate_id)
+CREATE INDEX IF NOT EXISTS idx_applicants_assessment_submitted
+    ON applicants (assessment_id, submitted_utc, candidate_id);
+
+-- applicant_exists_for_assessment duplicate check: lower(applicant_email)
+CREATE INDEX IF NOT EXISTS idx_applicants_assessment_email_lower
+    ON applicants (assessment_id, lower(applicant_email));
+
+-- auth_db.get_employer_by_email: lower(email)
+CREATE INDEX IF NOT EXISTS idx_employers_email_lower
+    ON employers (lower(email));
+
+-- webhooks.trigger_webhooks subscriber lookup
+CREATE INDEX IF NOT EXISTS idx_webhooks_employer_event_active
+    ON webhooks (employer_id, event_type, active);
+
+-- webhook log listing
+CREATE INDEX IF NOT EXISTS idx_webhook_logs_webhook_created
+    ON webhook_logs (webhook_id, created_utc);
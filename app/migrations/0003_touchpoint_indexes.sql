@@ -0,0 +1,21 @@
+-- app/migrations/0003_touchpoint_indexes.sql
+-- Journey analytics: funnel / time-to-completion scans by employer and time window.
+-- The table is normally created lazily by JourneyAnalytics; create it here so the
+-- index can always be built.
+
+CREATE TABLE IF NOT EXISTS candidate_touchpoints (
+    id TEXT PRIMARY KEY,
+    candidate_id TEXT,
+    role_id TEXT NOT NULL,
+    employer_id TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    event_data TEXT,
+    session_id TEXT,
+    user_agent TEXT,
+    ip_address TEXT,
+    timestamp TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_touchpoints_employer_timestamp
+    ON candidate_touchpoints (employer_id, timestamp);
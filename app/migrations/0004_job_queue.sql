@@ -0,0 +1,26 @@
+-- app/migrations/0004_job_queue.sql
+-- Durable background jobs (see app/services/job_queue.py, run by `python -m app.worker`).
+-- status: queued -> leased -> done | queued (retry with backoff) | dead (max_attempts reached)
+
+CREATE TABLE IF NOT EXISTS job_queue (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload_json TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_after TEXT NOT NULL,
+    lease_owner TEXT,
+    lease_expires TEXT,
+    last_error TEXT,
+    created_utc TEXT NOT NULL,
+    updated_utc TEXT NOT NULL
+);
+
+-- lease(): oldest runnable job of a kind
+CREATE INDEX IF NOT EXISTS idx_job_queue_kind_status_run_after
+    ON job_queue (kind, status, run_after);
+
+-- stats(): depth per kind/status
+CREATE INDEX IF NOT EXISTS idx_job_queue_status
+    ON job_queue (status, kind);
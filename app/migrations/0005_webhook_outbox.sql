@@ -0,0 +1,47 @@
+-- app/migrations/0005_webhook_outbox.sql
+-- Transactional webhook outbox (see app/services/webhook_outbox.py).
+-- One row per (event, subscribed webhook), written in the same transaction as
+-- the change that caused the event; delivered and retried by the worker.
+-- status: pending -> delivering -> delivered | pending (retry) | dead
+
+CREATE TABLE IF NOT EXISTS webhook_outbox (
+    delivery_id TEXT PRIMARY KEY,
+    webhook_id TEXT NOT NULL,
+    employer_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    payload_json TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 8,
+    next_attempt_utc TEXT NOT NULL,
+    claimed_until TEXT,
+    last_status_code INTEGER,
+    last_error TEXT,
+    replay_of TEXT,
+    created_utc TEXT NOT NULL,
+    updated_utc TEXT NOT NULL,
+    delivered_utc TEXT,
+    FOREIGN KEY (webhook_id) REFERENCES webhooks(webhook_id) ON DELETE CASCADE
+);
+
+-- deliver_due(): due rows in order
+CREATE INDEX IF NOT EXISTS idx_webhook_outbox_status_next
+    ON webhook_outbox (status, next_attempt_utc);
+
+-- delivery history / replay per webhook
+CREATE INDEX IF NOT EXISTS idx_webhook_outbox_webhook_created
+    ON webhook_outbox (webhook_id, created_utc);
+
+-- Per-endpoint circuit breaker: after repeated failures a receiver is paused
+-- (state 'open') until retry_after_utc, then probed with a single delivery.
+CREATE TABLE IF NOT EXISTS webhook_circuits (
+    webhook_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL DEFAULT 'closed',
+    consecutive_failures INTEGER NOT NULL DEFAULT 0,
+    open_count INTEGER NOT NULL DEFAULT 0,
+    opened_utc TEXT,
+    retry_after_utc TEXT,
+    updated_utc TEXT NOT NULL,
+    FOREIGN KEY (webhook_id) REFERENCES webhooks(webhook_id) ON DELETE CASCADE
+);
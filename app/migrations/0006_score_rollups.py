@@ -0,0 +1,64 @@
+# app/migrations/0006_score_rollups.py
+"""
+Daily score rollups for /analytics (see app/services/score_rollups.py),
+seeded from the scores already stored.
+"""
+
+def upgrade(cur, dialect: str):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS score_rollup_daily (
+        employer_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        construct TEXT NOT NULL,
+        n INTEGER NOT NULL DEFAULT 0,
+        total REAL NOT NULL DEFAULT 0,
+        total_sq REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (employer_id, day, construct)
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS score_bucket_daily (
+        employer_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        n INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (employer_id, day, bucket)
+    )
+    """)
+
+    # Backfill, frozen as of this migration (score_rollups.rebuild may change later)
+    day = "substr(ap.submitted_utc, 1, 10)"
+    cur.execute(f"""
+    INSERT INTO score_rollup_daily (employer_id, day, construct, n, total, total_sq)
+    SELECT asm.employer_id, {day}, sc.construct, COUNT(*), SUM(sc.score), SUM(sc.score * sc.score)
+    FROM applicant_scores sc
+    JOIN applicants ap ON ap.candidate_id = sc.candidate_id
+    JOIN assessments asm ON asm.assessment_id = ap.assessment_id
+    GROUP BY asm.employer_id, {day}, sc.construct
+    """)
+    cur.execute(f"""
+    INSERT INTO score_rollup_daily (employer_id, day, construct, n, total, total_sq)
+    SELECT asm.employer_id, {day}, '_overall', COUNT(*), SUM(s.overall_average), SUM(s.overall_average * s.overall_average)
+    FROM applicant_score_summary s
+    JOIN applicants ap ON ap.candidate_id = s.candidate_id
+    JOIN assessments asm ON asm.assessment_id = ap.assessment_id
+    WHERE s.overall_average IS NOT NULL
+    GROUP BY asm.employer_id, {day}
+    """)
+    # Deciles of the 1-3 overall average (0-100%), clamped to 0-9
+    cur.execute(f"""
+    SELECT asm.employer_id, {day} AS day, s.overall_average
+    FROM applicant_score_summary s
+    JOIN applicants ap ON ap.candidate_id = s.candidate_id
+    JOIN assessments asm ON asm.assessment_id = ap.assessment_id
+    WHERE s.overall_average IS NOT NULL
+    """)
+    buckets = {}
+    for r in cur.fetchall():
+        pct = min(100.0, max(0.0, (float(r["overall_average"]) - 1.0) / 2.0 * 100.0))
+        key = (r["employer_id"], r["day"], min(9, int(pct // 10)))
+        buckets[key] = buckets.get(key, 0) + 1
+    if buckets:
+        cur.executemany("""
+        INSERT INTO score_bucket_daily (employer_id, day, bucket, n) VALUES (?, ?, ?, ?)
+        """, [(*key, n) for key, n in buckets.items()])
@@ -0,0 +1,128 @@
+# app/migrations/0007_funnel_rollups.py
+"""
+Journey funnel rollups (see app/services/funnel_rollups.py), seeded from the
+touchpoints already recorded.
+"""
+import math
+from datetime import datetime
+
+
+def upgrade(cur, dialect: str):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS funnel_rollup_daily (
+        employer_id TEXT NOT NULL,
+        role_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        stage TEXT NOT NULL,
+        events INTEGER NOT NULL DEFAULT 0,
+        uniques INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (employer_id, role_id, day, stage)
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS funnel_duration_daily (
+        employer_id TEXT NOT NULL,
+        role_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        transition TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        n INTEGER NOT NULL DEFAULT 0,
+        total_seconds REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (employer_id, role_id, day, transition, bucket)
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS funnel_actor_stage (
+        employer_id TEXT NOT NULL,
+        role_id TEXT NOT NULL,
+        stage TEXT NOT NULL,
+        actor TEXT NOT NULL,
+        first_timestamp TEXT NOT NULL,
+        PRIMARY KEY (employer_id, role_id, stage, actor)
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS funnel_last_event (
+        employer_id TEXT NOT NULL,
+        role_id TEXT NOT NULL,
+        candidate_id TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        PRIMARY KEY (employer_id, role_id, candidate_id)
+    )
+    """)
+
+    # Backfill, frozen as of this migration (funnel_rollups.rebuild may change later)
+    actor = "COALESCE(candidate_id, session_id)"
+    cur.execute("""
+    INSERT INTO funnel_rollup_daily (employer_id, role_id, day, stage, events, uniques)
+    SELECT employer_id, role_id, substr(timestamp, 1, 10), event_type, COUNT(*), 0
+    FROM candidate_touchpoints
+    GROUP BY employer_id, role_id, substr(timestamp, 1, 10), event_type
+    """)
+    cur.execute(f"""
+    INSERT INTO funnel_actor_stage (employer_id, role_id, stage, actor, first_timestamp)
+    SELECT employer_id, role_id, event_type, {actor}, MIN(timestamp)
+    FROM candidate_touchpoints WHERE {actor} IS NOT NULL
+    GROUP BY employer_id, role_id, event_type, {actor}
+    """)
+    cur.execute("""
+    SELECT employer_id, role_id, substr(first_timestamp, 1, 10) AS day, stage, COUNT(*) AS n
+    FROM funnel_actor_stage
+    GROUP BY employer_id, role_id, substr(first_timestamp, 1, 10), stage
+    """)
+    uniques = {(r["employer_id"], r["role_id"], r["day"], r["stage"]): int(r["n"]) for r in cur.fetchall()}
+
+    # Each candidate's events in time order: first sighting per role ("_candidates"),
+    # durations between consecutive events (log2 buckets) and the last event
+    cur.execute("""
+    SELECT employer_id, role_id, candidate_id, event_type, timestamp
+    FROM candidate_touchpoints WHERE candidate_id IS NOT NULL
+    ORDER BY employer_id, role_id, candidate_id, timestamp
+    """)
+    durations = {}
+    last_rows = []
+    key, prev = None, None
+    while True:
+        rows = cur.fetchmany(1000)
+        if not rows:
+            break
+        for r in rows:
+            k = (r["employer_id"], r["role_id"], r["candidate_id"])
+            if k != key:
+                if prev is not None:
+                    last_rows.append((*key, prev["event_type"], prev["timestamp"]))
+                first = (k[0], k[1], r["timestamp"][:10], "_candidates")
+                uniques[first] = uniques.get(first, 0) + 1
+                key, prev = k, None
+            if prev is not None:
+                try:
+                    seconds = (datetime.fromisoformat(r["timestamp"])
+                               - datetime.fromisoformat(prev["timestamp"])).total_seconds()
+                except (TypeError, ValueError):
+                    seconds = None
+                if seconds is not None:
+                    bucket = 0 if seconds < 1 else min(40, int(math.log2(seconds)) + 1)
+                    cell = (k[0], k[1], r["timestamp"][:10], f"{prev['event_type']}_to_{r['event_type']}", bucket)
+                    n, total = durations.get(cell, (0, 0.0))
+                    durations[cell] = (n + 1, total + seconds)
+            prev = dict(r)
+    if prev is not None:
+        last_rows.append((*key, prev["event_type"], prev["timestamp"]))
+
+    if uniques:
+        cur.executemany("""
+        INSERT INTO funnel_rollup_daily (employer_id, role_id, day, stage, events, uniques)
+        VALUES (?, ?, ?, ?, 0, ?)
+        ON CONFLICT (employer_id, role_id, day, stage) DO UPDATE SET uniques = excluded.uniques
+        """, [(*cell, n) for cell, n in uniques.items()])
+    if durations:
+        cur.executemany("""
+        INSERT INTO funnel_duration_daily (employer_id, role_id, day, transition, bucket, n, total_seconds)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [(*cell, n, total) for cell, (n, total) in durations.items()])
+    if last_rows:
+        cur.executemany("""
+        INSERT INTO funnel_last_event (employer_id, role_id, candidate_id, event_type, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+        """, last_rows)
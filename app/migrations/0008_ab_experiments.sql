@@ -0,0 +1,52 @@
+-- app/migrations/0008_ab_experiments.sql
+-- A/B test engine (app/services/ab_testing.py): one experiment row per test,
+-- holding the sequential-test settings and the stop decision. Per-variant
+-- sufficient statistics stay in variant_metrics (views / completions), which
+-- the event ingest buffer increments. The variant tables are normally created
+-- lazily by JourneyAnalytics; create them here so the indexes can be built.
+
+CREATE TABLE IF NOT EXISTS job_variants (
+    id TEXT PRIMARY KEY,
+    role_id TEXT NOT NULL,
+    employer_id TEXT NOT NULL,
+    variant_name TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    is_active INTEGER DEFAULT 1,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS variant_metrics (
+    id TEXT PRIMARY KEY,
+    variant_id TEXT NOT NULL,
+    role_id TEXT NOT NULL,
+    views INTEGER DEFAULT 0,
+    applications INTEGER DEFAULT 0,
+    completions INTEGER DEFAULT 0,
+    conversion_rate REAL DEFAULT 0.0,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS ab_experiments (
+    id TEXT PRIMARY KEY,
+    role_id TEXT NOT NULL,
+    employer_id TEXT NOT NULL,
+    control_variant_id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running',   -- running | stopped | superseded
+    alpha REAL NOT NULL,
+    tau REAL NOT NULL,
+    min_views INTEGER NOT NULL,
+    winner_variant_id TEXT,
+    stop_reason TEXT,
+    created_at TEXT NOT NULL,
+    stopped_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_ab_experiments_role
+    ON ab_experiments (employer_id, role_id, created_at);
+
+CREATE INDEX IF NOT EXISTS idx_job_variants_role
+    ON job_variants (role_id, employer_id);
+
+CREATE INDEX IF NOT EXISTS idx_variant_metrics_variant
+    ON variant_metrics (variant_id);
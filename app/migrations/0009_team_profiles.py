@@ -0,0 +1,65 @@
+# app/migrations/0009_team_profiles.py
+"""
+Incrementally maintained team profiles for TeamFitAnalyzer (app/services/team_fit.py),
+seeded from the "hired" journey events already recorded.
+"""
+
+CONSTRUCTS = ("SCL", "CCD", "CIL", "CVL", "ERL", "MSD", "ICI", "AJL")
+
+def upgrade(cur, dialect: str):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS team_members (
+        employer_id TEXT NOT NULL,
+        candidate_id TEXT NOT NULL,
+        role_id TEXT NOT NULL,
+        hired_at TEXT NOT NULL,
+        PRIMARY KEY (employer_id, candidate_id)
+    )
+    """)
+    # scope = role_id, or '' for the employer's whole team; Welford state per construct
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS team_profile_stats (
+        employer_id TEXT NOT NULL,
+        scope TEXT NOT NULL,
+        construct TEXT NOT NULL,
+        n INTEGER NOT NULL DEFAULT 0,
+        mean REAL NOT NULL DEFAULT 0,
+        m2 REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (employer_id, scope, construct)
+    )
+    """)
+
+    # Backfill, frozen as of this migration (team_fit.rebuild_profiles may change later).
+    # Members: every candidate with a "hired" journey event (the earliest one wins)
+    cur.execute("""
+    SELECT employer_id, candidate_id, role_id, timestamp FROM candidate_touchpoints
+    WHERE event_type = 'hired' AND candidate_id IS NOT NULL
+    ORDER BY timestamp
+    """)
+    cur.executemany("""
+    INSERT INTO team_members (employer_id, candidate_id, role_id, hired_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (employer_id, candidate_id) DO NOTHING
+    """, [(r["employer_id"], r["candidate_id"], r["role_id"] or "", r["timestamp"]) for r in cur.fetchall()])
+
+    # Per-construct n / mean / m2 for the whole team ('') and each role
+    cur.execute("""
+    SELECT tm.employer_id, tm.role_id, sc.construct, sc.score
+    FROM team_members tm
+    JOIN applicant_scores sc ON sc.candidate_id = tm.candidate_id
+    """)
+    values = {}
+    for r in cur.fetchall():
+        if r["construct"] not in CONSTRUCTS:
+            continue
+        for scope in ({"", r["role_id"]} if r["role_id"] else {""}):
+            values.setdefault((r["employer_id"], scope, r["construct"]), []).append(float(r["score"]))
+    rows = []
+    for (e, scope, c), xs in values.items():
+        mean = sum(xs) / len(xs)
+        rows.append((e, scope, c, len(xs), mean, sum((x - mean) ** 2 for x in xs)))
+    if rows:
+        cur.executemany("""
+        INSERT INTO team_profile_stats (employer_id, scope, construct, n, mean, m2)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
@@ -0,0 +1,6 @@
+-- app/migrations/0010_score_summary_computed_index.sql
+-- Candidate similarity index (app/services/similarity_index.py): incremental
+-- refresh picks up applicants scored since its last look.
+
+CREATE INDEX IF NOT EXISTS idx_score_summary_computed
+    ON applicant_score_summary (computed_utc);
@@ -0,0 +1,38 @@
+-- app/migrations/0011_bias_audit.sql
+-- Bulk bias audit (app/services/bias_audit.py): one row per flagged category
+-- per note / feedback comment, plus audit runs with their resume checkpoints.
+
+CREATE TABLE IF NOT EXISTS bias_findings (
+    source TEXT NOT NULL,              -- note | feedback
+    row_id INTEGER NOT NULL,           -- candidate_notes.note_id / candidate_feedback.feedback_id
+    category TEXT NOT NULL,
+    audit_id TEXT NOT NULL,
+    candidate_id TEXT,
+    employer_id TEXT,
+    author TEXT,
+    feedback_category TEXT,
+    terms_json TEXT NOT NULL,
+    term_count INTEGER NOT NULL,
+    score INTEGER NOT NULL,            -- bias score of the whole text
+    text_timestamp TEXT,
+    found_utc TEXT NOT NULL,
+    PRIMARY KEY (source, row_id, category)
+);
+
+CREATE INDEX IF NOT EXISTS idx_bias_findings_employer_category
+    ON bias_findings (employer_id, category);
+
+CREATE TABLE IF NOT EXISTS bias_audit_runs (
+    audit_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,              -- queued | running | done | failed
+    full_scan INTEGER NOT NULL DEFAULT 0,
+    note_cursor INTEGER NOT NULL DEFAULT 0,
+    feedback_cursor INTEGER NOT NULL DEFAULT 0,
+    rows_scanned INTEGER NOT NULL DEFAULT 0,
+    rows_flagged INTEGER NOT NULL DEFAULT 0,
+    requested_by TEXT,
+    error TEXT,
+    created_utc TEXT NOT NULL,
+    started_utc TEXT,
+    finished_utc TEXT
+);
@@ -0,0 +1,26 @@
+-- app/migrations/0012_interview_time_index.sql
+-- Interview scheduling (app/services/scheduling_agent.py): busy intervals are
+-- loaded per employer for a time window. The interviews table is normally
+-- created lazily by the calendar routes; create it here so the index exists.
+
+CREATE TABLE IF NOT EXISTS interviews (
+    id TEXT PRIMARY KEY,
+    employer_id TEXT NOT NULL,
+    candidate_id TEXT NOT NULL,
+    candidate_name TEXT NOT NULL,
+    role_id TEXT NOT NULL,
+    role_title TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    duration_minutes INTEGER NOT NULL,
+    location TEXT,
+    meeting_link TEXT,
+    interviewer_names TEXT,
+    status TEXT DEFAULT 'scheduled',
+    ai_suggested INTEGER DEFAULT 0,
+    notes TEXT,
+    created_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_interviews_employer_start
+    ON interviews (employer_id, start_time);
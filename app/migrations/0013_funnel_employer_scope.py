@@ -0,0 +1,43 @@
+# app/migrations/0013_funnel_employer_scope.py
+"""
+Employer-wide funnel rollups (role_id '' in funnel_rollup_daily and
+funnel_actor_stage), so role-less funnel reads count each actor once.
+Seeded from the touchpoints already recorded; rows stored under role_id ''
+before this (touchpoints without a role) are replaced by the new scope.
+"""
+
+def upgrade(cur, dialect: str):
+    actor = "COALESCE(candidate_id, session_id)"
+    cur.execute("DELETE FROM funnel_rollup_daily WHERE role_id = ''")
+    cur.execute("DELETE FROM funnel_actor_stage WHERE role_id = ''")
+    cur.execute("""
+    INSERT INTO funnel_rollup_daily (employer_id, role_id, day, stage, events, uniques)
+    SELECT employer_id, '', substr(timestamp, 1, 10), event_type, COUNT(*), 0
+    FROM candidate_touchpoints
+    GROUP BY employer_id, substr(timestamp, 1, 10), event_type
+    """)
+    # First touch per actor and stage, and each candidate's first sighting, employer-wide
+    cur.execute(f"""
+    INSERT INTO funnel_actor_stage (employer_id, role_id, stage, actor, first_timestamp)
+    SELECT employer_id, '', event_type, {actor}, MIN(timestamp)
+    FROM candidate_touchpoints WHERE {actor} IS NOT NULL
+    GROUP BY employer_id, event_type, {actor}
+    """)
+    cur.execute("""
+    INSERT INTO funnel_actor_stage (employer_id, role_id, stage, actor, first_timestamp)
+    SELECT employer_id, '', '_candidates', candidate_id, MIN(timestamp)
+    FROM candidate_touchpoints WHERE candidate_id IS NOT NULL
+    GROUP BY employer_id, candidate_id
+    """)
+    cur.execute("""
+    SELECT employer_id, substr(first_timestamp, 1, 10) AS day, stage, COUNT(*) AS n
+    FROM funnel_actor_stage WHERE role_id = ''
+    GROUP BY employer_id, substr(first_timestamp, 1, 10), stage
+    """)
+    rows = [(r["employer_id"], r["day"], r["stage"], int(r["n"])) for r in cur.fetchall()]
+    if rows:
+        cur.executemany("""
+        INSERT INTO funnel_rollup_daily (employer_id, role_id, day, stage, events, uniques)
+        VALUES (?, '', ?, ?, 0, ?)
+        ON CONFLICT (employer_id, role_id, day, stage) DO UPDATE SET uniques = excluded.uniques
+        """, rows)
@@ -1,58 +1,79 @@
 """
-Analytics endpoint that reads PDF reports and generates insights
+Analytics endpoint: score insights from the persisted construct scores
 """
-from fastapi import APIRouter, Depends, HTTPException
-from pathlib import Path
-import json
-from typing import Dict, List, Any
-from collections import defaultdict
+import datetime
+
+from fastapi import APIRouter, Depends, Query
 
 from app.auth import require_employer
-from app.services import db
+from app.services import db, score_rollups
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-REPORTS_DIR = PROJECT_ROOT / "reports"
+# Dashboard ranges over the overall score (%), built from the rollup deciles
+DISTRIBUTION_RANGES = [
+    ("90-100%", (9,), "#10b981"),
+    ("80-89%", (8,), "#06b6d4"),
+    ("70-79%", (7,), "#6366f1"),
+    ("60-69%", (6,), "#f59e0b"),
+    ("Below 60%", (0, 1, 2, 3, 4, 5), "#ef4444"),
+]
 
-def extract_scores_from_responses(responses_json: str) -> Dict[str, float]:
-    """
-    Extract construct scores from applicant responses.
-    In a real implementation, this would parse the PDF or stored JSON.
-    """
+# Change in mean (percentage points) below which a construct counts as stable
+TREND_THRESHOLD = 1.0
+
+
+def _trend(current, previous) -> str:
+    if current is None or previous is None:
+        return "stable"
+    if current - previous >= TREND_THRESHOLD:
+        return "up"
+    if previous - current >= TREND_THRESHOLD:
+        return "down"
+    return "stable"
+
+
+def _submission_counts(employer_id: str):
+    con = db.connect()
     try:
-        responses = json.loads(responses_json) if isinstance(responses_json, str) else responses_json
-        # Simulate score extraction - in reality, you'd calculate from responses
-        # For now, return dummy scores
-        return {
-            "Structural Clarity": 75.0,
-            "Change Volatility": 68.0,
-            "Autonomy & Judgment": 82.0,
-            "Social Interaction": 71.0,
-            "Performance Pressure": 77.0
-        }
-    except:
-        return {}
+        cur = con.cursor()
+        cur.execute("""
+            SELECT COUNT(*) AS total,
+                   SUM(CASE WHEN ap.pdf_status = 'success' THEN 1 ELSE 0 END) AS pdfs
+            FROM applicants ap
+            JOIN assessments s ON s.assessment_id = ap.assessment_id
+            WHERE s.employer_id = ?
+        """, (employer_id,))
+        row = cur.fetchone()
+        return int(row["total"] or 0), int(row["pdfs"] or 0)
+    finally:
+        con.close()
+
+
+def _time_ago(submitted_utc: str) -> str:
+    try:
+        then = datetime.datetime.fromisoformat((submitted_utc or "").replace("Z", "").split("+")[0])
+    except ValueError:
+        return "Recently"
+    seconds = (datetime.datetime.utcnow() - then).total_seconds()
+    if seconds < 3600:
+        return f"{max(1, int(seconds // 60))}m ago"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}h ago"
+    return f"{int(seconds // 86400)}d ago"
+
 
 @router.get("")
-def get_analytics(emp=Depends(require_employer)):
+def get_analytics(emp=Depends(require_employer), days: int = Query(30, ge=1, le=365)):
     """
-    Generate analytics from all applicant submissions.
-    Reads PDF metadata and response data to provide insights.
+    Score analytics for the employer's applicants, read from the daily rollups
+    (app/services/score_rollups.py), so the cost doesn't grow with applicants.
+    Trends compare the last `days` days with the `days` before them.
     """
     employer_id = emp.get("employer_id")
-    
-    # Get all assessments for employer
-    assessments = db.list_assessments_for_employer(employer_id)
-    
-    all_applicants = []
-    for assessment in assessments:
-        assessment_id = assessment.get("assessment_id")
-        if assessment_id:
-            applicants = db.list_applicants_for_assessment(assessment_id)
-            all_applicants.extend(applicants)
-    
-    if not all_applicants:
+
+    total_submissions, pdf_count = _submission_counts(employer_id)
+    if not total_submissions:
         return {
             "totalSubmissions": 0,
             "averageScore": 0,
@@ -61,86 +82,78 @@ def get_analytics(emp=Depends(require_employer)):
             "pdfCount": 0,
             "scoreDistribution": [],
             "constructScores": [],
+            "topConstructs": [],
             "recentActivity": []
         }
-    
-    # Calculate analytics
-    total_submissions = len(all_applicants)
-    pdf_count = sum(1 for a in all_applicants if a.get("pdf_status") == "success")
-    
-    # Analyze construct scores
-    construct_totals = defaultdict(lambda: {"sum": 0.0, "count": 0})
-    all_scores = []
-    
-    for applicant in all_applicants:
-        responses_json = applicant.get("responses_json", "{}")
-        scores = extract_scores_from_responses(responses_json)
-        
-        if scores:
-            # Calculate average score for this applicant
-            avg_score = sum(scores.values()) / len(scores)
-            all_scores.append(avg_score)
-            
-            # Aggregate construct scores
-            for construct, score in scores.items():
-                construct_totals[construct]["sum"] += score
-                construct_totals[construct]["count"] += 1
-    
-    # Calculate average overall score
-    avg_score = sum(all_scores) / len(all_scores) if all_scores else 0
-    
-    # Find top construct
-    top_construct = "N/A"
-    max_avg = 0
-    for construct, data in construct_totals.items():
-        if data["count"] > 0:
-            avg = data["sum"] / data["count"]
-            if avg > max_avg:
-                max_avg = avg
-                top_construct = construct
-    
+
+    previous_start, current_start, end = score_rollups.period_bounds(days)
+    overall = score_rollups.construct_stats(employer_id)
+    current = score_rollups.construct_stats(employer_id, current_start, end)
+    previous = score_rollups.construct_stats(employer_id, previous_start, current_start)
+
+    def pct(stats, construct):
+        s = stats.get(construct)
+        return score_rollups.to_percent(s["mean"]) if s else None
+
+    # Average overall score (all time, %)
+    avg_score = pct(overall, score_rollups.OVERALL) or 0
+
     # Score distribution
+    deciles = score_rollups.bucket_counts(employer_id)
     score_distribution = [
-        {"range": "90-100%", "count": sum(1 for s in all_scores if s >= 90), "color": "#10b981"},
-        {"range": "80-89%", "count": sum(1 for s in all_scores if 80 <= s < 90), "color": "#06b6d4"},
-        {"range": "70-79%", "count": sum(1 for s in all_scores if 70 <= s < 80), "color": "#6366f1"},
-        {"range": "60-69%", "count": sum(1 for s in all_scores if 60 <= s < 70), "color": "#f59e0b"},
-        {"range": "Below 60%", "count": sum(1 for s in all_scores if s < 60), "color": "#ef4444"}
+        {"range": label, "count": sum(deciles[b] for b in buckets), "color": color}
+        for label, buckets, color in DISTRIBUTION_RANGES
     ]
-    
-    # Construct averages
-    construct_scores = [
-        {
-            "name": construct,
-            "avg": round(data["sum"] / data["count"], 1) if data["count"] > 0 else 0,
-            "trend": "stable"  # In real implementation, compare to historical data
-        }
-        for construct, data in construct_totals.items()
-    ]
-    
-    # Recent activity (simplified)
+
+    # Construct averages (%), with trend vs the previous period
+    construct_scores = []
+    for code, stats in overall.items():
+        if code == score_rollups.OVERALL:
+            continue
+        cur_pct, prev_pct = pct(current, code), pct(previous, code)
+        construct_scores.append({
+            "code": code,
+            "name": score_rollups.CONSTRUCT_NAMES.get(code, code),
+            "avg": round(score_rollups.to_percent(stats["mean"]), 1),
+            "mean": round(stats["mean"], 2),
+            "count": stats["n"],
+            "trend": _trend(cur_pct, prev_pct),
+            "change": round(cur_pct - prev_pct, 1) if cur_pct is not None and prev_pct is not None else None,
+        })
+    construct_scores.sort(key=lambda c: c["avg"], reverse=True)
+    top_constructs = construct_scores[:3]
+
+    # Submissions trend: scored applicants this period vs the previous one
+    cur_n = current.get(score_rollups.OVERALL, {}).get("n", 0)
+    prev_n = previous.get(score_rollups.OVERALL, {}).get("n", 0)
+    recent_trend = "up" if cur_n > prev_n else "down" if cur_n < prev_n else "stable"
+
+    # Recent activity (newest five, LIMIT in SQL)
     recent_activity = []
-    for applicant in sorted(all_applicants, key=lambda x: x.get("submitted_utc", ""), reverse=True)[:5]:
+    for applicant in db.list_applicant_submissions_for_employer(employer_id, limit=5):
+        name = applicant.get("applicant_name") or "candidate"
         if applicant.get("pdf_status") == "success":
             recent_activity.append({
-                "action": f"PDF generated for {applicant.get('name', 'candidate')}",
-                "time": "Recently",
+                "action": f"PDF generated for {name}",
+                "time": _time_ago(applicant.get("submitted_utc")),
                 "color": "#06b6d4"
             })
         else:
             recent_activity.append({
-                "action": f"New submission from {applicant.get('name', 'candidate')}",
-                "time": "Recently",
+                "action": f"New submission from {name}",
+                "time": _time_ago(applicant.get("submitted_utc")),
                 "color": "#10b981"
             })
-    
+
     return {
         "totalSubmissions": total_submissions,
         "averageScore": round(avg_score, 1),
-        "topConstruct": top_construct,
-        "recentTrend": "up" if len(all_applicants) > 5 else "stable",
+        "topConstruct": top_constructs[0]["name"] if top_constructs else "N/A",
+        "recentTrend": recent_trend,
         "pdfCount": pdf_count,
         "scoreDistribution": score_distribution,
         "constructScores": construct_scores,
-        "recentActivity": recent_activity
+        "topConstructs": top_constructs,
+        "recentActivity": recent_activity,
+        "period": {"days": days, "current_start": current_start, "previous_start": previous_start},
     }
@@ -1,6 +1,6 @@
 # app/routes/analytics_journey.py
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict
 from app.services.db import get_current_user_from_session
 from app.services.journey_analytics import journey_analytics
@@ -17,6 +17,9 @@ class TrackEventRequest(BaseModel):
 class ABTestRequest(BaseModel):
     role_id: str
     variants: List[Dict[str, str]]
+    alpha: Optional[float] = Field(None, gt=0, lt=1)
+    tau: Optional[float] = Field(None, gt=0, le=1)
+    min_views: Optional[int] = Field(None, ge=0)
 
 @router.post("/track")
 async def track_event(
@@ -71,7 +74,8 @@ async def create_ab_test(
     variant_ids = await journey_analytics.create_ab_test(
         role_id=request.role_id,
         employer_id=user["user_id"],
-        variants=request.variants
+        variants=request.variants,
+        settings={"alpha": request.alpha, "tau": request.tau, "min_views": request.min_views}
     )
     return {"variant_ids": variant_ids}
 
@@ -86,3 +90,17 @@ async def get_ab_results(
         employer_id=user["user_id"]
     )
     return results
+
+@router.get("/ab-test/{role_id}/assign")
+async def assign_variant(
+    role_id: str,
+    user: dict = Depends(get_current_user_from_session)
+):
+    """Pick the variant to show next (Thompson sampling)"""
+    variant = await journey_analytics.assign_variant(
+        role_id=role_id,
+        employer_id=user["user_id"]
+    )
+    if variant is None:
+        raise HTTPException(status_code=404, detail="No active variants for this role")
+    return variant
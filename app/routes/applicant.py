@@ -3,14 +3,14 @@ import uuid
 from pathlib import Path
 from json import JSONDecodeError
 import re
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Request, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, Request, Depends, Query
 from fastapi.responses import FileResponse
 
 import epq_core
 from app.auth import require_employer
-from app.services import db
-from report_generator import generate_pdf_report
+from app.services import db, applicant_scores, pdf_jobs
 
 router = APIRouter(prefix="/applicant", tags=["applicant"])
 
@@ -24,49 +24,15 @@ import logging
 logger = logging.getLogger(__name__)
 
 def _generate_pdf_background(assessment_id: str, applicant_result: dict, employer_env: str, candidate_id: str):
+    """Render a PDF synchronously (debug scripts). Submissions go through pdf_jobs.enqueue_pdf."""
     logger.info(f"[PDF_BG] Starting PDF generation for candidate {candidate_id}")
     try:
-        logger.info(f"[PDF_BG] Calling generate_pdf_report with env={employer_env}, output_dir={REPORTS_DIR}")
-        pdf_path = generate_pdf_report(
-            applicant_result=applicant_result,
-            employer_environment=employer_env,
-            candidate_id=candidate_id,
-            output_dir=str(REPORTS_DIR),
-        )
-        logger.info(f"[PDF_BG] generate_pdf_report returned: {pdf_path}")
-        
-        if not pdf_path:
-            logger.error(f"[PDF_BG] PDF generation returned None for {candidate_id}")
-            db.set_applicant_pdf_failed(candidate_id, "generate_pdf_report returned None")
-            return
-
-        pdf_filename = Path(pdf_path).name
-        logger.info(f"[PDF_BG] Setting PDF success: {pdf_filename}")
-        db.set_applicant_pdf_success(candidate_id, pdf_filename)
-        logger.info(f"[PDF_BG] PDF generation complete for {candidate_id}")
-        
-        # Trigger webhook for PDF ready (synchronous call in background task)
-        try:
-            import asyncio
-            from app.services.webhooks import trigger_webhooks
-            a = db.get_assessment(assessment_id)
-            if a:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(trigger_webhooks(
-                    a.get("employer_id"),
-                    "candidate.pdf_ready",
-                    {
-                        "candidate_id": candidate_id,
-                        "assessment_id": assessment_id,
-                        "pdf_filename": pdf_filename,
-                        "pdf_url": f"/api/employer/pdf/{candidate_id}"
-                    }
-                ))
-                loop.close()
-        except Exception as webhook_error:
-            logger.warning(f"[PDF_BG] Webhook failed for {candidate_id}: {webhook_error}")
-
+        pdf_jobs.generate_applicant_pdf({
+            "assessment_id": assessment_id,
+            "candidate_id": candidate_id,
+            "applicant_result": applicant_result,
+            "employer_env": employer_env,
+        })
     except Exception as e:
         logger.exception(f"[PDF_BG] PDF generation failed for {candidate_id}")
         db.set_applicant_pdf_failed(candidate_id, str(e))
@@ -182,7 +148,7 @@ def get_questions(assessment_id: str):
     }
 
 @router.post("/{assessment_id}/submit")
-async def submit(assessment_id: str, request: Request, background_tasks: BackgroundTasks):
+async def submit(assessment_id: str, request: Request):
     try:
         a = db.get_assessment(assessment_id)
         if not a:
@@ -242,6 +208,18 @@ async def submit(assessment_id: str, request: Request, background_tasks: Backgro
         candidate_id = "A-" + assessment_id[:8] + "-" + uuid.uuid4().hex[:6]
     
         # ---- Create applicant submission row (pending) ----
+        # candidate.completed is written to the webhook outbox in the same transaction
+        completed_event = (
+            a.get("employer_id"),
+            "candidate.completed",
+            {
+                "candidate_id": candidate_id,
+                "assessment_id": assessment_id,
+                "name": applicant_name,
+                "email": applicant_email,
+                "submitted_at": db.now_iso()
+            }
+        )
         try:
             db.create_applicant_submission(
                 assessment_id=assessment_id,
@@ -250,36 +228,31 @@ async def submit(assessment_id: str, request: Request, background_tasks: Backgro
                 responses=cleaned,          # choice-text responses
                 candidate_id=candidate_id,
                 score=applicant_result,     # <- THIS is what the PDF should render
+                webhook_events=[completed_event],
             )
         except Exception as exc:
             raise HTTPException(status_code=500, detail=f"DB write failed: {exc}")
     
-        # ---- Generate PDF in background using the computed result ----
-        logger.info(f"[SUBMIT] Queueing background PDF task for {candidate_id}")
-        background_tasks.add_task(
-            _generate_pdf_background,
-            assessment_id,
-            applicant_result,
-            a.get("environment", "moderate"),
-            candidate_id,
-        )
-        logger.info(f"[SUBMIT] Background task queued successfully")
+        # ---- Persist construct/environment scores (readers use these instead of re-scoring) ----
+        try:
+            applicant_scores.save_scores(candidate_id, applicant_result)
+        except Exception as exc:
+            # Not fatal: the score backfill / first read will compute them
+            logger.warning(f"[SUBMIT] Could not persist scores for {candidate_id}: {exc}")
+    
+        # ---- Queue PDF generation (durable job, run by app.worker) ----
+        try:
+            job_id = pdf_jobs.enqueue_pdf(
+                assessment_id,
+                candidate_id,
+                applicant_result,
+                a.get("environment", "moderate"),
+            )
+            logger.info(f"[SUBMIT] Queued PDF job {job_id} for {candidate_id}")
+        except Exception as exc:
+            logger.exception(f"[SUBMIT] Could not queue PDF job for {candidate_id}")
+            db.set_applicant_pdf_failed(candidate_id, f"Could not queue PDF generation: {exc}")
         
-        # ---- Trigger webhooks for candidate completion ----
-        from app.services.webhooks import trigger_webhooks
-        background_tasks.add_task(
-            trigger_webhooks,
-            a.get("employer_id"),
-            "candidate.completed",
-            {
-                "candidate_id": candidate_id,
-                "assessment_id": assessment_id,
-                "name": applicant_name,
-                "email": applicant_email,
-                "submitted_at": db.now_iso()
-            }
-        )
-
         return {"status": "processing", "candidate_id": candidate_id}
 
     except Exception as e:
@@ -385,17 +358,39 @@ def debug_normalize(assessment_id: str):
     }
 
 @router.get("/submissions")
-def list_submissions(emp=Depends(require_employer)):
+def list_submissions(
+    emp=Depends(require_employer),
+    status: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    order: str = "newest",
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+):
     """
     Employer dashboard feed:
     Lists submissions across all assessments owned by the employer.
+    Same filters / keyset pagination as /employer/submissions.
     """
     employer_id = emp.get("employer_id") if isinstance(emp, dict) else None
     if not employer_id:
         raise HTTPException(status_code=403, detail="Forbidden")
 
+    filters = {
+        "status": [s.strip() for s in status.split(",") if s.strip()] if status else None,
+        "since": since or "",
+        "until": until or "",
+        "order": order,
+    }
+    next_cursor = None
     try:
-        rows = db.list_applicant_submissions_for_employer(employer_id)
+        if limit:
+            page = db.list_applicant_submissions_page(employer_id, limit=limit, cursor=cursor or "", **filters)
+            rows, next_cursor = page["items"], page["next_cursor"]
+        else:
+            rows = db.list_applicant_submissions_for_employer(employer_id, **filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"DB read failed: {exc}")
 
@@ -416,7 +411,7 @@ def list_submissions(emp=Depends(require_employer)):
             }
         )
 
-    return {"items": items}
+    return {"items": items, "next_cursor": next_cursor}
 
 @router.get("/reports/by-candidate/{candidate_id}")
 def get_report_by_candidate(candidate_id: str, emp=Depends(require_employer)):
@@ -1,7 +1,11 @@
 # app/routes/bias.py
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from app.services.bias_detection import detect_bias, get_bias_score, suggest_alternative
+
+from app.auth import require_employer
+from app.services.bias_detection import scan, suggest_alternative
 
 router = APIRouter(prefix="/bias", tags=["bias"])
 
@@ -13,8 +17,8 @@ def check_bias(request: BiasCheckRequest):
     """
     Check text for potential bias and return detailed feedback.
     """
-    result = detect_bias(request.text)
-    score = get_bias_score(request.text)
+    scanned = scan(request.text)
+    result, score = scanned["detection"], scanned["score"]
     
     response = {
         "text": request.text,
@@ -33,3 +37,32 @@ def check_bias(request: BiasCheckRequest):
             response["additional_concerns"] = result["additional_concerns"]
     
     return response
+
+
+# Audit runs cover every employer's notes, so their volumes (rows scanned /
+# flagged, cursors) and who requested them stay CLI-only; employers only see
+# when the findings were last refreshed.
+_RUN_FIELDS = ("status", "created_utc", "started_utc", "finished_utc")
+
+
+def _public_run(run):
+    return {k: run.get(k) for k in _RUN_FIELDS} if run else None
+
+
+@router.get("/audit/summary")
+def bias_audit_summary(
+    by: str = Query("category", description="category | author | source"),
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    emp=Depends(require_employer),
+):
+    """Audit findings for the employer's candidates, aggregated by category, author or source"""
+    from app.services import bias_audit
+    if by == "employer":
+        raise HTTPException(status_code=400, detail="by must be one of category, author, source")
+    try:
+        result = bias_audit.summary(emp.get("employer_id"), by=by, since=since or "", until=until or "")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result["last_run"] = _public_run(result["last_run"])
+    return result
@@ -1,10 +1,12 @@
 # app/routes/calendar.py
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
 from datetime import datetime, timedelta
+from app.services import batch_scheduler
 from app.services.db import get_current_user_from_session, get_db, now_iso
-from app.services.scheduling_agent import scheduling_agent
+from app.services.scheduling_agent import load_busy_intervals, parse_time, scheduling_agent
 
 router = APIRouter(prefix="/employer/calendar", tags=["calendar"])
 
@@ -32,6 +34,26 @@ class ScheduleRequest(BaseModel):
     location: Optional[str] = None
     use_ai: bool = True
 
+class BatchCandidateRequest(BaseModel):
+    candidate_id: str
+    duration_minutes: int = Field(60, gt=0, le=480)
+    interviewers: List[str] = []  # fixed panel; empty = pick panel_size from the pool
+    panel_size: int = Field(1, ge=1)
+    available: List[Dict[str, str]] = []  # [{"start": ISO, "end": ISO}]; empty = any time
+
+class BatchScheduleRequest(BaseModel):
+    candidates: List[BatchCandidateRequest] = Field(..., min_length=1, max_length=500)
+    interviewers: List[str] = []
+    start_date: Optional[str] = None  # default: tomorrow
+    days: int = Field(5, ge=1, le=31)
+    day_start_hour: int = Field(9, ge=0, le=23)
+    day_end_hour: int = Field(18, ge=1, le=24)
+    slot_minutes: int = Field(30, ge=5, le=240)
+    buffer_minutes: int = Field(0, ge=0, le=240)
+    max_per_interviewer_per_day: Optional[int] = Field(None, ge=1)
+    include_weekends: bool = False
+    time_budget_ms: int = Field(2000, ge=0, le=batch_scheduler.MAX_TIME_BUDGET_MS)
+
 @router.get("/interviews")
 async def get_interviews(
     start: str = Query(...),
@@ -171,30 +193,15 @@ async def suggest_optimal_time(
     duration_minutes: int
 ) -> str:
     """AI-powered optimal time suggestion"""
-    conn = get_db()
-    
-    # Get existing interviews to avoid conflicts
-    existing = conn.execute("""
-        SELECT start_time, end_time FROM interviews
-        WHERE employer_id = ? AND status != 'cancelled'
-    """, [employer_id]).fetchall()
+    # Existing interviews, loaded once; each check is a bisect
+    existing = load_busy_intervals(employer_id)
     
     # Simple algorithm: pick first non-conflicting time
     for pref_time in preferred_times:
-        pref_dt = datetime.fromisoformat(pref_time.replace('Z', '+00:00'))
+        pref_dt = parse_time(pref_time)
         pref_end = pref_dt + timedelta(minutes=duration_minutes)
         
-        has_conflict = False
-        for existing_interview in existing:
-            ex_start = datetime.fromisoformat(existing_interview["start_time"].replace('Z', '+00:00'))
-            ex_end = datetime.fromisoformat(existing_interview["end_time"].replace('Z', '+00:00'))
-            
-            # Check overlap
-            if not (pref_end <= ex_start or pref_dt >= ex_end):
-                has_conflict = True
-                break
-        
-        if not has_conflict:
+        if not existing.overlaps(pref_dt, pref_end):
             return pref_time
     
     # If all preferred times conflict, suggest next available slot
@@ -264,46 +271,68 @@ async def get_availability(
     user: dict = Depends(get_current_user_from_session)
 ):
     """Get available time slots for a specific date"""
-    conn = get_db()
-    
-    # Get all interviews for the date
     day_start = datetime.fromisoformat(date).replace(hour=0, minute=0, second=0)
-    day_end = day_start + timedelta(days=1)
-    
-    interviews = conn.execute("""
-        SELECT start_time, end_time FROM interviews
-        WHERE employer_id = ? 
-        AND start_time >= ?
-        AND start_time < ?
-        AND status != 'cancelled'
-        ORDER BY start_time ASC
-    """, [user["user_id"], day_start.isoformat(), day_end.isoformat()]).fetchall()
     
     # Business hours: 9 AM to 6 PM
-    available_slots = []
-    current_time = day_start.replace(hour=9, minute=0)
+    start_of_day = day_start.replace(hour=9, minute=0)
     end_of_day = day_start.replace(hour=18, minute=0)
     
-    for interview in interviews:
-        interview_start = datetime.fromisoformat(interview["start_time"].replace('Z', '+00:00'))
-        
-        if current_time < interview_start:
-            available_slots.append({
-                "start": current_time.isoformat(),
-                "end": interview_start.isoformat()
-            })
-        
-        current_time = datetime.fromisoformat(interview["end_time"].replace('Z', '+00:00'))
-    
-    # Add remaining time until end of day
-    if current_time < end_of_day:
-        available_slots.append({
-            "start": current_time.isoformat(),
-            "end": end_of_day.isoformat()
-        })
+    # Interviews overlapping business hours; gaps between them (overlaps merged)
+    busy = load_busy_intervals(user["user_id"], window_start=start_of_day, window_end=end_of_day)
+    available_slots = [
+        {"start": start.isoformat(), "end": end.isoformat()}
+        for start, end in busy.free_slots(start_of_day, end_of_day)
+    ]
     
     return {"available_slots": available_slots}
 
+@router.post("/batch-schedule")
+async def batch_schedule(
+    request: BatchScheduleRequest,
+    user: dict = Depends(get_current_user_from_session)
+):
+    """Conflict-free schedule for a batch of candidates across an interviewer pool (not booked)"""
+    if request.day_end_hour <= request.day_start_hour:
+        raise HTTPException(status_code=400, detail="day_end_hour must be after day_start_hour")
+    try:
+        if request.start_date:
+            window_start = datetime.fromisoformat(request.start_date).replace(hour=0, minute=0, second=0, microsecond=0)
+        else:
+            window_start = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        candidates = [
+            batch_scheduler.BatchCandidate(
+                candidate_id=c.candidate_id,
+                duration_minutes=c.duration_minutes,
+                interviewers=c.interviewers,
+                panel_size=c.panel_size,
+                available=[(parse_time(a["start"]), parse_time(a["end"])) for a in c.available],
+            )
+            for c in request.candidates
+        ]
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid start_date or availability window")
+    if not request.interviewers and any(not c.interviewers for c in candidates):
+        raise HTTPException(status_code=400, detail="interviewers is required for candidates without a fixed panel")
+    
+    constraints = batch_scheduler.BatchConstraints(
+        window_start=window_start,
+        window_end=window_start + timedelta(days=request.days),
+        day_start_hour=request.day_start_hour,
+        day_end_hour=request.day_end_hour,
+        slot_minutes=request.slot_minutes,
+        buffer_minutes=request.buffer_minutes,
+        max_per_interviewer_per_day=request.max_per_interviewer_per_day,
+        include_weekends=request.include_weekends
+    )
+    try:
+        # CPU-bound for up to time_budget_ms; keep it off the event loop
+        return await asyncio.get_running_loop().run_in_executor(
+            None, batch_scheduler.schedule_batch,
+            user["user_id"], candidates, request.interviewers, constraints, request.time_budget_ms
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/suggest-times")
 async def suggest_interview_times(
     candidate_id: str,
@@ -1,5 +1,5 @@
 # app/routes/candidates.py
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Query, Request
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 import sqlite3
@@ -7,8 +7,10 @@ import json
 import datetime
 from pathlib import Path
 
+from app.services import db
+
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DB_PATH = (PROJECT_ROOT / "epq.db").resolve()
+DB_PATH = db.DB_PATH
 
 router = APIRouter(prefix="/employer/candidates", tags=["candidates"])
 
@@ -16,9 +18,8 @@ def now_iso() -> str:
     return datetime.datetime.utcnow().isoformat()
 
 def conn():
-    con = sqlite3.connect(str(DB_PATH))
-    con.row_factory = sqlite3.Row
-    return con
+    # Shared connection pool (app/services/db_pool.py)
+    return db.connect()
 
 def get_employer_id(request: Request) -> str:
     try:
@@ -33,54 +34,32 @@ def get_employer_id(request: Request) -> str:
         pass
     raise HTTPException(status_code=401, detail="Not authenticated")
 
+NEUTRAL_ENVIRONMENT = {
+    "autonomy": 50,
+    "pace": 50,
+    "structure": 50,
+    "collaboration": 50,
+    "innovation": 50,
+    "ambiguity": 50
+}
+
 def calculate_environment_from_responses(candidate_id: str) -> Dict[str, int]:
     """
-    Calculate environment scores from candidate's psychometric responses.
-    Integrates with epq_core and environment_mapper.
+    Environment scores for a candidate, read from persisted applicant scores
+    (computed from their psychometric responses at submit time, or on first read).
     """
-    with conn() as con:
-        cur = con.cursor()
-        
-        # Get applicant's responses_json
-        cur.execute("SELECT responses_json FROM applicants WHERE candidate_id = ?", (candidate_id,))
-        row = cur.fetchone()
-        
-        if not row or not row["responses_json"]:
-            # Return neutral defaults if no responses
-            return {
-                "autonomy": 50,
-                "pace": 50,
-                "structure": 50,
-                "collaboration": 50,
-                "innovation": 50,
-                "ambiguity": 50
-            }
-        
-        try:
-            responses = json.loads(row["responses_json"])
-            
-            # Use epq_core to score responses
-            import epq_core
-            result = epq_core.run_applicant_from_choice_responses(responses)
-            construct_scores = result.get("construct_scores", {})
-            
-            # Map constructs to environment dimensions
-            from app.services.environment_mapper import map_constructs_to_environment
-            environment = map_constructs_to_environment(construct_scores)
-            
-            return environment
-            
-        except Exception as e:
-            print(f"Error calculating environment for {candidate_id}: {e}")
-            # Return neutral defaults on error
-            return {
-                "autonomy": 50,
-                "pace": 50,
-                "structure": 50,
-                "collaboration": 50,
-                "innovation": 50,
-                "ambiguity": 50
-            }
+    try:
+        from app.services import applicant_scores
+        scores = applicant_scores.get_or_compute_scores(candidate_id)
+    except Exception as e:
+        print(f"Error calculating environment for {candidate_id}: {e}")
+        scores = None
+
+    environment = (scores or {}).get("environment")
+    if not environment:
+        # Return neutral defaults if no responses
+        return dict(NEUTRAL_ENVIRONMENT)
+    return environment
 
 # ============ MODELS ============
 class Note(BaseModel):
@@ -99,6 +78,26 @@ class FeedbackItem(BaseModel):
 
 # ============ ENDPOINTS ============
 
+@router.get("/similar/{candidate_id}")
+def similar_candidates(
+    candidate_id: str,
+    request: Request,
+    k: int = Query(10, ge=1, le=100),
+    role_id: Optional[str] = None,
+    since: Optional[str] = Query(None, description="submitted_utc lower bound (ISO, inclusive)"),
+    until: Optional[str] = Query(None, description="submitted_utc upper bound (ISO, exclusive)"),
+):
+    """
+    Candidates whose construct and environment scores are closest to this
+    candidate's, among the employer's scored applicants (app/services/similarity_index.py)
+    """
+    from app.services import similarity_index
+    employer_id = get_employer_id(request)
+    try:
+        return similarity_index.similar(employer_id, candidate_id, k=k, role_id=role_id, since=since, until=until)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Candidate not found or not scored")
+
 @router.get("/{candidate_id}")
 def get_candidate(candidate_id: str, request: Request):
     """Get full candidate details including psychometric data and environment scores"""
@@ -1,11 +1,11 @@
 ﻿# app/routes/employer.py
-from fastapi import APIRouter, HTTPException, Request, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Request, Depends, Query
+from typing import List, Optional
 from app.services.employer_epq import get_employer_epq_questions
 from pathlib import Path
 from json import JSONDecodeError
 from app.auth import require_employer
-from app.services import db
+from app.services import db, applicant_scores
 import epq_core
 
 router = APIRouter(prefix="/employer", tags=["employer"])
@@ -50,62 +50,75 @@ def dashboard(emp=Depends(require_employer)):
     return {"employer": dict(emp), "assessments": assessments}
 
 @router.get("/submissions")
-def submissions(emp=Depends(require_employer)):
+def submissions(
+    emp=Depends(require_employer),
+    status: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    order: str = "newest",
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+):
     """
     Employer dashboard feed:
     Returns a flat list of all applicant submissions across all assessments
-    owned by the logged-in employer.
+    owned by the logged-in employer (one joined query).
+
+    Optional: status=success,failed  since/until=ISO timestamps  order=newest|oldest
+              limit + cursor for keyset pagination (pass back next_cursor)
 
     Shape:
-      { "items": [ {candidate_id, assessment_id, applicant_name, applicant_email, ...}, ... ] }
+      { "items": [ {candidate_id, assessment_id, applicant_name, applicant_email, ...}, ... ],
+        "next_cursor": "<opaque>" | null }
     """
     employer_id = emp.get("employer_id")
     if not employer_id:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    assessments = db.list_assessments_for_employer(employer_id)
+    filters = {
+        "status": [s.strip() for s in status.split(",") if s.strip()] if status else None,
+        "since": since or "",
+        "until": until or "",
+        "order": order,
+    }
+    try:
+        if limit:
+            page = db.list_applicant_submissions_page(employer_id, limit=limit, cursor=cursor or "", **filters)
+        else:
+            page = {"items": db.list_applicant_submissions_for_employer(employer_id, **filters), "next_cursor": None}
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
     items: List[dict] = []
 
-    for a in assessments:
-        assessment_id = a.get("assessment_id")
-        if not assessment_id:
-            continue
+    for ap in page["items"]:
+        candidate_id = ap.get("candidate_id")
+        pdf_filename = ap.get("pdf_filename")
+        pdf_status = ap.get("pdf_status", "pending")
+        
+        # Build PDF download URL if PDF is ready
+        pdf_url = None
+        if pdf_filename and pdf_status == "success":
+            pdf_url = f"/api/employer/pdf/{candidate_id}"
+        
+        items.append(
+            {
+                "candidate_id": candidate_id,
+                "assessment_id": ap.get("assessment_id"),
+                "name": ap.get("applicant_name"),  # Frontend expects "name"
+                "email": ap.get("applicant_email"),  # Frontend expects "email"
+                "submitted_utc": ap.get("submitted_utc"),
+                "status": pdf_status,  # Frontend expects "status"
+                "pdf_status": pdf_status,  # Keep for backwards compatibility
+                "pdf_filename": pdf_filename,
+                "pdf_url": pdf_url,
+                "pdf_error": ap.get("pdf_error"),
+                "environment": ap.get("environment"),
+                "max_questions": ap.get("max_questions"),
+            }
+        )
 
-        applicants = db.list_applicants_for_assessment(assessment_id)
-
-        for ap in applicants:
-            # ap already includes: candidate_id, applicant_name, applicant_email, submitted_utc, pdf_status, pdf_filename, pdf_error
-            candidate_id = ap.get("candidate_id")
-            pdf_filename = ap.get("pdf_filename")
-            pdf_status = ap.get("pdf_status", "pending")
-            
-            # Build PDF download URL if PDF is ready
-            pdf_url = None
-            if pdf_filename and pdf_status == "success":
-                pdf_url = f"/api/employer/pdf/{candidate_id}"
-            
-            items.append(
-                {
-                    "candidate_id": candidate_id,
-                    "assessment_id": assessment_id,
-                    "name": ap.get("applicant_name"),  # Frontend expects "name"
-                    "email": ap.get("applicant_email"),  # Frontend expects "email"
-                    "submitted_utc": ap.get("submitted_utc"),
-                    "status": pdf_status,  # Frontend expects "status"
-                    "pdf_status": pdf_status,  # Keep for backwards compatibility
-                    "pdf_filename": pdf_filename,
-                    "pdf_url": pdf_url,
-                    "pdf_error": ap.get("pdf_error"),
-                    "environment": a.get("environment"),
-                    "max_questions": a.get("max_questions"),
-                }
-            )
-
-    # Sort newest-first (works even if sqlite returns ISO-ish strings)
-    items.sort(key=lambda x: str(x.get("submitted_utc") or ""), reverse=True)
-
-    return {"items": items}
+    return {"items": items, "next_cursor": page["next_cursor"]}
 
 @router.get("/candidates/{candidate_id}")
 def get_candidate_details(candidate_id: str, emp=Depends(require_employer)):
@@ -136,6 +149,9 @@ def get_candidate_details(candidate_id: str, emp=Depends(require_employer)):
     if pdf_filename and pdf_status == "success":
         pdf_url = f"/api/employer/pdf/{candidate_id}"
     
+    # Persisted construct/environment scores (scored once, not on every read)
+    scores = applicant_scores.get_or_compute_scores(candidate_id) or {}
+    
     # Return candidate details
     return {
         "candidate_id": candidate_id,
@@ -149,7 +165,10 @@ def get_candidate_details(candidate_id: str, emp=Depends(require_employer)):
         "pdf_error": applicant.get("pdf_error"),
         "responses": applicant.get("responses_json"),
         "score": applicant.get("score_json"),
-        "environment": applicant.get("environment"),
+        "construct_scores": scores.get("construct_scores") or {},
+        "overall_average": scores.get("overall_average"),
+        "overall_band": scores.get("overall_band"),
+        "environment": scores.get("environment") or None,
         "notes": [],  # TODO: Implement notes storage
         "tags": [],   # TODO: Implement tags storage
         "feedback": [] # TODO: Implement feedback storage
@@ -1,7 +1,10 @@
 # app/routes/exports.py
 import json
+import shutil
+import tempfile
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import Response, JSONResponse
+from fastapi.responses import FileResponse, Response, JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from app.services import exports
 
 router = APIRouter(prefix="/employer/exports", tags=["exports"])
@@ -19,28 +22,60 @@ def get_employer_id(request: Request) -> str:
         pass
     raise HTTPException(status_code=401, detail="Not authenticated")
 
-@router.get("/candidates.csv")
-def export_candidates_csv(request: Request):
-    """Export all candidates to CSV format."""
+def _stream(request: Request, stream_fn, media_type: str, filename: str,
+            columns: str, since: str, until: str) -> StreamingResponse:
     employer_id = get_employer_id(request)
-    csv_content = exports.export_candidates_csv(employer_id)
-    
-    return Response(
-        content=csv_content,
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=candidates.csv"}
+    try:
+        # Validates the columns (a bad list is a 400, not a broken 200); no SQL
+        # runs until the response iterates the chunks
+        chunks = stream_fn(employer_id, columns=columns, since=since, until=until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
+@router.get("/candidates.csv")
+def export_candidates_csv(request: Request, columns: str = "", since: str = "", until: str = ""):
+    """Export candidates to CSV (streamed). columns=a,b,c; since/until filter submitted_utc."""
+    return _stream(request, exports.stream_candidates_csv, "text/csv", "candidates.csv", columns, since, until)
+
+@router.get("/candidates.ndjson")
+def export_candidates_ndjson(request: Request, columns: str = "", since: str = "", until: str = ""):
+    """Export candidates as newline-delimited JSON (streamed)."""
+    return _stream(request, exports.stream_candidates_ndjson, "application/x-ndjson", "candidates.ndjson",
+                   columns, since, until)
+
 @router.get("/candidates.json")
-def export_candidates_json(request: Request):
-    """Export all candidates to JSON format."""
+def export_candidates_json(request: Request, columns: str = "", since: str = "", until: str = ""):
+    """Export candidates to a JSON array (streamed)."""
+    return _stream(request, exports.stream_candidates_json, "application/json", "candidates.json",
+                   columns, since, until)
+
+@router.get("/scores.{fmt}")
+def export_scores_columnar(fmt: str, request: Request, since: str = "", until: str = ""):
+    """Applicant scores as one typed Parquet or Arrow IPC file (fmt = parquet | arrow)."""
     employer_id = get_employer_id(request)
-    data = exports.export_candidates_json(employer_id)
-    
-    return Response(
-        content=json.dumps(data, indent=2),
-        media_type="application/json",
-        headers={"Content-Disposition": "attachment; filename=candidates.json"}
+    if fmt not in ("parquet", "arrow"):
+        raise HTTPException(status_code=404, detail="Unknown export format")
+    tmp_dir = tempfile.mkdtemp(prefix="epq_scores_")
+    try:
+        files = exports.export_scores_dataset(tmp_dir, employer_id, fmt=fmt, partition_by=(), since=since, until=until)
+    except RuntimeError as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    return FileResponse(
+        files[0],
+        media_type="application/vnd.apache.parquet" if fmt == "parquet" else "application/vnd.apache.arrow.file",
+        filename=f"scores.{fmt}",
+        background=BackgroundTask(shutil.rmtree, tmp_dir, ignore_errors=True),
     )
 
 @router.get("/candidates/{candidate_id}.json")
@@ -3,9 +3,11 @@ from pydantic import BaseModel
 import sqlite3, uuid, datetime
 from pathlib import Path
 
+from app.services import db
+
 # project root / epq.db
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DB_PATH = (PROJECT_ROOT / "epq.db").resolve()
+DB_PATH = db.DB_PATH
 
 router = APIRouter(prefix="/api/employer/roles", tags=["roles"])
 
@@ -13,9 +15,8 @@ def now_iso() -> str:
     return datetime.datetime.utcnow().isoformat()
 
 def conn():
-    con = sqlite3.connect(str(DB_PATH))
-    con.row_factory = sqlite3.Row
-    return con
+    # Shared connection pool (app/services/db_pool.py)
+    return db.connect()
 
 def get_employer_id(request: Request) -> str:
     # session auth (your app uses this pattern)
@@ -227,18 +228,12 @@ def delete_role(role_id: str, request: Request):
         )
         aids = [r["assessment_id"] for r in cur.fetchall()]
 
-        if aids:
-            qMarks = ",".join(["?"] * len(aids))
-            # cascade delete applicants + applicant_responses (if present)
-            cur.execute(f"DELETE FROM applicants WHERE assessment_id IN ({qMarks})", aids)
-            try:
-                cur.execute(f"DELETE FROM applicant_responses WHERE assessment_id IN ({qMarks})", aids)
-            except Exception:
-                pass
-            cur.execute(f"DELETE FROM assessments WHERE assessment_id IN ({qMarks})", aids)
+        # cascade delete applicants (responses, scores, team membership) and assessments
+        db.delete_assessments_cascade(cur, employer_id, aids)
 
         cur.execute("DELETE FROM roles WHERE employer_id=? AND role_id=?", (employer_id, role_id))
         con.commit()
 
+    db.invalidate_employer_caches(employer_id)
     return {"status": "ok", "role_id": role_id}
 
@@ -1,8 +1,8 @@
 # app/routes/webhooks.py
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-from typing import Optional
-from app.services import webhooks
+from typing import List, Optional
+from app.services import webhooks, webhook_outbox
 
 router = APIRouter(prefix="/employer/webhooks", tags=["webhooks"])
 
@@ -81,3 +81,38 @@ def get_webhook_logs(webhook_id: str, request: Request, limit: int = 50):
     employer_id = get_employer_id(request)
     logs = webhooks.get_webhook_logs(webhook_id, employer_id, limit)
     return {"logs": logs}
+
+class WebhookReplay(BaseModel):
+    delivery_ids: Optional[List[str]] = None
+    statuses: List[str] = ["dead"]
+    since: Optional[str] = None
+    limit: int = 100
+
+@router.get("/{webhook_id}/deliveries")
+def get_webhook_deliveries(webhook_id: str, request: Request, status: str = "", limit: int = 50):
+    """Outbox deliveries for a webhook (pending / delivering / delivered / dead) and its circuit state."""
+    employer_id = get_employer_id(request)
+    deliveries = webhook_outbox.list_deliveries(webhook_id, employer_id, status, limit)
+    if deliveries is None:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    return {"deliveries": deliveries, "circuit": webhook_outbox.get_circuit(webhook_id)}
+
+@router.post("/{webhook_id}/replay")
+def replay_webhook(webhook_id: str, request: Request, replay: Optional[WebhookReplay] = None):
+    """Re-send past deliveries: the given delivery_ids, or the newest in statuses (default: dead)."""
+    employer_id = get_employer_id(request)
+    replay = replay or WebhookReplay()
+    invalid = set(replay.statuses) - {"pending", "delivering", "delivered", "dead"}
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid status: {', '.join(sorted(invalid))}")
+    queued = webhook_outbox.replay(
+        webhook_id,
+        employer_id,
+        delivery_ids=replay.delivery_ids,
+        statuses=replay.statuses,
+        since=replay.since or "",
+        limit=max(1, min(replay.limit, 1000)),
+    )
+    if queued is None:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    return {"replayed": len(queued), "delivery_ids": queued}
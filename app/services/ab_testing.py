@@ -0,0 +1,323 @@
+# app/services/ab_testing.py
+"""
+A/B test engine for job-posting variants (JourneyAnalytics.create_ab_test /
+get_ab_test_results).
+
+State is O(variants): an ab_experiments row (migration 0008) plus each
+variant's views / completions in variant_metrics, which event_ingest keeps up
+to date incrementally. Those two counters are the sufficient statistics of the
+Beta-Bernoulli model, so nothing here reads candidate_touchpoints.
+
+  - Posterior: Beta(1 + completions, 1 + views - completions) per variant.
+  - P(variant beats control): exact closed form for Beta pairs (sum over
+    the smaller shape), normal approximation above EXACT_LIMIT terms.
+  - P(variant is best): Monte Carlo over the posteriors (numpy, BEST_DRAWS).
+  - Sequential test: mixture SPRT on the difference in conversion rate vs
+    the control (normal mixing prior with sd `tau`), whose always-valid
+    p-values can be checked after every event without inflating the false
+    positive rate. Comparisons are Bonferroni-corrected; once the leader is
+    significant the experiment stops and the winner is stored.
+  - Traffic: Thompson sampling (assign()), i.e. each new view goes to the
+    variant with the highest draw from its posterior; after a stop, all
+    traffic goes to the winner.
+
+Defaults for new experiments (environment variables):
+  AB_TEST_ALPHA       false positive rate of the sequential test   default 0.05
+  AB_TEST_TAU         sd of the expected lift (absolute rate)      default 0.05
+  AB_TEST_MIN_VIEWS   views per variant before a stop is allowed   default 100
+"""
+import logging
+import math
+import os
+import random
+import uuid
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services import db
+
+logger = logging.getLogger("epq.ab_testing")
+
+PRIOR_ALPHA = 1.0
+PRIOR_BETA = 1.0
+
+EXACT_LIMIT = 20000
+BEST_DRAWS = 20000
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def default_settings() -> Dict:
+    return {
+        "alpha": _env_float("AB_TEST_ALPHA", 0.05),
+        "tau": _env_float("AB_TEST_TAU", 0.05),
+        "min_views": int(_env_float("AB_TEST_MIN_VIEWS", 100)),
+    }
+
+
+# -------------------------
+# Statistics
+# -------------------------
+def posterior(views: int, conversions: int):
+    """Beta (alpha, beta) posterior for a conversion rate."""
+    views = max(0, int(views or 0))
+    conversions = min(views, max(0, int(conversions or 0)))
+    return PRIOR_ALPHA + conversions, PRIOR_BETA + views - conversions
+
+
+def _lbeta(a: float, b: float) -> float:
+    return math.lgamma(a) + math.lgamma(b) - math.lgamma(a + b)
+
+
+def prob_beats(a1: float, b1: float, a2: float, b2: float) -> float:
+    """P(X2 > X1) for X1 ~ Beta(a1, b1), X2 ~ Beta(a2, b2)."""
+    if min(a1, a2) <= EXACT_LIMIT and float(a1).is_integer() and float(a2).is_integer():
+        # Closed form, summing over whichever success shape is smaller
+        if a2 > a1:
+            return 1.0 - prob_beats(a2, b2, a1, b1)
+        total = 0.0
+        for i in range(int(a2)):
+            total += math.exp(
+                _lbeta(a1 + i, b1 + b2) - math.log(b2 + i) - _lbeta(1 + i, b2) - _lbeta(a1, b1)
+            )
+        return min(1.0, max(0.0, total))
+    m1, m2 = a1 / (a1 + b1), a2 / (a2 + b2)
+    v1 = a1 * b1 / ((a1 + b1) ** 2 * (a1 + b1 + 1))
+    v2 = a2 * b2 / ((a2 + b2) ** 2 * (a2 + b2 + 1))
+    z = (m2 - m1) / math.sqrt(v1 + v2)
+    return 0.5 * (1.0 + math.erf(z / math.sqrt(2.0)))
+
+
+def prob_best(shapes: List[tuple], draws: int = BEST_DRAWS, seed: Optional[int] = None) -> List[float]:
+    """P(each arm has the highest rate), shapes = [(alpha, beta), ...]."""
+    if not shapes:
+        return []
+    if len(shapes) == 1:
+        return [1.0]
+    rng = np.random.default_rng(seed)
+    samples = np.column_stack([rng.beta(a, b, draws) for a, b in shapes])
+    wins = np.bincount(samples.argmax(axis=1), minlength=len(shapes))
+    return (wins / draws).tolist()
+
+
+def credible_interval(a: float, b: float, level: float = 0.95):
+    """Equal-tailed interval from the normal approximation to the Beta (clamped to [0, 1])."""
+    mean = a / (a + b)
+    sd = math.sqrt(a * b / ((a + b) ** 2 * (a + b + 1)))
+    z = {0.9: 1.6449, 0.95: 1.96, 0.99: 2.5758}.get(level, 1.96)
+    return max(0.0, mean - z * sd), min(1.0, mean + z * sd)
+
+
+def msprt_p_value(views_c: int, conv_c: int, views_v: int, conv_v: int, tau: float) -> float:
+    """
+    Always-valid p-value for H0: rate_v == rate_c (mixture SPRT, normal
+    approximation, N(0, tau^2) mixing prior on the difference).
+    """
+    if views_c <= 0 or views_v <= 0:
+        return 1.0
+    pc, pv = conv_c / views_c, conv_v / views_v
+    var = pc * (1 - pc) / views_c + pv * (1 - pv) / views_v
+    if var <= 0:
+        return 1.0
+    tau2 = tau * tau
+    diff = pv - pc
+    log_lambda = 0.5 * math.log(var / (var + tau2)) + tau2 * diff * diff / (2 * var * (var + tau2))
+    return min(1.0, math.exp(-log_lambda)) if log_lambda < 700 else 0.0
+
+
+# -------------------------
+# Experiment state
+# -------------------------
+def _load(cur, role_id: str, employer_id: str):
+    cur.execute("""
+        SELECT * FROM ab_experiments
+        WHERE employer_id = ? AND role_id = ? AND status != 'superseded'
+        ORDER BY created_at DESC LIMIT 1
+    """, (employer_id, role_id))
+    experiment = cur.fetchone()
+    cur.execute("""
+        SELECT v.id, v.variant_name, v.title, v.description, v.created_at,
+               COALESCE(SUM(m.views), 0) AS views,
+               COALESCE(SUM(m.applications), 0) AS applications,
+               COALESCE(SUM(m.completions), 0) AS completions
+        FROM job_variants v
+        LEFT JOIN variant_metrics m ON m.variant_id = v.id
+        WHERE v.role_id = ? AND v.employer_id = ? AND v.is_active = 1
+        GROUP BY v.id, v.variant_name, v.title, v.description, v.created_at
+        ORDER BY v.created_at ASC, v.id ASC
+    """, (role_id, employer_id))
+    variants = [dict(r) for r in cur.fetchall()]
+    return (dict(experiment) if experiment else None), variants
+
+
+def create(cur, role_id: str, employer_id: str, variant_ids: List[str], settings: Optional[Dict] = None) -> str:
+    """Start an experiment over variant_ids (the first is the control), superseding any earlier one."""
+    cfg = {**default_settings(), **{k: v for k, v in (settings or {}).items() if v is not None}}
+    now = db.now_iso()
+    placeholders = ", ".join("?" for _ in variant_ids)
+    cur.execute(f"""
+        UPDATE job_variants SET is_active = 0
+        WHERE role_id = ? AND employer_id = ? AND id NOT IN ({placeholders})
+    """, (role_id, employer_id, *variant_ids))
+    cur.execute("""
+        UPDATE ab_experiments SET status = 'superseded', stopped_at = ?
+        WHERE role_id = ? AND employer_id = ? AND status = 'running'
+    """, (now, role_id, employer_id))
+    experiment_id = str(uuid.uuid4())
+    cur.execute("""
+        INSERT INTO ab_experiments (id, role_id, employer_id, control_variant_id, status,
+                                    alpha, tau, min_views, created_at)
+        VALUES (?, ?, ?, ?, 'running', ?, ?, ?, ?)
+    """, (experiment_id, role_id, employer_id, variant_ids[0],
+          float(cfg["alpha"]), float(cfg["tau"]), int(cfg["min_views"]), now))
+    cur.executemany("""
+        INSERT INTO variant_metrics (id, variant_id, role_id, updated_at) VALUES (?, ?, ?, ?)
+    """, [(str(uuid.uuid4()), variant_id, role_id, now) for variant_id in variant_ids])
+    return experiment_id
+
+
+def _ensure_experiment(role_id: str, employer_id: str):
+    """Load state, creating an experiment for variants made before the engine existed."""
+    with db.connection() as con:
+        cur = con.cursor()
+        experiment, variants = _load(cur, role_id, employer_id)
+        if experiment is None and variants:
+            cfg = default_settings()
+            experiment = {
+                "id": str(uuid.uuid4()), "role_id": role_id, "employer_id": employer_id,
+                "control_variant_id": variants[0]["id"], "status": "running",
+                "alpha": cfg["alpha"], "tau": cfg["tau"], "min_views": cfg["min_views"],
+                "winner_variant_id": None, "stop_reason": None,
+                "created_at": db.now_iso(), "stopped_at": None,
+            }
+            cur.execute("""
+                INSERT INTO ab_experiments (id, role_id, employer_id, control_variant_id, status,
+                                            alpha, tau, min_views, created_at)
+                VALUES (?, ?, ?, ?, 'running', ?, ?, ?, ?)
+            """, (experiment["id"], role_id, employer_id, experiment["control_variant_id"],
+                  experiment["alpha"], experiment["tau"], experiment["min_views"], experiment["created_at"]))
+        return experiment, variants
+
+
+def _decide(experiment: Dict, variants: List[Dict], means: List[float], p_values: List[Optional[float]]):
+    """(winner_id, reason) if the sequential test allows stopping now, else None."""
+    control = next((i for i, v in enumerate(variants) if v["id"] == experiment["control_variant_id"]), 0)
+    if len(variants) < 2 or any(v["views"] < experiment["min_views"] for v in variants):
+        return None
+    threshold = experiment["alpha"] / (len(variants) - 1)
+    leader = max(range(len(variants)), key=lambda i: means[i])
+    if leader != control:
+        if p_values[leader] is not None and p_values[leader] <= threshold:
+            return variants[leader]["id"], f"beats control (always-valid p={p_values[leader]:.4f})"
+        return None
+    others = [p for i, p in enumerate(p_values) if i != control]
+    if all(p is not None and p <= threshold for p in others):
+        return variants[control]["id"], f"control beats all variants (max always-valid p={max(others):.4f})"
+    return None
+
+
+def _stop(experiment: Dict, winner_id: str, reason: str):
+    now = db.now_iso()
+    with db.connection() as con:
+        con.execute("""
+            UPDATE ab_experiments SET status = 'stopped', winner_variant_id = ?, stop_reason = ?, stopped_at = ?
+            WHERE id = ? AND status = 'running'
+        """, (winner_id, reason, now, experiment["id"]))
+    experiment.update(status="stopped", winner_variant_id=winner_id, stop_reason=reason, stopped_at=now)
+    logger.info(f"[AB] Experiment {experiment['id']} stopped: {winner_id} {reason}")
+
+
+def results(role_id: str, employer_id: str) -> Dict:
+    """Posterior summary, sequential-test state and allocation weights for a role's experiment."""
+    experiment, variants = _ensure_experiment(role_id, employer_id)
+    if not variants:
+        return {"experiment": None, "variants": [], "best_variant": None, "total_variants": 0}
+
+    shapes = [posterior(v["views"], v["completions"]) for v in variants]
+    means = [a / (a + b) for a, b in shapes]
+    best = prob_best(shapes)
+    control = next((i for i, v in enumerate(variants) if v["id"] == experiment["control_variant_id"]), 0)
+    ca, cb = shapes[control]
+    c_views, c_conv = variants[control]["views"], variants[control]["completions"]
+
+    p_values: List[Optional[float]] = []
+    out = []
+    for i, (v, (a, b)) in enumerate(zip(variants, shapes)):
+        is_control = i == control
+        p = None if is_control else msprt_p_value(c_views, c_conv, v["views"], v["completions"], experiment["tau"])
+        p_values.append(p)
+        low, high = credible_interval(a, b)
+        out.append({
+            "id": v["id"],
+            "name": v["variant_name"],
+            "title": v["title"],
+            "is_control": is_control,
+            "views": int(v["views"]),
+            "applications": int(v["applications"]),
+            "completions": int(v["completions"]),
+            "conversion_rate": round(v["completions"] / v["views"] * 100, 2) if v["views"] else 0.0,
+            "posterior": {"alpha": a, "beta": b, "mean": round(means[i], 4),
+                          "ci95": [round(low, 4), round(high, 4)]},
+            "prob_best": round(best[i], 4),
+            "prob_beats_control": None if is_control else round(prob_beats(ca, cb, a, b), 4),
+            "lift_vs_control": None if is_control or not means[control] else round((means[i] / means[control] - 1) * 100, 2),
+            "p_value": None if p is None else round(p, 6),
+        })
+
+    if experiment["status"] == "running":
+        decision = _decide(experiment, variants, means, p_values)
+        if decision:
+            _stop(experiment, *decision)
+
+    if experiment.get("winner_variant_id"):
+        best_variant = next((r for r in out if r["id"] == experiment["winner_variant_id"]), None)
+    else:
+        best_variant = max(out, key=lambda r: r["prob_best"])
+    return {
+        "experiment": {
+            "id": experiment["id"],
+            "status": experiment["status"],
+            "control_variant_id": experiment["control_variant_id"],
+            "winner_variant_id": experiment.get("winner_variant_id"),
+            "stop_reason": experiment.get("stop_reason"),
+            "alpha": experiment["alpha"],
+            "tau": experiment["tau"],
+            "min_views": experiment["min_views"],
+            "created_at": experiment["created_at"],
+            "stopped_at": experiment.get("stopped_at"),
+        },
+        "variants": out,
+        "best_variant": best_variant,
+        "total_variants": len(out),
+    }
+
+
+def assign(role_id: str, employer_id: str) -> Optional[Dict]:
+    """Pick the variant to show next: the winner once stopped, else Thompson sampling."""
+    con = db.connect()
+    try:
+        experiment, variants = _load(con.cursor(), role_id, employer_id)
+    finally:
+        con.close()
+    if not variants:
+        return None
+    chosen = None
+    if experiment and experiment["status"] == "stopped" and experiment.get("winner_variant_id"):
+        chosen = next((v for v in variants if v["id"] == experiment["winner_variant_id"]), None)
+    if chosen is None:
+        draws = [random.betavariate(*posterior(v["views"], v["completions"])) for v in variants]
+        chosen = variants[max(range(len(variants)), key=draws.__getitem__)]
+    return {
+        "variant_id": chosen["id"],
+        "name": chosen["variant_name"],
+        "title": chosen["title"],
+        "description": chosen["description"],
+        "experiment_id": experiment["id"] if experiment else None,
+        "experiment_status": experiment["status"] if experiment else None,
+    }
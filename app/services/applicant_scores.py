@@ -0,0 +1,262 @@
+# app/services/applicant_scores.py
+"""
+Persisted applicant scores.
+
+Scores are computed once (at submit time, or by the backfill) and stored in
+applicant_scores (candidate x construct) and applicant_score_summary
+(overall average, band, environment dimensions). Every row carries the
+scorer_version() that produced it (the core scorer's version plus the
+environment mapper's); rows with any other version are stale and are
+recomputed by backfill_stale_scores() or on first read.
+
+Run the backfill by hand with:
+    python -m app.services.applicant_scores
+"""
+import json
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import epq_core
+from app.services import db, score_rollups, team_fit
+from app.services.environment_mapper import (
+    ENVIRONMENT_DIMENSIONS, ENVIRONMENT_MAPPER_VERSION, map_constructs_to_environment,
+)
+
+logger = logging.getLogger("epq.scores")
+
+# Max bound parameters per IN (...) query (SQLite's historical limit is 999)
+_IN_CHUNK = 500
+
+
+def scorer_version() -> str:
+    """Version stored with persisted scores, e.g. "choice-v1.3f9a0c1b2d+env-v1" (scorer, bank, mapper)."""
+    return f"{epq_core.scorer_version()}+{ENVIRONMENT_MAPPER_VERSION}"
+
+
+def _write_rows(cur, candidate_id: str, result: Dict, version: str, computed_utc: str) -> Dict:
+    construct_scores = result.get("construct_scores") or {}
+    # An empty result marks an unscorable submission: no environment either.
+    environment = map_constructs_to_environment(construct_scores) if result else {}
+
+    previous = score_rollups.read_contribution(cur, candidate_id)
+    cur.execute("DELETE FROM applicant_scores WHERE candidate_id = ?", (candidate_id,))
+    cur.execute("DELETE FROM applicant_score_summary WHERE candidate_id = ?", (candidate_id,))
+    if construct_scores:
+        cur.executemany(
+            """
+            INSERT INTO applicant_scores (candidate_id, construct, score, scorer_version, computed_utc)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [(candidate_id, c, float(v), version, computed_utc) for c, v in construct_scores.items()],
+        )
+    cur.execute(
+        f"""
+        INSERT INTO applicant_score_summary
+          (candidate_id, overall_average, overall_band, {", ".join(ENVIRONMENT_DIMENSIONS)}, scorer_version, computed_utc)
+        VALUES (?, ?, ?, {", ".join("?" for _ in ENVIRONMENT_DIMENSIONS)}, ?, ?)
+        """,
+        (
+            candidate_id,
+            result.get("overall_average"),
+            result.get("overall_band"),
+            *[environment.get(d) for d in ENVIRONMENT_DIMENSIONS],
+            version,
+            computed_utc,
+        ),
+    )
+    # Keep the /analytics rollups and team profiles in step, in the same transaction
+    score_rollups.apply(cur, candidate_id, previous, score_rollups.contribution(result))
+    team_fit.apply_rescore(cur, candidate_id, previous, dict(construct_scores))
+    return {
+        "construct_scores": dict(construct_scores),
+        "overall_average": result.get("overall_average"),
+        "overall_band": result.get("overall_band"),
+        "environment": environment,
+        "scorer_version": version,
+        "computed_utc": computed_utc,
+    }
+
+
+def save_scores(candidate_id: str, result: Dict) -> Dict:
+    """
+    Persist one scored result (output of epq_core.run_applicant_from_choice_responses).
+    Returns the stored record in the same shape as get_scores().
+    """
+    with db.connection() as con:
+        return _write_rows(con.cursor(), candidate_id, result, scorer_version(), db.now_iso())
+
+
+def save_scores_many(pairs: Iterable) -> int:
+    """Persist [(candidate_id, result), ...] in a single transaction."""
+    version = scorer_version()
+    computed_utc = db.now_iso()
+    n = 0
+    with db.connection() as con:
+        cur = con.cursor()
+        for candidate_id, result in pairs:
+            _write_rows(cur, candidate_id, result, version, computed_utc)
+            n += 1
+    return n
+
+
+def get_scores_many(candidate_ids: List[str], current_only: bool = True) -> Dict[str, Dict]:
+    """
+    Stored scores keyed by candidate_id:
+      { "A-...": {construct_scores, overall_average, overall_band, environment, scorer_version, computed_utc} }
+    Candidates with no row (or a stale row when current_only=True) are absent.
+    """
+    version = scorer_version()
+    ids = [c for c in dict.fromkeys(candidate_ids or []) if c]
+    out: Dict[str, Dict] = {}
+    if not ids:
+        return out
+
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        for i in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[i:i + _IN_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            cur.execute(
+                f"SELECT * FROM applicant_score_summary WHERE candidate_id IN ({marks})",
+                chunk,
+            )
+            for row in cur.fetchall():
+                row = dict(row)
+                if current_only and row["scorer_version"] != version:
+                    continue
+                out[row["candidate_id"]] = {
+                    "construct_scores": {},
+                    "overall_average": row["overall_average"],
+                    "overall_band": row["overall_band"],
+                    "environment": {d: row[d] for d in ENVIRONMENT_DIMENSIONS if row[d] is not None},
+                    "scorer_version": row["scorer_version"],
+                    "computed_utc": row["computed_utc"],
+                }
+
+            found = [c for c in chunk if c in out]
+            if not found:
+                continue
+            marks = ",".join("?" * len(found))
+            cur.execute(
+                f"SELECT candidate_id, construct, score FROM applicant_scores WHERE candidate_id IN ({marks})",
+                found,
+            )
+            for row in cur.fetchall():
+                out[row["candidate_id"]]["construct_scores"][row["construct"]] = row["score"]
+    finally:
+        con.close()
+    return out
+
+
+def get_scores(candidate_id: str) -> Optional[Dict]:
+    """Stored, current scores for one candidate, or None."""
+    return get_scores_many([candidate_id]).get(candidate_id)
+
+
+def _load_responses(candidate_ids: List[str]) -> Dict[str, Dict]:
+    out: Dict[str, Dict] = {}
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        for i in range(0, len(candidate_ids), _IN_CHUNK):
+            chunk = candidate_ids[i:i + _IN_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            cur.execute(
+                f"SELECT candidate_id, responses_json FROM applicants WHERE candidate_id IN ({marks})",
+                chunk,
+            )
+            for row in cur.fetchall():
+                try:
+                    responses = json.loads(row["responses_json"]) if row["responses_json"] else None
+                except Exception:
+                    responses = None
+                if isinstance(responses, dict) and responses:
+                    out[row["candidate_id"]] = responses
+    finally:
+        con.close()
+    return out
+
+
+def _score_and_save(responses_by_id: Dict[str, Dict]) -> Dict[str, Dict]:
+    ids = list(responses_by_id)
+    results = epq_core.score_batch([responses_by_id[c] for c in ids])
+    version = scorer_version()
+    computed_utc = db.now_iso()
+    out: Dict[str, Dict] = {}
+    with db.connection() as con:
+        cur = con.cursor()
+        for candidate_id, result in zip(ids, results):
+            out[candidate_id] = _write_rows(cur, candidate_id, result, version, computed_utc)
+    return out
+
+
+def get_or_compute_scores_many(candidate_ids: List[str]) -> Dict[str, Dict]:
+    """
+    Read-through: stored scores where current, otherwise score from responses_json
+    (one batch) and persist. Candidates without usable responses are absent.
+    """
+    ids = [c for c in dict.fromkeys(candidate_ids or []) if c]
+    out = get_scores_many(ids)
+    missing = [c for c in ids if c not in out]
+    if missing:
+        try:
+            out.update(_score_and_save(_load_responses(missing)))
+        except Exception as exc:
+            logger.warning(f"[SCORES] Could not compute scores for {len(missing)} candidates: {exc}")
+    return out
+
+
+def get_or_compute_scores(candidate_id: str) -> Optional[Dict]:
+    return get_or_compute_scores_many([candidate_id]).get(candidate_id)
+
+
+def list_stale_candidates(limit: int = 500) -> List[str]:
+    """Candidates with no summary row or one written by another scorer version."""
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        cur.execute(
+            """
+            SELECT a.candidate_id
+            FROM applicants a
+            LEFT JOIN applicant_score_summary s ON s.candidate_id = a.candidate_id
+            WHERE s.candidate_id IS NULL OR s.scorer_version != ?
+            LIMIT ?
+            """,
+            (scorer_version(), int(limit)),
+        )
+        return [r["candidate_id"] for r in cur.fetchall()]
+    finally:
+        con.close()
+
+
+def backfill_stale_scores(batch_size: int = 500, max_batches: Optional[int] = None) -> Dict[str, int]:
+    """
+    Recompute only stale rows, batch_size candidates at a time.
+    Candidates whose responses can't be scored get an empty summary row so they
+    aren't retried until the scorer version changes.
+    """
+    scored = 0
+    empty = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        stale = list_stale_candidates(batch_size)
+        if not stale:
+            break
+        responses = _load_responses(stale)
+        if responses:
+            scored += len(_score_and_save(responses))
+        unscorable = [c for c in stale if c not in responses]
+        if unscorable:
+            save_scores_many((c, {}) for c in unscorable)
+            empty += len(unscorable)
+        batches += 1
+    if scored or empty:
+        logger.info(f"[SCORES] Backfill scored={scored} empty={empty} version={scorer_version()}")
+    return {"scored": scored, "empty": empty, "batches": batches}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(backfill_stale_scores())
@@ -5,41 +5,30 @@ from pathlib import Path
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 
+from app.services import db
+
 # Single source of truth for sqlite DB path:
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DB_PATH = Path(os.getenv("DB_PATH") or (PROJECT_ROOT / "epq.db")).resolve()
+DB_PATH = db.DB_PATH
 
 def connect():
-    con = sqlite3.connect(str(DB_PATH))
-    con.row_factory = sqlite3.Row
-    return con
+    # Shared connection pool (app/services/db_pool.py)
+    return db.connect()
 
 def _conn():
     """Alias for connect() for backwards compatibility"""
     return connect()
 
+_auth_columns_ready = False
+
 def ensure_auth_columns():
-    """Ensure all auth-related columns exist in the employers table"""
-    con = _conn()
-    cur = con.cursor()
-    
-    columns_to_add = [
-        ("password_hash", "TEXT"),
-        ("email_verified", "INTEGER DEFAULT 0"),
-        ("verification_token", "TEXT"),
-        ("verification_token_expires", "TEXT"),
-        ("reset_token", "TEXT"),
-        ("reset_token_expires", "TEXT"),
-    ]
-    
-    for column_name, column_type in columns_to_add:
-        try:
-            cur.execute(f"ALTER TABLE employers ADD COLUMN {column_name} {column_type}")
-            con.commit()
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-    
-    con.close()
+    """Ensure all auth-related columns exist in the employers table (migration 0001)"""
+    global _auth_columns_ready
+    if _auth_columns_ready:
+        return
+    from app.services import migrations
+    migrations.migrate()
+    _auth_columns_ready = True
 
 def get_employer_by_email(email: str) -> Optional[Dict[str, Any]]:
     """Get employer record by email address"""
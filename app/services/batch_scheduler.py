@@ -0,0 +1,390 @@
+# app/services/batch_scheduler.py
+"""
+Batch interview scheduling: place a whole set of candidates' interviews across
+a pool of interviewers in one solve (POST /employer/calendar/batch-schedule),
+instead of one suggest call per candidate that can double-book the others.
+
+Each candidate needs one interview of a given length with either a fixed
+panel (their `interviewers`) or `panel_size` interviewers picked from the
+pool. Start times lie on a slot grid inside business hours. Every
+interviewer, and every candidate, has a BusyIntervals timeline seeded with
+the employer's existing (non-cancelled) interviews; an existing interview
+with no interviewers listed blocks the whole pool. Existing interviews also
+count toward max_per_interviewer_per_day for the interviewers they name.
+
+Solve:
+  1. greedy: most constrained candidate first (fewest feasible starts), each
+     at its best-scoring feasible start / panel given what is placed so far;
+  2. local search until the time budget runs out: take one interview out
+     (or an unplaced candidate in, bumping one that blocks it) and re-place
+     it at its best position; keep the change only if the schedule gets
+     better (more candidates placed, then a higher total score).
+
+Slot scores use SchedulingAgent's scale: 50 + time-of-day / weekday
+preference + spacing (+15 if no panel member has another interview starting
+within 2 hours, down to -20 if all of them do), clipped to 0-100.
+
+The result is a proposal; nothing is written to the interviews table.
+"""
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.services import db
+from app.services.scheduling_agent import BusyIntervals, in_window, parse_time, scheduling_agent, window_conditions
+
+MAX_TIME_BUDGET_MS = 10000
+FATIGUE_GAP = timedelta(hours=2)
+
+
+@dataclass
+class BatchCandidate:
+    """One interview to place"""
+    candidate_id: str
+    duration_minutes: int = 60
+    interviewers: List[str] = field(default_factory=list)  # fixed panel; empty = pick from the pool
+    panel_size: int = 1
+    available: List[Tuple[datetime, datetime]] = field(default_factory=list)  # empty = any time
+
+
+@dataclass
+class BatchConstraints:
+    """Where interviews may go"""
+    window_start: datetime
+    window_end: datetime
+    day_start_hour: int = 9
+    day_end_hour: int = 18
+    slot_minutes: int = 30
+    buffer_minutes: int = 0
+    max_per_interviewer_per_day: Optional[int] = None
+    include_weekends: bool = False
+
+
+def load_calendars(
+    employer_id: str,
+    interviewers: List[str],
+    candidate_ids: List[str],
+    window_start: datetime,
+    window_end: datetime
+) -> Tuple[Dict[str, BusyIntervals], Dict[str, BusyIntervals], Dict[Tuple[str, date], int]]:
+    """
+    Busy timelines per interviewer and per candidate, and interviews per
+    (interviewer, day), from the employer's existing interviews on the
+    window's days (whole days, so the per-day counts are complete)
+    """
+    window_start = window_start.replace(hour=0, minute=0, second=0, microsecond=0)
+    window_end = window_end.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    window_where, window_params = window_conditions(window_start, window_end)
+    conn = db.connect()
+    try:
+        rows = conn.execute(f"""
+            SELECT candidate_id, interviewer_names, start_time, end_time FROM interviews
+            WHERE employer_id = ? AND status != 'cancelled' AND {" AND ".join(window_where)}
+        """, [employer_id, *window_params]).fetchall()
+    finally:
+        conn.close()
+
+    interviewer_busy = {name: BusyIntervals() for name in interviewers}
+    candidate_busy = {cid: BusyIntervals() for cid in candidate_ids}
+    day_load: Dict[Tuple[str, date], int] = defaultdict(int)
+    for row in rows:
+        start, end = parse_time(row["start_time"]), parse_time(row["end_time"])
+        if not in_window(start, end, window_start, window_end):
+            continue
+        names = [n.strip() for n in (row["interviewer_names"] or "").split(",") if n.strip()]
+        for name in (names or interviewers):
+            if name in interviewer_busy:
+                interviewer_busy[name].add(start, end)
+        for name in names:
+            if name in interviewer_busy:
+                day_load[(name, start.date())] += 1
+        if row["candidate_id"] in candidate_busy:
+            candidate_busy[row["candidate_id"]].add(start, end)
+    return interviewer_busy, candidate_busy, dict(day_load)
+
+
+class BatchScheduler:
+    """Greedy placement plus local search over one batch; see the module docstring"""
+
+    def __init__(
+        self,
+        candidates: List[BatchCandidate],
+        interviewers: List[str],
+        constraints: BatchConstraints,
+        interviewer_busy: Optional[Dict[str, BusyIntervals]] = None,
+        candidate_busy: Optional[Dict[str, BusyIntervals]] = None,
+        day_load: Optional[Dict[Tuple[str, date], int]] = None,
+        seed: int = 0
+    ):
+        pool = list(dict.fromkeys(interviewers))
+        for c in candidates:
+            for name in c.interviewers:
+                if name not in pool:
+                    pool.append(name)
+        for c in candidates:
+            if not c.interviewers and c.panel_size > len(pool):
+                raise ValueError(
+                    f"Candidate {c.candidate_id} needs {c.panel_size} interviewers; the pool has {len(pool)}"
+                )
+        self.candidates = candidates
+        self.pool = pool
+        self.constraints = constraints
+        self.busy = {name: BusyIntervals() for name in pool}
+        self.busy.update(interviewer_busy or {})
+        self.candidate_busy = defaultdict(BusyIntervals, candidate_busy or {})
+        # Existing interviews per (interviewer, day); placements add to it
+        self.day_load: Dict[Tuple[str, date], int] = defaultdict(int, day_load or {})
+        self.placed: Dict[int, Tuple[datetime, Tuple[str, ...]]] = {}
+        self.rng = random.Random(seed)
+        self.grid = self._grid()
+
+    # Search space
+
+    def _grid(self) -> List[datetime]:
+        c = self.constraints
+        now = datetime.now()
+        starts = []
+        day = c.window_start.replace(hour=0, minute=0, second=0, microsecond=0)
+        while day < c.window_end:
+            if c.include_weekends or day.weekday() < 5:
+                t = day + timedelta(hours=c.day_start_hour)
+                while t < day + timedelta(hours=c.day_end_hour):
+                    if c.window_start <= t < c.window_end and t >= now:
+                        starts.append(t)
+                    t += timedelta(minutes=c.slot_minutes)
+            day += timedelta(days=1)
+        return starts
+
+    def _starts_for(self, i: int) -> List[datetime]:
+        """Grid starts where candidate i's interview fits the day, the window and their availability"""
+        cand = self.candidates[i]
+        c = self.constraints
+        length = timedelta(minutes=cand.duration_minutes)
+        out = []
+        for start in self.grid:
+            end = start + length
+            day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+            if end > day + timedelta(hours=c.day_end_hour) or end > c.window_end:
+                continue
+            if cand.available and not any(a <= start and end <= b for a, b in cand.available):
+                continue
+            out.append(start)
+        return out
+
+    # Feasibility and scoring
+
+    def _interviewer_free(self, name: str, start: datetime, end: datetime) -> bool:
+        buffer = timedelta(minutes=self.constraints.buffer_minutes)
+        if self.busy[name].overlaps(start - buffer, end + buffer):
+            return False
+        limit = self.constraints.max_per_interviewer_per_day
+        return limit is None or self.day_load[(name, start.date())] < limit
+
+    def _fatigued(self, name: str, start: datetime, placed: bool) -> bool:
+        # An interview already on the timeline finds itself; don't count it
+        return self.busy[name].starts_near(start, FATIGUE_GAP) > (1 if placed else 0)
+
+    def _score(self, start: datetime, panel: Tuple[str, ...], placed: bool = False) -> float:
+        fatigued = sum(self._fatigued(name, start, placed) for name in panel) / len(panel)
+        score = 50.0 + scheduling_agent._time_preference(start) + 15 - 35 * fatigued
+        return min(100.0, max(0.0, score))
+
+    def _best_position(self, i: int) -> Optional[Tuple[float, datetime, Tuple[str, ...]]]:
+        """Best (score, start, panel) for candidate i against the current timelines"""
+        cand = self.candidates[i]
+        length = timedelta(minutes=cand.duration_minutes)
+        best = None
+        for start in self._starts[i]:
+            end = start + length
+            if self.candidate_busy[cand.candidate_id].overlaps(start, end):
+                continue
+            if cand.interviewers:
+                if not all(self._interviewer_free(n, start, end) for n in cand.interviewers):
+                    continue
+                panel = tuple(cand.interviewers)
+            else:
+                free = [n for n in self.pool if self._interviewer_free(n, start, end)]
+                if len(free) < cand.panel_size:
+                    continue
+                # Rested interviewers first, then the least loaded that day
+                free.sort(key=lambda n: (self._fatigued(n, start, False), self.day_load[(n, start.date())]))
+                panel = tuple(free[:cand.panel_size])
+            score = self._score(start, panel)
+            if best is None or score > best[0]:
+                best = (score, start, panel)
+        return best
+
+    def _place(self, i: int, start: datetime, panel: Tuple[str, ...]):
+        cand = self.candidates[i]
+        end = start + timedelta(minutes=cand.duration_minutes)
+        for name in panel:
+            self.busy[name].add(start, end)
+            self.day_load[(name, start.date())] += 1
+        self.candidate_busy[cand.candidate_id].add(start, end)
+        self.placed[i] = (start, panel)
+
+    def _unplace(self, i: int):
+        cand = self.candidates[i]
+        start, panel = self.placed.pop(i)
+        end = start + timedelta(minutes=cand.duration_minutes)
+        for name in panel:
+            self.busy[name].remove(start, end)
+            self.day_load[(name, start.date())] -= 1
+        self.candidate_busy[cand.candidate_id].remove(start, end)
+
+    def _insert(self, i: int) -> bool:
+        best = self._best_position(i)
+        if best is None:
+            return False
+        self._place(i, best[1], best[2])
+        return True
+
+    def _objective(self) -> Tuple[int, float]:
+        total = sum(self._score(start, panel, placed=True) for start, panel in self.placed.values())
+        return len(self.placed), round(total, 6)
+
+    # Solve
+
+    def _blocking(self, i: int) -> List[int]:
+        """Placed interviews sharing a panel member or the candidate with some start of candidate i"""
+        cand = self.candidates[i]
+        people = set(cand.interviewers or self.pool)
+        return [
+            j for j, (_, panel) in self.placed.items()
+            if people.intersection(panel) or self.candidates[j].candidate_id == cand.candidate_id
+        ]
+
+    def _local_search(self, deadline: float) -> Tuple[int, int]:
+        iterations = improvements = 0
+        stale = 0
+        n = len(self.candidates)
+        while time.monotonic() < deadline and stale < 50 * n:
+            iterations += 1
+            before = self._objective()
+            snapshot = dict(self.placed)
+            unplaced = [i for i in range(n) if i not in self.placed]
+            if unplaced and self.rng.random() < 0.5:
+                # Bump one interview that may be in the way, place the unplaced one, re-place the bumped one
+                i = self.rng.choice(unplaced)
+                blockers = self._blocking(i)
+                if not blockers:
+                    stale += 1
+                    continue
+                j = self.rng.choice(blockers)
+                self._unplace(j)
+                self._insert(i)
+                self._insert(j)
+            elif self.placed:
+                # Move one interview to its best position given all the others
+                i = self.rng.choice(list(self.placed))
+                self._unplace(i)
+                self._insert(i)
+            else:
+                break
+            if self._objective() > before:
+                improvements += 1
+                stale = 0
+            else:
+                self._restore(snapshot)
+                stale += 1
+        return iterations, improvements
+
+    def _restore(self, snapshot: Dict[int, Tuple[datetime, Tuple[str, ...]]]):
+        for i in list(self.placed):
+            if snapshot.get(i) != self.placed[i]:
+                self._unplace(i)
+        for i, (start, panel) in snapshot.items():
+            if i not in self.placed:
+                self._place(i, start, panel)
+
+    def solve(self, time_budget_ms: int = 2000) -> Dict:
+        started = time.monotonic()
+        deadline = started + min(time_budget_ms, MAX_TIME_BUDGET_MS) / 1000.0
+        self._starts = [self._starts_for(i) for i in range(len(self.candidates))]
+
+        # Most constrained first: fewest starts that are feasible before anything is placed
+        def feasible(i):
+            cand = self.candidates[i]
+            length = timedelta(minutes=cand.duration_minutes)
+            need = cand.interviewers or None
+            count = 0
+            for start in self._starts[i]:
+                end = start + length
+                if self.candidate_busy[cand.candidate_id].overlaps(start, end):
+                    continue
+                if need:
+                    count += all(self._interviewer_free(n, start, end) for n in need)
+                else:
+                    count += sum(self._interviewer_free(n, start, end) for n in self.pool) >= cand.panel_size
+            return count
+        initial = [feasible(i) for i in range(len(self.candidates))]
+        order = sorted(
+            range(len(self.candidates)),
+            key=lambda i: (initial[i], -self.candidates[i].duration_minutes, i)
+        )
+        for i in order:
+            self._insert(i)
+        greedy = self._objective()
+        iterations, improvements = self._local_search(deadline)
+        placed, total = self._objective()
+
+        schedule = []
+        for i, (start, panel) in self.placed.items():
+            cand = self.candidates[i]
+            score = round(self._score(start, panel, placed=True), 1)
+            schedule.append({
+                "candidate_id": cand.candidate_id,
+                "interviewers": list(panel),
+                "start_time": start.isoformat(),
+                "end_time": (start + timedelta(minutes=cand.duration_minutes)).isoformat(),
+                "duration_minutes": cand.duration_minutes,
+                "score": score,
+                "reason": scheduling_agent._get_slot_reason(start, score),
+            })
+        schedule.sort(key=lambda s: (s["start_time"], s["candidate_id"]))
+        unscheduled = [
+            {
+                "candidate_id": self.candidates[i].candidate_id,
+                "reason": "No feasible slot in the window" if not initial[i]
+                else "No slot left without double-booking",
+            }
+            for i in range(len(self.candidates)) if i not in self.placed
+        ]
+        return {
+            "schedule": schedule,
+            "unscheduled": unscheduled,
+            "stats": {
+                "candidates": len(self.candidates),
+                "scheduled": placed,
+                "total_score": round(total, 1),
+                "mean_score": round(total / placed, 1) if placed else 0.0,
+                "greedy_scheduled": greedy[0],
+                "greedy_total_score": round(greedy[1], 1),
+                "iterations": iterations,
+                "improvements": improvements,
+                "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+                "time_budget_ms": min(time_budget_ms, MAX_TIME_BUDGET_MS),
+            },
+        }
+
+
+def schedule_batch(
+    employer_id: str,
+    candidates: List[BatchCandidate],
+    interviewers: List[str],
+    constraints: BatchConstraints,
+    time_budget_ms: int = 2000,
+    seed: int = 0
+) -> Dict:
+    """Conflict-free schedule for the batch against the employer's existing interviews"""
+    pool = list(dict.fromkeys(interviewers + [n for c in candidates for n in c.interviewers]))
+    interviewer_busy, candidate_busy, day_load = load_calendars(
+        employer_id, pool, [c.candidate_id for c in candidates],
+        constraints.window_start, constraints.window_end
+    )
+    solver = BatchScheduler(candidates, pool, constraints, interviewer_busy, candidate_busy,
+                            day_load=day_load, seed=seed)
+    return solver.solve(time_budget_ms)
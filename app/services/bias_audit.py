@@ -0,0 +1,325 @@
+# app/services/bias_audit.py
+"""
+Bulk bias audit over historical candidate_notes and candidate_feedback
+(job kind "bias.audit", tables from migration 0011).
+
+start_audit() records a bias_audit_runs row and enqueues the job. The worker
+reads each source in id order, BIAS_AUDIT_CHUNK rows at a time (keyset
+pagination, so nothing is held open between chunks), scans each chunk with
+bias_detection.scan across a process pool, and writes the findings and the
+run's checkpoint (last id per source) in one transaction. A job that crashes
+or loses its lease is retried by the queue and resumes from the checkpoint.
+
+bias_findings holds one row per flagged category per text; re-scanning a row
+replaces its findings. An incremental audit (the default) starts where the
+last finished run stopped; full=True rescans everything and first clears each
+source's findings, so texts deleted since the last audit lose theirs.
+
+Runs span every employer, so they are started and monitored from the CLI only;
+employers see their own findings via GET /bias/audit/summary.
+    python -m app.services.bias_audit start [--full] [--wait]
+    python -m app.services.bias_audit status [--audit-id BA-...]
+    python -m app.services.bias_audit summary [--employer E1] [--by author]
+
+Tuning (environment variables):
+  BIAS_AUDIT_CHUNK       rows per checkpointed chunk             default 2000
+  BIAS_AUDIT_PROCESSES   scanner processes (0 = scan in-process)  default cpu count, max 8
+"""
+import json
+import logging
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from app.services import bias_detection, db, job_queue
+
+logger = logging.getLogger("epq.bias_audit")
+
+KIND = "bias.audit"
+
+SUMMARY_GROUPS = {
+    "category": "category",
+    "author": "COALESCE(author, '')",
+    "employer": "COALESCE(employer_id, '')",
+    "source": "source",
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _scan_texts(texts: List[str]) -> List[Dict]:
+    """Runs in the pool processes: (score, categories) per text."""
+    return [
+        {"score": r["score"], "categories": r["categories"]}
+        for r in bias_detection.scan_many(texts)
+    ]
+
+
+class _Scanner:
+    """Splits a chunk across worker processes (or scans in-process when processes <= 1)."""
+
+    def __init__(self, processes: int):
+        self.processes = processes
+        self.pool: Optional[ProcessPoolExecutor] = None
+        if processes > 1:
+            # spawn: never fork the (multi-threaded) worker process
+            self.pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+
+    def scan(self, texts: List[str]) -> List[Dict]:
+        if not self.pool or len(texts) < 2 * self.processes:
+            return _scan_texts(texts)
+        size = -(-len(texts) // self.processes)
+        parts = [texts[i:i + size] for i in range(0, len(texts), size)]
+        return [r for part in self.pool.map(_scan_texts, parts) for r in part]
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown(wait=True)
+
+
+def _fetch_chunk(source: str, after_id: int, limit: int) -> List[Dict]:
+    _, table, id_col, text_col, extra = next(s for s in bias_detection.AUDIT_SOURCES if s[0] == source)
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        cur.execute(f"""
+            SELECT t.{id_col} AS row_id, t.candidate_id, t.{text_col} AS text, t.timestamp,
+                   asm.employer_id, {extra}
+            FROM {table} t
+            LEFT JOIN applicants ap ON ap.candidate_id = t.candidate_id
+            LEFT JOIN assessments asm ON asm.assessment_id = ap.assessment_id
+            WHERE t.{id_col} > ?
+            ORDER BY t.{id_col}
+            LIMIT ?
+        """, (after_id, limit))
+        return [dict(r) for r in cur.fetchall()]
+    finally:
+        con.close()
+
+
+def _write_chunk(audit_id: str, source: str, rows: List[Dict], results: List[Dict], clear: bool = False) -> int:
+    """
+    Replace findings for the chunk's id range (all of the source's findings if
+    clear) and advance the checkpoint, atomically. Returns rows flagged.
+    """
+    now = db.now_iso()
+    findings = []
+    flagged = 0
+    for row, result in zip(rows, results):
+        if result["categories"]:
+            flagged += 1
+        for category, terms in result["categories"].items():
+            findings.append((
+                source, row["row_id"], category, audit_id, row["candidate_id"], row["employer_id"],
+                row["author"], row["feedback_category"], json.dumps(terms), len(terms),
+                result["score"], row["timestamp"], now,
+            ))
+    first, last = rows[0]["row_id"], rows[-1]["row_id"]
+    with db.connection() as con:
+        cur = con.cursor()
+        if clear:
+            cur.execute("DELETE FROM bias_findings WHERE source = ?", (source,))
+        else:
+            cur.execute(
+                "DELETE FROM bias_findings WHERE source = ? AND row_id >= ? AND row_id <= ?",
+                (source, first, last),
+            )
+        if findings:
+            cur.executemany("""
+                INSERT INTO bias_findings (source, row_id, category, audit_id, candidate_id, employer_id,
+                                           author, feedback_category, terms_json, term_count, score,
+                                           text_timestamp, found_utc)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, findings)
+        cur.execute(f"""
+            UPDATE bias_audit_runs
+            SET {source}_cursor = ?, rows_scanned = rows_scanned + ?, rows_flagged = rows_flagged + ?
+            WHERE audit_id = ?
+        """, (last, len(rows), flagged, audit_id))
+    return flagged
+
+
+def get_run(audit_id: str = "") -> Optional[Dict]:
+    """One audit run (or the latest)."""
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        if audit_id:
+            cur.execute("SELECT * FROM bias_audit_runs WHERE audit_id = ?", (audit_id,))
+        else:
+            cur.execute("SELECT * FROM bias_audit_runs ORDER BY created_utc DESC LIMIT 1")
+        row = cur.fetchone()
+        return dict(row) if row else None
+    finally:
+        con.close()
+
+
+def start_audit(full: bool = False, requested_by: str = "") -> Dict:
+    """
+    Queue an audit, or return the one already queued / running. Incremental
+    audits start from the last finished run's checkpoints.
+    """
+    with db.connection() as con:
+        cur = con.cursor()
+        cur.execute("""
+            SELECT * FROM bias_audit_runs WHERE status IN ('queued', 'running')
+            ORDER BY created_utc DESC LIMIT 1
+        """)
+        active = cur.fetchone()
+        if active:
+            return dict(active)
+        note_cursor = feedback_cursor = 0
+        if not full:
+            cur.execute("""
+                SELECT note_cursor, feedback_cursor FROM bias_audit_runs
+                WHERE status = 'done' ORDER BY created_utc DESC LIMIT 1
+            """)
+            last = cur.fetchone()
+            if last:
+                note_cursor, feedback_cursor = int(last["note_cursor"]), int(last["feedback_cursor"])
+        audit_id = "BA-" + uuid.uuid4().hex
+        cur.execute("""
+            INSERT INTO bias_audit_runs (audit_id, status, full_scan, note_cursor, feedback_cursor,
+                                         requested_by, created_utc)
+            VALUES (?, 'queued', ?, ?, ?, ?, ?)
+        """, (audit_id, 1 if full else 0, note_cursor, feedback_cursor, requested_by, db.now_iso()))
+    job_queue.enqueue(KIND, {"audit_id": audit_id}, job_id="J-" + audit_id)
+    return get_run(audit_id)
+
+
+def _on_dead(payload: Dict, error: str):
+    with db.connection() as con:
+        con.execute("""
+            UPDATE bias_audit_runs SET status = 'failed', error = ?, finished_utc = ?
+            WHERE audit_id = ?
+        """, ((error or "audit failed")[:2000], db.now_iso(), payload.get("audit_id", "")))
+
+
+@job_queue.register(KIND, on_dead=_on_dead)
+def run_audit(payload: Dict) -> Dict:
+    """Scan from the run's checkpoints to the end of both sources. Safe to re-run after a crash."""
+    audit_id = payload["audit_id"]
+    run = get_run(audit_id)
+    if not run or run["status"] in ("done", "failed"):
+        return run or {}
+    with db.connection() as con:
+        con.execute("""
+            UPDATE bias_audit_runs SET status = 'running', started_utc = COALESCE(started_utc, ?)
+            WHERE audit_id = ?
+        """, (db.now_iso(), audit_id))
+
+    chunk = max(1, _env_int("BIAS_AUDIT_CHUNK", 2000))
+    scanner = _Scanner(_env_int("BIAS_AUDIT_PROCESSES", min(8, os.cpu_count() or 1)))
+    try:
+        for source, *_ in bias_detection.AUDIT_SOURCES:
+            cursor = int(run[f"{source}_cursor"])
+            # A full run clears the source with its first chunk (not again after resuming from a checkpoint)
+            clear = bool(run["full_scan"]) and cursor == 0
+            while True:
+                rows = _fetch_chunk(source, cursor, chunk)
+                if not rows:
+                    if clear:
+                        with db.connection() as con:
+                            con.execute("DELETE FROM bias_findings WHERE source = ?", (source,))
+                    break
+                results = scanner.scan([r["text"] or "" for r in rows])
+                _write_chunk(audit_id, source, rows, results, clear=clear)
+                clear = False
+                cursor = rows[-1]["row_id"]
+            logger.info(f"[BIAS_AUDIT] {audit_id}: {source} scanned up to id {cursor}")
+    finally:
+        scanner.close()
+
+    with db.connection() as con:
+        con.execute(
+            "UPDATE bias_audit_runs SET status = 'done', finished_utc = ?, error = NULL WHERE audit_id = ?",
+            (db.now_iso(), audit_id),
+        )
+    return get_run(audit_id)
+
+
+def summary(employer_id: str = "", by: str = "category", since: str = "", until: str = "") -> Dict:
+    """
+    Flagged-text counts grouped by category, author, employer or source
+    (optionally for one employer and a text timestamp window [since, until)).
+    """
+    if by not in SUMMARY_GROUPS:
+        raise ValueError(f"by must be one of {', '.join(SUMMARY_GROUPS)}")
+    where, params = [], []
+    if employer_id:
+        where.append("employer_id = ?")
+        params.append(employer_id)
+    if since:
+        where.append("text_timestamp >= ?")
+        params.append(since)
+    if until:
+        where.append("text_timestamp < ?")
+        params.append(until)
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    key = SUMMARY_GROUPS[by]
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        cur.execute(f"""
+            SELECT {key} AS grp, COUNT(*) AS findings, COUNT(DISTINCT source || ':' || row_id) AS texts,
+                   SUM(term_count) AS terms
+            FROM bias_findings {clause}
+            GROUP BY {key}
+            ORDER BY findings DESC, grp
+        """, params)
+        groups = [
+            {by: r["grp"], "findings": int(r["findings"]), "texts": int(r["texts"]), "terms": int(r["terms"] or 0)}
+            for r in cur.fetchall()
+        ]
+        cur.execute(f"""
+            SELECT COUNT(*) AS findings, COUNT(DISTINCT source || ':' || row_id) AS texts
+            FROM bias_findings {clause}
+        """, params)
+        total = cur.fetchone()
+    finally:
+        con.close()
+    return {
+        "by": by,
+        "groups": groups,
+        "total_findings": int(total["findings"] or 0),
+        "flagged_texts": int(total["texts"] or 0),
+        "last_run": get_run(),
+    }
+
+
+def main(argv=None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m app.services.bias_audit")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("start", help="queue an audit")
+    p.add_argument("--full", action="store_true", help="rescan every row, not just rows added since the last audit")
+    p.add_argument("--wait", action="store_true", help="run it in this process instead of leaving it to a worker")
+    p = sub.add_parser("status", help="print an audit run (default: the latest)")
+    p.add_argument("--audit-id", default="")
+    p = sub.add_parser("summary", help="print aggregate findings")
+    p.add_argument("--employer", default="")
+    p.add_argument("--by", default="category", choices=sorted(SUMMARY_GROUPS))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.cmd == "start":
+        run = start_audit(full=args.full, requested_by="cli")
+        if args.wait:
+            run = run_audit({"audit_id": run["audit_id"]})
+        print(run)
+    elif args.cmd == "status":
+        print(json.dumps(get_run(args.audit_id) or {"status": "never_run"}, indent=2))
+    elif args.cmd == "summary":
+        print(json.dumps(summary(args.employer, args.by), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
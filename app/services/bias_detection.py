@@ -3,7 +3,7 @@
 Enhanced bias detection for candidate notes and feedback.
 Provides context-aware warnings and educational prompts.
 """
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterable, Iterator
 import re
 
 class BiasPattern:
@@ -107,67 +107,131 @@ BIAS_PATTERNS = [
     ),
 ]
 
-def detect_bias(text: str) -> Optional[Dict[str, any]]:
+# Points per distinct matched term, by category (anything unlisted: 10)
+SEVERITY = {
+    "age": 20, "family_status": 20, "accent_origin": 20,                 # High severity
+    "culture_fit": 15, "gendered_language": 15, "gut_feeling": 15,       # Medium severity
+}
+DEFAULT_SEVERITY = 10  # Lower severity (still problematic)
+
+
+def _compile_scanner(patterns: List[BiasPattern]):
     """
-    Detect bias patterns in text and return detailed feedback.
-    
-    Returns:
-        None if no bias detected
-        Dict with category, warning, education, and matched_terms if bias found
+    One alternation regex over every pattern, a named group per pattern, so a
+    single pass over the text finds all categories. Inner groups are made
+    non-capturing so m.lastgroup is always the pattern's group. Where two
+    categories could match the same span, the earlier pattern wins.
+    """
+    parts = []
+    for i, p in enumerate(patterns):
+        body = re.sub(r"(?<!\\)\((?!\?)", "(?:", p.pattern) if p.is_regex else rf"\b{p.pattern}\b"
+        parts.append(f"(?P<p{i}>{body})")
+    return re.compile("|".join(parts))
+
+
+_SCANNER = _compile_scanner(BIAS_PATTERNS)
+
+
+def scan(text: str) -> Dict[str, any]:
+    """
+    Single-pass scan returning detection and score together:
+        {"detection": <detect_bias() result or None>, "score": <get_bias_score()>,
+         "categories": {category: [matched terms]}}
     """
     if not text:
-        return None
+        return {"detection": None, "score": 0, "categories": {}}
     
-    text_lower = text.lower()
-    matched_patterns = []
+    # pattern index -> distinct matched terms, in order of appearance
+    found: Dict[int, Dict[str, None]] = {}
+    for m in _SCANNER.finditer(text.lower()):
+        found.setdefault(int(m.lastgroup[1:]), {})[m.group()] = None
     
-    for pattern in BIAS_PATTERNS:
-        if pattern.is_regex:
-            matches = re.findall(pattern.pattern, text_lower)
-            if matches:
-                matched_patterns.append({
-                    "category": pattern.category,
-                    "warning": pattern.warning,
-                    "education": pattern.education,
-                    "matched_terms": list(set(matches))
-                })
+    matched_patterns = []
+    score = 0
+    for i in sorted(found):
+        pattern, terms = BIAS_PATTERNS[i], list(found[i])
+        matched_patterns.append({
+            "category": pattern.category,
+            "warning": pattern.warning,
+            "education": pattern.education,
+            "matched_terms": terms
+        })
+        score += SEVERITY.get(pattern.category, DEFAULT_SEVERITY) * len(terms)
     
     # Return the first match (or could combine multiple)
+    detection = None
     if matched_patterns:
-        result = matched_patterns[0]
+        detection = dict(matched_patterns[0])
         # If multiple categories detected, note it
         if len(matched_patterns) > 1:
-            result["additional_concerns"] = [p["category"] for p in matched_patterns[1:]]
-        return result
+            detection["additional_concerns"] = [p["category"] for p in matched_patterns[1:]]
     
-    return None
+    return {
+        "detection": detection,
+        "score": min(score, 100),
+        "categories": {p["category"]: p["matched_terms"] for p in matched_patterns}
+    }
+
+def detect_bias(text: str) -> Optional[Dict[str, any]]:
+    """
+    Detect bias patterns in text and return detailed feedback.
+    
+    Returns:
+        None if no bias detected
+        Dict with category, warning, education, and matched_terms if bias found
+    """
+    return scan(text)["detection"]
 
 def get_bias_score(text: str) -> int:
     """
     Calculate a bias score (0-100) based on number and severity of bias indicators.
     Higher scores indicate more potential bias.
     """
-    if not text:
-        return 0
-    
-    text_lower = text.lower()
-    score = 0
-    
-    for pattern in BIAS_PATTERNS:
-        if pattern.is_regex:
-            matches = re.findall(pattern.pattern, text_lower)
-            if matches:
-                # High severity patterns
-                if pattern.category in ["age", "family_status", "accent_origin"]:
-                    score += 20 * len(set(matches))
-                # Medium severity
-                elif pattern.category in ["culture_fit", "gendered_language", "gut_feeling"]:
-                    score += 15 * len(set(matches))
-                # Lower severity (still problematic)
-                else:
-                    score += 10 * len(set(matches))
-    
-    return min(score, 100)
+    return scan(text)["score"]
+
+def scan_many(texts: Iterable[str]) -> Iterator[Dict[str, any]]:
+    """scan() over many texts with the shared compiled scanner."""
+    for text in texts:
+        yield scan(text)
+
+# Stored free text that can carry bias: (source, table, id column, text column, extra columns)
+AUDIT_SOURCES = (
+    ("note", "candidate_notes", "note_id", "text", "t.author AS author, NULL AS feedback_category"),
+    ("feedback", "candidate_feedback", "feedback_id", "comment", "NULL AS author, t.category AS feedback_category"),
+)
+
+def iter_stored_scans(batch_size: int = 500, flagged_only: bool = True) -> Iterator[Dict[str, any]]:
+    """
+    Batch mode: re-scan every candidate_notes / candidate_feedback row, streamed
+    in batches (db.stream_rows) so memory stays flat. Yields one dict per row
+    (only rows with findings unless flagged_only=False).
+    """
+    from app.services import db
+    for source, table, id_col, text_col, extra in AUDIT_SOURCES:
+        sql = f"""
+            SELECT t.{id_col} AS row_id, t.candidate_id, t.{text_col} AS text, t.timestamp,
+                   asm.employer_id, {extra}
+            FROM {table} t
+            LEFT JOIN applicants ap ON ap.candidate_id = t.candidate_id
+            LEFT JOIN assessments asm ON asm.assessment_id = ap.assessment_id
+            ORDER BY t.{id_col}
+        """
+        for batch in db.stream_rows(sql, (), batch_size):
+            for row in batch:
+                result = scan(row["text"])
+                if flagged_only and not result["categories"]:
+                    continue
+                yield {
+                    "source": source,
+                    "row_id": row["row_id"],
+                    "candidate_id": row["candidate_id"],
+                    "employer_id": row["employer_id"],
+                    "author": row["author"],
+                    "feedback_category": row["feedback_category"],
+                    "timestamp": row["timestamp"],
+                    "score": result["score"],
+                    "categories": result["categories"],
+                }
 
 def suggest_alternative(text: str, category: str) -> Optional[str]:
     """
@@ -187,3 +251,24 @@ def suggest_alternative(text: str, category: str) -> Optional[str]:
     }
     
     return alternatives.get(category)
+
+def main(argv=None) -> int:
+    import argparse
+    from collections import Counter
+    parser = argparse.ArgumentParser(prog="python -m app.services.bias_detection")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("audit", help="re-scan stored notes and feedback; print counts by category")
+    p.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "audit":
+        rows, by_category = 0, Counter()
+        for finding in iter_stored_scans(args.batch_size):
+            rows += 1
+            by_category.update(finding["categories"].keys())
+        print({"flagged_rows": rows, "by_category": dict(by_category)})
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
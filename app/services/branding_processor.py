@@ -1,6 +1,6 @@
 # app/services/branding_processor.py
 """Image processing service for tenant branding"""
-from PIL import Image
+from PIL import Image, ImageChops, ImageStat
 import io
 import colorsys
 
@@ -76,15 +76,12 @@ class BrandingProcessor:
         if img.mode != 'RGBA':
             img = img.convert('RGBA')
         
-        data = img.load()
-        width, height = img.size
-        
-        for y in range(height):
-            for x in range(width):
-                r, g, b, a = data[x, y]
-                # Make white/near-white pixels transparent
-                if r > 240 and g > 240 and b > 240:
-                    data[x, y] = (255, 255, 255, 0)
+        # Make white/near-white pixels transparent: all of R, G, B > 240,
+        # i.e. the darkest channel > 240 (channel ops, no per-pixel Python)
+        r, g, b, _ = img.split()
+        darkest = ImageChops.darker(ImageChops.darker(r, g), b)
+        mask = darkest.point(lambda v: 255 if v > 240 else 0, '1')
+        img.paste((255, 255, 255, 0), mask=mask)
         
         output = io.BytesIO()
         img.save(output, format='PNG', optimize=True)
@@ -130,11 +127,9 @@ class BrandingProcessor:
             center_y + sample_size
         ))
         
-        # Get average RGB
-        pixels = list(region.getdata())
-        avg_r = sum(p[0] for p in pixels) // len(pixels)
-        avg_g = sum(p[1] for p in pixels) // len(pixels)
-        avg_b = sum(p[2] for p in pixels) // len(pixels)
+        # Get average RGB (per-channel sums from the histogram)
+        count = region.width * region.height
+        avg_r, avg_g, avg_b = (int(total) // count for total in ImageStat.Stat(region).sum)
         
         # Desaturate for subtle accent
         h, s, v = colorsys.rgb_to_hsv(avg_r/255, avg_g/255, avg_b/255)
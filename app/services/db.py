@@ -5,29 +5,40 @@ import os
 import sqlite3
 from pathlib import Path
 
+from app.services import db_pool
+
 # Set up database path for SQLite (development)
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DB_PATH = Path(os.getenv("DB_PATH") or (PROJECT_ROOT / "epq.db")).resolve()
 
 # Database connection with PostgreSQL support for production
 def connect():
-    """Get database connection - PostgreSQL if DATABASE_URL is set, otherwise SQLite"""
-    database_url = os.environ.get("DATABASE_URL")
-    
-    if database_url:
-        # PostgreSQL connection for production
-        try:
-            import psycopg2
-            from psycopg2.extras import RealDictCursor
-            conn = psycopg2.connect(database_url, cursor_factory=RealDictCursor)
-            return conn
-        except ImportError:
-            raise RuntimeError("psycopg2-binary required for PostgreSQL. Install with: pip install psycopg2-binary")
-    else:
-        # SQLite connection for development (existing code)
-        conn = sqlite3.connect(str(DB_PATH))
-        conn.row_factory = sqlite3.Row
-        return conn
+    """
+    Get a pooled database connection - PostgreSQL if DATABASE_URL is set, otherwise SQLite.
+    con.close() returns it to the pool (see app/services/db_pool.py).
+    """
+    return db_pool.get_pool(DB_PATH, os.environ.get("DATABASE_URL")).connect()
+
+def connection():
+    """
+    Context-managed pooled connection: commits on success, rolls back on error.
+
+        with db.connection() as con:
+            con.execute(...)
+    """
+    return db_pool.pooled(db_pool.get_pool(DB_PATH, os.environ.get("DATABASE_URL")))
+
+def stream_rows(sql: str, params=(), batch_size: int = 500):
+    """
+    Generator of row batches (lists of at most batch_size rows) for one query,
+    read through a streaming cursor: memory stays O(batch_size) however large
+    the result. Close the generator (or exhaust it) to release the connection.
+    """
+    return db_pool.get_pool(DB_PATH, os.environ.get("DATABASE_URL")).stream(sql, params, batch_size)
+
+def pool_stats() -> dict:
+    """Current connection pool counters (backend, idle/in-use, checkouts)."""
+    return db_pool.get_pool(DB_PATH, os.environ.get("DATABASE_URL")).stats()
 
 def now_iso() -> str:
     """Return current UTC timestamp in ISO format."""
@@ -59,24 +70,6 @@ def init_db():
         )
         """)
         
-        # Add new columns to existing employers table (PostgreSQL compatible)
-        columns_to_add = [
-            ("email_verified", "INTEGER DEFAULT 0"),
-            ("verification_token", "TEXT"),
-            ("verification_token_expires", "TEXT"),
-            ("reset_token", "TEXT"),
-            ("reset_token_expires", "TEXT")
-        ]
-        
-        for column_name, column_def in columns_to_add:
-            try:
-                if database_url:  # PostgreSQL
-                    cur.execute(f"ALTER TABLE employers ADD COLUMN IF NOT EXISTS {column_name} {column_def}")
-                else:  # SQLite
-                    cur.execute(f"ALTER TABLE employers ADD COLUMN {column_name} {column_def}")
-            except Exception:
-                pass  # Column already exists
-        
         # Create assessments table
         cur.execute("""
         CREATE TABLE IF NOT EXISTS assessments (
@@ -175,10 +168,46 @@ def init_db():
             FOREIGN KEY (webhook_id) REFERENCES webhooks(webhook_id) ON DELETE CASCADE
         )
         """)
-        
+
+        # Persisted scores (see app/services/applicant_scores.py):
+        # one row per candidate x construct ...
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS applicant_scores (
+            candidate_id TEXT NOT NULL,
+            construct TEXT NOT NULL,
+            score REAL NOT NULL,
+            scorer_version TEXT NOT NULL,
+            computed_utc TEXT NOT NULL,
+            PRIMARY KEY (candidate_id, construct),
+            FOREIGN KEY (candidate_id) REFERENCES applicants(candidate_id) ON DELETE CASCADE
+        )
+        """)
+
+        # ... plus one summary row per candidate (overall + environment dimensions)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS applicant_score_summary (
+            candidate_id TEXT PRIMARY KEY,
+            overall_average REAL,
+            overall_band TEXT,
+            autonomy INTEGER,
+            pace INTEGER,
+            structure INTEGER,
+            collaboration INTEGER,
+            innovation INTEGER,
+            ambiguity INTEGER,
+            scorer_version TEXT NOT NULL,
+            computed_utc TEXT NOT NULL,
+            FOREIGN KEY (candidate_id) REFERENCES applicants(candidate_id) ON DELETE CASCADE
+        )
+        """)
+
         con.commit()
     finally:
         con.close()
+
+    # Column additions and secondary indexes are versioned migrations (app/migrations/)
+    from app.services import migrations
+    migrations.migrate()
 # -------------------------
 # Employer helpers
 # -------------------------
@@ -310,6 +339,118 @@ def get_applicant_responses_json(candidate_id: str):
             pass
 
 
+# -------------------------
+# Employer submission feed
+# -------------------------
+# Lightweight projection: no responses_json / score_json.
+SUBMISSION_FEED_COLUMNS = """
+    ap.candidate_id,
+    ap.assessment_id,
+    ap.applicant_name,
+    ap.applicant_email,
+    ap.submitted_utc,
+    ap.pdf_status,
+    ap.pdf_filename,
+    ap.pdf_error,
+    s.role_id,
+    s.environment,
+    s.max_questions
+"""
+
+def encode_submission_cursor(row: dict) -> str:
+    """Opaque keyset cursor for the row a page ended on: (submitted_utc, candidate_id)."""
+    import base64
+    raw = json.dumps([row.get("submitted_utc") or "", row.get("candidate_id") or ""])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_submission_cursor(cursor: str):
+    import base64
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        submitted_utc, candidate_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return str(submitted_utc), str(candidate_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def list_applicant_submissions_for_employer(
+    employer_id: str,
+    status=None,
+    since: str = "",
+    until: str = "",
+    order: str = "newest",
+    limit: int | None = None,
+    cursor: str = "",
+):
+    """
+    All submissions across an employer's assessments in ONE joined query
+    (applicants JOIN assessments on employer_id), as list[dict] using
+    SUBMISSION_FEED_COLUMNS.
+
+    Filters:  status  - pdf_status value or list of values
+              since / until - ISO timestamps, since <= submitted_utc < until
+    Sorting:  order   - "newest" (default) or "oldest"; ties broken by candidate_id
+    Paging:   limit + cursor (keyset on submitted_utc, candidate_id; see
+              list_applicant_submissions_page)
+    """
+    descending = (order or "newest") != "oldest"
+    where = ["s.employer_id = ?"]
+    params: list = [employer_id]
+
+    if status:
+        statuses = [status] if isinstance(status, str) else list(status)
+        where.append(f"ap.pdf_status IN ({','.join('?' * len(statuses))})")
+        params.extend(statuses)
+    if since:
+        where.append("ap.submitted_utc >= ?")
+        params.append(since)
+    if until:
+        where.append("ap.submitted_utc < ?")
+        params.append(until)
+    if cursor:
+        after_utc, after_id = decode_submission_cursor(cursor)
+        op = "<" if descending else ">"
+        where.append(f"(ap.submitted_utc {op} ? OR (ap.submitted_utc = ? AND ap.candidate_id {op} ?))")
+        params.extend([after_utc, after_utc, after_id])
+
+    direction = "DESC" if descending else "ASC"
+    sql = f"""
+        SELECT {SUBMISSION_FEED_COLUMNS}
+        FROM applicants ap
+        JOIN assessments s ON s.assessment_id = ap.assessment_id
+        WHERE {" AND ".join(where)}
+        ORDER BY ap.submitted_utc {direction}, ap.candidate_id {direction}
+    """
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    con = connect()
+    try:
+        cur = con.cursor()
+        cur.execute(sql, params)
+        return [dict(r) for r in cur.fetchall()]
+    finally:
+        try:
+            con.close()
+        except Exception:
+            pass
+
+def list_applicant_submissions_page(employer_id: str, limit: int = 50, cursor: str = "", **filters):
+    """
+    One page of the employer submission feed:
+      {"items": [...], "next_cursor": "<opaque>" | None}
+    Pass next_cursor back (with the same filters/order) to get the following page.
+    """
+    limit = max(1, int(limit))
+    rows = list_applicant_submissions_for_employer(employer_id, limit=limit + 1, cursor=cursor, **filters)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "items": rows,
+        "next_cursor": encode_submission_cursor(rows[-1]) if has_more and rows else None,
+    }
+
+
 # -------------------------
 # Added helpers (auto-patch)
 # -------------------------
@@ -404,9 +545,22 @@ def create_applicant(
         except Exception:
             pass
 
-def update_applicant_pdf_status(candidate_id: str, pdf_status: str, pdf_filename: str = ""):
+def _enqueue_webhook_events(cur, webhook_events):
+    """
+    Write (employer_id, event_type, data) events to the webhook outbox on the
+    caller's cursor, so they commit (or roll back) with the row change.
+    """
+    if not webhook_events:
+        return
+    from app.services import webhook_outbox
+    for employer_id, event_type, data in webhook_events:
+        webhook_outbox.enqueue_event(cur, employer_id, event_type, data)
+
+def update_applicant_pdf_status(candidate_id: str, pdf_status: str, pdf_filename: str = "",
+                                webhook_events=None):
     """
     Update PDF generation status for an applicant.
+    webhook_events are written to the outbox in the same transaction.
     """
     con = connect()
     try:
@@ -415,6 +569,7 @@ def update_applicant_pdf_status(candidate_id: str, pdf_status: str, pdf_filename
             "UPDATE applicants SET pdf_status = ?, pdf_filename = ? WHERE candidate_id = ?",
             (pdf_status, pdf_filename or "", candidate_id),
         )
+        _enqueue_webhook_events(cur, webhook_events)
         con.commit()
         return True
     finally:
@@ -442,11 +597,11 @@ def set_applicant_pdf_error(candidate_id: str, pdf_error: str):
         except Exception:
             pass
 
-def set_applicant_pdf_success(candidate_id: str, pdf_filename: str):
+def set_applicant_pdf_success(candidate_id: str, pdf_filename: str, webhook_events=None):
     """
     Mark PDF generation as successful.
     """
-    return update_applicant_pdf_status(candidate_id, "success", pdf_filename)
+    return update_applicant_pdf_status(candidate_id, "success", pdf_filename, webhook_events=webhook_events)
 
 def set_applicant_pdf_failed(candidate_id: str, error_message: str):
     """
@@ -759,6 +914,7 @@ def create_applicant_submission(
     pdf_filename: str = "",
     pdf_error: str = "",
     submitted_utc: str = "",
+    webhook_events=None,
     **kwargs,
 ):
     import datetime, uuid, json
@@ -821,6 +977,8 @@ def create_applicant_submission(
                 submitted_utc,
             ),
         )
+        # Outbox rows commit atomically with the applicant (see webhook_outbox)
+        _enqueue_webhook_events(cur, webhook_events)
         con.commit()
         return {
             "candidate_id": candidate_id,
@@ -869,13 +1027,53 @@ def mark_role_configured(employer_id: str, role_id: str):
         try: con.close()
         except Exception: pass
 
+def _table_exists(cur, table: str) -> bool:
+    if os.environ.get("DATABASE_URL"):
+        cur.execute("SELECT 1 FROM information_schema.tables WHERE table_name = ?", (table,))
+    else:
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cur.fetchone() is not None
+
+def delete_assessments_cascade(cur, employer_id: str, aids: list):
+    """
+    Deletes assessments and their applicants, with the applicants' responses,
+    stored scores and team membership, then rebuilds the employer's score
+    rollups and team profiles. Runs on cur, inside the caller's transaction;
+    call invalidate_employer_caches(employer_id) after commit.
+    """
+    if not aids:
+        return
+    qMarks = ",".join(["?"] * len(aids))
+    cur.execute(f"SELECT candidate_id FROM applicants WHERE assessment_id IN ({qMarks})", aids)
+    cids = [r["candidate_id"] for r in cur.fetchall()]
+    for i in range(0, len(cids), 500):
+        chunk = cids[i:i + 500]
+        cMarks = ",".join(["?"] * len(chunk))
+        cur.execute(f"DELETE FROM applicant_scores WHERE candidate_id IN ({cMarks})", chunk)
+        cur.execute(f"DELETE FROM applicant_score_summary WHERE candidate_id IN ({cMarks})", chunk)
+        cur.execute(f"DELETE FROM team_members WHERE employer_id = ? AND candidate_id IN ({cMarks})", [employer_id, *chunk])
+    cur.execute(f"DELETE FROM applicants WHERE assessment_id IN ({qMarks})", aids)
+    if _table_exists(cur, "applicant_responses"):
+        cur.execute(f"DELETE FROM applicant_responses WHERE assessment_id IN ({qMarks})", aids)
+    cur.execute(f"DELETE FROM assessments WHERE assessment_id IN ({qMarks})", aids)
+
+    from app.services import score_rollups, team_fit
+    score_rollups.rebuild(cur, employer_id)
+    team_fit.rebuild_profiles(cur, employer_id)
+
+def invalidate_employer_caches(employer_id: str):
+    """Drop in-process caches built from an employer's applicants (after deleting some)."""
+    from app.services import similarity_index, team_fit
+    team_fit.invalidate(employer_id)
+    similarity_index.invalidate(employer_id)
+
 def delete_role_cascade(employer_id: str, role_id: str):
     """
-    Deletes a role and associated assessments + applicants + applicant_responses.
+    Deletes a role and associated assessments + applicants (with their
+    responses, scores and team membership).
     Safe: only deletes rows belonging to this employer_id.
     """
-    con = connect()
-    try:
+    with connection() as con:
         cur = con.cursor()
 
         # collect assessments for this role
@@ -884,19 +1082,11 @@ def delete_role_cascade(employer_id: str, role_id: str):
             (employer_id, role_id),
         )
         aids = [r["assessment_id"] for r in cur.fetchall()]
-
-        if aids:
-            qMarks = ",".join(["?"] * len(aids))
-            cur.execute(f"DELETE FROM applicants WHERE assessment_id IN ({qMarks})", aids)
-            cur.execute(f"DELETE FROM applicant_responses WHERE assessment_id IN ({qMarks})", aids)
-            cur.execute(f"DELETE FROM assessments WHERE assessment_id IN ({qMarks})", aids)
+        delete_assessments_cascade(cur, employer_id, aids)
 
         cur.execute("DELETE FROM roles WHERE employer_id = ? AND role_id = ?", (employer_id, role_id))
-        con.commit()
-        return True
-    finally:
-        try: con.close()
-        except Exception: pass
+    invalidate_employer_caches(employer_id)
+    return True
 
 # -------------------------
 # Applicant PDF status helpers
@@ -0,0 +1,494 @@
+# app/services/db_pool.py
+"""
+Connection pooling for app.services.db.connect().
+
+- SQLite (development / single node): free list of independent handles;
+  each connect() (nested or not) gets its own.
+- PostgreSQL (DATABASE_URL set): bounded pool of psycopg2 connections with
+  min/max size, checkout timeout and health checks.
+
+Callers keep the old API: `con = db.connect(); ...; con.close()` returns the
+connection to the pool instead of tearing it down. `with db.connection() as con:`
+commits on success, rolls back on error and releases. `db.stream_rows(sql, params)`
+iterates a large result in batches without loading it (exports).
+
+Tuning (environment variables):
+  DB_POOL_MIN             connections opened eagerly (PostgreSQL)   default 1
+  DB_POOL_MAX             hard cap on open connections (PostgreSQL),
+                          idle handles kept (SQLite)                default 10
+  DB_POOL_TIMEOUT         seconds to wait for a free connection     default 10
+  DB_POOL_HEALTHCHECK     re-validate idle connections after N s    default 30
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class PoolExhausted(RuntimeError):
+    """Raised when no connection becomes free within DB_POOL_TIMEOUT."""
+
+
+# Quoted strings, quoted identifiers and comments are copied as they are;
+# only a bare '?' is a placeholder
+_SQL_TOKENS = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|--[^\n]*|/\*.*?\*/|[?%]""", re.S)
+
+
+@lru_cache(maxsize=1024)
+def pg_query(query: str, with_params: bool = True) -> str:
+    """
+    sqlite-style query -> psycopg2: '?' placeholders become %s. With params,
+    psycopg2 also reads '%' anywhere in the text (literals included) as a format
+    character, so every literal '%' is doubled then.
+    """
+    def sub(m):
+        token = m.group(0)
+        if token == "?":
+            return "%s"
+        if not with_params:
+            return token
+        return token.replace("%", "%%")
+
+    return _SQL_TOKENS.sub(sub, query)
+
+
+class _PgCursor:
+    """psycopg2 cursor that accepts the sqlite-style '?' placeholders used across the app."""
+
+    def __init__(self, cur):
+        self._cur = cur
+
+    def execute(self, query, params=None):
+        if params is None:
+            return self._cur.execute(pg_query(query, with_params=False))
+        return self._cur.execute(pg_query(query), params)
+
+    def executemany(self, query, seq):
+        return self._cur.executemany(pg_query(query), seq)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+class PooledConnection:
+    """
+    Proxy handed out by the pool. Behaves like the underlying DB-API connection,
+    except close() (or garbage collection) returns it to the pool.
+    """
+
+    _raw = None
+
+    def __init__(self, pool, raw, kind: str):
+        self._pool = pool
+        self._raw = raw
+        self._kind = kind
+
+    @property
+    def raw(self):
+        if self._raw is None:
+            raise sqlite3.ProgrammingError("Connection already returned to pool")
+        return self._raw
+
+    def cursor(self, *args, **kwargs):
+        cur = self.raw.cursor(*args, **kwargs)
+        return _PgCursor(cur) if self._kind == "postgresql" else cur
+
+    def execute(self, query, params=None):
+        # sqlite3.Connection.execute shortcut; emulate it for psycopg2
+        if self._kind == "sqlite":
+            return self.raw.execute(query, params or ())
+        cur = self.cursor()
+        cur.execute(query, params)
+        return cur
+
+    def executemany(self, query, seq):
+        if self._kind == "sqlite":
+            return self.raw.executemany(query, seq)
+        cur = self.cursor()
+        cur.executemany(query, seq)
+        return cur
+
+    def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._release(raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._raw is not None:
+                if exc_type is None:
+                    self._raw.commit()
+                else:
+                    self._raw.rollback()
+        finally:
+            self.close()
+        return False
+
+    def __del__(self):
+        # Callers that never close() (e.g. `conn = db.get_db()` in services)
+        # still hand the connection back once the proxy goes out of scope.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class SQLitePool:
+    """
+    Free list of independent sqlite3 handles. Every connect() gets a handle of
+    its own, so a nested `with db.connection()` is its own transaction and
+    never commits or rolls back the caller's (as with PostgresPool). Handles
+    are opened with check_same_thread=False, so a proxy closed from another
+    thread (garbage collection, executor hand-offs) still comes back here.
+    At most max_idle handles are kept; SQLite itself needs no hard cap.
+    """
+
+    kind = "sqlite"
+
+    def __init__(self, db_path: Path, max_idle: int = 10, healthcheck_seconds: float = 30.0, timeout: float = 10.0):
+        self.db_path = Path(db_path)
+        self.max_idle = max(1, max_idle)
+        self.healthcheck_seconds = healthcheck_seconds
+        self.timeout = timeout
+        self._idle = deque()  # (conn, returned_at)
+        self._in_use = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._checkouts = 0
+        self._discarded = 0
+
+    def _open(self):
+        con = sqlite3.connect(str(self.db_path), timeout=self.timeout, check_same_thread=False)
+        con.row_factory = sqlite3.Row
+        return con
+
+    def _healthy(self, con) -> bool:
+        try:
+            con.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, con):
+        # Caller holds self._lock
+        self._discarded += 1
+        try:
+            con.close()
+        except Exception:
+            pass
+
+    def connect(self) -> PooledConnection:
+        with self._lock:
+            while self._idle:
+                con, returned_at = self._idle.pop()
+                stale = time.monotonic() - returned_at > self.healthcheck_seconds
+                if stale and not self._healthy(con):
+                    self._discard(con)
+                    continue
+                self._in_use += 1
+                self._checkouts += 1
+                return PooledConnection(self, con, self.kind)
+        con = self._open()
+        with self._lock:
+            self._opened += 1
+            self._in_use += 1
+            self._checkouts += 1
+        return PooledConnection(self, con, self.kind)
+
+    def _release(self, raw):
+        keep = True
+        try:
+            if raw.in_transaction:
+                # Same outcome as closing an uncommitted sqlite3 connection.
+                raw.rollback()
+        except sqlite3.Error:
+            keep = False
+        with self._lock:
+            self._in_use -= 1
+            if keep and not self._closed and len(self._idle) < self.max_idle:
+                self._idle.append((raw, time.monotonic()))
+            else:
+                self._discard(raw)
+
+    def close_all(self):
+        """
+        Close the idle handles (shutdown / pool replacement). Checked-out ones
+        stay usable and are closed when released.
+        """
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+
+    def stream(self, sql: str, params=(), batch_size: int = 500):
+        """
+        Yield the rows of one query in lists of batch_size, without materializing
+        the result. Uses its own connection so the generator can be advanced from
+        any thread (StreamingResponse iterates in a threadpool); WAL keeps it
+        from blocking writers.
+        """
+        con = sqlite3.connect(str(self.db_path), timeout=self.timeout, check_same_thread=False)
+        con.row_factory = sqlite3.Row
+        with self._lock:
+            self._opened += 1
+        try:
+            cur = con.execute(sql, params or ())
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            con.close()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.kind,
+            "path": str(self.db_path),
+            "max_idle": self.max_idle,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "opened": self._opened,
+            "checkouts": self._checkouts,
+            "discarded": self._discarded,
+        }
+
+
+class PostgresPool:
+    """Bounded, thread-safe pool of psycopg2 connections."""
+
+    kind = "postgresql"
+
+    def __init__(self, dsn: str, minconn: int = 1, maxconn: int = 10,
+                 timeout: float = 10.0, healthcheck_seconds: float = 30.0):
+        try:
+            import psycopg2
+            from psycopg2.extras import RealDictCursor
+        except ImportError:
+            raise RuntimeError("psycopg2-binary required for PostgreSQL. Install with: pip install psycopg2-binary")
+        self._psycopg2 = psycopg2
+        self._cursor_factory = RealDictCursor
+        self.dsn = dsn
+        self.minconn = max(0, minconn)
+        self.maxconn = max(1, maxconn, self.minconn)
+        self.timeout = timeout
+        self.healthcheck_seconds = healthcheck_seconds
+        self._idle = deque()  # (conn, returned_at)
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._checkouts = 0
+        self._discarded = 0
+        for _ in range(self.minconn):
+            self._idle.append((self._open(), time.monotonic()))
+
+    def _open(self):
+        return self._psycopg2.connect(self.dsn, cursor_factory=self._cursor_factory)
+
+    def _healthy(self, con) -> bool:
+        if con.closed:
+            return False
+        try:
+            with con.cursor() as cur:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+            con.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, con):
+        self._discarded += 1
+        try:
+            con.close()
+        except Exception:
+            pass
+
+    def connect(self) -> PooledConnection:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                while self._idle:
+                    con, returned_at = self._idle.pop()
+                    stale = time.monotonic() - returned_at > self.healthcheck_seconds
+                    if con.closed or (stale and not self._healthy(con)):
+                        self._discard(con)
+                        continue
+                    self._in_use += 1
+                    self._checkouts += 1
+                    return PooledConnection(self, con, self.kind)
+                if self._in_use + len(self._idle) < self.maxconn:
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhausted(f"No database connection available within {self.timeout}s (max={self.maxconn})")
+                self._cond.wait(remaining)
+        # Open outside the lock so a slow handshake doesn't block other threads.
+        try:
+            con = self._open()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._checkouts += 1
+        return PooledConnection(self, con, self.kind)
+
+    def _release(self, raw):
+        keep = not raw.closed
+        if keep:
+            try:
+                # Uncommitted work is discarded, as it was when callers closed the connection.
+                raw.rollback()
+            except Exception:
+                keep = False
+        with self._cond:
+            self._in_use -= 1
+            if keep and not self._closed:
+                self._idle.append((raw, time.monotonic()))
+            else:
+                self._discard(raw)
+            self._cond.notify()
+
+    def stream(self, sql: str, params=(), batch_size: int = 500):
+        """
+        Yield the rows of one query in lists of batch_size through a named
+        (server-side) cursor, so only one batch is held in memory. Runs on a
+        connection of its own, outside the pool: a client-paced download must
+        not hold one of the maxconn slots while the per-batch lookups need more.
+        """
+        con = self._open()
+        try:
+            cur = con.cursor(name=f"stream_{uuid.uuid4().hex[:12]}")
+            cur.itersize = batch_size
+            cur.execute(pg_query(sql, with_params=bool(params)), params or None)
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+            cur.close()
+        finally:
+            # Closing without a commit also drops an unfinished named cursor
+            try:
+                con.close()
+            except Exception:
+                pass
+
+    def close_all(self):
+        """
+        Close the idle connections (shutdown / pool replacement). Checked-out
+        ones stay usable and are closed when released.
+        """
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.kind,
+            "min": self.minconn,
+            "max": self.maxconn,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "checkouts": self._checkouts,
+            "discarded": self._discarded,
+        }
+
+
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(db_path: Path, database_url: Optional[str] = None):
+    """Return the process-wide pool, (re)building it if the target database changed."""
+    global _pool, _pool_key
+    key = database_url or str(db_path)
+    if _pool is not None and _pool_key == key:
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_key != key:
+            old = _pool
+            timeout = _env_float("DB_POOL_TIMEOUT", 10.0)
+            healthcheck = _env_float("DB_POOL_HEALTHCHECK", 30.0)
+            if database_url:
+                _pool = PostgresPool(
+                    database_url,
+                    minconn=_env_int("DB_POOL_MIN", 1),
+                    maxconn=_env_int("DB_POOL_MAX", 10),
+                    timeout=timeout,
+                    healthcheck_seconds=healthcheck,
+                )
+            else:
+                _pool = SQLitePool(
+                    db_path,
+                    max_idle=_env_int("DB_POOL_MAX", 10),
+                    healthcheck_seconds=healthcheck,
+                    timeout=timeout,
+                )
+            _pool_key = key
+            if old is not None:
+                old.close_all()
+    return _pool
+
+
+def close_pool():
+    """Close pooled connections (call on application shutdown)."""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = None
+        _pool_key = None
+
+
+@contextmanager
+def pooled(pool):
+    """Check out a connection; commit on success, roll back on error, always release."""
+    con = pool.connect()
+    try:
+        yield con
+        con.commit()
+    except Exception:
+        try:
+            con.rollback()
+        except Exception:
+            pass
+        raise
+    finally:
+        con.close()
@@ -4,6 +4,11 @@ Map psychometric construct scores to environment dimensions.
 """
 from typing import Dict
 
+# Bump when the construct -> dimension formulas change (invalidates persisted scores).
+ENVIRONMENT_MAPPER_VERSION = "env-v1"
+
+ENVIRONMENT_DIMENSIONS = ("autonomy", "pace", "structure", "collaboration", "innovation", "ambiguity")
+
 def map_constructs_to_environment(construct_scores: Dict[str, float]) -> Dict[str, int]:
     """
     Convert psychometric construct scores (1-4 scale) to environment dimension scores (0-100 scale).
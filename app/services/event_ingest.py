@@ -0,0 +1,262 @@
+# app/services/event_ingest.py
+"""
+Buffered ingestion for journey touchpoints (JourneyAnalytics.track_event).
+
+submit() appends the event to a bounded in-memory buffer and returns at once;
+a flusher thread writes batches when EVENT_BATCH_SIZE events are waiting or
+EVENT_FLUSH_INTERVAL seconds have passed, whichever comes first. One flush is
+one transaction:
+  - a multi-row INSERT into candidate_touchpoints
+  - the funnel rollups (app/services/funnel_rollups.py) for every event
+  - variant_metrics: increments coalesced to one UPDATE per variant
+  - team profiles for "hired" events (app/services/team_fit.py)
+
+When the buffer is full new events are dropped (counted in stats()["dropped"])
+rather than slowing down the request. A failed flush is retried once, then
+its events are written one at a time so a single bad event only costs itself
+(the ones that still fail are dropped, stats()["failed"]). shutdown() flushes
+what's left; the web app calls it on shutdown.
+
+Tuning (environment variables):
+  EVENT_BUFFER_MAX        events held in memory before dropping   default 10000
+  EVENT_BATCH_SIZE        events per flush                        default 500
+  EVENT_FLUSH_INTERVAL    max seconds an event waits              default 0.5
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
+from app.services import db, funnel_rollups, team_fit
+
+logger = logging.getLogger("epq.event_ingest")
+
+# event_type -> variant_metrics counter column
+VARIANT_COUNTERS = {
+    "viewed": "views",
+    "applied": "applications",
+    "completed_assessment": "completions",
+}
+
+_TOUCHPOINT_COLUMNS = (
+    "id", "candidate_id", "role_id", "employer_id", "event_type", "event_data",
+    "session_id", "user_agent", "ip_address", "timestamp", "created_at",
+)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def write_events(events: List[Dict]):
+    """Write one batch of touchpoint dicts (_TOUCHPOINT_COLUMNS + optional variant_id) in one transaction."""
+    if not events:
+        return
+    now = db.now_iso()
+    increments: Dict[str, Dict[str, int]] = defaultdict(lambda: {"views": 0, "applications": 0, "completions": 0})
+    for e in events:
+        column = VARIANT_COUNTERS.get(e["event_type"])
+        if column and e.get("variant_id"):
+            increments[e["variant_id"]][column] += 1
+
+    with db.connection() as con:
+        cur = con.cursor()
+        cur.executemany(f"""
+            INSERT INTO candidate_touchpoints ({", ".join(_TOUCHPOINT_COLUMNS)})
+            VALUES ({", ".join("?" for _ in _TOUCHPOINT_COLUMNS)})
+        """, [tuple(e.get(c) for c in _TOUCHPOINT_COLUMNS) for e in events])
+        for e in events:
+            funnel_rollups.record(
+                cur, e["employer_id"], e["role_id"], e["event_type"], e["timestamp"],
+                candidate_id=e.get("candidate_id"), session_id=e.get("session_id"),
+            )
+            if e["event_type"] == "hired" and e.get("candidate_id"):
+                team_fit.record_hire(cur, e["employer_id"], e["role_id"], e["candidate_id"], e["timestamp"])
+
+        if increments:
+            # First event for a variant: create its metrics row
+            cur.executemany("""
+                INSERT INTO variant_metrics (id, variant_id, role_id, updated_at)
+                SELECT ?, v.id, v.role_id, ?
+                FROM job_variants v
+                WHERE v.id = ? AND NOT EXISTS (SELECT 1 FROM variant_metrics m WHERE m.variant_id = v.id)
+            """, [(str(uuid.uuid4()), now, variant_id) for variant_id in increments])
+            # SET expressions see the old row, so the rate is computed from old + delta
+            cur.executemany("""
+                UPDATE variant_metrics
+                SET views = views + ?,
+                    applications = applications + ?,
+                    completions = completions + ?,
+                    conversion_rate = CASE WHEN views + ? > 0
+                        THEN (completions + ?) * 100.0 / (views + ?) ELSE conversion_rate END,
+                    updated_at = ?
+                WHERE variant_id = ?
+            """, [
+                (inc["views"], inc["applications"], inc["completions"],
+                 inc["views"], inc["completions"], inc["views"], now, variant_id)
+                for variant_id, inc in increments.items()
+            ])
+
+    # Again after commit, so a concurrent read can't re-cache the pre-hire profile
+    for employer_id, role_id in {(e["employer_id"], e["role_id"]) for e in events if e["event_type"] == "hired"}:
+        team_fit.invalidate(employer_id, role_id)
+
+
+class EventBuffer:
+    def __init__(self, max_events: int = 10000, batch_size: int = 500, flush_interval: float = 0.5):
+        self.max_events = max(1, int(max_events))
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._counts = {"accepted": 0, "dropped": 0, "written": 0, "failed": 0, "flushes": 0, "retries": 0}
+        self._last_flush_ms = 0.0
+
+    def submit(self, event: Dict) -> bool:
+        """Queue one event without touching the database. False if it was dropped."""
+        with self._cond:
+            if len(self._queue) >= self.max_events:
+                self._counts["dropped"] += 1
+                return False
+            self._queue.append(event)
+            self._counts["accepted"] += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+        if self._thread is None:
+            self.start()
+        return True
+
+    def start(self) -> "EventBuffer":
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="event-ingest", daemon=True)
+                self._thread.start()
+        return self
+
+    def _take(self) -> List[Dict]:
+        with self._cond:
+            n = min(self.batch_size, len(self._queue))
+            return [self._queue.popleft() for _ in range(n)]
+
+    def flush(self) -> int:
+        """Write everything queued so far (on the calling thread). Returns events written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take()
+                if not batch:
+                    return written
+                written += self._write(batch)
+
+    def _write(self, batch: List[Dict]) -> int:
+        started = time.monotonic()
+        written = len(batch)
+        for attempt in (1, 2):
+            try:
+                write_events(batch)
+                break
+            except Exception as e:
+                if attempt == 1:
+                    with self._cond:
+                        self._counts["retries"] += 1
+                    logger.warning(f"[EVENTS] Flush of {len(batch)} events failed, retrying: {e}")
+                    time.sleep(0.2)
+                    continue
+                if len(batch) == 1:
+                    self._drop(batch[0], e)
+                    written = 0
+                    break
+                logger.warning(f"[EVENTS] Flush of {len(batch)} events failed again, writing them one by one: {e}")
+                written = sum(self._write_one(event) for event in batch)
+        with self._cond:
+            self._counts["written"] += written
+            self._counts["failed"] += len(batch) - written
+            self._counts["flushes"] += 1
+            self._last_flush_ms = round((time.monotonic() - started) * 1000, 1)
+        return written
+
+    def _write_one(self, event: Dict) -> int:
+        try:
+            write_events([event])
+            return 1
+        except Exception as e:
+            self._drop(event, e)
+            return 0
+
+    @staticmethod
+    def _drop(event: Dict, error: Exception):
+        logger.error(f"[EVENTS] Dropping {event.get('event_type')} event {event.get('id')} after failed flush: {error}")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # Hold back small batches until the interval has passed (one wait, not one per check)
+                self._cond.wait_for(lambda: self._stopping or len(self._queue) >= self.batch_size,
+                                    self.flush_interval)
+                stopping = self._stopping
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("[EVENTS] Unexpected flush error")
+            if stopping:
+                return
+
+    def shutdown(self, timeout: float = 10.0):
+        """Stop the flusher after writing everything still queued."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "queue_depth": len(self._queue),
+                "max_events": self.max_events,
+                "batch_size": self.batch_size,
+                "flush_interval": self.flush_interval,
+                "last_flush_ms": self._last_flush_ms,
+                **self._counts,
+            }
+
+
+_buffer: Optional[EventBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> EventBuffer:
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = EventBuffer(
+                    max_events=int(_env_float("EVENT_BUFFER_MAX", 10000)),
+                    batch_size=int(_env_float("EVENT_BATCH_SIZE", 500)),
+                    flush_interval=_env_float("EVENT_FLUSH_INTERVAL", 0.5),
+                )
+    return _buffer
+
+
+def shutdown():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is not None:
+            _buffer.shutdown()
+        _buffer = None
+
+
+def stats() -> Optional[Dict]:
+    return _buffer.stats() if _buffer is not None else None
@@ -1,115 +1,379 @@
 # app/services/exports.py
 """
-Export candidate data to various formats (CSV, JSON).
+Export candidate data to various formats (CSV, NDJSON, JSON, Parquet/Arrow).
+
+The stream_* functions validate the column list (ValueError) and return an
+iterator of text chunks for StreamingResponse; no SQL runs until it is
+iterated. Rows come from db.stream_rows() (server-side cursor) EXPORT_BATCH_SIZE at a
+time, so memory is O(batch) and the first bytes go out as soon as the first
+batch is read. Column selection and the submitted_utc range are part of the
+SQL; scores are read per batch from applicant_score_summary / applicant_scores
+(missing or stale ones are computed for that batch only).
+
+export_scores_dataset() writes the same data as typed columnar files
+(Parquet or Arrow IPC, optionally partitioned by employer and month) for BI
+pipelines; it needs pyarrow. Nightly, for every employer:
+    python -m app.services.exports /data/epq_scores --format parquet
 """
 import csv
-import json
 import io
-from typing import List, Dict
-from app.services import db
-from app.services.environment_mapper import map_constructs_to_environment
-import epq_core
+import json
+import os
+from typing import Dict, Iterator, List, Sequence
 
-def export_candidates_csv(employer_id: str) -> str:
-    """Export all candidates for an employer to CSV format."""
-    
-    # Get all assessments for employer
-    assessments = db.list_assessments_for_employer(employer_id)
-    assessment_ids = [a.get("assessment_id") for a in assessments]
-    
-    # Get all applicants
-    candidates = []
-    for assessment_id in assessment_ids:
-        applicants = db.list_applicants_for_assessment(assessment_id)
-        for app in applicants:
-            # Calculate environment scores
-            candidate_id = app.get("candidate_id")
-            try:
-                responses_json = db.get_applicant_responses_json(candidate_id)
-                if responses_json:
-                    responses = json.loads(responses_json)
-                    result = epq_core.run_applicant_from_choice_responses(responses)
-                    construct_scores = result.get("construct_scores", {})
-                    environment = map_constructs_to_environment(construct_scores)
-                else:
-                    environment = {}
-            except:
-                environment = {}
-            
-            candidates.append({
-                "candidate_id": candidate_id,
-                "name": app.get("applicant_name"),
-                "email": app.get("applicant_email"),
-                "submitted_at": app.get("submitted_utc"),
-                "pdf_status": app.get("pdf_status"),
-                "autonomy": environment.get("autonomy", ""),
-                "pace": environment.get("pace", ""),
-                "structure": environment.get("structure", ""),
-                "collaboration": environment.get("collaboration", ""),
-                "innovation": environment.get("innovation", ""),
-                "ambiguity": environment.get("ambiguity", ""),
-            })
-    
-    # Generate CSV
-    output = io.StringIO()
-    if candidates:
-        fieldnames = ["candidate_id", "name", "email", "submitted_at", "pdf_status", 
-                     "autonomy", "pace", "structure", "collaboration", "innovation", "ambiguity"]
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(candidates)
-    
-    return output.getvalue()
+from app.services import db, applicant_scores
+from app.services.environment_mapper import ENVIRONMENT_DIMENSIONS
 
-def export_candidates_json(employer_id: str) -> List[Dict]:
-    """Export all candidates for an employer to JSON format."""
-    
-    # Get all assessments for employer
-    assessments = db.list_assessments_for_employer(employer_id)
-    assessment_ids = [a.get("assessment_id") for a in assessments]
-    
-    # Get all applicants with full data
-    candidates = []
-    for assessment_id in assessment_ids:
-        applicants = db.list_applicants_for_assessment(assessment_id)
-        for app in applicants:
-            candidate_id = app.get("candidate_id")
-            
-            # Calculate environment scores
-            try:
-                responses_json = db.get_applicant_responses_json(candidate_id)
-                if responses_json:
-                    responses = json.loads(responses_json)
-                    result = epq_core.run_applicant_from_choice_responses(responses)
-                    construct_scores = result.get("construct_scores", {})
-                    environment = map_constructs_to_environment(construct_scores)
-                    overall_average = result.get("overall_average")
-                    overall_band = result.get("overall_band")
-                else:
-                    environment = {}
-                    construct_scores = {}
-                    overall_average = None
-                    overall_band = None
-            except:
-                environment = {}
-                construct_scores = {}
-                overall_average = None
-                overall_band = None
-            
-            candidates.append({
-                "candidate_id": candidate_id,
-                "name": app.get("applicant_name"),
-                "email": app.get("applicant_email"),
-                "submitted_at": app.get("submitted_utc"),
-                "pdf_status": app.get("pdf_status"),
-                "pdf_filename": app.get("pdf_filename"),
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 500))
+
+# Flat export columns -> SQL expression (ap = applicants, asm = assessments,
+# sc = current applicant_score_summary row)
+EXPORT_COLUMNS = {
+    "candidate_id": "ap.candidate_id",
+    "name": "ap.applicant_name",
+    "email": "ap.applicant_email",
+    "submitted_at": "ap.submitted_utc",
+    "pdf_status": "ap.pdf_status",
+    "pdf_filename": "ap.pdf_filename",
+    "assessment_id": "ap.assessment_id",
+    "role_id": "asm.role_id",
+    "overall_average": "sc.overall_average",
+    "overall_band": "sc.overall_band",
+    **{d: f"sc.{d}" for d in ENVIRONMENT_DIMENSIONS},
+}
+SCORE_COLUMNS = ("overall_average", "overall_band", *ENVIRONMENT_DIMENSIONS)
+
+CSV_DEFAULT_COLUMNS = ["candidate_id", "name", "email", "submitted_at", "pdf_status", *ENVIRONMENT_DIMENSIONS]
+
+# JSON records: flat fields plus the nested score objects
+JSON_NESTED_FIELDS = ("environment", "constructs")
+JSON_DEFAULT_FIELDS = [
+    "candidate_id", "name", "email", "submitted_at", "pdf_status", "pdf_filename",
+    "environment", "constructs", "overall_average", "overall_band",
+]
+
+
+def parse_columns(columns, allowed: Sequence[str], default: List[str]) -> List[str]:
+    """'a,b,c' or a list -> validated column list (ValueError on unknown names)."""
+    if not columns:
+        return list(default)
+    names = [c.strip() for c in (columns.split(",") if isinstance(columns, str) else columns) if c and c.strip()]
+    unknown = [c for c in names if c not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return list(dict.fromkeys(names)) or list(default)
+
+
+def _iter_batches(employer_id: str, columns: List[str], since: str = "", until: str = "",
+                  batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[Dict]]:
+    """
+    Batches of {column: value} for the employer's applicants, newest first.
+    Only the requested columns are selected; the score summary is joined only
+    when a score column is requested.
+    """
+    select = list(dict.fromkeys(["candidate_id", *columns]))
+    want_scores = any(c in SCORE_COLUMNS for c in select)
+    sql_cols = [f"{EXPORT_COLUMNS[c]} AS {c}" for c in select]
+    params: list = []
+    joins = "JOIN assessments asm ON asm.assessment_id = ap.assessment_id"
+    if want_scores:
+        sql_cols.append("sc.candidate_id AS _scored")
+        joins += "\n        LEFT JOIN applicant_score_summary sc ON sc.candidate_id = ap.candidate_id AND sc.scorer_version = ?"
+        params.append(applicant_scores.scorer_version())
+    where = ["asm.employer_id = ?"]
+    params.append(employer_id)
+    if since:
+        where.append("ap.submitted_utc >= ?")
+        params.append(since)
+    if until:
+        where.append("ap.submitted_utc < ?")
+        params.append(until)
+
+    sql = f"""
+        SELECT {", ".join(sql_cols)}
+        FROM applicants ap
+        {joins}
+        WHERE {" AND ".join(where)}
+        ORDER BY ap.submitted_utc DESC, ap.candidate_id DESC
+    """
+    for rows in db.stream_rows(sql, params, batch_size):
+        batch = [dict(r) for r in rows]
+        if want_scores:
+            # Missing / stale summaries: score this batch's stragglers and fill them in
+            missing = [r["candidate_id"] for r in batch if r["_scored"] is None]
+            computed = applicant_scores.get_or_compute_scores_many(missing) if missing else {}
+            for r in batch:
+                result = computed.get(r["candidate_id"])
+                if r.pop("_scored") is None and result is not None:
+                    environment = result.get("environment") or {}
+                    for c in select:
+                        if c in ENVIRONMENT_DIMENSIONS:
+                            r[c] = environment.get(c)
+                        elif c in ("overall_average", "overall_band"):
+                            r[c] = result.get(c)
+        yield batch
+
+
+def stream_candidates_csv(employer_id: str, columns=None, since: str = "", until: str = "") -> Iterator[str]:
+    """CSV export as chunks: header, then one chunk per batch."""
+    columns = parse_columns(columns, list(EXPORT_COLUMNS), CSV_DEFAULT_COLUMNS)
+    return _csv_chunks(employer_id, columns, since, until)
+
+
+def _csv_chunks(employer_id: str, columns: List[str], since: str, until: str) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    yield buf.getvalue()
+    for batch in _iter_batches(employer_id, columns, since, until):
+        buf.seek(0)
+        buf.truncate(0)
+        # Blank cells for missing scores, as before
+        writer.writerows(["" if r[c] is None else r[c] for c in columns] for r in batch)
+        yield buf.getvalue()
+
+
+def _iter_records(employer_id: str, fields: List[str], since: str, until: str) -> Iterator[List[Dict]]:
+    nested = [f for f in fields if f in JSON_NESTED_FIELDS]
+    flat = [f for f in fields if f not in JSON_NESTED_FIELDS]
+    # Nested objects come from get_or_compute_scores_many; flat score columns then too
+    sql_flat = [f for f in flat if not (nested and f in SCORE_COLUMNS)]
+    for batch in _iter_batches(employer_id, sql_flat, since, until):
+        scores = applicant_scores.get_or_compute_scores_many([r["candidate_id"] for r in batch]) if nested else {}
+        records = []
+        for r in batch:
+            result = scores.get(r["candidate_id"]) or {}
+            environment = result.get("environment") or {}
+            extra = {
+                **environment,
                 "environment": environment,
-                "constructs": construct_scores,
-                "overall_average": overall_average,
-                "overall_band": overall_band
-            })
-    
-    return candidates
+                "constructs": result.get("construct_scores") or {},
+                "overall_average": result.get("overall_average"),
+                "overall_band": result.get("overall_band"),
+            }
+            records.append({f: (r[f] if f in r else extra.get(f)) for f in fields})
+        yield records
+
+
+def stream_candidates_ndjson(employer_id: str, columns=None, since: str = "", until: str = "") -> Iterator[str]:
+    """One JSON object per line, one chunk per batch."""
+    fields = parse_columns(columns, [*EXPORT_COLUMNS, *JSON_NESTED_FIELDS], JSON_DEFAULT_FIELDS)
+    return _ndjson_chunks(employer_id, fields, since, until)
+
+
+def _ndjson_chunks(employer_id: str, fields: List[str], since: str, until: str) -> Iterator[str]:
+    for records in _iter_records(employer_id, fields, since, until):
+        yield "".join(json.dumps(rec, ensure_ascii=False, default=str) + "\n" for rec in records)
+
+
+def stream_candidates_json(employer_id: str, columns=None, since: str = "", until: str = "") -> Iterator[str]:
+    """A single JSON array, emitted incrementally."""
+    fields = parse_columns(columns, [*EXPORT_COLUMNS, *JSON_NESTED_FIELDS], JSON_DEFAULT_FIELDS)
+    return _json_chunks(employer_id, fields, since, until)
+
+
+def _json_chunks(employer_id: str, fields: List[str], since: str, until: str) -> Iterator[str]:
+    yield "["
+    first = True
+    for records in _iter_records(employer_id, fields, since, until):
+        chunk = ",\n".join(json.dumps(rec, ensure_ascii=False, default=str) for rec in records)
+        yield ("\n" if first else ",\n") + chunk
+        first = False
+    yield "\n]" if not first else "]"
+
+
+def export_candidates_csv(employer_id: str, columns=None, since: str = "", until: str = "") -> str:
+    """Export all candidates for an employer to CSV format (whole file; prefer stream_candidates_csv)."""
+    return "".join(stream_candidates_csv(employer_id, columns, since, until))
+
+
+def export_candidates_json(employer_id: str, columns=None, since: str = "", until: str = "") -> List[Dict]:
+    """Export all candidates for an employer as a list (prefer stream_candidates_json)."""
+    fields = parse_columns(columns, [*EXPORT_COLUMNS, *JSON_NESTED_FIELDS], JSON_DEFAULT_FIELDS)
+    return [rec for records in _iter_records(employer_id, fields, since, until) for rec in records]
+
+# -------------------------
+# Columnar (Arrow / Parquet) export
+# -------------------------
+# Typed construct columns, in the TeamFitAnalyzer.CONSTRUCTS order
+SCORE_CONSTRUCTS = ("SCL", "CCD", "CIL", "CVL", "ERL", "MSD", "ICI", "AJL")
+PARTITION_KEYS = ("employer_id", "month")
+
+_COLUMNAR_SQL = """
+    SELECT ap.candidate_id, asm.employer_id, ap.assessment_id, asm.role_id,
+           ap.submitted_utc, ap.pdf_status,
+           sc.candidate_id AS _scored, sc.overall_average, sc.overall_band,
+           {env}, sc.scorer_version, sc.computed_utc
+    FROM applicants ap
+    JOIN assessments asm ON asm.assessment_id = ap.assessment_id
+    LEFT JOIN applicant_score_summary sc ON sc.candidate_id = ap.candidate_id AND sc.scorer_version = ?
+    WHERE {where}
+    ORDER BY asm.employer_id, ap.submitted_utc, ap.candidate_id
+""".format(env=", ".join(f"sc.{d}" for d in ENVIRONMENT_DIMENSIONS), where="{where}")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+    except ImportError:
+        raise RuntimeError("pyarrow required for Parquet/Arrow exports. Install with: pip install pyarrow")
+    return pyarrow
+
+
+def scores_arrow_schema():
+    pa = _pyarrow()
+    return pa.schema(
+        [
+            ("candidate_id", pa.string()),
+            ("employer_id", pa.string()),
+            ("assessment_id", pa.string()),
+            ("role_id", pa.string()),
+            ("submitted_utc", pa.timestamp("us", tz="UTC")),
+            ("month", pa.string()),
+            ("pdf_status", pa.string()),
+            ("overall_average", pa.float64()),
+            ("overall_band", pa.string()),
+            *[(c, pa.float64()) for c in SCORE_CONSTRUCTS],
+            *[(d, pa.int16()) for d in ENVIRONMENT_DIMENSIONS],
+            ("scorer_version", pa.string()),
+            ("computed_utc", pa.timestamp("us", tz="UTC")),
+        ]
+    )
+
+
+def _parse_utc(value):
+    import datetime
+    if not value:
+        return None
+    try:
+        dt = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00").replace(" ", "T"))
+    except ValueError:
+        return None
+    return dt.replace(tzinfo=datetime.timezone.utc) if dt.tzinfo is None else dt
+
+
+def _construct_scores(candidate_ids: List[str], version: str) -> Dict[str, Dict[str, float]]:
+    out: Dict[str, Dict[str, float]] = {}
+    if not candidate_ids:
+        return out
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        cur.execute(
+            f"""
+            SELECT candidate_id, construct, score FROM applicant_scores
+            WHERE scorer_version = ? AND candidate_id IN ({",".join("?" * len(candidate_ids))})
+            """,
+            [version, *candidate_ids],
+        )
+        for r in cur.fetchall():
+            out.setdefault(r["candidate_id"], {})[r["construct"]] = r["score"]
+    finally:
+        con.close()
+    return out
+
+
+def iter_score_record_batches(employer_id: str = "", since: str = "", until: str = "",
+                              batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    pyarrow.RecordBatch per DB batch: one row per candidate with typed construct,
+    environment and band columns. employer_id="" exports every employer.
+    """
+    pa = _pyarrow()
+    schema = scores_arrow_schema()
+    version = applicant_scores.scorer_version()
+    where, params = ["1 = 1"], [version]
+    if employer_id:
+        where.append("asm.employer_id = ?")
+        params.append(employer_id)
+    if since:
+        where.append("ap.submitted_utc >= ?")
+        params.append(since)
+    if until:
+        where.append("ap.submitted_utc < ?")
+        params.append(until)
+
+    for rows in db.stream_rows(_COLUMNAR_SQL.format(where=" AND ".join(where)), params, batch_size):
+        batch = [dict(r) for r in rows]
+        constructs = _construct_scores([r["candidate_id"] for r in batch if r["_scored"] is not None], version)
+        # Missing / stale summaries are scored for this batch only
+        missing = [r["candidate_id"] for r in batch if r["_scored"] is None]
+        fresh = applicant_scores.get_or_compute_scores_many(missing) if missing else {}
+
+        columns: Dict[str, list] = {name: [] for name in schema.names}
+        for r in batch:
+            cid = r["candidate_id"]
+            result = fresh.get(cid)
+            if result:
+                r.update(result.get("environment") or {})
+                r.update({k: result.get(k) for k in ("overall_average", "overall_band", "scorer_version", "computed_utc")})
+                constructs[cid] = result.get("construct_scores") or {}
+            submitted = _parse_utc(r["submitted_utc"])
+            scores = constructs.get(cid) or {}
+            columns["candidate_id"].append(cid)
+            columns["employer_id"].append(r["employer_id"])
+            columns["assessment_id"].append(r["assessment_id"])
+            columns["role_id"].append(r["role_id"])
+            columns["submitted_utc"].append(submitted)
+            columns["month"].append(submitted.strftime("%Y-%m") if submitted else "unknown")
+            columns["pdf_status"].append(r["pdf_status"])
+            columns["overall_average"].append(r["overall_average"])
+            columns["overall_band"].append(r["overall_band"])
+            for c in SCORE_CONSTRUCTS:
+                columns[c].append(scores.get(c))
+            for d in ENVIRONMENT_DIMENSIONS:
+                columns[d].append(r.get(d))
+            columns["scorer_version"].append(r.get("scorer_version"))
+            columns["computed_utc"].append(_parse_utc(r.get("computed_utc")))
+        yield pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+def export_scores_dataset(output_dir: str, employer_id: str = "", fmt: str = "parquet",
+                          partition_by: Sequence[str] = PARTITION_KEYS,
+                          since: str = "", until: str = "") -> List[str]:
+    """
+    Write applicant scores as a Parquet (fmt="parquet") or Arrow IPC (fmt="arrow")
+    dataset under output_dir, streamed batch by batch. partition_by is any of
+    ("employer_id", "month") -> hive directories (employer_id=E1/month=2026-01/...);
+    pass () for a single file. Existing files in output_dir are replaced.
+    Returns the written file paths.
+    """
+    pa = _pyarrow()
+    if fmt not in ("parquet", "arrow"):
+        raise ValueError("fmt must be 'parquet' or 'arrow'")
+    partition_by = list(partition_by or [])
+    unknown = [k for k in partition_by if k not in PARTITION_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown partition key(s): {', '.join(unknown)}")
+
+    schema = scores_arrow_schema()
+    written: List[str] = []
+    pa.dataset.write_dataset(
+        iter_score_record_batches(employer_id, since, until),
+        output_dir,
+        schema=schema,
+        format="parquet" if fmt == "parquet" else "ipc",
+        partitioning=pa.dataset.partitioning(
+            pa.schema([schema.field(k) for k in partition_by]), flavor="hive"
+        ) if partition_by else None,
+        basename_template="scores-{i}." + ("parquet" if fmt == "parquet" else "arrow"),
+        existing_data_behavior="delete_matching",
+        file_visitor=lambda f: written.append(f.path),
+    )
+    if not written and not partition_by:
+        # No rows: still hand back one (empty, typed) file
+        path = os.path.join(output_dir, "scores-0." + ("parquet" if fmt == "parquet" else "arrow"))
+        os.makedirs(output_dir, exist_ok=True)
+        if fmt == "parquet":
+            import pyarrow.parquet
+            pa.parquet.write_table(schema.empty_table(), path)
+        else:
+            with pa.ipc.new_file(path, schema) as writer:
+                writer.write_table(schema.empty_table())
+        written.append(path)
+    return written
+
 
 def export_candidate_detail_json(candidate_id: str, employer_id: str) -> Dict:
     """Export a single candidate's full details including collaboration data."""
@@ -170,3 +434,32 @@ def export_candidate_detail_json(candidate_id: str, employer_id: str) -> Dict:
         "notes": notes,
         "feedback": feedback
     }
+
+
+def main(argv=None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m app.services.exports",
+                                     description="Write applicant scores as a Parquet/Arrow dataset")
+    parser.add_argument("output_dir")
+    parser.add_argument("--employer", default="", help="one employer_id (default: all)")
+    parser.add_argument("--format", choices=("parquet", "arrow"), default="parquet")
+    parser.add_argument("--partition", default=",".join(PARTITION_KEYS),
+                        help="comma-separated partition keys: employer_id,month ('' for one file)")
+    parser.add_argument("--since", default="")
+    parser.add_argument("--until", default="")
+    args = parser.parse_args(argv)
+
+    files = export_scores_dataset(
+        args.output_dir,
+        employer_id=args.employer,
+        fmt=args.format,
+        partition_by=[k for k in args.partition.split(",") if k],
+        since=args.since,
+        until=args.until,
+    )
+    print(f"Wrote {len(files)} files to {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,329 @@
+# app/services/funnel_rollups.py
+"""
+Incrementally maintained rollups behind the journey funnel (migration 0007).
+
+    funnel_rollup_daily    (employer_id, role_id, day, stage) -> events, uniques
+        events  - touchpoints recorded
+        uniques - actors (candidate_id, else session_id) reaching the stage for
+                  the first time that day; summed over a window this is
+                  "distinct actors who first reached the stage in the window"
+        stage "_candidates" counts candidates seen for the first time
+        role_id '' is the employer-wide scope: an actor who reaches a stage in
+        several roles counts once there, so role-less reads use it instead of
+        summing the roles
+    funnel_duration_daily  (employer_id, role_id, day, transition, bucket) -> n, total_seconds
+        duration sketch for "<event>_to_<next event>" of one candidate:
+        log2 buckets (0 = under 1s, b = [2^(b-1), 2^b) seconds) plus exact sums,
+        so means are exact and percentiles are bucket estimates
+    funnel_actor_stage     first (actor, stage) per employer/role, and per employer
+                           (role_id '')  - dedupes uniques
+    funnel_last_event      last event per candidate per employer/role - pairs transitions
+
+record(cur, ...) updates all of them in the touchpoint's transaction; reads
+only touch the rollups, so dashboard cost depends on days x stages, not on
+the number of touchpoints.
+
+Recompute from candidate_touchpoints with:
+    python -m app.services.funnel_rollups rebuild [--employer E1]
+"""
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.services import db
+
+logger = logging.getLogger("epq.funnel_rollups")
+
+CANDIDATES = "_candidates"
+ALL_ROLES = ""
+MAX_BUCKET = 40
+
+
+def duration_bucket(seconds: float) -> int:
+    if seconds < 1:
+        return 0
+    return min(MAX_BUCKET, int(math.log2(seconds)) + 1)
+
+
+def bucket_upper_seconds(bucket: int) -> float:
+    return 1.0 if bucket == 0 else float(2 ** bucket)
+
+
+def _parse(ts: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(ts)
+    except (TypeError, ValueError):
+        return None
+
+
+def _add_counts(cur, counts: Dict[Tuple[str, str, str, str], List[int]]):
+    rows = [(e, r, d, s, v[0], v[1]) for (e, r, d, s), v in counts.items() if v[0] or v[1]]
+    if rows:
+        cur.executemany("""
+            INSERT INTO funnel_rollup_daily (employer_id, role_id, day, stage, events, uniques)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (employer_id, role_id, day, stage) DO UPDATE SET
+                events = funnel_rollup_daily.events + excluded.events,
+                uniques = funnel_rollup_daily.uniques + excluded.uniques
+        """, rows)
+
+
+def _add_durations(cur, durations: Dict[Tuple[str, str, str, str, int], List[float]]):
+    rows = [(e, r, d, t, b, int(v[0]), v[1]) for (e, r, d, t, b), v in durations.items() if v[0]]
+    if rows:
+        cur.executemany("""
+            INSERT INTO funnel_duration_daily (employer_id, role_id, day, transition, bucket, n, total_seconds)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (employer_id, role_id, day, transition, bucket) DO UPDATE SET
+                n = funnel_duration_daily.n + excluded.n,
+                total_seconds = funnel_duration_daily.total_seconds + excluded.total_seconds
+        """, rows)
+
+
+# -------------------------
+# Incremental maintenance
+# -------------------------
+def record(cur, employer_id: str, role_id: str, event_type: str, timestamp: str,
+           candidate_id: Optional[str] = None, session_id: Optional[str] = None):
+    """Fold one touchpoint into the rollups (its role and the employer-wide scope), on the caller's cursor."""
+    day = timestamp[:10]
+    scopes = list(dict.fromkeys([role_id, ALL_ROLES]))
+    counts: Dict[Tuple[str, str, str, str], List[int]] = defaultdict(lambda: [0, 0])
+
+    def first_touch(scope: str, stage: str, actor: str) -> bool:
+        cur.execute("""
+            INSERT INTO funnel_actor_stage (employer_id, role_id, stage, actor, first_timestamp)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (employer_id, role_id, stage, actor) DO NOTHING
+        """, (employer_id, scope, stage, actor, timestamp))
+        return cur.rowcount == 1
+
+    actor = candidate_id or session_id
+    for scope in scopes:
+        counts[(employer_id, scope, day, event_type)][0] += 1
+        if actor and first_touch(scope, event_type, actor):
+            counts[(employer_id, scope, day, event_type)][1] += 1
+    # Employer-wide first sighting of the candidate (per role it is the first funnel_last_event row)
+    if candidate_id and first_touch(ALL_ROLES, CANDIDATES, candidate_id):
+        counts[(employer_id, ALL_ROLES, day, CANDIDATES)][1] += 1
+
+    durations: Dict[Tuple[str, str, str, str, int], List[float]] = defaultdict(lambda: [0, 0.0])
+    if candidate_id:
+        cur.execute("""
+            SELECT event_type, timestamp FROM funnel_last_event
+            WHERE employer_id = ? AND role_id = ? AND candidate_id = ?
+        """, (employer_id, role_id, candidate_id))
+        last = cur.fetchone()
+        if last is None:
+            if role_id != ALL_ROLES:
+                counts[(employer_id, role_id, day, CANDIDATES)][1] += 1
+            cur.execute("""
+                INSERT INTO funnel_last_event (employer_id, role_id, candidate_id, event_type, timestamp)
+                VALUES (?, ?, ?, ?, ?)
+            """, (employer_id, role_id, candidate_id, event_type, timestamp))
+        else:
+            previous, now = _parse(last["timestamp"]), _parse(timestamp)
+            if previous and now and now >= previous:
+                seconds = (now - previous).total_seconds()
+                d = durations[(employer_id, role_id, day, f"{last['event_type']}_to_{event_type}", duration_bucket(seconds))]
+                d[0] += 1
+                d[1] += seconds
+            if not previous or (now and now >= previous):
+                cur.execute("""
+                    UPDATE funnel_last_event SET event_type = ?, timestamp = ?
+                    WHERE employer_id = ? AND role_id = ? AND candidate_id = ?
+                """, (event_type, timestamp, employer_id, role_id, candidate_id))
+
+    _add_counts(cur, counts)
+    _add_durations(cur, durations)
+
+
+def rebuild(cur=None, employer_id: str = "") -> Dict[str, int]:
+    """
+    Recompute every rollup from candidate_touchpoints (all employers, or one).
+    Runs on cur if given (e.g. inside a migration), else in its own transaction.
+    """
+    if cur is None:
+        with db.connection() as con:
+            return rebuild(con.cursor(), employer_id)
+
+    where, params = "", []
+    if employer_id:
+        where, params = "WHERE employer_id = ?", [employer_id]
+    for table in ("funnel_rollup_daily", "funnel_duration_daily", "funnel_actor_stage", "funnel_last_event"):
+        cur.execute(f"DELETE FROM {table} {where}", params)
+
+    actor = "COALESCE(candidate_id, session_id)"
+    and_ = "AND" if where else "WHERE"
+    # Per role, then employer-wide (role_id ''; touchpoints without a role only land there)
+    roles = f"{where} {and_} role_id <> ''"
+    for scope, events_where, actors_where in (
+        ("role_id", roles, f"{roles} AND {actor} IS NOT NULL"),
+        ("''", where, f"{where} {and_} {actor} IS NOT NULL"),
+    ):
+        # Raw event counts
+        cur.execute(f"""
+            INSERT INTO funnel_rollup_daily (employer_id, role_id, day, stage, events, uniques)
+            SELECT employer_id, {scope}, substr(timestamp, 1, 10), event_type, COUNT(*), 0
+            FROM candidate_touchpoints {events_where}
+            GROUP BY employer_id, {scope}, substr(timestamp, 1, 10), event_type
+        """, params)
+        # First touch per actor and stage
+        cur.execute(f"""
+            INSERT INTO funnel_actor_stage (employer_id, role_id, stage, actor, first_timestamp)
+            SELECT employer_id, {scope}, event_type, {actor}, MIN(timestamp)
+            FROM candidate_touchpoints {actors_where}
+            GROUP BY employer_id, {scope}, event_type, {actor}
+        """, params)
+    # First sighting of each candidate employer-wide
+    cur.execute(f"""
+        INSERT INTO funnel_actor_stage (employer_id, role_id, stage, actor, first_timestamp)
+        SELECT employer_id, '', ?, candidate_id, MIN(timestamp)
+        FROM candidate_touchpoints {where} {and_} candidate_id IS NOT NULL
+        GROUP BY employer_id, candidate_id
+    """, [CANDIDATES, *params])
+    cur.execute(f"""
+        SELECT employer_id, role_id, substr(first_timestamp, 1, 10) AS day, stage, COUNT(*) AS n
+        FROM funnel_actor_stage {where}
+        GROUP BY employer_id, role_id, substr(first_timestamp, 1, 10), stage
+    """, params)
+    counts: Dict[Tuple[str, str, str, str], List[int]] = defaultdict(lambda: [0, 0])
+    for r in cur.fetchall():
+        counts[(r["employer_id"], r["role_id"], r["day"], r["stage"])][1] += int(r["n"])
+
+    # Transitions: walk each candidate's events in time order, one batch at a time
+    durations: Dict[Tuple[str, str, str, str, int], List[float]] = defaultdict(lambda: [0, 0.0])
+    last_rows = []
+    key, prev = None, None
+    for rows in db.stream_rows(f"""
+        SELECT employer_id, role_id, candidate_id, event_type, timestamp
+        FROM candidate_touchpoints {where} {and_} candidate_id IS NOT NULL
+        ORDER BY employer_id, role_id, candidate_id, timestamp
+    """, params):
+        for r in rows:
+            k = (r["employer_id"], r["role_id"], r["candidate_id"])
+            if k != key:
+                if prev is not None:
+                    last_rows.append((*key, prev["event_type"], prev["timestamp"]))
+                if k[1] != ALL_ROLES:
+                    counts[(k[0], k[1], r["timestamp"][:10], CANDIDATES)][1] += 1
+                key, prev = k, None
+            if prev is not None:
+                a, b = _parse(prev["timestamp"]), _parse(r["timestamp"])
+                if a and b:
+                    seconds = (b - a).total_seconds()
+                    d = durations[(k[0], k[1], r["timestamp"][:10],
+                                   f"{prev['event_type']}_to_{r['event_type']}", duration_bucket(seconds))]
+                    d[0] += 1
+                    d[1] += seconds
+            prev = dict(r)
+    if prev is not None:
+        last_rows.append((*key, prev["event_type"], prev["timestamp"]))
+
+    _add_counts(cur, counts)
+    _add_durations(cur, durations)
+    if last_rows:
+        cur.executemany("""
+            INSERT INTO funnel_last_event (employer_id, role_id, candidate_id, event_type, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        """, last_rows)
+    return {"candidates": len(last_rows), "duration_cells": len(durations)}
+
+
+# -------------------------
+# Reads
+# -------------------------
+def _filters(employer_id: str, role_id: Optional[str], start_date: Optional[str], end_date: Optional[str]):
+    where, params = ["employer_id = ?"], [employer_id]
+    if role_id is not None:
+        where.append("role_id = ?")
+        params.append(role_id)
+    if start_date:
+        where.append("day >= ?")
+        params.append(start_date[:10])
+    if end_date:
+        where.append("day <= ?")
+        params.append(end_date[:10])
+    return " AND ".join(where), params
+
+
+def stage_counts(employer_id: str, role_id: Optional[str] = None,
+                 start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """{stage: {"events": n, "uniques": n}} from funnel_rollup_daily (employer-wide when no role is given)."""
+    where, params = _filters(employer_id, role_id or ALL_ROLES, start_date, end_date)
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        cur.execute(f"""
+            SELECT stage, SUM(events) AS events, SUM(uniques) AS uniques
+            FROM funnel_rollup_daily WHERE {where}
+            GROUP BY stage
+        """, params)
+        return {r["stage"]: {"events": int(r["events"] or 0), "uniques": int(r["uniques"] or 0)}
+                for r in cur.fetchall()}
+    finally:
+        con.close()
+
+
+def duration_stats(employer_id: str, role_id: Optional[str] = None,
+                   start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    {transition: {n, mean_seconds, p50_seconds, p90_seconds}} (percentiles: bucket
+    upper bounds). Transitions are per role, so without a role they are summed.
+    """
+    where, params = _filters(employer_id, role_id or None, start_date, end_date)
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        cur.execute(f"""
+            SELECT transition, bucket, SUM(n) AS n, SUM(total_seconds) AS total
+            FROM funnel_duration_daily WHERE {where}
+            GROUP BY transition, bucket
+        """, params)
+        hist: Dict[str, Dict[int, Tuple[int, float]]] = defaultdict(dict)
+        for r in cur.fetchall():
+            hist[r["transition"]][int(r["bucket"])] = (int(r["n"] or 0), float(r["total"] or 0.0))
+    finally:
+        con.close()
+
+    out = {}
+    for transition, buckets in hist.items():
+        n = sum(v[0] for v in buckets.values())
+        if not n:
+            continue
+
+        def quantile(q):
+            seen = 0
+            for b in sorted(buckets):
+                seen += buckets[b][0]
+                if seen >= q * n:
+                    return bucket_upper_seconds(b)
+            return bucket_upper_seconds(max(buckets))
+
+        out[transition] = {
+            "n": n,
+            "mean_seconds": sum(v[1] for v in buckets.values()) / n,
+            "p50_seconds": quantile(0.5),
+            "p90_seconds": quantile(0.9),
+        }
+    return out
+
+
+def main(argv=None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m app.services.funnel_rollups")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("rebuild", help="recompute funnel rollups from candidate_touchpoints")
+    p.add_argument("--employer", default="")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.cmd == "rebuild":
+        print(rebuild(employer_id=args.employer))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,405 @@
+# app/services/job_queue.py
+"""
+Durable background job queue (table job_queue, migration 0004).
+
+Web processes only enqueue(); workers (`python -m app.worker`) lease jobs,
+run the registered handler and complete() or fail() them.
+
+Lifecycle:
+    queued  --lease()-->  leased  --complete()-->  done
+                            |
+                            +--fail()--> queued (run_after = now + backoff)
+                            +--fail()--> dead   (attempts reached max_attempts)
+    leased with an expired lease (worker crashed / restarted) is put back to
+    queued by reclaim_expired(), or dead-lettered if it has no attempts left.
+
+Handlers are plain functions taking the decoded payload dict; raising an
+exception counts as a failed attempt, except PermanentError, which
+dead-letters the job at once (retrying can't help, e.g. a missing binary).
+on_dead(payload, error) runs once when a job is dead-lettered. Modules can also register_periodic() work that every
+worker runs on a timer (the webhook outbox uses this).
+
+Tuning (environment variables):
+  JOB_LEASE_SECONDS     lease length, renewed by the worker while running   default 120
+  JOB_MAX_ATTEMPTS      default attempts per job                            default 5
+  JOB_BACKOFF_BASE      first retry delay in seconds (doubles per attempt)  default 5
+  JOB_BACKOFF_MAX       cap on the retry delay                              default 600
+"""
+import datetime
+import json
+import logging
+import os
+import random
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional
+
+from app.services import db
+
+logger = logging.getLogger("epq.jobs")
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+# Modules that register handlers on import; the worker imports all of them.
+HANDLER_MODULES = [
+    "app.services.pdf_jobs",
+    "app.services.webhook_outbox",
+    "app.services.bias_audit",
+]
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+LEASE_SECONDS = _env_float("JOB_LEASE_SECONDS", 120)
+MAX_ATTEMPTS = int(_env_float("JOB_MAX_ATTEMPTS", 5))
+BACKOFF_BASE = _env_float("JOB_BACKOFF_BASE", 5)
+BACKOFF_MAX = _env_float("JOB_BACKOFF_MAX", 600)
+
+
+class PermanentError(Exception):
+    """Raised by a handler when retrying can't succeed; the job is dead-lettered immediately."""
+
+
+class JobHandler:
+    def __init__(self, kind: str, func: Callable[[Dict], None],
+                 on_dead: Optional[Callable[[Dict, str], None]] = None,
+                 max_attempts: Optional[int] = None):
+        self.kind = kind
+        self.func = func
+        self.on_dead = on_dead
+        self.max_attempts = max_attempts
+
+
+HANDLERS: Dict[str, JobHandler] = {}
+
+
+def register(kind: str, on_dead: Optional[Callable[[Dict, str], None]] = None,
+             max_attempts: Optional[int] = None):
+    """Decorator: @job_queue.register("pdf.generate", on_dead=...)"""
+    def wrap(func):
+        HANDLERS[kind] = JobHandler(kind, func, on_dead=on_dead, max_attempts=max_attempts)
+        return func
+    return wrap
+
+
+class PeriodicTask:
+    def __init__(self, name: str, interval: float, func: Callable[[], object]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+
+
+PERIODIC: Dict[str, PeriodicTask] = {}
+
+
+def register_periodic(name: str, interval: float, func: Callable[[], object]) -> Callable[[], object]:
+    """Run func() every interval seconds in each worker process (e.g. outbox delivery)."""
+    PERIODIC[name] = PeriodicTask(name, interval, func)
+    return func
+
+
+def load_handlers() -> Dict[str, JobHandler]:
+    import importlib
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+    return HANDLERS
+
+
+def _iso(dt: datetime.datetime) -> str:
+    # Fixed width so run_after / lease_expires compare correctly as strings
+    return dt.isoformat(timespec="microseconds")
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with +/-10% jitter: base, 2*base, 4*base, ... capped at BACKOFF_MAX."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.9, 1.1)
+
+
+def _decode(row) -> Dict:
+    job = dict(row)
+    try:
+        job["payload"] = json.loads(job.get("payload_json") or "{}")
+    except Exception:
+        job["payload"] = {}
+    return job
+
+
+def _is_postgres() -> bool:
+    return bool(os.environ.get("DATABASE_URL"))
+
+
+# -------------------------
+# Producer side
+# -------------------------
+def enqueue(kind: str, payload: Dict, max_attempts: Optional[int] = None,
+            delay_seconds: float = 0, job_id: str = "") -> str:
+    """Persist a job and return its job_id. Runs on web nodes; never executes the job."""
+    handler = HANDLERS.get(kind)
+    if max_attempts is None:
+        max_attempts = (handler.max_attempts if handler and handler.max_attempts else MAX_ATTEMPTS)
+    job_id = job_id or "J-" + uuid.uuid4().hex
+    now = _now()
+    with db.connection() as con:
+        con.cursor().execute(
+            """
+            INSERT INTO job_queue
+              (job_id, kind, payload_json, status, attempts, max_attempts, run_after, created_utc, updated_utc)
+            VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?)
+            """,
+            (
+                job_id,
+                kind,
+                json.dumps(payload, ensure_ascii=False, default=str),
+                QUEUED,
+                int(max_attempts),
+                _iso(now + datetime.timedelta(seconds=delay_seconds)),
+                _iso(now),
+                _iso(now),
+            ),
+        )
+    return job_id
+
+
+# -------------------------
+# Worker side
+# -------------------------
+def lease(worker_id: str, kinds: Optional[Iterable[str]] = None,
+          lease_seconds: Optional[float] = None) -> Optional[Dict]:
+    """
+    Atomically claim the oldest runnable job (optionally restricted to kinds).
+    Returns the job dict (with decoded "payload") or None when nothing is due.
+    """
+    lease_seconds = lease_seconds or LEASE_SECONDS
+    kinds = list(kinds or [])
+    now = _now()
+    where = "status = ? AND run_after <= ?"
+    params: list = [QUEUED, _iso(now)]
+    if kinds:
+        where += f" AND kind IN ({','.join('?' * len(kinds))})"
+        params.extend(kinds)
+
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        if _is_postgres():
+            # Concurrent workers skip rows another transaction already holds
+            cur.execute(
+                f"SELECT * FROM job_queue WHERE {where} ORDER BY run_after LIMIT 1 FOR UPDATE SKIP LOCKED",
+                params,
+            )
+        else:
+            if con.in_transaction:
+                con.commit()
+            # Serializes writers, so the SELECT + UPDATE below can't race another worker
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute(f"SELECT * FROM job_queue WHERE {where} ORDER BY run_after LIMIT 1", params)
+        row = cur.fetchone()
+        if not row:
+            con.rollback()
+            return None
+        job = _decode(row)
+        expires = _iso(now + datetime.timedelta(seconds=lease_seconds))
+        cur.execute(
+            """
+            UPDATE job_queue
+            SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_expires = ?, updated_utc = ?
+            WHERE job_id = ?
+            """,
+            (LEASED, worker_id, expires, _iso(now), job["job_id"]),
+        )
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    finally:
+        con.close()
+
+    job.update(status=LEASED, attempts=int(job["attempts"]) + 1, lease_owner=worker_id, lease_expires=expires)
+    return job
+
+
+def extend_lease(job_id: str, worker_id: str, lease_seconds: Optional[float] = None) -> bool:
+    """Heartbeat for long-running jobs. False if the lease was lost (reclaimed)."""
+    expires = _iso(_now() + datetime.timedelta(seconds=lease_seconds or LEASE_SECONDS))
+    with db.connection() as con:
+        cur = con.cursor()
+        cur.execute(
+            "UPDATE job_queue SET lease_expires = ? WHERE job_id = ? AND status = ? AND lease_owner = ?",
+            (expires, job_id, LEASED, worker_id),
+        )
+        return cur.rowcount > 0
+
+
+def complete(job_id: str, worker_id: str) -> bool:
+    with db.connection() as con:
+        cur = con.cursor()
+        cur.execute(
+            """
+            UPDATE job_queue
+            SET status = ?, lease_owner = NULL, lease_expires = NULL, last_error = NULL, updated_utc = ?
+            WHERE job_id = ? AND status = ? AND lease_owner = ?
+            """,
+            (DONE, _iso(_now()), job_id, LEASED, worker_id),
+        )
+        return cur.rowcount > 0
+
+
+def fail(job: Dict, worker_id: str, error: str, permanent: bool = False) -> str:
+    """
+    Record a failed attempt. Returns "retry" (re-queued with backoff), "dead"
+    (dead-lettered, also when permanent; the caller runs the handler's on_dead)
+    or "lost" (lease was reclaimed by someone else in the meantime).
+    """
+    attempts = int(job["attempts"])
+    now = _now()
+    if permanent or attempts >= int(job["max_attempts"]):
+        status, run_after, outcome = DEAD, job["run_after"], "dead"
+    else:
+        status = QUEUED
+        run_after = _iso(now + datetime.timedelta(seconds=backoff_seconds(attempts)))
+        outcome = "retry"
+    with db.connection() as con:
+        cur = con.cursor()
+        cur.execute(
+            """
+            UPDATE job_queue
+            SET status = ?, run_after = ?, lease_owner = NULL, lease_expires = NULL, last_error = ?, updated_utc = ?
+            WHERE job_id = ? AND status = ? AND lease_owner = ?
+            """,
+            (status, run_after, (error or "")[:2000], _iso(now), job["job_id"], LEASED, worker_id),
+        )
+        if cur.rowcount == 0:
+            return "lost"
+    return outcome
+
+
+def reclaim_expired() -> List[Dict]:
+    """
+    Return jobs whose lease expired (worker died mid-job) to the queue.
+    Jobs with no attempts left are dead-lettered instead and returned so the
+    caller can run on_dead for them.
+    """
+    now = _iso(_now())
+    dead: List[Dict] = []
+    with db.connection() as con:
+        cur = con.cursor()
+        cur.execute(
+            "SELECT * FROM job_queue WHERE status = ? AND lease_expires < ?",
+            (LEASED, now),
+        )
+        for row in cur.fetchall():
+            job = _decode(row)
+            exhausted = int(job["attempts"]) >= int(job["max_attempts"])
+            cur.execute(
+                """
+                UPDATE job_queue
+                SET status = ?, run_after = ?, lease_owner = NULL, lease_expires = NULL,
+                    last_error = ?, updated_utc = ?
+                WHERE job_id = ? AND status = ? AND lease_expires < ?
+                """,
+                (
+                    DEAD if exhausted else QUEUED,
+                    now,
+                    f"lease expired (worker {job.get('lease_owner')})",
+                    now,
+                    job["job_id"],
+                    LEASED,
+                    now,
+                ),
+            )
+            if cur.rowcount and exhausted:
+                job["status"] = DEAD
+                dead.append(job)
+    if dead:
+        logger.warning(f"[JOBS] Dead-lettered {len(dead)} jobs with expired leases")
+    return dead
+
+
+def run_on_dead(job: Dict, error: str):
+    handler = HANDLERS.get(job["kind"])
+    if handler and handler.on_dead:
+        try:
+            handler.on_dead(job["payload"], error)
+        except Exception:
+            logger.exception(f"[JOBS] on_dead failed for {job['job_id']}")
+
+
+# -------------------------
+# Visibility / operations
+# -------------------------
+def stats() -> Dict:
+    """Queue depth per kind and status, plus the age of the oldest due job."""
+    by_kind: Dict[str, Dict[str, int]] = {}
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        cur.execute("SELECT kind, status, COUNT(*) AS n FROM job_queue GROUP BY kind, status")
+        for row in cur.fetchall():
+            by_kind.setdefault(row["kind"], {})[row["status"]] = int(row["n"])
+        cur.execute(
+            "SELECT MIN(run_after) AS oldest FROM job_queue WHERE status = ? AND run_after <= ?",
+            (QUEUED, _iso(_now())),
+        )
+        row = cur.fetchone()
+        oldest = row["oldest"] if row else None
+    finally:
+        con.close()
+
+    lag = None
+    if oldest:
+        lag = round((_now() - datetime.datetime.fromisoformat(oldest)).total_seconds(), 3)
+    totals = {s: sum(k.get(s, 0) for k in by_kind.values()) for s in (QUEUED, LEASED, DONE, DEAD)}
+    return {"depth": totals[QUEUED], "totals": totals, "by_kind": by_kind, "oldest_due_seconds": lag}
+
+
+def list_jobs(status: str = DEAD, kind: str = "", limit: int = 50) -> List[Dict]:
+    sql = "SELECT * FROM job_queue WHERE status = ?"
+    params: list = [status]
+    if kind:
+        sql += " AND kind = ?"
+        params.append(kind)
+    sql += " ORDER BY updated_utc DESC LIMIT ?"
+    params.append(int(limit))
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        cur.execute(sql, params)
+        return [_decode(r) for r in cur.fetchall()]
+    finally:
+        con.close()
+
+
+def retry_dead(job_id: str) -> bool:
+    """Move a dead-lettered job back to the queue with a fresh attempt budget."""
+    now = _iso(_now())
+    with db.connection() as con:
+        cur = con.cursor()
+        cur.execute(
+            """
+            UPDATE job_queue SET status = ?, attempts = 0, run_after = ?, last_error = NULL, updated_utc = ?
+            WHERE job_id = ? AND status = ?
+            """,
+            (QUEUED, now, now, job_id, DEAD),
+        )
+        return cur.rowcount > 0
+
+
+def purge_finished(older_than_seconds: float = 7 * 86400) -> int:
+    """Delete done jobs older than the cutoff (dead jobs are kept for inspection)."""
+    cutoff = _iso(_now() - datetime.timedelta(seconds=older_than_seconds))
+    with db.connection() as con:
+        cur = con.cursor()
+        cur.execute("DELETE FROM job_queue WHERE status = ? AND updated_utc < ?", (DONE, cutoff))
+        return cur.rowcount
@@ -5,8 +5,7 @@ Tracks every touchpoint from job view to hire, identifies drop-off points, A/B t
 """
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
-from collections import defaultdict
-from app.services import db
+from app.services import ab_testing, db, event_ingest, funnel_rollups
 import json
 
 class JourneyAnalytics:
@@ -102,90 +101,27 @@ class JourneyAnalytics:
         if not self._initialized:
             return "analytics_disabled"  # Skip if DB not available
         import uuid
-        conn = db.get_db()
-        
         event_id = str(uuid.uuid4())
         
-        conn.execute("""
-            INSERT INTO candidate_touchpoints (
-                id, candidate_id, role_id, employer_id,
-                event_type, event_data, session_id, user_agent,
-                ip_address, timestamp, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, [
-            event_id, candidate_id, role_id, employer_id,
-            event_type, json.dumps(event_data) if event_data else None,
-            session_id, user_agent, ip_address,
-            datetime.now().isoformat(), db.now_iso()
-        ])
-        
-        # Update variant metrics if this is a variant view
-        if event_type == "viewed" and event_data and "variant_id" in event_data:
-            await self._update_variant_metrics(event_data["variant_id"], "view")
-        elif event_type == "applied" and event_data and "variant_id" in event_data:
-            await self._update_variant_metrics(event_data["variant_id"], "application")
-        elif event_type == "completed_assessment" and event_data and "variant_id" in event_data:
-            await self._update_variant_metrics(event_data["variant_id"], "completion")
+        # Written in batches by the ingest buffer: touchpoint, funnel rollups and
+        # coalesced variant metrics per flush (app/services/event_ingest.py)
+        event_ingest.get_buffer().submit({
+            "id": event_id,
+            "candidate_id": candidate_id,
+            "role_id": role_id,
+            "employer_id": employer_id,
+            "event_type": event_type,
+            "event_data": json.dumps(event_data) if event_data else None,
+            "session_id": session_id,
+            "user_agent": user_agent,
+            "ip_address": ip_address,
+            "timestamp": datetime.now().isoformat(),
+            "created_at": db.now_iso(),
+            "variant_id": (event_data or {}).get("variant_id"),
+        })
         
         return event_id
     
-    async def _update_variant_metrics(self, variant_id: str, metric_type: str):
-        """Update A/B test variant metrics"""
-        conn = db.get_db()
-        
-        # Get or create metrics record
-        metrics = conn.execute("""
-            SELECT * FROM variant_metrics WHERE variant_id = ?
-        """, [variant_id]).fetchone()
-        
-        if not metrics:
-            # Create new record
-            import uuid
-            conn.execute("""
-                INSERT INTO variant_metrics (id, variant_id, role_id, updated_at)
-                SELECT ?, ?, role_id, ?
-                FROM job_variants WHERE id = ?
-            """, [str(uuid.uuid4()), variant_id, db.now_iso(), variant_id])
-            metrics = conn.execute("""
-                SELECT * FROM variant_metrics WHERE variant_id = ?
-            """, [variant_id]).fetchone()
-        
-        # Update counts
-        if metric_type == "view":
-            new_views = metrics["views"] + 1
-            conn.execute("""
-                UPDATE variant_metrics 
-                SET views = ?, updated_at = ?
-                WHERE variant_id = ?
-            """, [new_views, db.now_iso(), variant_id])
-        elif metric_type == "application":
-            new_apps = metrics["applications"] + 1
-            conn.execute("""
-                UPDATE variant_metrics 
-                SET applications = ?, updated_at = ?
-                WHERE variant_id = ?
-            """, [new_apps, db.now_iso(), variant_id])
-        elif metric_type == "completion":
-            new_comps = metrics["completions"] + 1
-            conn.execute("""
-                UPDATE variant_metrics 
-                SET completions = ?, updated_at = ?
-                WHERE variant_id = ?
-            """, [new_comps, db.now_iso(), variant_id])
-        
-        # Recalculate conversion rate
-        updated_metrics = conn.execute("""
-            SELECT * FROM variant_metrics WHERE variant_id = ?
-        """, [variant_id]).fetchone()
-        
-        if updated_metrics["views"] > 0:
-            conversion_rate = (updated_metrics["completions"] / updated_metrics["views"]) * 100
-            conn.execute("""
-                UPDATE variant_metrics
-                SET conversion_rate = ?
-                WHERE variant_id = ?
-            """, [conversion_rate, variant_id])
-    
     async def get_funnel_data(
         self,
         employer_id: str,
@@ -196,43 +132,12 @@ class JourneyAnalytics:
         """
         Get conversion funnel data
         
-        Returns counts and conversion rates for each stage
-        """
-        conn = db.get_db()
-        
-        # Build query
-        query = """
-            SELECT event_type, COUNT(DISTINCT 
-                CASE WHEN candidate_id IS NOT NULL THEN candidate_id 
-                     ELSE session_id 
-                END
-            ) as count
-            FROM candidate_touchpoints
-            WHERE employer_id = ?
+        Returns counts and conversion rates for each stage. Counts are distinct
+        candidates (or sessions) that first reached the stage in the date range,
+        read from the daily rollups rather than the raw touchpoints.
         """
-        params = [employer_id]
-        
-        if role_id:
-            query += " AND role_id = ?"
-            params.append(role_id)
-        
-        if start_date:
-            query += " AND timestamp >= ?"
-            params.append(start_date)
-        
-        if end_date:
-            query += " AND timestamp <= ?"
-            params.append(end_date)
-        
-        query += " GROUP BY event_type"
-        
-        results = conn.execute(query, params).fetchall()
-        
-        # Build funnel stages
-        stage_counts = {stage: 0 for stage in self.STAGES}
-        for row in results:
-            if row["event_type"] in stage_counts:
-                stage_counts[row["event_type"]] = row["count"]
+        counts = funnel_rollups.stage_counts(employer_id, role_id, start_date, end_date)
+        stage_counts = {stage: counts.get(stage, {}).get("uniques", 0) for stage in self.STAGES}
         
         # Calculate conversion rates
         funnel_stages = []
@@ -301,97 +206,70 @@ class JourneyAnalytics:
         employer_id: str,
         role_id: Optional[str] = None
     ) -> Dict:
-        """Analyze how long candidates take at each stage"""
-        conn = db.get_db()
-        
-        query = """
-            SELECT 
-                candidate_id,
-                event_type,
-                timestamp
-            FROM candidate_touchpoints
-            WHERE employer_id = ?
-            AND candidate_id IS NOT NULL
         """
-        params = [employer_id]
-        
-        if role_id:
-            query += " AND role_id = ?"
-            params.append(role_id)
-        
-        query += " ORDER BY candidate_id, timestamp ASC"
-        
-        events = conn.execute(query, params).fetchall()
-        
-        # Group by candidate
-        candidate_timelines = defaultdict(list)
-        for event in events:
-            candidate_timelines[event["candidate_id"]].append({
-                "event": event["event_type"],
-                "time": datetime.fromisoformat(event["timestamp"])
-            })
-        
-        # Calculate time between stages
-        stage_durations = defaultdict(list)
-        
-        for candidate_id, timeline in candidate_timelines.items():
-            for i in range(len(timeline) - 1):
-                current = timeline[i]
-                next_event = timeline[i + 1]
-                
-                duration_seconds = (next_event["time"] - current["time"]).total_seconds()
-                stage_durations[f"{current['event']}_to_{next_event['event']}"].append(duration_seconds)
+        Analyze how long candidates take at each stage (between consecutive
+        events of a candidate within a role), from the duration rollups.
+        """
+        stats = funnel_rollups.duration_stats(employer_id, role_id)
+        counts = funnel_rollups.stage_counts(employer_id, role_id)
         
-        # Calculate averages
         avg_durations = {}
-        for stage, durations in stage_durations.items():
-            if durations:
-                avg_seconds = sum(durations) / len(durations)
-                avg_durations[stage] = {
-                    "average_seconds": round(avg_seconds, 2),
-                    "average_hours": round(avg_seconds / 3600, 2),
-                    "average_days": round(avg_seconds / 86400, 2),
-                    "sample_size": len(durations)
-                }
+        for stage, data in stats.items():
+            avg_seconds = data["mean_seconds"]
+            avg_durations[stage] = {
+                "average_seconds": round(avg_seconds, 2),
+                "average_hours": round(avg_seconds / 3600, 2),
+                "average_days": round(avg_seconds / 86400, 2),
+                "median_seconds_estimate": data["p50_seconds"],
+                "p90_seconds_estimate": data["p90_seconds"],
+                "sample_size": data["n"]
+            }
         
         return {
             "stage_durations": avg_durations,
-            "total_candidates": len(candidate_timelines)
+            "total_candidates": counts.get(funnel_rollups.CANDIDATES, {}).get("uniques", 0)
         }
     
     async def create_ab_test(
         self,
         role_id: str,
         employer_id: str,
-        variants: List[Dict[str, str]]
+        variants: List[Dict[str, str]],
+        settings: Optional[Dict] = None
     ) -> List[str]:
         """
-        Create A/B test variants for a job posting
+        Create A/B test variants for a job posting and start an experiment
+        over them (the first variant is the control; see app/services/ab_testing.py)
         
         variants = [
             {"name": "A", "title": "...", "description": "..."},
             {"name": "B", "title": "...", "description": "..."}
         ]
+        settings = {"alpha": 0.05, "tau": 0.05, "min_views": 100}  # optional
         """
+        self._ensure_initialized()
         import uuid
-        conn = db.get_db()
         
         variant_ids = []
         
-        for variant in variants:
-            variant_id = str(uuid.uuid4())
-            
-            conn.execute("""
-                INSERT INTO job_variants (
-                    id, role_id, employer_id, variant_name,
-                    title, description, created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, [
-                variant_id, role_id, employer_id, variant["name"],
-                variant["title"], variant["description"], db.now_iso()
-            ])
+        with db.connection() as conn:
+            for variant in variants:
+                variant_id = str(uuid.uuid4())
+                
+                conn.execute("""
+                    INSERT INTO job_variants (
+                        id, role_id, employer_id, variant_name,
+                        title, description, created_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    variant_id, role_id, employer_id, variant["name"],
+                    variant["title"], variant["description"], db.now_iso()
+                ])
+                
+                variant_ids.append(variant_id)
             
-            variant_ids.append(variant_id)
+            if variant_ids:
+                ab_testing.create(conn.cursor(), role_id, employer_id, variant_ids, settings)
         
         return variant_ids
     
@@ -400,46 +278,21 @@ class JourneyAnalytics:
         role_id: str,
         employer_id: str
     ) -> Dict:
-        """Get A/B test performance comparison"""
-        conn = db.get_db()
-        
-        variants = conn.execute("""
-            SELECT 
-                v.id, v.variant_name, v.title,
-                m.views, m.applications, m.completions, m.conversion_rate
-            FROM job_variants v
-            LEFT JOIN variant_metrics m ON v.id = m.variant_id
-            WHERE v.role_id = ? AND v.employer_id = ?
-            AND v.is_active = 1
-            ORDER BY v.created_at ASC
-        """, [role_id, employer_id]).fetchall()
-        
-        results = []
-        best_variant = None
-        best_conversion = 0
-        
-        for variant in variants:
-            variant_data = {
-                "id": variant["id"],
-                "name": variant["variant_name"],
-                "title": variant["title"],
-                "views": variant["views"] or 0,
-                "applications": variant["applications"] or 0,
-                "completions": variant["completions"] or 0,
-                "conversion_rate": variant["conversion_rate"] or 0.0
-            }
-            
-            results.append(variant_data)
-            
-            if variant_data["conversion_rate"] > best_conversion:
-                best_conversion = variant_data["conversion_rate"]
-                best_variant = variant_data
-        
-        return {
-            "variants": results,
-            "best_variant": best_variant,
-            "total_variants": len(results)
-        }
+        """
+        Get A/B test performance comparison: Beta posteriors, P(best),
+        P(beats control) and the sequential test's stop decision
+        """
+        self._ensure_initialized()
+        return ab_testing.results(role_id, employer_id)
+    
+    async def assign_variant(
+        self,
+        role_id: str,
+        employer_id: str
+    ) -> Optional[Dict]:
+        """Variant to show the next visitor (Thompson sampling; the winner once stopped)"""
+        self._ensure_initialized()
+        return ab_testing.assign(role_id, employer_id)
 
 # Global instance
 journey_analytics = JourneyAnalytics()
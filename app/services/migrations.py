@@ -0,0 +1,315 @@
+# app/services/migrations.py
+"""
+Versioned schema migrations.
+
+Migrations live in app/migrations/ as ordered files:
+    NNNN_short_name.sql   plain SQL, statements separated by ';'
+    NNNN_short_name.py    module with upgrade(cur, dialect) for anything conditional
+
+A migration is frozen once released: .py migrations don't import service
+code (a later change to a rebuild() would change what an old migration does
+on a fresh install); backfills spell out their own SQL.
+
+Each migration runs in its own transaction and is recorded in schema_version
+(version, name, applied_utc). init_db() calls migrate() after creating the
+base tables, so a fresh or existing database always ends up on the latest
+version.
+
+CLI:
+    python -m app.services.migrations plan             # applied / pending
+    python -m app.services.migrations migrate          # apply pending
+    python -m app.services.migrations migrate --dry-run
+    python -m app.services.migrations explain          # query plans for TOP_QUERIES
+"""
+import importlib
+import logging
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from app.services import db
+
+logger = logging.getLogger("epq.migrations")
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+_FILENAME_RE = re.compile(r"^(\d{4})_([a-z0-9_]+)\.(sql|py)$")
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent workers apply each migration once
+_PG_LOCK_KEY = 704_120_001
+
+
+def dialect() -> str:
+    return "postgresql" if os.environ.get("DATABASE_URL") else "sqlite"
+
+
+def discover() -> List[Dict]:
+    """Migration files in version order: [{version, name, kind, path}]."""
+    found: Dict[int, Dict] = {}
+    for path in sorted(MIGRATIONS_DIR.iterdir()):
+        m = _FILENAME_RE.match(path.name)
+        if not m:
+            continue
+        version = int(m.group(1))
+        if version in found:
+            raise ValueError(f"Duplicate migration version {version:04d}: {found[version]['path'].name}, {path.name}")
+        found[version] = {"version": version, "name": m.group(2), "kind": m.group(3), "path": path}
+    return [found[v] for v in sorted(found)]
+
+
+def _ensure_version_table(con):
+    con.cursor().execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_utc TEXT NOT NULL
+    )
+    """)
+    con.commit()
+
+
+def _applied(cur) -> Dict[int, Dict]:
+    cur.execute("SELECT version, name, applied_utc FROM schema_version ORDER BY version")
+    return {int(r["version"]): dict(r) for r in cur.fetchall()}
+
+
+def plan() -> List[Dict]:
+    """Every known migration with its applied state."""
+    con = db.connect()
+    try:
+        _ensure_version_table(con)
+        applied = _applied(con.cursor())
+    finally:
+        con.close()
+    out = []
+    for mig in discover():
+        row = applied.get(mig["version"])
+        out.append({
+            "version": mig["version"],
+            "name": mig["name"],
+            "kind": mig["kind"],
+            "applied": row is not None,
+            "applied_utc": row["applied_utc"] if row else None,
+        })
+    return out
+
+
+def _split_sql(text: str) -> List[str]:
+    lines = [ln for ln in text.splitlines() if not ln.strip().startswith("--")]
+    return [s.strip() for s in "\n".join(lines).split(";") if s.strip()]
+
+
+def _run(cur, mig: Dict, dialect_name: str):
+    if mig["kind"] == "sql":
+        for statement in _split_sql(mig["path"].read_text(encoding="utf-8-sig")):
+            cur.execute(statement)
+    else:
+        module = importlib.import_module(f"app.migrations.{mig['path'].stem}")
+        module.upgrade(cur, dialect_name)
+
+
+def _begin(con, cur, dialect_name: str):
+    if dialect_name == "sqlite":
+        if con.in_transaction:
+            con.commit()
+        # Take the write lock up front so two processes can't apply the same version
+        cur.execute("BEGIN IMMEDIATE")
+    else:
+        cur.execute("SELECT pg_advisory_xact_lock(?)", (_PG_LOCK_KEY,))
+
+
+def migrate(dry_run: bool = False) -> List[Dict]:
+    """
+    Apply pending migrations in order. Returns the migrations that ran.
+    With dry_run=True every pending migration is executed and then rolled back,
+    so SQL errors surface without changing the schema.
+    """
+    dialect_name = dialect()
+    ran = []
+    con = db.connect()
+    try:
+        _ensure_version_table(con)
+        cur = con.cursor()
+        for mig in discover():
+            _begin(con, cur, dialect_name)
+            try:
+                # Re-check under the lock: another worker may have applied it meanwhile
+                if mig["version"] in _applied(cur):
+                    con.rollback()
+                    continue
+                _run(cur, mig, dialect_name)
+                cur.execute(
+                    "INSERT INTO schema_version (version, name, applied_utc) VALUES (?, ?, ?)",
+                    (mig["version"], mig["name"], db.now_iso()),
+                )
+            except Exception:
+                con.rollback()
+                logger.error(f"[MIGRATIONS] {mig['version']:04d}_{mig['name']} failed")
+                raise
+            if dry_run:
+                con.rollback()
+            else:
+                con.commit()
+                logger.info(f"[MIGRATIONS] Applied {mig['version']:04d}_{mig['name']}")
+            ran.append({"version": mig["version"], "name": mig["name"], "kind": mig["kind"]})
+    finally:
+        con.close()
+    return ran
+
+
+def current_version() -> int:
+    applied = [m["version"] for m in plan() if m["applied"]]
+    return max(applied) if applied else 0
+
+
+# -------------------------
+# Helpers for .py migrations
+# -------------------------
+def column_exists(cur, dialect_name: str, table: str, column: str) -> bool:
+    if dialect_name == "postgresql":
+        cur.execute(
+            "SELECT 1 FROM information_schema.columns WHERE table_name = ? AND column_name = ?",
+            (table, column),
+        )
+        return cur.fetchone() is not None
+    cur.execute(f"PRAGMA table_info({table})")
+    return any(r["name"] == column for r in cur.fetchall())
+
+
+def add_column_if_missing(cur, dialect_name: str, table: str, column: str, column_def: str) -> bool:
+    """ALTER TABLE ... ADD COLUMN only when the column is absent. Returns True if added."""
+    if column_exists(cur, dialect_name, table, column):
+        return False
+    cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_def}")
+    return True
+
+
+# -------------------------
+# Query plan report
+# -------------------------
+# (name, sql, sample params) for the hottest read paths. Keep in sync with the
+# queries in db.py / auth_db.py / webhooks.py / journey_analytics.py.
+TOP_QUERIES = [
+    (
+        "assessments_for_employer",
+        "SELECT * FROM assessments WHERE employer_id=? ORDER BY created_utc DESC",
+        ("E-0",),
+    ),
+    (
+        "applicants_for_assessment",
+        "SELECT candidate_id, pdf_status FROM applicants WHERE assessment_id = ? ORDER BY submitted_utc DESC",
+        ("S-0",),
+    ),
+    (
+        "submission_feed",
+        f"""
+        SELECT {db.SUBMISSION_FEED_COLUMNS}
+        FROM applicants ap
+        JOIN assessments s ON s.assessment_id = ap.assessment_id
+        WHERE s.employer_id = ?
+        ORDER BY ap.submitted_utc DESC, ap.candidate_id DESC
+        LIMIT ?
+        """,
+        ("E-0", 50),
+    ),
+    (
+        "applicant_duplicate_check",
+        "SELECT 1 FROM applicants WHERE assessment_id = ? AND lower(applicant_email) = ? LIMIT 1",
+        ("S-0", "someone@example.com"),
+    ),
+    (
+        "employer_by_email",
+        "SELECT employer_id FROM employers WHERE lower(email)=lower(?)",
+        ("someone@example.com",),
+    ),
+    (
+        "webhook_subscribers",
+        "SELECT webhook_id, url, secret FROM webhooks WHERE employer_id = ? AND event_type = ? AND active = 1",
+        ("E-0", "applicant.submitted"),
+    ),
+    (
+        "touchpoints_funnel",
+        "SELECT event_type, COUNT(*) FROM candidate_touchpoints "
+        "WHERE employer_id = ? AND timestamp >= ? GROUP BY event_type",
+        ("E-0", "1970-01-01T00:00:00"),
+    ),
+]
+
+
+def _is_full_scan(detail: str) -> bool:
+    # SQLite: "SCAN applicants" is a table scan; "SCAN x USING [COVERING] INDEX" is not.
+    # PostgreSQL: "Seq Scan on applicants". Note the Postgres planner legitimately
+    # prefers seq scans on tiny tables, so judge it on production-sized data.
+    detail = detail.strip()
+    if "Seq Scan" in detail:
+        return True
+    return detail.startswith("SCAN ") and " USING " not in detail
+
+
+def explain_top_queries() -> List[Dict]:
+    """
+    [{name, plan: [lines], full_scan: bool}] for TOP_QUERIES on the configured database.
+    Queries that can't be planned (missing table) carry an "error" key instead.
+    """
+    dialect_name = dialect()
+    prefix = "EXPLAIN QUERY PLAN " if dialect_name == "sqlite" else "EXPLAIN "
+    out = []
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        for name, sql, params in TOP_QUERIES:
+            try:
+                cur.execute(prefix + sql, params)
+                rows = cur.fetchall()
+            except Exception as exc:
+                # e.g. candidate_touchpoints before init_db/migrate has run
+                con.rollback()
+                out.append({"name": name, "plan": [f"error: {exc}"], "full_scan": False, "error": str(exc)})
+                continue
+            if dialect_name == "sqlite":
+                plan_lines = [r["detail"] for r in rows]
+            else:
+                plan_lines = [list(dict(r).values())[0] for r in rows]
+            out.append({
+                "name": name,
+                "plan": plan_lines,
+                "full_scan": any(_is_full_scan(line) for line in plan_lines),
+            })
+    finally:
+        con.close()
+    return out
+
+
+def _main(argv: List[str]) -> int:
+    command = argv[0] if argv else "plan"
+    if command == "plan":
+        for m in plan():
+            state = f"applied {m['applied_utc']}" if m["applied"] else "pending"
+            print(f"{m['version']:04d}  {m['name']:<40} {m['kind']:<4} {state}")
+        return 0
+    if command == "migrate":
+        dry_run = "--dry-run" in argv[1:]
+        ran = migrate(dry_run=dry_run)
+        verb = "Would apply" if dry_run else "Applied"
+        for m in ran:
+            print(f"{verb} {m['version']:04d}_{m['name']}")
+        if not ran:
+            print("Schema is up to date")
+        return 0
+    if command == "explain":
+        regressions = 0
+        for q in explain_top_queries():
+            flag = "ERROR" if q.get("error") else "FULL SCAN" if q["full_scan"] else "ok"
+            regressions += q["full_scan"] or bool(q.get("error"))
+            print(f"[{flag}] {q['name']}")
+            for line in q["plan"]:
+                print(f"    {line}")
+        return 1 if regressions else 0
+    print(__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,94 @@
+# app/services/pdf_jobs.py
+"""
+Applicant PDF generation as a durable job (kind "pdf.generate").
+
+applicant.submit calls enqueue_pdf(); a worker (`python -m app.worker`)
+renders the report and flips applicants.pdf_status to success, queueing the
+candidate.pdf_ready webhook in the same transaction. Failed
+attempts are retried with backoff while the row stays 'processing'; the row
+is only marked failed once the job is dead-lettered. A missing pdfkit or
+wkhtmltopdf dead-letters the job (and fails the row) on the first attempt.
+"""
+import logging
+from pathlib import Path
+from typing import Dict
+
+from app.services import db, job_queue, pdf_renderer
+
+logger = logging.getLogger("epq.pdf_jobs")
+
+KIND = "pdf.generate"
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+REPORTS_DIR = PROJECT_ROOT / "reports"
+
+
+def enqueue_pdf(assessment_id: str, candidate_id: str, applicant_result: Dict, employer_env: str) -> str:
+    return job_queue.enqueue(
+        KIND,
+        {
+            "assessment_id": assessment_id,
+            "candidate_id": candidate_id,
+            "applicant_result": applicant_result,
+            "employer_env": employer_env or "moderate",
+        },
+    )
+
+
+def _pdf_ready_events(assessment_id: str, candidate_id: str, pdf_filename: str):
+    a = db.get_assessment(assessment_id)
+    if not a:
+        return []
+    return [(
+        a.get("employer_id"),
+        "candidate.pdf_ready",
+        {
+            "candidate_id": candidate_id,
+            "assessment_id": assessment_id,
+            "pdf_filename": pdf_filename,
+            "pdf_url": f"/api/employer/pdf/{candidate_id}"
+        }
+    )]
+
+
+def _on_dead(payload: Dict, error: str):
+    db.set_applicant_pdf_failed(payload.get("candidate_id", ""), error or "PDF generation failed")
+
+
+@job_queue.register(KIND, on_dead=_on_dead)
+def generate_applicant_pdf(payload: Dict) -> str:
+    """
+    Render the report for one applicant and mark it ready. Raises on failure
+    so the queue retries. Returns the PDF filename.
+    """
+    candidate_id = payload["candidate_id"]
+    assessment_id = payload.get("assessment_id", "")
+
+    # A retry after a crash between render and ack: the work is already done
+    row = db.get_applicant(candidate_id) or {}
+    if row.get("pdf_status") == "success" and row.get("pdf_filename") and (REPORTS_DIR / row["pdf_filename"]).exists():
+        return row["pdf_filename"]
+
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    logger.info(f"[PDF_JOB] Generating PDF for {candidate_id} env={payload.get('employer_env')}")
+    # Rendered in the pre-warmed process pool (app/services/pdf_renderer.py)
+    pdf_path = pdf_renderer.get_renderer().render(
+        applicant_result=payload.get("applicant_result") or {},
+        employer_environment=payload.get("employer_env", "moderate"),
+        candidate_id=candidate_id,
+        output_dir=str(REPORTS_DIR),
+    )
+    if not pdf_path:
+        import report_generator
+        if not report_generator.PDFKIT_AVAILABLE or not report_generator.wkhtmltopdf_info()[0]:
+            raise job_queue.PermanentError("PDF rendering unavailable: pdfkit or the wkhtmltopdf binary is missing")
+        raise RuntimeError("generate_pdf_report returned None")
+
+    pdf_filename = Path(pdf_path).name
+    # candidate.pdf_ready goes to the webhook outbox in the same transaction
+    db.set_applicant_pdf_success(
+        candidate_id, pdf_filename,
+        webhook_events=_pdf_ready_events(assessment_id, candidate_id, pdf_filename),
+    )
+    logger.info(f"[PDF_JOB] PDF generation complete for {candidate_id}: {pdf_filename}")
+    return pdf_filename
@@ -0,0 +1,216 @@
+# app/services/pdf_renderer.py
+"""
+Fixed-size pool of pre-warmed PDF render processes.
+
+Each worker process imports report_generator once and runs warm_up()
+(wkhtmltopdf path/version resolved, chart backend loaded), so a
+report only pays for the chart, the HTML and one wkhtmltopdf run.
+
+    renderer = pdf_renderer.get_renderer()
+    fut = renderer.submit(applicant_result=..., employer_environment=..., candidate_id=..., output_dir=...)
+    pdf_path = renderer.result(fut)          # or renderer.render(...) for both steps
+
+Back-pressure: at most max_pending renders are queued or running; submit()
+waits up to submit_timeout for a slot and then raises RendererBusy, so a
+burst can't pile up unbounded work or subprocesses.
+
+Tuning (environment variables):
+  PDF_RENDER_PROCESSES      worker processes (0 = render inline, no pool)  default 2
+  PDF_RENDER_MAX_PENDING    queued + running renders                        default 2 x processes
+  PDF_RENDER_TIMEOUT        seconds to wait for one render                  default WKHTMLTOPDF_TIMEOUT + 30
+  PDF_RENDER_SUBMIT_TIMEOUT seconds to wait for a free slot                 default 30
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+logger = logging.getLogger("epq.pdf_renderer")
+
+
+class RendererBusy(RuntimeError):
+    """No render slot became free within submit_timeout."""
+
+
+class RenderTimeout(TimeoutError):
+    """A render did not finish within the per-job timeout."""
+
+
+# ---- executed in the worker processes ----
+_warm_info: Dict = {}
+
+
+def _init_worker():
+    global _warm_info
+    import report_generator
+    try:
+        _warm_info = report_generator.warm_up()
+    except Exception as e:  # a cold worker still renders, just slower
+        _warm_info = {"error": str(e)}
+
+
+def _worker_info() -> Dict:
+    # Hold the worker briefly so start()'s pings spread across the pool
+    time.sleep(0.05)
+    return dict(_warm_info, pid=os.getpid())
+
+
+def _render(kwargs: Dict) -> Optional[str]:
+    import report_generator
+    return report_generator.generate_pdf_report(**kwargs)
+
+
+class PdfRenderer:
+    def __init__(self, processes: int = 2, max_pending: Optional[int] = None,
+                 job_timeout: Optional[float] = None, submit_timeout: float = 30.0):
+        import report_generator
+
+        self.processes = max(0, int(processes))
+        self.max_pending = max(1, int(max_pending or 2 * max(1, self.processes)))
+        self.job_timeout = job_timeout or report_generator.WKHTMLTOPDF_TIMEOUT + 30
+        self.submit_timeout = submit_timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._workers = []
+        self._counts = {"submitted": 0, "completed": 0, "failed": 0, "timeouts": 0, "rejected": 0, "restarts": 0}
+
+    # ---- pool lifecycle ----
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: never fork the (multi-threaded) web/worker process
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._pool
+
+    def start(self, timeout: float = 120.0) -> "PdfRenderer":
+        """Start and warm every worker process now instead of on the first report."""
+        if self.processes:
+            pool = self._ensure_pool()
+            workers: Dict[int, Dict] = {}
+            deadline = time.monotonic() + timeout
+            # Processes start on demand; keep pinging until every one has warmed up
+            while len(workers) < self.processes and time.monotonic() < deadline:
+                futures = [pool.submit(_worker_info) for _ in range(self.processes)]
+                for f in futures:
+                    info = f.result(max(0.1, deadline - time.monotonic()))
+                    workers[info["pid"]] = info
+            self._workers = list(workers.values())
+            logger.info(f"[RENDERER] {self.processes} render processes ready: {self._workers}")
+        return self
+
+    def _reset(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._counts["restarts"] += 1
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+    # ---- API ----
+    def submit(self, **kwargs) -> Future:
+        """Queue one generate_pdf_report(**kwargs) call. Raises RendererBusy when saturated."""
+        if not self._slots.acquire(timeout=self.submit_timeout):
+            with self._lock:
+                self._counts["rejected"] += 1
+            raise RendererBusy(f"{self.max_pending} renders already pending")
+        with self._lock:
+            self._counts["submitted"] += 1
+        try:
+            if self.processes:
+                fut = self._ensure_pool().submit(_render, kwargs)
+            else:
+                fut = Future()
+                try:
+                    fut.set_result(_render(kwargs))
+                except Exception as e:
+                    fut.set_exception(e)
+        except Exception:
+            self._slots.release()
+            raise
+        fut.add_done_callback(lambda _f: self._slots.release())
+        return fut
+
+    def result(self, fut: Future, timeout: Optional[float] = None) -> Optional[str]:
+        try:
+            pdf_path = fut.result(timeout or self.job_timeout)
+        except FutureTimeout:
+            fut.cancel()
+            with self._lock:
+                self._counts["timeouts"] += 1
+            raise RenderTimeout(f"PDF render exceeded {timeout or self.job_timeout:.0f}s")
+        except BrokenProcessPool:
+            # A worker died (OOM / crash): start a fresh pool for the next job
+            logger.error("[RENDERER] Render process died; restarting pool")
+            self._reset()
+            with self._lock:
+                self._counts["failed"] += 1
+            raise RuntimeError("PDF render process crashed")
+        except Exception:
+            with self._lock:
+                self._counts["failed"] += 1
+            raise
+        with self._lock:
+            self._counts["completed" if pdf_path else "failed"] += 1
+        return pdf_path
+
+    def render(self, timeout: Optional[float] = None, **kwargs) -> Optional[str]:
+        return self.result(self.submit(**kwargs), timeout)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            "processes": self.processes,
+            "max_pending": self.max_pending,
+            # BoundedSemaphore has no public counter; _value is the free slot count
+            "pending": self.max_pending - self._slots._value,
+            "started": self._pool is not None,
+            "workers": self._workers,
+            **counts,
+        }
+
+
+_renderer: Optional[PdfRenderer] = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer() -> PdfRenderer:
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                processes = int(os.environ.get("PDF_RENDER_PROCESSES", 2))
+                timeout = os.environ.get("PDF_RENDER_TIMEOUT")
+                _renderer = PdfRenderer(
+                    processes=processes,
+                    max_pending=int(os.environ.get("PDF_RENDER_MAX_PENDING", 0)) or None,
+                    job_timeout=float(timeout) if timeout else None,
+                    submit_timeout=float(os.environ.get("PDF_RENDER_SUBMIT_TIMEOUT", 30)),
+                )
+    return _renderer
+
+
+def shutdown_renderer():
+    global _renderer
+    with _renderer_lock:
+        if _renderer is not None:
+            _renderer.shutdown(wait=False)
+        _renderer = None
+
+
+def stats() -> Optional[Dict]:
+    return _renderer.stats() if _renderer is not None else None
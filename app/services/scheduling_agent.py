@@ -3,11 +3,163 @@
 AI-powered interview scheduling agent
 Handles automatic scheduling, calendar invite generation, and candidate communication
 """
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Tuple
 import json
 from app.services import db
 
+
+# Stored times may be UTC ('Z') or carry an offset while windows are naive
+# local time, so SQL string comparisons are only a prefilter widened by this
+# much (more than any UTC offset); the parsed times are then clipped exactly.
+SQL_WINDOW_SLACK = timedelta(days=1)
+
+
+def parse_time(value: str) -> datetime:
+    """ISO timestamp -> naive local datetime (offsets converted), comparable with datetime.now()"""
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone().replace(tzinfo=None)
+    return dt
+
+
+def window_conditions(
+    window_start: Optional[datetime],
+    window_end: Optional[datetime]
+) -> Tuple[List[str], List]:
+    """SQL conditions (and params) for interviews that may overlap the window, padded by SQL_WINDOW_SLACK"""
+    where, params = [], []
+    if window_end is not None:
+        where.append("start_time < ?")
+        params.append((window_end + SQL_WINDOW_SLACK).isoformat())
+    if window_start is not None:
+        where.append("end_time > ?")
+        params.append((window_start - SQL_WINDOW_SLACK).isoformat())
+    return where, params
+
+
+def in_window(start: datetime, end: datetime, window_start: Optional[datetime], window_end: Optional[datetime]) -> bool:
+    """True if the parsed interval [start, end) overlaps the window"""
+    return (window_end is None or start < window_end) and (window_start is None or end > window_start)
+
+
+class BusyIntervals:
+    """
+    Existing interviews as a sorted interval structure, parsed once.
+    
+    Intervals are sorted by start with a running maximum of end times, so
+    "does [start, end) overlap anything" is one bisect: among intervals that
+    start before `end`, the latest end must be after `start`. Overlapping
+    (double-booked) interviews are handled. Nearby-start checks for fatigue
+    scoring are a bisect on the start times.
+    """
+    
+    def __init__(self, intervals: Iterable[Tuple[datetime, datetime]] = ()):
+        pairs = sorted((s, e) for s, e in intervals if e > s)
+        self.starts = [s for s, _ in pairs]
+        self.ends = [e for _, e in pairs]
+        self.max_end: List[datetime] = []
+        for e in self.ends:
+            self.max_end.append(e if not self.max_end or e > self.max_end[-1] else self.max_end[-1])
+    
+    @classmethod
+    def from_rows(cls, rows) -> "BusyIntervals":
+        """From rows with ISO start_time / end_time columns"""
+        return cls((parse_time(r["start_time"]), parse_time(r["end_time"])) for r in rows)
+    
+    def __len__(self) -> int:
+        return len(self.starts)
+    
+    def add(self, start: datetime, end: datetime):
+        """Insert an interval, keeping the structure sorted"""
+        if end <= start:
+            return
+        i = bisect_left(self.starts, start)
+        while i < len(self.starts) and self.starts[i] == start and self.ends[i] <= end:
+            i += 1
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.max_end.insert(i, end)
+        for j in range(i, len(self.max_end)):
+            best = self.ends[j] if j == 0 else max(self.ends[j], self.max_end[j - 1])
+            if j > i and best == self.max_end[j]:
+                break
+            self.max_end[j] = best
+    
+    def remove(self, start: datetime, end: datetime):
+        """Remove one interval previously added"""
+        i = bisect_left(self.starts, start)
+        while self.ends[i] != end:
+            i += 1
+        del self.starts[i], self.ends[i]
+        self.max_end = self.max_end[:i]
+        for e in self.ends[i:]:
+            self.max_end.append(e if not self.max_end or e > self.max_end[-1] else self.max_end[-1])
+    
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        """True if [start, end) intersects any interval. O(log n)"""
+        i = bisect_left(self.starts, end)  # intervals starting before `end`
+        return i > 0 and self.max_end[i - 1] > start
+    
+    def starts_within(self, moment: datetime, gap: timedelta) -> bool:
+        """True if any interval starts strictly less than `gap` away from `moment`. O(log n)"""
+        i = bisect_right(self.starts, moment - gap)
+        return i < len(self.starts) and self.starts[i] < moment + gap
+    
+    def starts_near(self, moment: datetime, gap: timedelta) -> int:
+        """Number of intervals starting strictly less than `gap` away from `moment`. O(log n)"""
+        return bisect_left(self.starts, moment + gap) - bisect_right(self.starts, moment - gap)
+    
+    def free_slots(self, window_start: datetime, window_end: datetime) -> List[Tuple[datetime, datetime]]:
+        """Gaps inside [window_start, window_end) not covered by any interval"""
+        slots = []
+        cursor = window_start
+        # Everything before i ends at or before window_start (max_end is non-decreasing)
+        i = bisect_right(self.max_end, window_start)
+        while i < len(self.starts) and self.starts[i] < window_end:
+            if self.starts[i] > cursor:
+                slots.append((cursor, self.starts[i]))
+            if self.ends[i] > cursor:
+                cursor = self.ends[i]
+            i += 1
+        if cursor < window_end:
+            slots.append((cursor, window_end))
+        return slots
+
+
+def load_busy_intervals(
+    employer_id: str,
+    statuses: Optional[List[str]] = None,
+    window_start: Optional[datetime] = None,
+    window_end: Optional[datetime] = None
+) -> BusyIntervals:
+    """
+    An employer's interviews as BusyIntervals: with the given statuses (default:
+    everything not cancelled), optionally only those overlapping a window.
+    """
+    where = ["employer_id = ?"]
+    params: List = [employer_id]
+    if statuses:
+        where.append(f"status IN ({', '.join('?' for _ in statuses)})")
+        params.extend(statuses)
+    else:
+        where.append("status != 'cancelled'")
+    window_where, window_params = window_conditions(window_start, window_end)
+    where.extend(window_where)
+    params.extend(window_params)
+    conn = db.connect()
+    try:
+        rows = conn.execute(f"""
+            SELECT start_time, end_time FROM interviews
+            WHERE {" AND ".join(where)}
+        """, params).fetchall()
+    finally:
+        conn.close()
+    intervals = ((parse_time(r["start_time"]), parse_time(r["end_time"])) for r in rows)
+    return BusyIntervals((s, e) for s, e in intervals if in_window(s, e, window_start, window_end))
+
+
 class SchedulingAgent:
     """AI agent for intelligent interview scheduling"""
     
@@ -33,20 +185,10 @@ class SchedulingAgent:
         - Historical interview success patterns
         - Avoid back-to-back scheduling fatigue
         """
-        conn = db.get_db()
-        
-        # Get existing interviews to avoid conflicts
-        existing = conn.execute("""
-            SELECT start_time, end_time, candidate_id FROM interviews
-            WHERE employer_id = ? AND status IN ('scheduled', 'confirmed')
-            AND start_time >= ?
-        """, [employer_id, datetime.now().isoformat()]).fetchall()
-        
-        # Get candidate info for personalization
-        candidate = conn.execute(
-            "SELECT name, email FROM applicants WHERE id = ?",
-            [candidate_id]
-        ).fetchone()
+        # Existing interviews, parsed once into a sorted interval structure
+        existing = load_busy_intervals(
+            employer_id, statuses=['scheduled', 'confirmed'], window_start=datetime.now()
+        )
         
         suggestions = []
         current_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
@@ -100,23 +242,17 @@ class SchedulingAgent:
         self,
         start: datetime,
         end: datetime,
-        existing_interviews: List[Dict]
+        existing_interviews: BusyIntervals
     ) -> bool:
         """Check if proposed time conflicts with existing interviews"""
-        for interview in existing_interviews:
-            ex_start = datetime.fromisoformat(interview["start_time"].replace('Z', '+00:00'))
-            ex_end = datetime.fromisoformat(interview["end_time"].replace('Z', '+00:00'))
-            
-            # Check overlap
-            if not (end <= ex_start or start >= ex_end):
-                return True
-        
-        return False
+        if not isinstance(existing_interviews, BusyIntervals):
+            existing_interviews = BusyIntervals.from_rows(existing_interviews)
+        return existing_interviews.overlaps(start, end)
     
     def _calculate_slot_score(
         self,
         slot_start: datetime,
-        existing_interviews: List[Dict],
+        existing_interviews: BusyIntervals,
         candidate_id: str
     ) -> float:
         """
@@ -128,7 +264,21 @@ class SchedulingAgent:
         - Day of week (Tuesday-Thursday preferred)
         - Historical success patterns
         """
-        score = 50.0  # Base score
+        score = 50.0 + self._time_preference(slot_start)
+        
+        # Spacing from other interviews (avoid back-to-back)
+        if not isinstance(existing_interviews, BusyIntervals):
+            existing_interviews = BusyIntervals.from_rows(existing_interviews)
+        if existing_interviews.starts_within(slot_start, timedelta(hours=2)):
+            score -= 20
+        else:
+            score += 15
+        
+        return min(100.0, max(0.0, score))
+    
+    def _time_preference(self, slot_start: datetime) -> float:
+        """Time-of-day and day-of-week part of the slot score"""
+        score = 0.0
         
         # Time of day preference
         hour = slot_start.hour
@@ -146,21 +296,7 @@ class SchedulingAgent:
         elif weekday in [0, 4]:  # Mon, Fri
             score += 5
         
-        # Spacing from other interviews (avoid back-to-back)
-        min_gap = timedelta(hours=2)
-        has_good_spacing = True
-        for interview in existing_interviews:
-            ex_start = datetime.fromisoformat(interview["start_time"].replace('Z', '+00:00'))
-            gap = abs((slot_start - ex_start).total_seconds())
-            if gap < min_gap.total_seconds():
-                score -= 20
-                has_good_spacing = False
-                break
-        
-        if has_good_spacing:
-            score += 15
-        
-        return min(100.0, max(0.0, score))
+        return score
     
     def _get_slot_reason(self, slot_start: datetime, score: float) -> str:
         """Generate human-readable reason for this suggestion"""
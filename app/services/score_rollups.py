@@ -0,0 +1,263 @@
+# app/services/score_rollups.py
+"""
+Per-employer, per-day score rollups behind /analytics (migration 0006).
+
+    score_rollup_daily  (employer_id, day, construct) -> n, total, total_sq
+                        construct "_overall" holds the applicants' overall_average
+    score_bucket_daily  (employer_id, day, bucket)    -> n
+                        bucket = decile (0..9) of the overall score as a percentage
+
+Rows are maintained incrementally by applicant_scores._write_rows(): the
+candidate's previous contribution is subtracted and the new one added in the
+same transaction, so the dashboard reads a few rows per day instead of every
+applicant. `day` is the submission date (submitted_utc[:10]).
+
+Recompute from applicant_scores / applicant_score_summary with:
+    python -m app.services.score_rollups rebuild [--employer E1]
+"""
+import datetime
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from app.services import db
+
+logger = logging.getLogger("epq.score_rollups")
+
+OVERALL = "_overall"
+
+# Construct averages are on the 1-3 answer scale; the dashboard shows 0-100%
+SCORE_MIN = 1.0
+SCORE_MAX = 3.0
+
+CONSTRUCT_NAMES = {
+    "SCL": "Structural Clarity Load",
+    "CCD": "Cognitive Compression Demand",
+    "CIL": "Complexity Integration Load",
+    "CVL": "Change Volatility Load",
+    "ERL": "Emotional Regulation Load",
+    "MSD": "Motivational Sustainment Demand",
+    "ICI": "Interpersonal Coordination Intensity",
+    "AJL": "Autonomy & Judgment Load",
+}
+
+
+def to_percent(score: float) -> float:
+    pct = (float(score) - SCORE_MIN) / (SCORE_MAX - SCORE_MIN) * 100.0
+    return min(100.0, max(0.0, pct))
+
+
+def bucket_for(score: float) -> int:
+    return min(9, int(to_percent(score) // 10))
+
+
+# -------------------------
+# Incremental maintenance
+# -------------------------
+def read_contribution(cur, candidate_id: str) -> Dict[str, float]:
+    """{construct: score, "_overall": avg} currently stored for a candidate (before it is rewritten)."""
+    out: Dict[str, float] = {}
+    cur.execute("SELECT construct, score FROM applicant_scores WHERE candidate_id = ?", (candidate_id,))
+    for r in cur.fetchall():
+        out[r["construct"]] = float(r["score"])
+    cur.execute("SELECT overall_average FROM applicant_score_summary WHERE candidate_id = ?", (candidate_id,))
+    row = cur.fetchone()
+    if row and row["overall_average"] is not None:
+        out[OVERALL] = float(row["overall_average"])
+    return out
+
+
+def contribution(result: Dict) -> Dict[str, float]:
+    out = {c: float(v) for c, v in (result.get("construct_scores") or {}).items()}
+    if result.get("overall_average") is not None:
+        out[OVERALL] = float(result["overall_average"])
+    return out
+
+
+def _upsert(cur, stats: Dict[Tuple[str, str, str], List[float]], buckets: Dict[Tuple[str, str, int], int]):
+    rows = [(e, d, c, int(v[0]), v[1], v[2]) for (e, d, c), v in stats.items() if any(v)]
+    if rows:
+        cur.executemany("""
+            INSERT INTO score_rollup_daily (employer_id, day, construct, n, total, total_sq)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (employer_id, day, construct) DO UPDATE SET
+                n = score_rollup_daily.n + excluded.n,
+                total = score_rollup_daily.total + excluded.total,
+                total_sq = score_rollup_daily.total_sq + excluded.total_sq
+        """, rows)
+    rows = [(e, d, b, n) for (e, d, b), n in buckets.items() if n]
+    if rows:
+        cur.executemany("""
+            INSERT INTO score_bucket_daily (employer_id, day, bucket, n)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (employer_id, day, bucket) DO UPDATE SET
+                n = score_bucket_daily.n + excluded.n
+        """, rows)
+
+
+def apply(cur, candidate_id: str, old: Dict[str, float], new: Dict[str, float]):
+    """Replace a candidate's old contribution with new, on the caller's cursor."""
+    if old == new:
+        return
+    cur.execute("""
+        SELECT asm.employer_id, ap.submitted_utc
+        FROM applicants ap
+        JOIN assessments asm ON asm.assessment_id = ap.assessment_id
+        WHERE ap.candidate_id = ?
+    """, (candidate_id,))
+    row = cur.fetchone()
+    if not row:
+        return
+    employer_id, day = row["employer_id"], (row["submitted_utc"] or "")[:10]
+
+    stats: Dict[Tuple[str, str, str], List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+    buckets: Dict[Tuple[str, str, int], int] = defaultdict(int)
+    for sign, scores in ((-1, old), (1, new)):
+        for construct, score in scores.items():
+            s = stats[(employer_id, day, construct)]
+            s[0] += sign
+            s[1] += sign * score
+            s[2] += sign * score * score
+        if OVERALL in scores:
+            buckets[(employer_id, day, bucket_for(scores[OVERALL]))] += sign
+    _upsert(cur, stats, buckets)
+
+
+def rebuild(cur=None, employer_id: str = "") -> Dict[str, int]:
+    """
+    Recompute rollups from the stored scores (all employers, or one).
+    Runs on cur if given (e.g. inside a migration), else in its own transaction.
+    """
+    if cur is None:
+        with db.connection() as con:
+            return rebuild(con.cursor(), employer_id)
+
+    where, params = "", []
+    if employer_id:
+        where, params = "WHERE asm.employer_id = ?", [employer_id]
+        cur.execute("DELETE FROM score_rollup_daily WHERE employer_id = ?", params)
+        cur.execute("DELETE FROM score_bucket_daily WHERE employer_id = ?", params)
+    else:
+        cur.execute("DELETE FROM score_rollup_daily")
+        cur.execute("DELETE FROM score_bucket_daily")
+
+    day = "substr(ap.submitted_utc, 1, 10)"
+    cur.execute(f"""
+        INSERT INTO score_rollup_daily (employer_id, day, construct, n, total, total_sq)
+        SELECT asm.employer_id, {day}, sc.construct, COUNT(*), SUM(sc.score), SUM(sc.score * sc.score)
+        FROM applicant_scores sc
+        JOIN applicants ap ON ap.candidate_id = sc.candidate_id
+        JOIN assessments asm ON asm.assessment_id = ap.assessment_id
+        {where}
+        GROUP BY asm.employer_id, {day}, sc.construct
+    """, params)
+    cur.execute(f"""
+        INSERT INTO score_rollup_daily (employer_id, day, construct, n, total, total_sq)
+        SELECT asm.employer_id, {day}, '{OVERALL}', COUNT(*), SUM(s.overall_average), SUM(s.overall_average * s.overall_average)
+        FROM applicant_score_summary s
+        JOIN applicants ap ON ap.candidate_id = s.candidate_id
+        JOIN assessments asm ON asm.assessment_id = ap.assessment_id
+        {where} {"AND" if where else "WHERE"} s.overall_average IS NOT NULL
+        GROUP BY asm.employer_id, {day}
+    """, params)
+
+    # Deciles need a clamp + floor that SQLite and Postgres spell differently; do them here
+    buckets: Dict[Tuple[str, str, int], int] = defaultdict(int)
+    cur.execute(f"""
+        SELECT asm.employer_id, {day} AS day, s.overall_average
+        FROM applicant_score_summary s
+        JOIN applicants ap ON ap.candidate_id = s.candidate_id
+        JOIN assessments asm ON asm.assessment_id = ap.assessment_id
+        {where} {"AND" if where else "WHERE"} s.overall_average IS NOT NULL
+    """, params)
+    for r in cur.fetchall():
+        buckets[(r["employer_id"], r["day"], bucket_for(r["overall_average"]))] += 1
+    _upsert(cur, {}, buckets)
+
+    cur.execute("SELECT COUNT(*) AS n FROM score_rollup_daily")
+    return {"rollup_rows": int(cur.fetchone()["n"]), "bucket_rows": len(buckets)}
+
+
+# -------------------------
+# Reads
+# -------------------------
+def construct_stats(employer_id: str, since: str = "", until: str = "") -> Dict[str, Dict]:
+    """{construct: {n, mean, std}} over submission days in [since, until)."""
+    where, params = ["employer_id = ?"], [employer_id]
+    if since:
+        where.append("day >= ?")
+        params.append(since[:10])
+    if until:
+        where.append("day < ?")
+        params.append(until[:10])
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        cur.execute(f"""
+            SELECT construct, SUM(n) AS n, SUM(total) AS total, SUM(total_sq) AS total_sq
+            FROM score_rollup_daily
+            WHERE {" AND ".join(where)}
+            GROUP BY construct
+        """, params)
+        out = {}
+        for r in cur.fetchall():
+            n = int(r["n"] or 0)
+            if n <= 0:
+                continue
+            mean = float(r["total"]) / n
+            var = max(0.0, float(r["total_sq"]) / n - mean * mean)
+            out[r["construct"]] = {"n": n, "mean": mean, "std": var ** 0.5}
+        return out
+    finally:
+        con.close()
+
+
+def bucket_counts(employer_id: str, since: str = "", until: str = "") -> List[int]:
+    """Applicants per overall-score decile (index 0 = 0-9%, 9 = 90-100%)."""
+    where, params = ["employer_id = ?"], [employer_id]
+    if since:
+        where.append("day >= ?")
+        params.append(since[:10])
+    if until:
+        where.append("day < ?")
+        params.append(until[:10])
+    counts = [0] * 10
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        cur.execute(f"""
+            SELECT bucket, SUM(n) AS n FROM score_bucket_daily
+            WHERE {" AND ".join(where)}
+            GROUP BY bucket
+        """, params)
+        for r in cur.fetchall():
+            counts[int(r["bucket"])] = int(r["n"] or 0)
+    finally:
+        con.close()
+    return counts
+
+
+def period_bounds(days: int, today: Optional[datetime.date] = None) -> Tuple[str, str, str]:
+    """(previous_start, current_start, end) ISO dates for two back-to-back windows of `days`."""
+    end = (today or datetime.datetime.utcnow().date()) + datetime.timedelta(days=1)
+    current = end - datetime.timedelta(days=days)
+    previous = current - datetime.timedelta(days=days)
+    return previous.isoformat(), current.isoformat(), end.isoformat()
+
+
+def main(argv=None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m app.services.score_rollups")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("rebuild", help="recompute rollups from stored scores")
+    p.add_argument("--employer", default="")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.cmd == "rebuild":
+        print(rebuild(employer_id=args.employer))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
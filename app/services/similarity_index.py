@@ -0,0 +1,276 @@
+# app/services/similarity_index.py
+"""
+Nearest-neighbour search over candidates' score vectors
+(/employer/candidates/similar/{candidate_id}).
+
+Each scored applicant is a 14-dimensional point: the 8 construct scores
+(SCL..AJL, 1-3 scale) and the 6 environment_mapper dimensions (0-100), both
+rescaled to [0, 1] so every dimension weighs the same. Per employer the index
+keeps one float32 matrix plus its row norms, so a query is one mat-vec
+(|x - q|^2 = |x|^2 + |q|^2 - 2 x.q) and an argpartition: milliseconds for
+hundreds of thousands of candidates, with no extra dependency.
+
+Indexes are built in-process on first use. Before answering, new or rescored
+candidates are merged in from applicant_score_summary.computed_utc (indexed,
+migration 0010), at most every SIMILARITY_REFRESH_SECONDS (default 1), so new
+submissions show up without a rebuild, whichever process scored them. A full
+rebuild every SIMILARITY_INDEX_TTL seconds (default 600) drops deleted
+candidates and picks up any row committed behind the watermark.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services import db, score_rollups
+from app.services.environment_mapper import ENVIRONMENT_DIMENSIONS
+
+logger = logging.getLogger("epq.similarity")
+
+CONSTRUCTS = ("SCL", "CCD", "CIL", "CVL", "ERL", "MSD", "ICI", "AJL")
+DIMENSIONS = CONSTRUCTS + ENVIRONMENT_DIMENSIONS
+MAX_DISTANCE = math.sqrt(len(DIMENSIONS))
+
+_SQL = """
+    SELECT ap.candidate_id, ap.applicant_name, asm.role_id, ap.submitted_utc, sm.computed_utc,
+           {env}, {constructs}
+    FROM applicant_score_summary sm
+    JOIN applicants ap ON ap.candidate_id = sm.candidate_id
+    JOIN assessments asm ON asm.assessment_id = ap.assessment_id
+    LEFT JOIN applicant_scores sc ON sc.candidate_id = sm.candidate_id
+    WHERE asm.employer_id = ? {{where}}
+    GROUP BY ap.candidate_id, ap.applicant_name, asm.role_id, ap.submitted_utc, sm.computed_utc, {env}
+""".format(
+    env=", ".join(f"sm.{d}" for d in ENVIRONMENT_DIMENSIONS),
+    constructs=", ".join(f"MAX(CASE WHEN sc.construct = '{c}' THEN sc.score END) AS {c.lower()}" for c in CONSTRUCTS),
+)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _vector(row) -> Optional[np.ndarray]:
+    """Scaled [0, 1] point for a row, or None if the candidate has no scores."""
+    if all(row[c.lower()] is None for c in CONSTRUCTS):
+        return None
+    span = score_rollups.SCORE_MAX - score_rollups.SCORE_MIN
+    # A missing value sits at the middle of its scale
+    values = [0.5 if row[c.lower()] is None else (float(row[c.lower()]) - score_rollups.SCORE_MIN) / span
+              for c in CONSTRUCTS]
+    values += [0.5 if row[d] is None else float(row[d]) / 100.0 for d in ENVIRONMENT_DIMENSIONS]
+    return np.clip(np.array(values, dtype=np.float32), 0.0, 1.0)
+
+
+class EmployerIndex:
+    """Score vectors of one employer's candidates: X (n x 14), |x|^2 and per-row metadata."""
+
+    def __init__(self, employer_id: str):
+        self.employer_id = employer_id
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.X = np.zeros((0, len(DIMENSIONS)), dtype=np.float32)
+        self.norms = np.zeros(0, dtype=np.float32)
+        self.names: List[str] = []
+        self.roles: List[str] = []
+        self.role_codes: Dict[str, int] = {}
+        self.role_ix = np.zeros(0, dtype=np.int32)
+        self.submitted = np.array([], dtype="U32")
+        self.watermark = ""
+        self.built_at = 0.0
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def _fetch(self, candidate_ids: Optional[List[str]] = None):
+        """Index rows for the employer's candidates (all, or just candidate_ids)."""
+        con = db.connect()
+        try:
+            cur = con.cursor()
+            if candidate_ids is None:
+                cur.execute(_SQL.format(where=""), (self.employer_id,))
+                return cur.fetchall()
+            rows = []
+            for i in range(0, len(candidate_ids), 500):
+                chunk = candidate_ids[i:i + 500]
+                cur.execute(
+                    _SQL.format(where=f"AND sm.candidate_id IN ({', '.join('?' for _ in chunk)})"),
+                    (self.employer_id, *chunk),
+                )
+                rows.extend(cur.fetchall())
+            return rows
+        finally:
+            con.close()
+
+    def _changed_since(self, watermark: str):
+        # Cheap probe on the computed_utc index (any employer); usually empty
+        con = db.connect()
+        try:
+            cur = con.cursor()
+            cur.execute(
+                "SELECT candidate_id, computed_utc FROM applicant_score_summary WHERE computed_utc > ?", (watermark,)
+            )
+            return cur.fetchall()
+        finally:
+            con.close()
+
+    def build(self):
+        rows = self._fetch()
+        points = [(r, _vector(r)) for r in rows]
+        points = [(r, v) for r, v in points if v is not None]
+        self.ids = [r["candidate_id"] for r, _ in points]
+        self.rows = {cid: i for i, cid in enumerate(self.ids)}
+        self.X = np.vstack([v for _, v in points]) if points else np.zeros((0, len(DIMENSIONS)), dtype=np.float32)
+        self.norms = np.einsum("ij,ij->i", self.X, self.X)
+        self.names = [r["applicant_name"] for r, _ in points]
+        self.roles = [r["role_id"] for r, _ in points]
+        self.role_codes = {}
+        self.role_ix = np.array([self._role_code(role) for role in self.roles], dtype=np.int32)
+        self.submitted = np.array([(r["submitted_utc"] or "")[:32] for r, _ in points], dtype="U32")
+        self.watermark = max((r["computed_utc"] or "" for r in rows), default="")
+        self.built_at = self.checked_at = time.monotonic()
+        logger.info(f"[SIMILAR] Built index for {self.employer_id}: {len(self.ids)} candidates")
+
+    def refresh(self):
+        """Merge candidates scored since the last build / refresh (append new rows, overwrite rescored ones)."""
+        changed = self._changed_since(self.watermark)
+        rows = self._fetch([r["candidate_id"] for r in changed]) if changed else []
+        self.watermark = max([self.watermark, *(r["computed_utc"] or "" for r in changed)])
+        new_vectors, new_rows = [], []
+        for r in rows:
+            v = _vector(r)
+            self.watermark = max(self.watermark, r["computed_utc"] or "")
+            cid = r["candidate_id"]
+            if cid in self.rows:
+                if v is None:
+                    continue
+                i = self.rows[cid]
+                self.X[i] = v
+                self.norms[i] = float(v @ v)
+                self.names[i] = r["applicant_name"]
+                self.roles[i] = r["role_id"]
+                self.role_ix[i] = self._role_code(r["role_id"])
+                self.submitted[i] = (r["submitted_utc"] or "")[:32]
+            elif v is not None:
+                new_vectors.append(v)
+                new_rows.append(r)
+        if new_rows:
+            start = len(self.ids)
+            for offset, r in enumerate(new_rows):
+                self.ids.append(r["candidate_id"])
+                self.rows[r["candidate_id"]] = start + offset
+                self.names.append(r["applicant_name"])
+                self.roles.append(r["role_id"])
+            block = np.vstack(new_vectors)
+            self.X = np.vstack([self.X, block])
+            self.norms = np.concatenate([self.norms, np.einsum("ij,ij->i", block, block)])
+            self.role_ix = np.concatenate([
+                self.role_ix, np.array([self._role_code(r["role_id"]) for r in new_rows], dtype=np.int32)
+            ])
+            self.submitted = np.concatenate([
+                self.submitted, np.array([(r["submitted_utc"] or "")[:32] for r in new_rows], dtype="U32")
+            ])
+        self.checked_at = time.monotonic()
+
+    def _role_code(self, role_id: str) -> int:
+        return self.role_codes.setdefault(role_id, len(self.role_codes))
+
+    def point(self, i: int) -> Dict:
+        x = self.X[i]
+        span = score_rollups.SCORE_MAX - score_rollups.SCORE_MIN
+        return {
+            "construct_scores": {c: round(float(x[j]) * span + score_rollups.SCORE_MIN, 3) for j, c in enumerate(CONSTRUCTS)},
+            "environment": {d: int(round(float(x[len(CONSTRUCTS) + j]) * 100)) for j, d in enumerate(ENVIRONMENT_DIMENSIONS)},
+        }
+
+    def search(self, candidate_id: str, k: int = 10, role_id: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+        i = self.rows[candidate_id]
+        q = self.X[i]
+        d2 = self.norms + float(q @ q) - 2.0 * (self.X @ q)
+        mask = np.ones(len(self.ids), dtype=bool)
+        mask[i] = False
+        if role_id:
+            if role_id not in self.role_codes:
+                return []
+            mask &= self.role_ix == self.role_codes[role_id]
+        if since:
+            mask &= self.submitted >= since
+        if until:
+            mask &= self.submitted < until
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return []
+        k = min(k, len(candidates))
+        top = candidates[np.argpartition(d2[candidates], k - 1)[:k]]
+        top = top[np.argsort(d2[top], kind="stable")]
+        out = []
+        for j in top:
+            distance = math.sqrt(max(0.0, float(d2[j])))
+            out.append({
+                "candidate_id": self.ids[j],
+                "applicant_name": self.names[j],
+                "role_id": self.roles[j],
+                "submitted_utc": str(self.submitted[j]) or None,
+                "distance": round(distance, 4),
+                "similarity": round(1.0 - distance / MAX_DISTANCE, 4),
+                **self.point(j),
+            })
+        return out
+
+
+_indexes: Dict[str, EmployerIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(employer_id: str) -> EmployerIndex:
+    """The employer's index: built on first use, rebuilt after the TTL, refreshed incrementally in between."""
+    with _indexes_lock:
+        index = _indexes.get(employer_id)
+        if index is None:
+            index = _indexes[employer_id] = EmployerIndex(employer_id)
+    now = time.monotonic()
+    with index.lock:
+        if not index.built_at or now - index.built_at > _env_float("SIMILARITY_INDEX_TTL", 600):
+            index.build()
+        elif now - index.checked_at > _env_float("SIMILARITY_REFRESH_SECONDS", 1):
+            index.refresh()
+    return index
+
+
+def invalidate(employer_id: Optional[str] = None):
+    """Forget built indexes (all, or one employer's); they are rebuilt on next use."""
+    with _indexes_lock:
+        if employer_id is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(employer_id, None)
+
+
+def similar(employer_id: str, candidate_id: str, k: int = 10, role_id: Optional[str] = None,
+            since: Optional[str] = None, until: Optional[str] = None) -> Dict:
+    """
+    The k candidates closest to candidate_id among the employer's scored
+    applicants, optionally limited to a role and a submitted_utc window
+    [since, until). Raises KeyError if the candidate isn't in the index.
+    """
+    index = get_index(employer_id)
+    with index.lock:
+        if candidate_id not in index.rows:
+            raise KeyError(candidate_id)
+        reference = index.point(index.rows[candidate_id])
+        matches = index.search(candidate_id, k, role_id, since, until)
+        size = len(index.ids)
+    return {
+        "candidate_id": candidate_id,
+        **reference,
+        "matches": matches,
+        "indexed_candidates": size,
+        "filters": {"role_id": role_id, "since": since, "until": until},
+    }
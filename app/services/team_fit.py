@@ -3,25 +3,239 @@
 Team Fit Prediction Engine
 Analyzes environmental preference compatibility between candidates and existing teams
 Non-discriminatory: Based on work environment preferences, not personal characteristics
+
+Team profiles are maintained incrementally (migration 0009):
+    team_members        (employer_id, candidate_id) -> role_id, hired_at
+    team_profile_stats  (employer_id, scope, construct) -> n, mean, m2
+                        Welford running mean / sum of squared deviations;
+                        scope is the role_id, or '' for the whole team
+
+record_hire() adds a member when a "hired" journey event is written
+(app/services/event_ingest.py), and applicant_scores keeps members' stats in
+step when their scores are recomputed. Profiles are cached in-process per
+(employer, scope) and invalidated on every change; TEAM_PROFILE_CACHE_TTL
+(seconds, default 60) bounds staleness across processes.
+
+Recompute from team_members / applicant_scores with:
+    python -m app.services.team_fit rebuild [--employer E1] [--seed-members]
 """
 from typing import Dict, List, Optional, Tuple
+import logging
 import math
-from app.services import db
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.services import db, score_rollups
+
+logger = logging.getLogger("epq.team_fit")
+
+# 8 Environmental Constructs (work environment preferences)
+CONSTRUCTS = (
+    "SCL",  # Structure/Clarity Level
+    "CCD",  # Collaborative/Competitive Dynamics
+    "CIL",  # Change/Innovation Level
+    "CVL",  # Communication Volume Level
+    "ERL",  # Emotional Responsiveness Level
+    "MSD",  # Meaning/Social-impact Driven
+    "ICI",  # Individual Contribution Importance
+    "AJL"   # Autonomy/Judgment Level
+)
+
+# Construct scores are on the 1-3 answer scale (applicant_scores)
+SCORE_RANGE = score_rollups.SCORE_MAX - score_rollups.SCORE_MIN
+
+_cache: Dict[Tuple[str, str], Tuple[float, Dict]] = {}
+_cache_lock = threading.Lock()
+
+
+def _cache_ttl() -> float:
+    try:
+        return float(os.environ.get("TEAM_PROFILE_CACHE_TTL", 60))
+    except ValueError:
+        return 60.0
+
+
+def invalidate(employer_id: str, role_id: Optional[str] = None):
+    """Drop cached profiles for an employer (the whole team and the role, or every scope)."""
+    with _cache_lock:
+        if role_id is None:
+            for key in [k for k in _cache if k[0] == employer_id]:
+                del _cache[key]
+        else:
+            _cache.pop((employer_id, ""), None)
+            _cache.pop((employer_id, role_id), None)
+
+
+# -------------------------
+# Incremental maintenance
+# -------------------------
+def _welford_add(cur, employer_id: str, scope: str, scores: Dict[str, float]):
+    # SET expressions see the old row: mean += d / (n + 1), m2 += d^2 * n / (n + 1), d = x - mean
+    cur.executemany("""
+        INSERT INTO team_profile_stats (employer_id, scope, construct, n, mean, m2)
+        VALUES (?, ?, ?, 1, ?, 0)
+        ON CONFLICT (employer_id, scope, construct) DO UPDATE SET
+            n = team_profile_stats.n + 1,
+            mean = team_profile_stats.mean + (excluded.mean - team_profile_stats.mean) / (team_profile_stats.n + 1),
+            m2 = team_profile_stats.m2 + (excluded.mean - team_profile_stats.mean) * (excluded.mean - team_profile_stats.mean)
+                 * team_profile_stats.n / (team_profile_stats.n + 1.0)
+    """, [(employer_id, scope, c, float(x)) for c, x in scores.items()])
+
+
+def _welford_remove(cur, employer_id: str, scope: str, scores: Dict[str, float]):
+    # Inverse step: mean' = (n * mean - x) / (n - 1), m2 -= (x - mean) * (x - mean')
+    cur.executemany("""
+        UPDATE team_profile_stats SET
+            n = n - 1,
+            mean = CASE WHEN n > 1 THEN (n * mean - ?) / (n - 1.0) ELSE 0 END,
+            m2 = CASE WHEN n > 1 THEN m2 - (? - mean) * (? - (n * mean - ?) / (n - 1.0)) ELSE 0 END
+        WHERE employer_id = ? AND scope = ? AND construct = ? AND n > 0
+    """, [(float(x), float(x), float(x), float(x), employer_id, scope, c) for c, x in scores.items()])
+
+
+def _stored_scores(cur, candidate_id: str) -> Dict[str, float]:
+    cur.execute("SELECT construct, score FROM applicant_scores WHERE candidate_id = ?", (candidate_id,))
+    return {r["construct"]: float(r["score"]) for r in cur.fetchall() if r["construct"] in CONSTRUCTS}
+
+
+def record_hire(cur, employer_id: str, role_id: str, candidate_id: str, hired_at: Optional[str] = None) -> bool:
+    """
+    Add a hired candidate to the team profile, on the caller's cursor.
+    False if they were already a member.
+    """
+    cur.execute("""
+        INSERT INTO team_members (employer_id, candidate_id, role_id, hired_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (employer_id, candidate_id) DO NOTHING
+    """, (employer_id, candidate_id, role_id or "", hired_at or db.now_iso()))
+    if cur.rowcount == 0:
+        return False
+    scores = _stored_scores(cur, candidate_id)
+    if scores:
+        _welford_add(cur, employer_id, "", scores)
+        if role_id:
+            _welford_add(cur, employer_id, role_id, scores)
+    invalidate(employer_id, role_id or "")
+    return True
+
+
+def apply_rescore(cur, candidate_id: str, old: Dict[str, float], new: Dict[str, float]):
+    """Swap a team member's old construct scores for new ones (called from applicant_scores)."""
+    old = {c: x for c, x in old.items() if c in CONSTRUCTS}
+    new = {c: x for c, x in new.items() if c in CONSTRUCTS}
+    if old == new:
+        return
+    cur.execute("SELECT employer_id, role_id FROM team_members WHERE candidate_id = ?", (candidate_id,))
+    for member in cur.fetchall():
+        employer_id, role_id = member["employer_id"], member["role_id"]
+        for scope in {"", role_id}:
+            _welford_remove(cur, employer_id, scope, old)
+            _welford_add(cur, employer_id, scope, new)
+        invalidate(employer_id, role_id)
+
+
+def rebuild_profiles(cur=None, employer_id: str = "", seed_members: bool = False) -> Dict[str, int]:
+    """
+    Recompute team_profile_stats from team_members and the stored scores.
+    seed_members first adds every candidate with a "hired" journey event.
+    Runs on cur if given (e.g. inside a migration), else in its own transaction.
+    """
+    if cur is None:
+        with db.connection() as con:
+            return rebuild_profiles(con.cursor(), employer_id, seed_members)
+
+    where, params = ("WHERE employer_id = ?", [employer_id]) if employer_id else ("", [])
+    if seed_members:
+        cur.execute(f"""
+            SELECT employer_id, candidate_id, role_id, timestamp FROM candidate_touchpoints
+            {where} {"AND" if where else "WHERE"} event_type = 'hired' AND candidate_id IS NOT NULL
+            ORDER BY timestamp
+        """, params)
+        cur.executemany("""
+            INSERT INTO team_members (employer_id, candidate_id, role_id, hired_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (employer_id, candidate_id) DO NOTHING
+        """, [(r["employer_id"], r["candidate_id"], r["role_id"] or "", r["timestamp"]) for r in cur.fetchall()])
+
+    cur.execute(f"DELETE FROM team_profile_stats {where}", params)
+    cur.execute(f"""
+        SELECT tm.employer_id, tm.role_id, sc.construct, sc.score
+        FROM team_members tm
+        JOIN applicant_scores sc ON sc.candidate_id = tm.candidate_id
+        {where.replace("employer_id", "tm.employer_id")}
+    """, params)
+    values: Dict[Tuple[str, str, str], List[float]] = {}
+    for r in cur.fetchall():
+        if r["construct"] not in CONSTRUCTS:
+            continue
+        scopes = {"", r["role_id"]} if r["role_id"] else {""}
+        for scope in scopes:
+            values.setdefault((r["employer_id"], scope, r["construct"]), []).append(float(r["score"]))
+    rows = []
+    for (e, scope, c), xs in values.items():
+        mean = sum(xs) / len(xs)
+        rows.append((e, scope, c, len(xs), mean, sum((x - mean) ** 2 for x in xs)))
+    if rows:
+        cur.executemany("""
+            INSERT INTO team_profile_stats (employer_id, scope, construct, n, mean, m2)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+    with _cache_lock:
+        _cache.clear()
+    cur.execute(f"SELECT COUNT(*) AS n FROM team_members {where}", params)
+    return {"members": int(cur.fetchone()["n"]), "stat_rows": len(rows)}
+
+
+def profile_stats(employer_id: str, role_id: Optional[str] = None) -> Dict:
+    """
+    Cached {team_size, mean, std} for an employer's team (or one role):
+    numpy arrays in CONSTRUCTS order. Reads at most len(CONSTRUCTS) rows.
+    """
+    key = (employer_id, role_id or "")
+    now = time.monotonic()
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and now - hit[0] < _cache_ttl():
+            return hit[1]
+
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        cur.execute("""
+            SELECT construct, n, mean, m2 FROM team_profile_stats
+            WHERE employer_id = ? AND scope = ?
+        """, key)
+        rows = {r["construct"]: r for r in cur.fetchall()}
+        cur.execute(
+            "SELECT COUNT(*) AS n FROM team_members WHERE employer_id = ?" + (" AND role_id = ?" if role_id else ""),
+            key if role_id else (employer_id,),
+        )
+        members = int(cur.fetchone()["n"])
+    finally:
+        con.close()
+
+    mean = np.zeros(len(CONSTRUCTS))
+    std = np.zeros(len(CONSTRUCTS))
+    scored = 0
+    for i, c in enumerate(CONSTRUCTS):
+        r = rows.get(c)
+        if r and r["n"] > 0:
+            mean[i] = float(r["mean"])
+            std[i] = math.sqrt(max(0.0, float(r["m2"])) / r["n"])  # population sd
+            scored = max(scored, int(r["n"]))
+    profile = {"team_size": scored, "member_count": members, "mean": mean, "std": std}
+    with _cache_lock:
+        _cache[key] = (now, profile)
+    return profile
+
 
 class TeamFitAnalyzer:
     """Analyzes team environmental compatibility using psychometric constructs"""
     
-    # 8 Environmental Constructs (work environment preferences)
-    CONSTRUCTS = [
-        "SCL",  # Structure/Clarity Level
-        "CCD",  # Collaborative/Competitive Dynamics
-        "CIL",  # Change/Innovation Level
-        "CVL",  # Communication Volume Level
-        "ERL",  # Emotional Responsiveness Level
-        "MSD",  # Meaning/Social-impact Driven
-        "ICI",  # Individual Contribution Importance
-        "AJL"   # Autonomy/Judgment Level
-    ]
+    CONSTRUCTS = list(CONSTRUCTS)
     
     def __init__(self):
         self.construct_weights = {
@@ -34,11 +248,13 @@ class TeamFitAnalyzer:
             "ICI": 1.1,  # Work style important
             "AJL": 1.2   # Autonomy needs critical
         }
+        self._weights = np.array([self.construct_weights[c] for c in self.CONSTRUCTS])
     
     async def get_team_profile(
         self,
         employer_id: str,
-        role_id: Optional[str] = None
+        role_id: Optional[str] = None,
+        include_members: bool = True
     ) -> Dict:
         """
         Get aggregated environmental profile of existing team
@@ -47,33 +263,11 @@ class TeamFitAnalyzer:
         - Average scores for each construct
         - Standard deviation (shows team diversity)
         - Team size
-        - Individual member profiles
-        """
-        conn = db.get_db()
-        
-        # Get all completed assessments for this employer
-        # If role_id provided, filter by department/role
-        query = """
-            SELECT 
-                a.id,
-                a.name,
-                a.role_id,
-                s.scl, s.ccd, s.cil, s.cvl, s.erl, s.msd, s.ici, s.ajl
-            FROM applicants a
-            JOIN submissions s ON a.id = s.applicant_id
-            WHERE a.employer_id = ?
-            AND s.completed = 1
-            AND a.status = 'hired'
+        - Individual member profiles (include_members; the only part that reads every member)
         """
-        params = [employer_id]
+        stats = profile_stats(employer_id, role_id)
         
-        if role_id:
-            query += " AND a.role_id = ?"
-            params.append(role_id)
-        
-        team_members = conn.execute(query, params).fetchall()
-        
-        if not team_members:
+        if stats["team_size"] == 0:
             return {
                 "team_size": 0,
                 "averages": {},
@@ -81,44 +275,138 @@ class TeamFitAnalyzer:
                 "members": []
             }
         
-        # Calculate averages and std deviations for each construct
-        construct_values = {c: [] for c in self.CONSTRUCTS}
-        
-        for member in team_members:
-            for construct in self.CONSTRUCTS:
-                value = member[construct.lower()]
-                if value is not None:
-                    construct_values[construct].append(value)
+        members = []
+        if include_members:
+            con = db.connect()
+            try:
+                cur = con.cursor()
+                cur.execute(f"""
+                    SELECT tm.candidate_id, ap.applicant_name, sc.construct, sc.score
+                    FROM team_members tm
+                    JOIN applicants ap ON ap.candidate_id = tm.candidate_id
+                    JOIN applicant_scores sc ON sc.candidate_id = tm.candidate_id
+                    WHERE tm.employer_id = ? {"AND tm.role_id = ?" if role_id else ""}
+                    ORDER BY tm.hired_at, tm.candidate_id
+                """, [employer_id, role_id] if role_id else [employer_id])
+                by_id: Dict[str, Dict] = {}
+                for r in cur.fetchall():
+                    m = by_id.setdefault(r["candidate_id"], {
+                        "id": r["candidate_id"],
+                        "name": r["applicant_name"],
+                        "scores": {c: None for c in self.CONSTRUCTS}
+                    })
+                    if r["construct"] in m["scores"]:
+                        m["scores"][r["construct"]] = r["score"]
+                members = list(by_id.values())
+            finally:
+                con.close()
         
-        averages = {}
-        std_devs = {}
+        return {
+            "team_size": stats["team_size"],
+            "averages": {c: round(float(v), 2) for c, v in zip(self.CONSTRUCTS, stats["mean"])},
+            "std_devs": {c: round(float(v), 2) for c, v in zip(self.CONSTRUCTS, stats["std"])},
+            "members": members
+        }
+    
+    def _candidate_scores(self, candidate_ids: List[str], employer_id: str) -> Dict[str, Dict]:
+        """{candidate_id: {name, scores}} for the employer's scored candidates, one query per chunk"""
+        out: Dict[str, Dict] = {}
+        con = db.connect()
+        try:
+            cur = con.cursor()
+            for i in range(0, len(candidate_ids), 500):
+                chunk = candidate_ids[i:i + 500]
+                cur.execute(f"""
+                    SELECT ap.candidate_id, ap.applicant_name, sc.construct, sc.score
+                    FROM applicants ap
+                    JOIN assessments asm ON asm.assessment_id = ap.assessment_id
+                    JOIN applicant_scores sc ON sc.candidate_id = ap.candidate_id
+                    WHERE asm.employer_id = ? AND ap.candidate_id IN ({", ".join("?" for _ in chunk)})
+                """, [employer_id, *chunk])
+                for r in cur.fetchall():
+                    c = out.setdefault(r["candidate_id"], {"name": r["applicant_name"], "scores": {}})
+                    c["scores"][r["construct"]] = float(r["score"])
+        finally:
+            con.close()
+        return out
+    
+    def _score_many(
+        self,
+        candidate_ids: List[str],
+        employer_id: str,
+        role_id: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Fit analyses for many candidates against one cached team profile:
+        fit scores and diversity impact are computed for all of them in one
+        vectorized pass. Unknown / unscored candidates are left out.
+        """
+        found = self._candidate_scores(list(dict.fromkeys(candidate_ids)), employer_id)
+        ids = [cid for cid in dict.fromkeys(candidate_ids) if cid in found]
+        if not ids:
+            return []
+        
+        team = profile_stats(employer_id, role_id)
+        if team["team_size"] == 0:
+            return [{
+                "candidate_id": cid,
+                "fit_score": 50,  # Neutral when no team data
+                "candidate_name": found[cid]["name"],
+                "message": "No existing team data - candidate would be first hire",
+                "construct_comparison": {},
+                "diversity_impact": {}
+            } for cid in ids]
+        
+        avg, std, n = team["mean"], team["std"], team["team_size"]
+        # Missing constructs count as the team average (no difference)
+        X = np.array([[found[cid]["scores"].get(c, avg[j]) for j, c in enumerate(self.CONSTRUCTS)] for cid in ids])
+        
+        # Closer = better fit, but some diversity is good (within 1 std dev is ideal)
+        diff = np.abs(X - avg)
+        normalized_diff = diff / SCORE_RANGE
+        fit = np.where(
+            diff <= std, 100.0,
+            np.where(diff <= std * 2, 100 - normalized_diff * 30, 100 - normalized_diff * 50)
+        )
+        fit = np.clip(fit, 0, 100)
+        overall = fit @ self._weights / self._weights.sum()
         
-        for construct in self.CONSTRUCTS:
-            values = construct_values[construct]
-            if values:
-                avg = sum(values) / len(values)
-                variance = sum((x - avg) ** 2 for x in values) / len(values)
-                std_dev = math.sqrt(variance)
-                
-                averages[construct] = round(avg, 2)
-                std_devs[construct] = round(std_dev, 2)
-            else:
-                averages[construct] = 0
-                std_devs[construct] = 0
+        # How each candidate would shift the team average if they joined
+        new_avg = (avg * n + X) / (n + 1)
+        shift = new_avg - avg
         
-        return {
-            "team_size": len(team_members),
-            "averages": averages,
-            "std_devs": std_devs,
-            "members": [
-                {
-                    "id": m["id"],
-                    "name": m["name"],
-                    "scores": {c: m[c.lower()] for c in self.CONSTRUCTS}
+        results = []
+        for i, cid in enumerate(ids):
+            construct_fits = {}
+            diversity_impact = {}
+            for j, construct in enumerate(self.CONSTRUCTS):
+                construct_fits[construct] = {
+                    "candidate_score": float(X[i, j]),
+                    "team_average": round(float(avg[j]), 2),
+                    "team_std_dev": round(float(std[j]), 2),
+                    "difference": round(float(diff[i, j]), 2),
+                    "fit_score": round(float(fit[i, j]), 2),
+                    "interpretation": self._interpret_fit(diff[i, j], std[j])
                 }
-                for m in team_members
-            ]
-        }
+                s = float(shift[i, j])
+                diversity_impact[construct] = {
+                    "current_avg": round(float(avg[j]), 2),
+                    "new_avg": round(float(new_avg[i, j]), 2),
+                    "shift": round(s, 2),
+                    "direction": "increase" if s > 0 else "decrease" if s < 0 else "neutral",
+                    "magnitude": "high" if abs(s) > 0.5 else "medium" if abs(s) > 0.2 else "low"
+                }
+            
+            results.append({
+                "candidate_id": cid,
+                "fit_score": round(float(overall[i]), 2),
+                "candidate_name": found[cid]["name"],
+                "team_size": n,
+                "construct_comparison": construct_fits,
+                "diversity_impact": diversity_impact,
+                "insights": self._generate_insights(construct_fits, float(overall[i]), diversity_impact)
+            })
+        return results
     
     async def calculate_fit_score(
         self,
@@ -135,99 +423,10 @@ class TeamFitAnalyzer:
         - Diversity impact (how candidate would shift team dynamics)
         - Strengths and concerns
         """
-        conn = db.get_db()
-        
-        # Get candidate scores
-        candidate = conn.execute("""
-            SELECT 
-                a.name,
-                s.scl, s.ccd, s.cil, s.cvl, s.erl, s.msd, s.ici, s.ajl
-            FROM applicants a
-            JOIN submissions s ON a.id = s.applicant_id
-            WHERE a.id = ?
-            AND s.completed = 1
-            ORDER BY s.completed_at DESC
-            LIMIT 1
-        """, [candidate_id]).fetchone()
-        
-        if not candidate:
+        results = self._score_many([candidate_id], employer_id, role_id)
+        if not results:
             raise ValueError("Candidate assessment not found")
-        
-        # Get team profile
-        team_profile = await self.get_team_profile(employer_id, role_id)
-        
-        if team_profile["team_size"] == 0:
-            return {
-                "fit_score": 50,  # Neutral when no team data
-                "message": "No existing team data - candidate would be first hire",
-                "construct_comparison": {},
-                "diversity_impact": {}
-            }
-        
-        # Calculate fit for each construct
-        construct_fits = {}
-        weighted_diffs = []
-        
-        for construct in self.CONSTRUCTS:
-            candidate_score = candidate[construct.lower()]
-            team_avg = team_profile["averages"][construct]
-            team_std = team_profile["std_devs"][construct]
-            
-            # Calculate difference
-            diff = abs(candidate_score - team_avg)
-            
-            # Normalize difference (0-10 scale becomes 0-1)
-            normalized_diff = diff / 10.0
-            
-            # Convert to fit score (closer = better fit)
-            # But some diversity is good (within 1 std dev is ideal)
-            if diff <= team_std:
-                # Within acceptable diversity range
-                fit = 100
-            elif diff <= team_std * 2:
-                # Moderate diversity
-                fit = 100 - (normalized_diff * 30)
-            else:
-                # High diversity - could be challenging
-                fit = 100 - (normalized_diff * 50)
-            
-            fit = max(0, min(100, fit))
-            
-            construct_fits[construct] = {
-                "candidate_score": candidate_score,
-                "team_average": team_avg,
-                "team_std_dev": team_std,
-                "difference": round(diff, 2),
-                "fit_score": round(fit, 2),
-                "interpretation": self._interpret_fit(diff, team_std)
-            }
-            
-            # Add to weighted calculation
-            weight = self.construct_weights[construct]
-            weighted_diffs.append(fit * weight)
-        
-        # Calculate overall fit score (weighted average)
-        total_weight = sum(self.construct_weights.values())
-        overall_fit = sum(weighted_diffs) / total_weight
-        
-        # Calculate diversity impact
-        diversity_impact = self._calculate_diversity_impact(
-            candidate, team_profile
-        )
-        
-        # Generate insights
-        insights = self._generate_insights(
-            construct_fits, overall_fit, diversity_impact
-        )
-        
-        return {
-            "fit_score": round(overall_fit, 2),
-            "candidate_name": candidate["name"],
-            "team_size": team_profile["team_size"],
-            "construct_comparison": construct_fits,
-            "diversity_impact": diversity_impact,
-            "insights": insights
-        }
+        return results[0]
     
     def _interpret_fit(self, diff: float, std_dev: float) -> str:
         """Interpret construct fit difference"""
@@ -242,36 +441,6 @@ class TeamFitAnalyzer:
         else:
             return "High divergence - may face adaptation challenges"
     
-    def _calculate_diversity_impact(
-        self,
-        candidate: Dict,
-        team_profile: Dict
-    ) -> Dict:
-        """
-        Calculate how candidate would change team dynamics
-        
-        Shows which dimensions candidate would shift and by how much
-        """
-        impact = {}
-        
-        for construct in self.CONSTRUCTS:
-            candidate_score = candidate[construct.lower()]
-            team_avg = team_profile["averages"][construct]
-            
-            # Calculate new average if candidate joins
-            new_avg = (team_avg * team_profile["team_size"] + candidate_score) / (team_profile["team_size"] + 1)
-            shift = new_avg - team_avg
-            
-            impact[construct] = {
-                "current_avg": team_avg,
-                "new_avg": round(new_avg, 2),
-                "shift": round(shift, 2),
-                "direction": "increase" if shift > 0 else "decrease" if shift < 0 else "neutral",
-                "magnitude": "high" if abs(shift) > 0.5 else "medium" if abs(shift) > 0.2 else "low"
-            }
-        
-        return impact
-    
     def _generate_insights(
         self,
         construct_fits: Dict,
@@ -355,16 +524,7 @@ class TeamFitAnalyzer:
         Compare multiple candidates' team fit
         Useful for final selection decisions
         """
-        results = []
-        
-        for candidate_id in candidate_ids:
-            try:
-                fit_analysis = await self.calculate_fit_score(
-                    candidate_id, employer_id, role_id
-                )
-                results.append(fit_analysis)
-            except ValueError:
-                continue
+        results = self._score_many(candidate_ids, employer_id, role_id)
         
         # Rank by fit score
         results.sort(key=lambda x: x["fit_score"], reverse=True)
@@ -377,3 +537,22 @@ class TeamFitAnalyzer:
 
 # Global instance
 team_fit_analyzer = TeamFitAnalyzer()
+
+
+def main(argv=None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m app.services.team_fit")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("rebuild", help="recompute team profiles from members' stored scores")
+    p.add_argument("--employer", default="")
+    p.add_argument("--seed-members", action="store_true", help='add candidates with a "hired" journey event first')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.cmd == "rebuild":
+        print(rebuild_profiles(employer_id=args.employer, seed_members=args.seed_members))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,501 @@
+# app/services/webhook_outbox.py
+"""
+Transactional webhook outbox (tables webhook_outbox / webhook_circuits, migration 0005).
+
+Producers call enqueue_event(cur, ...) with the cursor of the transaction
+that makes the change (applicant insert, PDF status update), so an event is
+recorded if and only if the change commits. The worker (`python -m app.worker`,
+or the embedded worker) calls deliver_due() periodically:
+
+- due rows are claimed (SKIP LOCKED on Postgres, BEGIN IMMEDIATE on SQLite)
+  and POSTed concurrently through the shared WebhookDispatcher. A claim takes
+  no more per receiving host (and in total) than the concurrency limits can
+  send within the claim window; sends still running at the deadline are
+  cancelled and recorded as failed attempts;
+- failures are retried with exponential backoff and dead-lettered after
+  max_attempts;
+- each webhook has a circuit breaker: WEBHOOK_CIRCUIT_THRESHOLD consecutive
+  failures pause the endpoint (no attempts consumed while paused), after the
+  cooldown a single probe delivery decides whether it closes again;
+- bodies are signed: X-Webhook-Signature = "sha256=" + HMAC-SHA256(secret,
+  "<X-Webhook-Timestamp>.<raw body>"). X-Webhook-Secret is still sent for
+  receivers that predate signing.
+
+replay() re-sends past deliveries (POST /employer/webhooks/{id}/replay).
+
+Tuning (environment variables):
+  WEBHOOK_MAX_ATTEMPTS        attempts before a delivery is dead        default 8
+  WEBHOOK_RETRY_BASE          first retry delay (s), doubles            default 30
+  WEBHOOK_RETRY_MAX           cap on the retry delay (s)                default 3600
+  WEBHOOK_CIRCUIT_THRESHOLD   consecutive failures that open a circuit  default 5
+  WEBHOOK_CIRCUIT_COOLDOWN    first pause (s), doubles per re-open      default 300
+  WEBHOOK_CIRCUIT_MAX         cap on the pause (s)                      default 3600
+  WEBHOOK_OUTBOX_INTERVAL     worker poll interval (s)                  default 2
+"""
+import asyncio
+import concurrent.futures
+import datetime
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from app.services import db, job_queue, webhooks
+
+logger = logging.getLogger("epq.webhook_outbox")
+
+PENDING = "pending"
+DELIVERING = "delivering"
+DELIVERED = "delivered"
+DEAD = "dead"
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+MAX_ATTEMPTS = int(_env_float("WEBHOOK_MAX_ATTEMPTS", 8))
+RETRY_BASE = _env_float("WEBHOOK_RETRY_BASE", 30)
+RETRY_MAX = _env_float("WEBHOOK_RETRY_MAX", 3600)
+CIRCUIT_THRESHOLD = int(_env_float("WEBHOOK_CIRCUIT_THRESHOLD", 5))
+CIRCUIT_COOLDOWN = _env_float("WEBHOOK_CIRCUIT_COOLDOWN", 300)
+CIRCUIT_MAX = _env_float("WEBHOOK_CIRCUIT_MAX", 3600)
+OUTBOX_INTERVAL = _env_float("WEBHOOK_OUTBOX_INTERVAL", 2)
+CLAIM_SECONDS = webhooks.WEBHOOK_TIMEOUT * 6
+# Sends must finish (or be cancelled) this long before a claim lapses, so
+# results are recorded before another worker may claim the rows again.
+SEND_DEADLINE = CLAIM_SECONDS - webhooks.WEBHOOK_TIMEOUT
+# Worst-case request rounds that fit in the deadline, one spare; claims are capped to them
+SEND_ROUNDS = max(1, int(SEND_DEADLINE // webhooks.WEBHOOK_TIMEOUT) - 1)
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+def _iso(dt: datetime.datetime) -> str:
+    return dt.isoformat(timespec="microseconds")
+
+
+def _is_postgres() -> bool:
+    return bool(os.environ.get("DATABASE_URL"))
+
+
+# -------------------------
+# Producer side
+# -------------------------
+def enqueue_event(cur, employer_id: str, event_type: str, data: Dict, event_id: str = "") -> List[str]:
+    """
+    Record one event for every active webhook of employer_id subscribed to
+    event_type, using the caller's cursor (and therefore its transaction).
+    Returns the delivery ids (empty when nobody is subscribed).
+    """
+    if not employer_id:
+        return []
+    cur.execute("""
+        SELECT webhook_id FROM webhooks
+        WHERE employer_id = ? AND event_type = ? AND active = 1
+    """, (employer_id, event_type))
+    hook_ids = [r["webhook_id"] for r in cur.fetchall()]
+    if not hook_ids:
+        return []
+
+    event_id = event_id or "evt_" + uuid.uuid4().hex
+    body = dict(webhooks.build_event(event_type, data), id=event_id)
+    payload_json = json.dumps(body, ensure_ascii=False, default=str)
+    now = _iso(_now())
+    rows = [
+        ("dlv_" + uuid.uuid4().hex, hook_id, employer_id, event_id, event_type, payload_json,
+         PENDING, MAX_ATTEMPTS, now, now, now)
+        for hook_id in hook_ids
+    ]
+    cur.executemany("""
+        INSERT INTO webhook_outbox
+          (delivery_id, webhook_id, employer_id, event_id, event_type, payload_json,
+           status, max_attempts, next_attempt_utc, created_utc, updated_utc)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    return [r[0] for r in rows]
+
+
+def enqueue(employer_id: str, event_type: str, data: Dict) -> List[str]:
+    """enqueue_event() in its own transaction, for events not tied to another write."""
+    with db.connection() as con:
+        return enqueue_event(con.cursor(), employer_id, event_type, data)
+
+
+# -------------------------
+# Signing
+# -------------------------
+def sign(secret: str, timestamp: str, body: str) -> str:
+    mac = hmac.new(secret.encode("utf-8"), f"{timestamp}.{body}".encode("utf-8"), hashlib.sha256)
+    return "sha256=" + mac.hexdigest()
+
+
+def verify_signature(secret: str, timestamp: str, body: str, signature: str) -> bool:
+    """Receiver-side check (also handy in tests)."""
+    return hmac.compare_digest(sign(secret, timestamp, body), signature or "")
+
+
+def _delivery_headers(row: Dict) -> Dict:
+    timestamp = str(int(_now().replace(tzinfo=datetime.timezone.utc).timestamp()))
+    headers = {
+        "X-Webhook-Event": row["event_type"],
+        "X-Webhook-Event-Id": row["event_id"],
+        "X-Webhook-Delivery": row["delivery_id"],
+        "X-Webhook-Timestamp": timestamp,
+    }
+    if row.get("secret"):
+        headers["X-Webhook-Signature"] = sign(row["secret"], timestamp, row["payload_json"])
+    return headers
+
+
+# -------------------------
+# Delivery
+# -------------------------
+def _claim(limit: int) -> List[Dict]:
+    now = _now()
+    now_s = _iso(now)
+    sql = """
+        SELECT o.delivery_id, o.webhook_id, o.event_id, o.event_type, o.payload_json, o.attempts, o.max_attempts,
+               w.url, w.secret, w.active, c.state AS circuit_state
+        FROM webhook_outbox o
+        JOIN webhooks w ON w.webhook_id = o.webhook_id
+        LEFT JOIN webhook_circuits c ON c.webhook_id = o.webhook_id
+        WHERE ((o.status = ? AND o.next_attempt_utc <= ?) OR (o.status = ? AND o.claimed_until < ?))
+          AND (c.state IS NULL OR c.state = 'closed' OR c.retry_after_utc <= ?)
+        ORDER BY o.next_attempt_utc
+        LIMIT ?
+    """
+    params = (PENDING, now_s, DELIVERING, now_s, now_s, int(limit))
+
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        if _is_postgres():
+            cur.execute(sql.rstrip() + " FOR UPDATE OF o SKIP LOCKED", params)
+        else:
+            if con.in_transaction:
+                con.commit()
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute(sql, params)
+        rows = [dict(r) for r in cur.fetchall()]
+
+        until = _iso(now + datetime.timedelta(seconds=CLAIM_SECONDS))
+        claimed, probing, disabled = [], set(), []
+        per_host: Dict[str, int] = {}
+        host_cap = webhooks.PER_HOST_CONCURRENCY * SEND_ROUNDS
+        total_cap = webhooks.FANOUT_CONCURRENCY * SEND_ROUNDS
+        for row in rows:
+            if not row["active"]:
+                disabled.append(row["delivery_id"])
+                continue
+            if len(claimed) >= total_cap:
+                continue
+            # No more for a host than it can be sent within the claim window
+            host = webhooks.host_of(row["url"])
+            if per_host.get(host, 0) >= host_cap:
+                continue
+            if row["circuit_state"] == "open":
+                # Half-open: a single probe per paused endpoint. Pushing the
+                # circuit's retry_after past the claim window takes the probe
+                # for this pass and keeps other workers / later passes out until
+                # _record() reopens or closes the circuit (or the claim expires).
+                if row["webhook_id"] in probing:
+                    continue
+                probing.add(row["webhook_id"])
+                cur.execute("""
+                    UPDATE webhook_circuits SET retry_after_utc = ?, updated_utc = ?
+                    WHERE webhook_id = ? AND state = 'open' AND retry_after_utc <= ?
+                """, (until, now_s, row["webhook_id"], now_s))
+                if cur.rowcount != 1:
+                    continue
+            per_host[host] = per_host.get(host, 0) + 1
+            claimed.append(row)
+
+        if claimed:
+            cur.executemany(
+                "UPDATE webhook_outbox SET status = ?, claimed_until = ?, updated_utc = ? WHERE delivery_id = ?",
+                [(DELIVERING, until, now_s, r["delivery_id"]) for r in claimed],
+            )
+        if disabled:
+            cur.executemany(
+                "UPDATE webhook_outbox SET status = ?, last_error = ?, updated_utc = ? WHERE delivery_id = ?",
+                [(DEAD, "webhook disabled", now_s, d) for d in disabled],
+            )
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    finally:
+        con.close()
+    return claimed
+
+
+def _unfinished(row: Dict, error: str) -> Dict:
+    return {"webhook_id": row["webhook_id"], "status_code": None, "response_body": None, "error": error}
+
+
+async def _send_all(rows: List[Dict], deadline: float = SEND_DEADLINE) -> List[Dict]:
+    """
+    Send every row; one result per row, in order. Sends still running after
+    deadline seconds are cancelled and reported as failed.
+    """
+    if not rows:
+        return []
+    dispatcher = webhooks.get_dispatcher()
+    gate = asyncio.Semaphore(dispatcher.fanout)
+
+    async def one(row):
+        hook = {"webhook_id": row["webhook_id"], "url": row["url"], "secret": row.get("secret")}
+        return await dispatcher.deliver(hook, row["event_type"], row["payload_json"], _delivery_headers(row), gate=gate)
+
+    tasks = [asyncio.ensure_future(one(r)) for r in rows]
+    _, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+        logger.warning(f"[OUTBOX] {len(pending)} deliveries still running after {deadline:g}s; cancelled")
+    results = []
+    for row, task in zip(rows, tasks):
+        if task in pending or task.cancelled():
+            results.append(_unfinished(row, f"delivery timed out after {deadline:g}s"))
+        elif task.exception() is not None:
+            error = task.exception()
+            results.append(_unfinished(row, (str(error) or type(error).__name__)[:500]))
+        else:
+            results.append(task.result())
+    return results
+
+
+def _retry_delay(attempts: int) -> float:
+    return min(RETRY_MAX, RETRY_BASE * (2 ** max(0, attempts - 1))) * random.uniform(0.9, 1.1)
+
+
+def _record(rows: List[Dict], results: List[Dict]) -> Dict[str, int]:
+    now = _now()
+    now_s = _iso(now)
+    counts = {"delivered": 0, "retry": 0, "dead": 0}
+    outbox_updates, log_rows = [], []
+    # webhook_id -> failed deliveries this round, or 0 if any delivery succeeded
+    circuit_failures: Dict[str, int] = {}
+
+    for row, res in zip(rows, results):
+        attempts = int(row["attempts"]) + 1
+        ok = res["error"] is None
+        prev = circuit_failures.get(row["webhook_id"])
+        circuit_failures[row["webhook_id"]] = 0 if ok or prev == 0 else (prev or 0) + 1
+        if ok:
+            status, next_at, delivered = DELIVERED, now_s, now_s
+            counts["delivered"] += 1
+        elif attempts >= int(row["max_attempts"]):
+            status, next_at, delivered = DEAD, now_s, None
+            counts["dead"] += 1
+        else:
+            status, next_at, delivered = PENDING, _iso(now + datetime.timedelta(seconds=_retry_delay(attempts))), None
+            counts["retry"] += 1
+        outbox_updates.append((
+            status, attempts, next_at, res["status_code"], res["error"], delivered, now_s, row["delivery_id"],
+        ))
+        log_rows.append((
+            row["webhook_id"], row["event_type"], row["payload_json"], res["status_code"], res["response_body"], res["error"],
+        ))
+
+    with db.connection() as con:
+        cur = con.cursor()
+        cur.executemany("""
+            UPDATE webhook_outbox
+            SET status = ?, attempts = ?, next_attempt_utc = ?, claimed_until = NULL,
+                last_status_code = ?, last_error = ?, delivered_utc = COALESCE(?, delivered_utc), updated_utc = ?
+            WHERE delivery_id = ?
+        """, outbox_updates)
+        cur.executemany("""
+            INSERT INTO webhook_logs (webhook_id, event_type, payload_json, status_code, response_body, error)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, log_rows)
+        for webhook_id, failures in circuit_failures.items():
+            _update_circuit(cur, webhook_id, failures, now)
+    return counts
+
+
+def _update_circuit(cur, webhook_id: str, new_failures: int, now: datetime.datetime):
+    """Apply one delivery round to the webhook's breaker (new_failures == 0: it answered)."""
+    cur.execute("SELECT * FROM webhook_circuits WHERE webhook_id = ?", (webhook_id,))
+    row = cur.fetchone()
+    circuit = dict(row) if row else {"state": "closed", "consecutive_failures": 0, "open_count": 0}
+    now_s = _iso(now)
+    if not new_failures:
+        if row is None or (circuit["state"] == "closed" and not circuit["consecutive_failures"]):
+            return
+        state, failures, open_count, opened, retry_after = "closed", 0, 0, None, None
+        if circuit["state"] == "open":
+            logger.info(f"[OUTBOX] Circuit closed for webhook {webhook_id}")
+    else:
+        failures = int(circuit["consecutive_failures"]) + new_failures
+        open_count = int(circuit["open_count"])
+        opened, retry_after, state = circuit.get("opened_utc"), circuit.get("retry_after_utc"), circuit["state"]
+        # A failed half-open probe re-opens at once; a closed circuit opens at the threshold
+        if circuit["state"] == "open" or failures >= CIRCUIT_THRESHOLD:
+            open_count += 1
+            pause = min(CIRCUIT_MAX, CIRCUIT_COOLDOWN * (2 ** (open_count - 1)))
+            state, opened = "open", now_s
+            retry_after = _iso(now + datetime.timedelta(seconds=pause))
+            logger.warning(f"[OUTBOX] Circuit open for webhook {webhook_id} ({failures} failures), paused {pause:.0f}s")
+    if row is None:
+        cur.execute("""
+            INSERT INTO webhook_circuits
+              (webhook_id, state, consecutive_failures, open_count, opened_utc, retry_after_utc, updated_utc)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (webhook_id, state, failures, open_count, opened, retry_after, now_s))
+    else:
+        cur.execute("""
+            UPDATE webhook_circuits
+            SET state = ?, consecutive_failures = ?, open_count = ?, opened_utc = ?, retry_after_utc = ?, updated_utc = ?
+            WHERE webhook_id = ?
+        """, (state, failures, open_count, opened, retry_after, now_s, webhook_id))
+
+
+def deliver_due(limit: int = 200) -> Dict[str, int]:
+    """
+    Claim due deliveries, send them concurrently, record results; repeat while
+    rows are due (claims are capped per host), up to limit rows and one claim
+    window of time. Returns counts.
+    """
+    totals = {"claimed": 0, "delivered": 0, "retry": 0, "dead": 0}
+    started = time.monotonic()
+    while totals["claimed"] < limit and time.monotonic() - started < CLAIM_SECONDS:
+        rows = _claim(limit - totals["claimed"])
+        if not rows:
+            break
+        fut = asyncio.run_coroutine_threadsafe(_send_all(rows), webhooks._background_loop())
+        try:
+            # _send_all stops itself at SEND_DEADLINE; this only guards a stuck loop
+            results = fut.result(CLAIM_SECONDS - webhooks.WEBHOOK_TIMEOUT / 2)
+        except concurrent.futures.TimeoutError:
+            fut.cancel()
+            results = [_unfinished(row, "delivery round did not finish") for row in rows]
+        counts = _record(rows, results)
+        totals["claimed"] += len(rows)
+        for key, n in counts.items():
+            totals[key] += n
+    return totals
+
+
+# Delivered by the job worker every WEBHOOK_OUTBOX_INTERVAL seconds
+job_queue.register_periodic("webhook.outbox", OUTBOX_INTERVAL, deliver_due)
+
+
+# -------------------------
+# Visibility / replay
+# -------------------------
+def _owned(cur, webhook_id: str, employer_id: str) -> bool:
+    cur.execute("SELECT 1 FROM webhooks WHERE webhook_id = ? AND employer_id = ?", (webhook_id, employer_id))
+    return cur.fetchone() is not None
+
+
+def list_deliveries(webhook_id: str, employer_id: str, status: str = "", limit: int = 50) -> Optional[List[Dict]]:
+    """Outbox rows for one webhook, newest first. None if the webhook isn't the employer's."""
+    sql = """
+        SELECT delivery_id, event_id, event_type, status, attempts, max_attempts, next_attempt_utc,
+               last_status_code, last_error, replay_of, created_utc, delivered_utc
+        FROM webhook_outbox
+        WHERE webhook_id = ?
+    """
+    params: list = [webhook_id]
+    if status:
+        sql += " AND status = ?"
+        params.append(status)
+    sql += " ORDER BY created_utc DESC LIMIT ?"
+    params.append(int(limit))
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        if not _owned(cur, webhook_id, employer_id):
+            return None
+        cur.execute(sql, params)
+        return [dict(r) for r in cur.fetchall()]
+    finally:
+        con.close()
+
+
+def get_circuit(webhook_id: str) -> Dict:
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        cur.execute("SELECT * FROM webhook_circuits WHERE webhook_id = ?", (webhook_id,))
+        row = cur.fetchone()
+        return dict(row) if row else {"webhook_id": webhook_id, "state": "closed", "consecutive_failures": 0}
+    finally:
+        con.close()
+
+
+def replay(webhook_id: str, employer_id: str, delivery_ids: Optional[Iterable[str]] = None,
+           statuses: Iterable[str] = (DEAD,), since: str = "", limit: int = 100) -> Optional[List[str]]:
+    """
+    Queue fresh copies of past deliveries (same event id and body, new
+    delivery id, full attempt budget) and close the webhook's circuit.
+    Selects delivery_ids if given, otherwise the newest rows in statuses
+    (optionally created at/after since). None if the webhook isn't the employer's.
+    """
+    now = _iso(_now())
+    with db.connection() as con:
+        cur = con.cursor()
+        if not _owned(cur, webhook_id, employer_id):
+            return None
+
+        sql = "SELECT * FROM webhook_outbox WHERE webhook_id = ?"
+        params: list = [webhook_id]
+        ids = [d for d in (delivery_ids or []) if d]
+        if ids:
+            sql += f" AND delivery_id IN ({','.join('?' * len(ids))})"
+            params.extend(ids)
+        else:
+            statuses = list(statuses or [])
+            if statuses:
+                sql += f" AND status IN ({','.join('?' * len(statuses))})"
+                params.extend(statuses)
+            if since:
+                sql += " AND created_utc >= ?"
+                params.append(since)
+        sql += " ORDER BY created_utc DESC LIMIT ?"
+        params.append(int(limit))
+        cur.execute(sql, params)
+        originals = [dict(r) for r in cur.fetchall()]
+
+        rows = [
+            ("dlv_" + uuid.uuid4().hex, o["webhook_id"], o["employer_id"], o["event_id"], o["event_type"],
+             o["payload_json"], PENDING, MAX_ATTEMPTS, now, o["delivery_id"], now, now)
+            for o in reversed(originals)
+        ]
+        if rows:
+            cur.executemany("""
+                INSERT INTO webhook_outbox
+                  (delivery_id, webhook_id, employer_id, event_id, event_type, payload_json,
+                   status, max_attempts, next_attempt_utc, replay_of, created_utc, updated_utc)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            # An explicit replay is the operator saying the receiver is back
+            cur.execute("DELETE FROM webhook_circuits WHERE webhook_id = ?", (webhook_id,))
+    return [r[0] for r in rows]
+
+
+def stats() -> Dict:
+    con = db.connect()
+    try:
+        cur = con.cursor()
+        cur.execute("SELECT status, COUNT(*) AS n FROM webhook_outbox GROUP BY status")
+        by_status = {r["status"]: int(r["n"]) for r in cur.fetchall()}
+        cur.execute("SELECT COUNT(*) AS n FROM webhook_circuits WHERE state = 'open'")
+        open_circuits = int(cur.fetchone()["n"])
+    finally:
+        con.close()
+    return {"by_status": by_status, "open_circuits": open_circuits}
@@ -1,22 +1,36 @@
 # app/services/webhooks.py
 """
-Webhook management and triggering service.
+Webhook management and delivery client.
+
+Events are queued in the transactional outbox (app/services/webhook_outbox.py)
+and sent by the worker through WebhookDispatcher: one long-lived,
+connection-pooled httpx.AsyncClient per event loop, with deliveries bounded
+per receiving host.
+
+Tuning (environment variables):
+  WEBHOOK_TIMEOUT               per-request timeout in seconds         default 10
+  WEBHOOK_FANOUT_CONCURRENCY    deliveries in flight per outbox round  default 20
+  WEBHOOK_PER_HOST_CONCURRENCY  deliveries in flight per host          default 4
+  WEBHOOK_MAX_CONNECTIONS       pooled connections per client          default 100
 """
+import asyncio
+import os
+import threading
+import time
 import uuid
 import json
 import datetime
-import sqlite3
+import weakref
+from contextlib import nullcontext
 import httpx
-from pathlib import Path
 from typing import Dict, List, Optional
+from urllib.parse import urlsplit
 
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DB_PATH = (PROJECT_ROOT / "epq.db").resolve()
+from app.services import db
 
 def conn():
-    con = sqlite3.connect(str(DB_PATH))
-    con.row_factory = sqlite3.Row
-    return con
+    # Shared connection pool (app/services/db_pool.py)
+    return db.connect()
 
 def now_iso() -> str:
     return datetime.datetime.utcnow().isoformat()
@@ -64,8 +78,13 @@ def delete_webhook(webhook_id: str, employer_id: str) -> bool:
             DELETE FROM webhooks
             WHERE webhook_id = ? AND employer_id = ?
         """, (webhook_id, employer_id))
+        deleted = cur.rowcount > 0
+        if deleted:
+            # Outbox rows of a deleted webhook can never be delivered
+            cur.execute("DELETE FROM webhook_outbox WHERE webhook_id = ?", (webhook_id,))
+            cur.execute("DELETE FROM webhook_circuits WHERE webhook_id = ?", (webhook_id,))
         con.commit()
-        return cur.rowcount > 0
+        return deleted
 
 def toggle_webhook(webhook_id: str, employer_id: str, active: bool) -> bool:
     """Enable/disable a webhook."""
@@ -79,67 +98,155 @@ def toggle_webhook(webhook_id: str, employer_id: str, active: bool) -> bool:
         con.commit()
         return cur.rowcount > 0
 
-# ============ WEBHOOK TRIGGERING ============
+# ============ WEBHOOK DELIVERY ============
 
-async def trigger_webhooks(employer_id: str, event_type: str, payload: Dict):
-    """
-    Trigger all active webhooks for an employer matching the event type.
-    Runs asynchronously and logs results.
-    """
-    with conn() as con:
-        cur = con.cursor()
-        cur.execute("""
-            SELECT webhook_id, url, secret
-            FROM webhooks
-            WHERE employer_id = ? AND event_type = ? AND active = 1
-        """, (employer_id, event_type))
-        
-        webhooks = [dict(r) for r in cur.fetchall()]
-    
-    if not webhooks:
-        return
-    
-    # Send webhooks asynchronously
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        for hook in webhooks:
-            await send_webhook(client, hook, event_type, payload)
-
-async def send_webhook(client: httpx.AsyncClient, hook: Dict, event_type: str, payload: Dict):
-    """Send a single webhook and log the result."""
-    webhook_id = hook["webhook_id"]
-    url = hook["url"]
-    secret = hook.get("secret")
-    
-    # Prepare payload
-    full_payload = {
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+WEBHOOK_TIMEOUT = float(os.environ.get("WEBHOOK_TIMEOUT", "10"))
+FANOUT_CONCURRENCY = _env_int("WEBHOOK_FANOUT_CONCURRENCY", 20)
+PER_HOST_CONCURRENCY = _env_int("WEBHOOK_PER_HOST_CONCURRENCY", 4)
+MAX_CONNECTIONS = _env_int("WEBHOOK_MAX_CONNECTIONS", 100)
+
+
+def host_of(url: str) -> str:
+    """Key for per-host concurrency limits."""
+    return (urlsplit(url).netloc or url).lower()
+
+
+def build_event(event_type: str, payload: Dict) -> Dict:
+    return {
         "event": event_type,
         "timestamp": now_iso(),
         "data": payload
     }
-    
-    headers = {"Content-Type": "application/json"}
-    if secret:
-        headers["X-Webhook-Secret"] = secret
-    
-    # Send request
+
+
+class WebhookDispatcher:
+    """
+    Long-lived HTTP client + bounded concurrent fan-out. Bound to the event
+    loop it was created on; use get_dispatcher() rather than constructing one.
+    """
+
+    def __init__(self, timeout: float = WEBHOOK_TIMEOUT, fanout: int = FANOUT_CONCURRENCY,
+                 per_host: int = PER_HOST_CONCURRENCY, max_connections: int = MAX_CONNECTIONS):
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max(1, max_connections // 4)),
+        )
+        self.fanout = max(1, fanout)
+        self.per_host = max(1, per_host)
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self.sent = 0
+        self.failed = 0
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = host_of(url)
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.per_host)
+        return slot
+
+    async def deliver(self, hook: Dict, event_type: str, body: Dict, headers: Optional[Dict] = None,
+                      gate: Optional[asyncio.Semaphore] = None) -> Dict:
+        """
+        POST one event to one hook. Never raises (except when cancelled); returns
+        {webhook_id, status_code, response_body, error, elapsed_ms}. gate, if
+        given, is taken after the host slot, so deliveries queued behind a slow
+        host don't hold it.
+        """
+        send_headers = {"Content-Type": "application/json"}
+        if hook.get("secret"):
+            send_headers["X-Webhook-Secret"] = hook["secret"]
+        if headers:
+            send_headers.update(headers)
+
+        started = time.monotonic()
+        async with self._host_slot(hook["url"]), (gate or nullcontext()):
+            try:
+                content = body if isinstance(body, (bytes, str)) else json.dumps(body)
+                response = await self.client.post(hook["url"], content=content, headers=send_headers)
+                status_code = response.status_code
+                response_body = response.text[:1000]  # Limit to 1000 chars
+                error = None if 200 <= status_code < 300 else f"HTTP {status_code}"
+            except Exception as e:
+                status_code = None
+                response_body = None
+                error = (str(e) or type(e).__name__)[:500]
+        if error:
+            self.failed += 1
+        else:
+            self.sent += 1
+        return {
+            "webhook_id": hook["webhook_id"],
+            "status_code": status_code,
+            "response_body": response_body,
+            "error": error,
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_dispatchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, WebhookDispatcher]" = weakref.WeakKeyDictionary()
+
+
+def get_dispatcher() -> WebhookDispatcher:
+    """The dispatcher for the running event loop (created on first use)."""
+    loop = asyncio.get_running_loop()
+    dispatcher = _dispatchers.get(loop)
+    if dispatcher is None:
+        dispatcher = _dispatchers[loop] = WebhookDispatcher()
+    return dispatcher
+
+
+# The outbox worker (sync code) sends on one background loop so the pooled
+# client survives between delivery rounds.
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_thread: Optional[threading.Thread] = None
+_sync_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _sync_loop, _sync_thread
+    with _sync_lock:
+        if _sync_loop is None or _sync_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            _sync_thread = threading.Thread(target=loop.run_forever, name="webhook-loop", daemon=True)
+            _sync_thread.start()
+            _sync_loop = loop
+        return _sync_loop
+
+
+def shutdown(timeout: float = 5.0):
+    """Close the background loop's HTTP client, stop the loop and join its thread (app shutdown)."""
+    global _sync_loop, _sync_thread
+    with _sync_lock:
+        loop, thread = _sync_loop, _sync_thread
+        _sync_loop = _sync_thread = None
+    if loop is None or loop.is_closed():
+        return
+
+    async def _close():
+        dispatcher = _dispatchers.pop(loop, None)
+        if dispatcher is not None:
+            await dispatcher.aclose()
+
     try:
-        response = await client.post(url, json=full_payload, headers=headers)
-        status_code = response.status_code
-        response_body = response.text[:1000]  # Limit to 1000 chars
-        error = None if 200 <= status_code < 300 else f"HTTP {status_code}"
-    except Exception as e:
-        status_code = None
-        response_body = None
-        error = str(e)[:500]
-    
-    # Log the result
-    with conn() as con:
-        cur = con.cursor()
-        cur.execute("""
-            INSERT INTO webhook_logs (webhook_id, event_type, payload_json, status_code, response_body, error)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (webhook_id, event_type, json.dumps(full_payload), status_code, response_body, error))
-        con.commit()
+        asyncio.run_coroutine_threadsafe(_close(), loop).result(timeout)
+    except Exception:
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join(timeout)
+    if not loop.is_running():
+        loop.close()
+
 
 def get_webhook_logs(webhook_id: str, employer_id: str, limit: int = 50) -> List[Dict]:
     """Get recent webhook logs (employer can only see their own)."""
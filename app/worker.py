@@ -0,0 +1,238 @@
+# app/worker.py
+"""
+Background job worker.
+
+    python -m app.worker                       # run until SIGTERM / Ctrl+C
+    python -m app.worker --concurrency 4       # jobs run in parallel in this process
+    python -m app.worker --kinds pdf.generate  # only these job kinds
+    python -m app.worker --once                # drain due jobs, then exit
+    python -m app.worker --stats               # print queue depth and exit
+
+Scale PDF throughput by running more worker processes; each leases jobs
+independently (see app/services/job_queue.py). The web app also starts an
+embedded worker thread unless JOB_WORKER_EMBEDDED=false, so single-process
+deployments keep generating PDFs without a separate service. Each worker
+also runs the registered periodic tasks, e.g. webhook outbox delivery.
+
+Environment:
+  WORKER_CONCURRENCY    jobs run at once per worker process   default 2
+  JOB_POLL_INTERVAL     idle sleep between lease attempts (s) default 1
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+import uuid
+from typing import Iterable, List, Optional
+
+from app.services import job_queue
+
+logger = logging.getLogger("epq.worker")
+
+
+class Worker:
+    def __init__(self, concurrency: int = 2, kinds: Optional[Iterable[str]] = None,
+                 poll_interval: float = 1.0, lease_seconds: Optional[float] = None):
+        self.concurrency = max(1, int(concurrency))
+        self.kinds = list(kinds or [])
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds or job_queue.LEASE_SECONDS
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.processed = 0
+        self._lock = threading.Lock()
+
+    # ---- single job ----
+    def _heartbeat(self, job_id: str, done: threading.Event):
+        interval = max(1.0, self.lease_seconds / 3)
+        while not done.wait(interval):
+            if not job_queue.extend_lease(job_id, self.worker_id, self.lease_seconds):
+                logger.warning(f"[WORKER] Lost lease on {job_id}")
+                return
+
+    def run_one(self) -> bool:
+        """Lease and run one job. Returns False when nothing was due."""
+        job = job_queue.lease(self.worker_id, self.kinds or job_queue.HANDLERS.keys(), self.lease_seconds)
+        if not job:
+            return False
+        handler = job_queue.HANDLERS.get(job["kind"])
+        done = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(job["job_id"], done), daemon=True)
+        beat.start()
+        started = time.monotonic()
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler registered for job kind {job['kind']!r}")
+            handler.func(job["payload"])
+        except Exception as exc:
+            done.set()
+            error = f"{type(exc).__name__}: {exc}"
+            outcome = job_queue.fail(job, self.worker_id, error, permanent=isinstance(exc, job_queue.PermanentError))
+            logger.warning(
+                f"[WORKER] {job['kind']} {job['job_id']} attempt {job['attempts']}/{job['max_attempts']} "
+                f"failed ({outcome}): {error}"
+            )
+            logger.debug(traceback.format_exc())
+            if outcome == "dead":
+                job_queue.run_on_dead(job, error)
+        else:
+            done.set()
+            job_queue.complete(job["job_id"], self.worker_id)
+            logger.info(f"[WORKER] {job['kind']} {job['job_id']} done in {time.monotonic() - started:.2f}s")
+        with self._lock:
+            self.processed += 1
+        return True
+
+    # ---- loops ----
+    def _loop(self):
+        while not self.stop_event.is_set():
+            try:
+                ran = self.run_one()
+            except Exception:
+                logger.exception("[WORKER] Unexpected error while leasing/running a job")
+                ran = False
+            if not ran:
+                self.stop_event.wait(self.poll_interval)
+
+    def _reclaim(self):
+        for job in job_queue.reclaim_expired():
+            job_queue.run_on_dead(job, job.get("last_error") or "lease expired")
+
+    def _periodic(self, task: job_queue.PeriodicTask):
+        while not self.stop_event.is_set():
+            try:
+                task.func()
+            except Exception:
+                logger.exception(f"[WORKER] Periodic task {task.name} failed")
+            self.stop_event.wait(task.interval)
+
+    def start(self):
+        job_queue.load_handlers()
+        self.stop_event.clear()
+        for i in range(self.concurrency):
+            t = threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        for task in job_queue.PERIODIC.values():
+            t = threading.Thread(target=self._periodic, args=(task,), name=f"periodic-{task.name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        logger.info(f"[WORKER] {self.worker_id} started: concurrency={self.concurrency} "
+                    f"kinds={self.kinds or sorted(job_queue.HANDLERS)}")
+
+    def stop(self, timeout: float = 30.0) -> bool:
+        """Signal every thread and wait for in-flight jobs, up to timeout seconds in total. True if all stopped."""
+        self.stop_event.set()
+        deadline = time.monotonic() + timeout
+        threads, self._threads = self._threads, []
+        for t in threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+        return not any(t.is_alive() for t in threads)
+
+    def run_forever(self, reclaim_interval: float = 30.0):
+        self.start()
+        last_reclaim = 0.0
+        while not self.stop_event.is_set():
+            if time.monotonic() - last_reclaim >= reclaim_interval:
+                try:
+                    self._reclaim()
+                except Exception:
+                    logger.exception("[WORKER] Lease reclaim failed")
+                last_reclaim = time.monotonic()
+            self.stop_event.wait(min(reclaim_interval, 5.0))
+        logger.info(f"[WORKER] {self.worker_id} stopping (finishing in-flight jobs)")
+        self.stop()
+
+    def drain(self) -> int:
+        """Run due jobs on the calling thread until the queue is empty, then each periodic task once."""
+        job_queue.load_handlers()
+        self._reclaim()
+        n = 0
+        while self.run_one():
+            n += 1
+        for task in job_queue.PERIODIC.values():
+            task.func()
+        return n
+
+
+_embedded: Optional[Worker] = None
+_embedded_thread: Optional[threading.Thread] = None
+
+
+def start_embedded() -> Optional[Worker]:
+    """In-process worker for the web app (JOB_WORKER_EMBEDDED, default true)."""
+    global _embedded, _embedded_thread
+    if os.environ.get("JOB_WORKER_EMBEDDED", "true").lower() != "true":
+        return None
+    if _embedded is None:
+        _embedded = Worker(
+            concurrency=int(os.environ.get("WORKER_CONCURRENCY", 1)),
+            poll_interval=float(os.environ.get("JOB_POLL_INTERVAL", 1)),
+        )
+        _embedded_thread = threading.Thread(target=_embedded.run_forever, name="job-worker", daemon=True)
+        _embedded_thread.start()
+    return _embedded
+
+
+def stop_embedded(timeout: float = 30.0):
+    """
+    Stop the embedded worker and wait (up to timeout seconds) for in-flight
+    jobs, so shutdown doesn't pull the renderer or the pool out from under them.
+    """
+    global _embedded, _embedded_thread
+    if _embedded is None:
+        return
+    deadline = time.monotonic() + timeout
+    stopped = _embedded.stop(timeout)
+    if _embedded_thread is not None:
+        _embedded_thread.join(max(0.0, deadline - time.monotonic()))
+    if not stopped:
+        logger.warning(f"[WORKER] Embedded worker jobs still running after {timeout:g}s; shutting down anyway")
+    _embedded = _embedded_thread = None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description="EPQ background job worker")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("WORKER_CONCURRENCY", 2)))
+    parser.add_argument("--kinds", nargs="*", default=None, help="job kinds to run (default: all registered)")
+    parser.add_argument("--poll-interval", type=float, default=float(os.environ.get("JOB_POLL_INTERVAL", 1)))
+    parser.add_argument("--once", action="store_true", help="drain due jobs and exit")
+    parser.add_argument("--stats", action="store_true", help="print queue stats and exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.stats:
+        print(json.dumps(job_queue.stats(), indent=2))
+        return 0
+
+    from app.services import pdf_renderer, webhooks
+
+    worker = Worker(concurrency=args.concurrency, kinds=args.kinds, poll_interval=args.poll_interval)
+    try:
+        if args.once:
+            print(f"Processed {worker.drain()} jobs")
+            return 0
+
+        # Warm the render processes before taking jobs
+        pdf_renderer.get_renderer().start()
+
+        def _stop(signum, frame):
+            worker.stop_event.set()
+
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+        worker.run_forever()
+        return 0
+    finally:
+        pdf_renderer.shutdown_renderer()
+        webhooks.shutdown()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
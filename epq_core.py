@@ -73,6 +73,19 @@ def generate_questions(max_q: int):
 
     return out
 
+# Bump when run_applicant_from_choice_responses / score_batch change how scores are derived.
+CHOICE_SCORER_VERSION = "choice-v1"
+
+def scorer_version() -> str:
+    """
+    Identifier of the choice scorer and the question bank it scores against,
+    e.g. "choice-v1.3f9a0c1b2d". Changes whenever the same responses could
+    score differently.
+    """
+    from epq_questions import question_bank_version
+
+    return f"{CHOICE_SCORER_VERSION}.{question_bank_version()}"
+
 def run_applicant_from_choice_responses(responses: Dict[str, str]) -> Dict[str, Any]:
     """
     responses = { "Q1": "Clear expectations ...", ... }
@@ -106,12 +119,90 @@ def run_applicant_from_choice_responses(responses: Dict[str, str]) -> Dict[str,
         overall_avg = 0.0
 
     base["overall_average"] = round(overall_avg, 2)
+    base["overall_band"] = overall_band_for(overall_avg)
 
+    return base
+
+def overall_band_for(overall_avg: float) -> str:
+    """Low/Moderate/High band for an overall construct average."""
     if overall_avg >= 3.0:
-        base["overall_band"] = "High"
+        return "High"
     elif overall_avg >= 2.0:
-        base["overall_band"] = "Moderate"
+        return "Moderate"
     else:
-        base["overall_band"] = "Low"
+        return "Low"
 
-    return base
+# Applicants scored per matrix multiply; bounds the one-hot block to ~chunk x columns floats.
+SCORE_BATCH_CHUNK = 4096
+
+def score_batch(batch: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Score many applicants at once. Same output, per applicant and in order, as
+    run_applicant_from_choice_responses(responses).
+
+    Answers are encoded into a sparse applicants x choice-column matrix and multiplied
+    against the precompiled (choice-column x construct) weight and mask matrices, giving
+    every applicant's construct totals and counts in one pass per chunk.
+    Falls back to per-applicant scoring when numpy is unavailable.
+    """
+    batch = list(batch or [])
+    if not batch:
+        return []
+
+    try:
+        import numpy as np
+        from epq_questions import (
+            compile_choice_score_table, compile_choice_weight_matrices, encode_choice_responses,
+        )
+
+        constructs, weights, mask = compile_choice_weight_matrices()
+        column_scores = compile_choice_score_table()["scores"]
+        rows, cols = encode_choice_responses(batch)
+    except ImportError:
+        return [run_applicant_from_choice_responses(r) for r in batch]
+    except Exception as exc:
+        return [
+            {"responses": r, "construct_scores": {}, "construct_scoring_error": str(exc),
+             "overall_average": 0.0, "overall_band": overall_band_for(0.0)}
+            for r in batch
+        ]
+
+    construct_pos = {c: k for k, c in enumerate(constructs)}
+    rows = np.asarray(rows, dtype=np.int64)
+    col_list = cols
+    cols = np.asarray(cols, dtype=np.int64)
+    n_cols = weights.shape[0]
+
+    out: List[Dict[str, Any]] = []
+    for start in range(0, len(batch), SCORE_BATCH_CHUNK):
+        stop = min(start + SCORE_BATCH_CHUNK, len(batch))
+        lo, hi = np.searchsorted(rows, [start, stop])
+
+        onehot = np.zeros((stop - start, n_cols), dtype=np.float64)
+        np.add.at(onehot, (rows[lo:hi] - start, cols[lo:hi]), 1.0)
+        totals = onehot @ weights
+        counts = onehot @ mask
+        with np.errstate(divide="ignore", invalid="ignore"):
+            averages = np.where(counts > 0, totals / np.maximum(counts, 1.0), np.nan)
+
+        bounds = np.searchsorted(rows, np.arange(start, stop + 1)).tolist()
+        for i, row in enumerate(averages.tolist()):
+            # Keep the single-applicant path's construct order (first seen while
+            # walking the answers) so the float sum below matches it exactly.
+            construct_scores: Dict[str, float] = {}
+            for j in col_list[bounds[i]:bounds[i + 1]]:
+                for c in column_scores[j]:
+                    if c not in construct_scores:
+                        construct_scores[c] = round(row[construct_pos[c]], 2)
+                if len(construct_scores) == len(constructs):
+                    break
+            vals = list(construct_scores.values())
+            overall_avg = (sum(vals) / len(vals)) if vals else 0.0
+            out.append({
+                "responses": batch[start + i],
+                "construct_scores": construct_scores,
+                "overall_average": round(overall_avg, 2),
+                "overall_band": overall_band_for(overall_avg),
+            })
+
+    return out
@@ -3,11 +3,13 @@
 EPQ Applicant Question Bank and scoring (web-safe).
 
 - Preserves your real choice counts (2/3/4/etc). No padding to 4.
-- Builds a mapping from (QID + chosen option text) -> construct score contributions.
+- Builds a mapping from (QID + chosen option text) -> construct score contributions,
+  compiled once per question bank and reused across submissions.
 - Scores submissions that send chosen option text.
 """
 
-from typing import Dict, Any, List
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Tuple
 
 
 def get_question_bank(max_q: int) -> List[Dict[str, Any]]:
@@ -62,33 +64,25 @@ def _normalize_choice_key(s: str) -> str:
     return s
 
 
-def build_choice_score_lookup(max_q: int) -> Dict[str, Dict[str, Dict[str, int]]]:
-    """
-    Returns:
-      {
-        "Q1": {
-          "<normalized choice text>": {"SCL":3,"AJL":1},
-          "<normalized choice text>": {"SCL":2,"CVL":3}
-        },
-        ...
-      }
-    """
-    from epq_additional_cli import QUESTIONS
+# Compiled once per process; see compile_choice_score_table() and clear_choice_score_cache().
+_COMPILED: Dict[str, Any] = {}
+_SOFT_MATCH_CACHE_SIZE = 4096
 
-    max_q = int(max_q) if max_q else 50
-    filtered = sorted(
-        (q for q in QUESTIONS if int(q.get("id", 0)) <= max_q),
-        key=lambda x: int(x.get("id", 0)),
-    )
 
-    lookup: Dict[str, Dict[str, Dict[str, int]]] = {}
+def _compile_bank(questions) -> Dict[str, Any]:
+    ordered = sorted(questions, key=lambda x: int(x.get("id", 0)))
 
-    for q in filtered:
+    per_qid: Dict[str, Dict[str, Mapping[str, int]]] = {}
+    raw_texts: Dict[str, Dict[str, str]] = {}
+    qnums: Dict[str, int] = {}
+
+    for q in ordered:
         qnum = int(q.get("id", 0))
         qid = f"Q{qnum}"
         opts = q.get("options") or []
 
-        per_q: Dict[str, Dict[str, int]] = {}
+        per_q: Dict[str, Mapping[str, int]] = {}
+        raw_q: Dict[str, str] = {}
 
         if isinstance(opts, list):
             for o in opts:
@@ -110,13 +104,175 @@ def build_choice_score_lookup(max_q: int) -> Dict[str, Dict[str, Dict[str, int]]
                     except Exception:
                         pass
 
-                per_q[_normalize_choice_key(text)] = cleaned_scores
+                key = _normalize_choice_key(text)
+                per_q[key] = MappingProxyType(cleaned_scores)
+                raw_q[text] = key
+
+        per_qid[qid] = per_q
+        raw_texts[qid] = raw_q
+        qnums[qid] = qnum
+
+    # Every distinct (qid, normalized choice) gets a column id; index maps both the
+    # exact option text the frontend sends and its normalized form to that column.
+    index: Dict[Tuple[str, str], int] = {}
+    options: Dict[str, Tuple[Tuple[str, int], ...]] = {}
+    column_scores: List[Mapping[str, int]] = []
+    column_qids: List[str] = []
+    for qid, per_q in per_qid.items():
+        cols = []
+        for key, scores in per_q.items():
+            j = len(column_scores)
+            column_scores.append(scores)
+            column_qids.append(qid)
+            index[(qid, key)] = j
+            cols.append((key, j))
+        for text, key in raw_texts[qid].items():
+            index[(qid, text)] = index[(qid, key)]
+        options[qid] = tuple(cols)
+
+    constructs: List[str] = []
+    for scores in column_scores:
+        for c in scores:
+            if c not in constructs:
+                constructs.append(c)
+
+    # Per-question view of the same index for the batch encoder's hot loop
+    # (plain dicts: treat as read-only).
+    by_qid: Dict[str, Tuple[int, Dict[str, int]]] = {qid: (qnum, {}) for qid, qnum in qnums.items()}
+    for (qid, text), j in index.items():
+        by_qid[qid][1][text] = j
+
+    return {
+        "qnums": MappingProxyType(qnums),
+        "index": MappingProxyType(index),
+        "by_qid": by_qid,
+        "options": MappingProxyType(options),
+        "scores": tuple(column_scores),
+        "column_qids": tuple(column_qids),
+        "constructs": tuple(constructs),
+        "soft": {},
+    }
+
+
+def compile_choice_score_table() -> Dict[str, Any]:
+    """
+    Return the compiled lookup for the whole question bank, building it on first use.
+
+      qnums:      {"Q1": 1, ...}
+      index:      {("Q1", "<choice text or normalized text>"): column, ...}
+      scores:     (column -> {"SCL": 3, "AJL": 1}, ...)
+      options:    {"Q1": (("<normalized text>", column), ...)}  (bank order, for soft matching)
+      constructs: ("SCL", "AJL", ...)  (first-seen order)
+
+    The bank is not watched for changes: anything that edits or replaces
+    epq_additional_cli.QUESTIONS at runtime must call clear_choice_score_cache().
+    """
+    compiled = _COMPILED.get("table")
+    if compiled is None:
+        from epq_additional_cli import QUESTIONS
+
+        compiled = _compile_bank(QUESTIONS)
+        _COMPILED["table"] = compiled
+    return compiled
+
+
+def question_bank_version() -> str:
+    """
+    Short content hash of the scored question bank (ids, option texts and scores).
+    Changes whenever re-scoring stored answers could give a different result.
+    """
+    compiled = compile_choice_score_table()
+    version = compiled.get("version")
+    if version is None:
+        import hashlib
+        import json
+
+        payload = [
+            [qid, compiled["qnums"][qid], [[key, sorted(compiled["scores"][j].items())] for key, j in options]]
+            for qid, options in compiled["options"].items()
+        ]
+        version = hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+        compiled["version"] = version
+    return version
+
+
+def clear_choice_score_cache() -> None:
+    """
+    Drop the compiled lookup, its soft-match cache and question_bank_version().
+
+    Required after any runtime change to epq_additional_cli.QUESTIONS (editing
+    option text or scores in place, adding/removing questions, or rebinding the
+    list); otherwise scoring keeps using the bank as it was first compiled.
+    """
+    _COMPILED.clear()
+
+
+def build_choice_score_lookup(max_q: int) -> Dict[str, Dict[str, Dict[str, int]]]:
+    """
+    Returns:
+      {
+        "Q1": {
+          "<normalized choice text>": {"SCL":3,"AJL":1},
+          "<normalized choice text>": {"SCL":2,"CVL":3}
+        },
+        ...
+      }
+    """
+    compiled = compile_choice_score_table()
+    max_q = int(max_q) if max_q else 50
 
-        lookup[qid] = per_q
+    scores = compiled["scores"]
+    lookup: Dict[str, Dict[str, Dict[str, int]]] = {}
+    for qid, options in compiled["options"].items():
+        if compiled["qnums"][qid] <= max_q:
+            lookup[qid] = {key: dict(scores[j]) for key, j in options}
 
     return lookup
 
 
+def _soft_match(compiled: Dict[str, Any], qid: str, chosen_key: str) -> Optional[int]:
+    """Substring fallback for near-miss answers; memoized per (qid, normalized choice)."""
+    soft = compiled["soft"]
+    cache_key = (qid, chosen_key)
+    if cache_key in soft:
+        return soft[cache_key]
+
+    column = None
+    for k, j in compiled["options"][qid]:
+        if chosen_key in k or k in chosen_key:
+            column = j
+            break
+
+    if len(soft) < _SOFT_MATCH_CACHE_SIZE:
+        soft[cache_key] = column
+    return column
+
+
+def _resolve_choice_column(compiled: Dict[str, Any], qid: str, chosen: Any) -> Optional[int]:
+    """Map one answer to its column: exact text, then normalized text, then soft match."""
+    chosen = str(chosen)
+    index = compiled["index"]
+    column = index.get((qid, chosen.strip()))
+
+    if column is None:
+        chosen_key = _normalize_choice_key(chosen)
+        column = index.get((qid, chosen_key))
+
+        # If exact key doesn't match, try a soft match (contains) as last resort
+        if column is None and chosen_key:
+            column = _soft_match(compiled, qid, chosen_key)
+
+    return column
+
+
+def _max_q_for(responses: Dict[str, Any]) -> int:
+    """Same max_q rule as epq_core.run_applicant_from_choice_responses."""
+    return max(
+        [int(k[1:]) for k in responses.keys()
+         if isinstance(k, str) and k.startswith("Q") and k[1:].isdigit()] + [50]
+    )
+
+
 def score_choice_responses_to_constructs(
     responses: Dict[str, str],
     max_q: int = 50,
@@ -125,7 +281,10 @@ def score_choice_responses_to_constructs(
     Convert {QID: chosen_text} into per-construct averages.
     Returns { "SCL": 2.6, "AJL": 1.9, ... }
     """
-    lookup = build_choice_score_lookup(max_q)
+    compiled = compile_choice_score_table()
+    qnums = compiled["qnums"]
+    column_scores = compiled["scores"]
+    max_q = int(max_q) if max_q else 50
 
     totals: Dict[str, int] = {}
     counts: Dict[str, int] = {}
@@ -135,24 +294,16 @@ def score_choice_responses_to_constructs(
             continue
 
         qid = qid.strip()
-        if qid not in lookup:
+        qnum = qnums.get(qid)
+        if qnum is None or qnum > max_q:
             continue
 
-        chosen_key = _normalize_choice_key(str(chosen))
-        contrib = lookup[qid].get(chosen_key)
-
-        # If exact key doesn't match, try a soft match (contains) as last resort
-        if contrib is None and chosen_key:
-            for k, v in lookup[qid].items():
-                if chosen_key in k or k in chosen_key:
-                    contrib = v
-                    break
-
-        if contrib is None:
+        column = _resolve_choice_column(compiled, qid, chosen)
+        if column is None:
             continue
 
-        for c, v in contrib.items():
-            totals[c] = totals.get(c, 0) + int(v)
+        for c, v in column_scores[column].items():
+            totals[c] = totals.get(c, 0) + v
             counts[c] = counts.get(c, 0) + 1
 
     avgs: Dict[str, float] = {}
@@ -160,3 +311,71 @@ def score_choice_responses_to_constructs(
         avgs[c] = round(total / max(counts.get(c, 1), 1), 2)
 
     return avgs
+
+
+def encode_choice_responses(batch: List[Dict[str, Any]]) -> Tuple[List[int], List[int]]:
+    """
+    Encode many {QID: chosen_text} submissions as a sparse (applicants x columns)
+    choice matrix in COO form: returns (rows, columns), one entry per scored answer,
+    in answer order. Applies the same max_q rule and answer matching as the
+    single-applicant path.
+    """
+    compiled = compile_choice_score_table()
+    by_qid = compiled["by_qid"]
+
+    rows: List[int] = []
+    cols: List[int] = []
+    for i, responses in enumerate(batch):
+        if not isinstance(responses, dict) or not responses:
+            continue
+        max_q = _max_q_for(responses)
+        for qid, chosen in responses.items():
+            if not isinstance(qid, str):
+                continue
+            entry = by_qid.get(qid)
+            if entry is None:
+                qid = qid.strip()
+                entry = by_qid.get(qid)
+                if entry is None:
+                    continue
+            qnum, choices = entry
+            if qnum > max_q:
+                continue
+            # Fast path: the frontend posts the option text verbatim
+            column = choices.get(chosen) if isinstance(chosen, str) else None
+            if column is None:
+                column = _resolve_choice_column(compiled, qid, chosen)
+                if column is None:
+                    continue
+            rows.append(i)
+            cols.append(column)
+    return rows, cols
+
+
+def compile_choice_weight_matrices():
+    """
+    NumPy form of the compiled bank, cached alongside it:
+      weights: (columns x constructs) score contributed by each choice
+      mask:    (columns x constructs) 1 where the choice scores that construct
+    Requires numpy.
+    """
+    import numpy as np
+
+    compiled = compile_choice_score_table()
+    cached = compiled.get("matrices")
+    if cached is not None:
+        return cached
+
+    constructs = compiled["constructs"]
+    pos = {c: k for k, c in enumerate(constructs)}
+    weights = np.zeros((len(compiled["scores"]), len(constructs)), dtype=np.float64)
+    mask = np.zeros_like(weights)
+    for j, scores in enumerate(compiled["scores"]):
+        for c, v in scores.items():
+            weights[j, pos[c]] = v
+            mask[j, pos[c]] = 1.0
+    weights.setflags(write=False)
+    mask.setflags(write=False)
+
+    compiled["matrices"] = (constructs, weights, mask)
+    return compiled["matrices"]
@@ -4,9 +4,14 @@ import sys
 import subprocess
 import datetime
 import base64
+import hashlib
+import threading
+from collections import OrderedDict
 from io import BytesIO
+import html as html_lib
 import re
 import shutil
+from functools import lru_cache
 from pathlib import Path
 
 # CRITICAL: Set wkhtmltopdf path at module import time
@@ -25,10 +30,6 @@ if not os.environ.get("WKHTMLTOPDF_PATH"):
             print(f"[report_generator] Auto-detected wkhtmltopdf at: {p}")
             break
 
-import matplotlib
-matplotlib.use("Agg")  # safe for servers/headless environments
-import matplotlib.pyplot as plt
-
 try:
     import pdfkit
     PDFKIT_AVAILABLE = True
@@ -37,6 +38,88 @@ except ImportError:
 
 EPQ_FEEDBACK = {}
 
+# Hard limit for one wkhtmltopdf run; a hung render is killed instead of blocking its worker
+WKHTMLTOPDF_TIMEOUT = float(os.environ.get("WKHTMLTOPDF_TIMEOUT", "60"))
+
+# Chart backend for the "Construct Averages" bar chart:
+#   "svg"        inline SVG built in pure Python (default, no matplotlib import)
+#   "matplotlib" PNG via matplotlib (also used as fallback if the SVG path fails)
+REPORT_CHART_BACKEND = os.environ.get("REPORT_CHART_BACKEND", "svg").strip().lower()
+
+
+class RenderCache:
+    """Thread-safe, size-bounded LRU with hit/miss counters."""
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = max(0, int(maxsize))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+# Identical score profiles render identical charts and table fragments; only the
+# name / candidate ID / date differ. Sizes via REPORT_CHART_CACHE_SIZE / REPORT_FRAGMENT_CACHE_SIZE (0 disables).
+CHART_CACHE = RenderCache("charts", int(os.environ.get("REPORT_CHART_CACHE_SIZE", "256")))
+FRAGMENT_CACHE = RenderCache("fragments", int(os.environ.get("REPORT_FRAGMENT_CACHE_SIZE", "2048")))
+
+
+def render_cache_stats() -> dict:
+    return {"charts": CHART_CACHE.stats(), "fragments": FRAGMENT_CACHE.stats()}
+
+
+def clear_render_cache():
+    """Drop cached charts/fragments (needed after changing EPQ_FEEDBACK or the chart backend code)."""
+    CHART_CACHE.clear()
+    FRAGMENT_CACHE.clear()
+
+
+# matplotlib's "tab20" palette, so both backends color bars identically
+TAB20_COLORS = [
+    "#1f77b4", "#aec7e8", "#ff7f0e", "#ffbb78", "#2ca02c", "#98df8a", "#d62728", "#ff9896", "#9467bd", "#c5b0d5",
+    "#8c564b", "#c49c94", "#e377c2", "#f7b6d2", "#7f7f7f", "#c7c7c7", "#bcbd22", "#dbdb8d", "#17becf", "#9edae5",
+]
+
 
 def find_wkhtmltopdf(verbose: bool = False):
     possible_paths = [
@@ -68,6 +151,204 @@ def find_wkhtmltopdf(verbose: bool = False):
     return None
 
 
+@lru_cache(maxsize=1)
+def wkhtmltopdf_info():
+    """
+    (path, version) of the wkhtmltopdf binary, resolved once per process.
+    path is None when not installed. Call wkhtmltopdf_info.cache_clear() after
+    changing WKHTMLTOPDF_PATH.
+    """
+    wk_path = find_wkhtmltopdf(verbose=True)
+    version = ""
+    if wk_path:
+        try:
+            version = subprocess.check_output(
+                [wk_path, "--version"], stderr=subprocess.STDOUT, text=True, timeout=15
+            ).strip()
+            print("[wkhtmltopdf]", version)
+        except Exception as e:
+            print("[wkhtmltopdf] Found binary but version check failed:", e)
+    return wk_path, version
+
+
+def _pyplot():
+    """Import matplotlib lazily: only the matplotlib chart backend needs it."""
+    import matplotlib
+    matplotlib.use("Agg")  # safe for servers/headless environments
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _render_bar_chart_png(labels, sizes, no_scores: bool) -> bytes:
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(9, 5.2))
+
+    palette = plt.get_cmap("tab20").colors
+    bar_colors = [palette[i % len(palette)] for i in range(len(labels))]
+
+    # Reverse so first item appears at top
+    labels_rev = list(reversed(labels))
+    sizes_rev = list(reversed(sizes))
+    colors_rev = list(reversed(bar_colors))
+
+    ax.barh(labels_rev, sizes_rev, color=colors_rev)
+
+    # add numeric value labels at end of bars
+    for y, v in enumerate(sizes_rev):
+        ax.text(v + 0.03, y, f"{v:.2f}", va="center", fontsize=9)
+
+    ax.set_title("Construct Averages" if not no_scores else "Construct Averages (No Data)", fontsize=16)
+    ax.set_xlabel("Average Score")
+
+    maxv = max(sizes_rev) if sizes_rev else 1.0
+    ax.set_xlim(0, max(1.0, maxv * 1.25))
+
+    fig.tight_layout()
+
+    buf = BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", dpi=150)
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def _nice_tick_step(xmax: float, max_ticks: int = 8) -> float:
+    for step in (0.1, 0.2, 0.25, 0.5, 1.0, 2.0, 2.5, 5.0, 10.0):
+        if xmax / step <= max_ticks:
+            return step
+    return xmax / max_ticks
+
+
+def _render_bar_chart_svg(labels, sizes, no_scores: bool) -> str:
+    """
+    Same chart as _render_bar_chart_png (labels, tab20 colors, value labels,
+    title, x axis from 0 to max(1, 1.25 x max)) as an inline SVG string.
+    """
+    width, height = 900, 520
+    n = max(len(labels), 1)
+    longest = max((len(str(l)) for l in labels), default=0)
+    left = min(360, max(120, 7.2 * longest + 24))
+    right, top, bottom = 30, 56, 62
+    plot_w = width - left - right
+    plot_h = height - top - bottom
+
+    maxv = max(sizes) if sizes else 1.0
+    xmax = max(1.0, maxv * 1.25)
+
+    def x_px(v: float) -> float:
+        return left + plot_w * (max(0.0, v) / xmax)
+
+    esc = html_lib.escape
+    title = "Construct Averages" if not no_scores else "Construct Averages (No Data)"
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" width="100%" '
+        f'font-family="Arial, sans-serif" role="img" aria-label="Construct Averages Bar Chart">',
+        f'<text x="{left + plot_w / 2:.1f}" y="32" font-size="21" text-anchor="middle">{title}</text>',
+    ]
+
+    # x axis grid ticks
+    step = _nice_tick_step(xmax)
+    tick = 0.0
+    while tick <= xmax + 1e-9:
+        x = x_px(tick)
+        parts.append(f'<line x1="{x:.1f}" y1="{top + plot_h}" x2="{x:.1f}" y2="{top + plot_h + 5}" stroke="#222"/>')
+        parts.append(
+            f'<text x="{x:.1f}" y="{top + plot_h + 20}" font-size="12" text-anchor="middle">{tick:g}</text>'
+        )
+        tick = round(tick + step, 10)
+    parts.append(
+        f'<text x="{left + plot_w / 2:.1f}" y="{height - 14}" font-size="14" text-anchor="middle">Average Score</text>'
+    )
+
+    # bars: first label at the top, as in the matplotlib version
+    band = plot_h / n
+    bar_h = band * 0.8
+    for i, (label, value) in enumerate(zip(labels, sizes)):
+        y = top + i * band + (band - bar_h) / 2
+        cy = y + bar_h / 2
+        color = TAB20_COLORS[i % len(TAB20_COLORS)]
+        parts.append(
+            f'<rect x="{left}" y="{y:.1f}" width="{x_px(value) - left:.1f}" height="{bar_h:.1f}" fill="{color}"/>'
+        )
+        parts.append(
+            f'<text x="{left - 8}" y="{cy:.1f}" font-size="12" text-anchor="end" dy=".35em">'
+            f'{esc(str(label))}</text>'
+        )
+        parts.append(
+            f'<text x="{x_px(value + 0.03):.1f}" y="{cy:.1f}" font-size="12" dy=".35em">'
+            f'{value:.2f}</text>'
+        )
+
+    # axes frame
+    parts.append(
+        f'<rect x="{left}" y="{top}" width="{plot_w}" height="{plot_h}" fill="none" stroke="#222" stroke-width="1"/>'
+    )
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def render_bar_chart_html(labels, sizes, no_scores: bool, backend: str = "") -> str:
+    """
+    The "Construct Averages" chart as an HTML fragment using the configured
+    backend (REPORT_CHART_BACKEND). Falls back to matplotlib if SVG fails.
+    """
+    backend = (backend or REPORT_CHART_BACKEND).lower()
+    # Content address: the (construct label, value) vector as it is drawn
+    key = hashlib.sha1(
+        repr((backend, bool(no_scores), [(str(l), round(float(v), 6)) for l, v in zip(labels, sizes)])).encode("utf-8")
+    ).hexdigest()
+    cached = CHART_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    chart_html = None
+    if backend == "svg":
+        try:
+            chart_html = '<div class="chart">' + _render_bar_chart_svg(labels, sizes, no_scores) + "</div>"
+        except Exception as e:
+            print("[report_generator] SVG chart failed, falling back to matplotlib:", e)
+    if chart_html is None:
+        img_base64 = base64.b64encode(_render_bar_chart_png(labels, sizes, no_scores)).decode("utf-8")
+        chart_html = f'<img src="data:image/png;base64,{img_base64}" alt="Construct Averages Bar Chart" />'
+    CHART_CACHE.put(key, chart_html)
+    return chart_html
+
+
+def warm_up():
+    """
+    Pay the one-off costs before the first real report: resolve the
+    wkhtmltopdf binary/version and draw a throwaway chart (with the
+    matplotlib backend this loads its font cache and Agg renderer). Used by the render worker pool.
+    """
+    wk_path, version = wkhtmltopdf_info()
+    render_bar_chart_html(["Warm Up"], [1.0], no_scores=False)
+    return {"wkhtmltopdf": wk_path, "version": version, "pdfkit": PDFKIT_AVAILABLE, "chart_backend": REPORT_CHART_BACKEND}
+
+
+def _html_to_pdf(html: str, pdf_path: Path, wk_path: str, options: dict, timeout: float):
+    """
+    Run wkhtmltopdf on html with a hard timeout (pdfkit.from_string has none).
+    Writes to a fresh temp file next to pdf_path and moves it into place only
+    if this run produced it, so a PDF left by an earlier run never passes.
+    """
+    kit = pdfkit.PDFKit(html, "string", options=options, configuration=pdfkit.configuration(wkhtmltopdf=wk_path))
+    tmp_path = pdf_path.with_name(f".{pdf_path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.pdf")
+    tmp_path.unlink(missing_ok=True)
+    args = kit.command(str(tmp_path))
+    try:
+        try:
+            result = subprocess.run(args, input=html.encode("utf-8"), capture_output=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"wkhtmltopdf timed out after {timeout:.0f}s")
+        written = tmp_path.exists() and tmp_path.stat().st_size > 0
+        if not written:
+            # wkhtmltopdf exits 1 on asset warnings while still writing a good PDF
+            stderr = (result.stderr or result.stdout or b"").decode("utf-8", errors="replace")
+            raise IOError(f"wkhtmltopdf exited with code {result.returncode}: {stderr.strip()[:500]}")
+        os.replace(tmp_path, pdf_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
 def _fix_mojibake(s: str) -> str:
     """
     Fix common UTF-8 -> cp1252 mojibake like Youâ€™re / didnâ€™t / itâ€™s.
@@ -112,7 +393,7 @@ def generate_pdf_report(
         print("[report_generator] PDF generation skipped: pdfkit not installed.")
         return None
 
-    wk_path = find_wkhtmltopdf(verbose=True)
+    wk_path, _wk_version = wkhtmltopdf_info()
     print(f"[report_generator] wkhtmltopdf path found: {wk_path}")
     
     if not wk_path:
@@ -122,12 +403,6 @@ def generate_pdf_report(
         print(r'[report_generator] Example (Windows): setx WKHTMLTOPDF_PATH "C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe"')
         return None
 
-    try:
-        out = subprocess.check_output([wk_path, "--version"], stderr=subprocess.STDOUT, text=True)
-        print("[wkhtmltopdf]", out.strip())
-    except Exception as e:
-        print("[wkhtmltopdf] Found binary but version check failed:", e)
-
     timestamp = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
 
     # ---------- helpers ----------
@@ -214,35 +489,7 @@ def generate_pdf_report(
         sizes = [1.0]
 
     # ---------- horizontal bar chart ----------
-    fig, ax = plt.subplots(figsize=(9, 5.2))
-
-    palette = plt.get_cmap("tab20").colors
-    bar_colors = [palette[i % len(palette)] for i in range(len(labels))]
-
-    # Reverse so first item appears at top
-    labels_rev = list(reversed(labels))
-    sizes_rev = list(reversed(sizes))
-    colors_rev = list(reversed(bar_colors))
-
-    ax.barh(labels_rev, sizes_rev, color=colors_rev)
-
-    # add numeric value labels at end of bars
-    for y, v in enumerate(sizes_rev):
-        ax.text(v + 0.03, y, f"{v:.2f}", va="center", fontsize=9)
-
-    ax.set_title("Construct Averages" if not no_scores else "Construct Averages (No Data)", fontsize=16)
-    ax.set_xlabel("Average Score")
-
-    maxv = max(sizes_rev) if sizes_rev else 1.0
-    ax.set_xlim(0, max(1.0, maxv * 1.25))
-
-    fig.tight_layout()
-
-    buf = BytesIO()
-    fig.savefig(buf, format="png", bbox_inches="tight", dpi=150)
-    plt.close(fig)
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode("utf-8")
+    chart_html = render_bar_chart_html(labels, sizes, no_scores)
 
     # ---------- generate table rows ----------
     table_rows_html = ""
@@ -264,16 +511,8 @@ def generate_pdf_report(
         development_opportunities = ["Verify scoring configuration so construct averages are computed for every submission."]
         interview_prompts = ["Walk me through how you approach a new questionnaire or unfamiliar process. What helps you be accurate?"]
     else:
+        env_key = str(employer_environment).capitalize()
         for k in ordered_keys:
-            full_name = humanize(k)
-            lookup = full_name.lower()
-
-            if lookup in canonical_map:
-                abbr, canonical_full, _short_meaning = canonical_map[lookup]
-            else:
-                abbr = get_abbrev(k)
-                canonical_full = full_name
-
             avg = _get_avg(k)
 
             if avg >= 2.7:
@@ -283,50 +522,76 @@ def generate_pdf_report(
             else:
                 band = "Low"
 
-            env_key = str(employer_environment).capitalize()
-            feedback_text = ""
-            if isinstance(EPQ_FEEDBACK, dict):
-                feedback_text = (
-                    EPQ_FEEDBACK.get(k, {}).get(env_key, {}).get(band, "")
-                    or EPQ_FEEDBACK.get(k, {}).get("Standard", {}).get(band, "")
-                    or ""
-                )
+            # Everything but the average depends only on (construct, band, environment)
+            fragment_key = ("row", k, band, env_key)
+            fragment = FRAGMENT_CACHE.get(fragment_key)
+            if fragment is None:
+                full_name = humanize(k)
+                lookup = full_name.lower()
 
-            if not feedback_text:
+                if lookup in canonical_map:
+                    abbr, canonical_full, _short_meaning = canonical_map[lookup]
+                else:
+                    abbr = get_abbrev(k)
+                    canonical_full = full_name
+
+                feedback_text = ""
+                if isinstance(EPQ_FEEDBACK, dict):
+                    feedback_text = (
+                        EPQ_FEEDBACK.get(k, {}).get(env_key, {}).get(band, "")
+                        or EPQ_FEEDBACK.get(k, {}).get("Standard", {}).get(band, "")
+                        or ""
+                    )
+
+                if not feedback_text:
+                    if band == "High":
+                        feedback_text = abbr + " indicates higher tolerance or preference for this environmental demand."
+                    elif band == "Moderate":
+                        feedback_text = abbr + " indicates flexibility and reasonable tolerance across environments."
+                    else:
+                        feedback_text = abbr + " indicates preference for lower environmental load in this domain."
+
+                strength = development = None
                 if band == "High":
-                    feedback_text = abbr + " indicates higher tolerance or preference for this environmental demand."
+                    positive = "Likely to perform strongly where " + canonical_full.lower() + " is expected."
+                    setback = "Low risk in most employer environments."
+                    mitigation = "Leverage this strength in role design and responsibilities."
+                    strength = abbr + ": comfortable with higher " + canonical_full.lower() + "."
                 elif band == "Moderate":
-                    feedback_text = abbr + " indicates flexibility and reasonable tolerance across environments."
+                    positive = "Performs well with clear expectations; adapts when demands shift."
+                    setback = "May prefer short checkpoints during spikes in demand."
+                    mitigation = "Provide brief SOPs and regular check-ins during onboarding."
+                    development = abbr + ": benefits from concise process cues."
                 else:
-                    feedback_text = abbr + " indicates preference for lower environmental load in this domain."
-
-            if band == "High":
-                positive = "Likely to perform strongly where " + canonical_full.lower() + " is expected."
-                setback = "Low risk in most employer environments."
-                mitigation = "Leverage this strength in role design and responsibilities."
-                key_strengths.append(abbr + ": comfortable with higher " + canonical_full.lower() + ".")
-            elif band == "Moderate":
-                positive = "Performs well with clear expectations; adapts when demands shift."
-                setback = "May prefer short checkpoints during spikes in demand."
-                mitigation = "Provide brief SOPs and regular check-ins during onboarding."
-                development_opportunities.append(abbr + ": benefits from concise process cues.")
-            else:
-                positive = "Performs best with structured supports in this domain."
-                setback = "Possible friction where high " + canonical_full.lower() + " is demanded from day one."
-                mitigation = "Use checklists, paired mentoring, and short focused training."
-                development_opportunities.append(abbr + ": provide structured onboarding and checklists.")
-
-            interview_prompts.append("Describe a time when " + canonical_full.lower() + " mattered and how you handled it.")
-
-            table_rows_html += (
-                "<tr>"
-                "<td><strong style='font-size:14px'>" + abbr + "</strong><div style='font-size:11px;color:#555'>" + canonical_full + "</div></td>"
-                "<td class='avg'>" + format(avg, ".2f") + "</td>"
-                "<td>" + _fix_mojibake(feedback_text) + "</td>"
-                "<td>" + _fix_mojibake(positive) + "</td>"
-                "<td>" + _fix_mojibake(setback) + "<br><em>Mitigation:</em> " + _fix_mojibake(mitigation) + "</td>"
-                "</tr>\n"
-            )
+                    positive = "Performs best with structured supports in this domain."
+                    setback = "Possible friction where high " + canonical_full.lower() + " is demanded from day one."
+                    mitigation = "Use checklists, paired mentoring, and short focused training."
+                    development = abbr + ": provide structured onboarding and checklists."
+
+                prompt = "Describe a time when " + canonical_full.lower() + " mattered and how you handled it."
+
+                row_head = (
+                    "<tr>"
+                    "<td><strong style='font-size:14px'>" + abbr + "</strong><div style='font-size:11px;color:#555'>" + canonical_full + "</div></td>"
+                    "<td class='avg'>"
+                )
+                row_tail = (
+                    "</td>"
+                    "<td>" + _fix_mojibake(feedback_text) + "</td>"
+                    "<td>" + _fix_mojibake(positive) + "</td>"
+                    "<td>" + _fix_mojibake(setback) + "<br><em>Mitigation:</em> " + _fix_mojibake(mitigation) + "</td>"
+                    "</tr>\n"
+                )
+                fragment = (row_head, row_tail, strength, development, prompt)
+                FRAGMENT_CACHE.put(fragment_key, fragment)
+
+            row_head, row_tail, strength, development, prompt = fragment
+            if strength:
+                key_strengths.append(strength)
+            if development:
+                development_opportunities.append(development)
+            interview_prompts.append(prompt)
+            table_rows_html += row_head + format(avg, ".2f") + row_tail
 
         key_strengths = sorted(set(key_strengths)) or ["Adaptive, collaborative, dependable."]
         development_opportunities = sorted(set(development_opportunities)) or ["Provide clear initial expectations and mentoring."]
@@ -361,7 +626,11 @@ def generate_pdf_report(
     )
 
     glossary_html = ""
-    if not no_scores:
+    glossary_key = ("glossary", tuple(sorted(constructs.keys()))) if not no_scores else None
+    cached_glossary = FRAGMENT_CACHE.get(glossary_key) if glossary_key else None
+    if cached_glossary is not None:
+        glossary_html = cached_glossary
+    elif not no_scores:
         for k in sorted(constructs.keys()):
             full_name = humanize(k)
             lookup = full_name.lower()
@@ -372,6 +641,7 @@ def generate_pdf_report(
                 canonical_full = full_name
                 short_meaning = canonical_full + ": a workplace demand related to environmental fit."
             glossary_html += "<tr><td><strong>" + abbr + "</strong></td><td>" + canonical_full + "</td><td>" + short_meaning + "</td></tr>\n"
+        FRAGMENT_CACHE.put(glossary_key, glossary_html)
     else:
         glossary_html = "<tr><td><strong>N/A</strong></td><td>No scored constructs</td><td>Scored construct aggregates were not available for this run.</td></tr>\n"
 
@@ -426,6 +696,8 @@ def generate_pdf_report(
         th {{ background-color: #f7f7f7; font-weight:600; }}
         td.avg {{ font-weight:700; width:70px; text-align:center; }}
         img {{ max-width: 100%; height: auto; display: block; margin: 12px auto; }}
+        .chart {{ width: 100%; margin: 12px auto; }}
+        .chart svg {{ display: block; width: 100%; height: auto; }}
         p, ul, ol {{ font-size: 17px; }}
       </style>
     </head>
@@ -452,7 +724,7 @@ def generate_pdf_report(
       </table>
 
       <h2>Visual Overview</h2>
-      <img src="data:image/png;base64,{img_base64}" alt="Construct Averages Bar Chart" />
+      {chart_html}
 
       <div style="page-break-after:always;"></div>
 
@@ -501,7 +773,6 @@ def generate_pdf_report(
     pdf_path = out_dir / f"applicant_report_{candidate_id}.pdf"
 
     try:
-        config = pdfkit.configuration(wkhtmltopdf=wk_path)
         options = {
             "margin-top": "15mm",
             "margin-bottom": "15mm",
@@ -514,7 +785,7 @@ def generate_pdf_report(
             "quiet": "",
         }
 
-        pdfkit.from_string(html, str(pdf_path), configuration=config, options=options)
+        _html_to_pdf(html, pdf_path, wk_path, options, WKHTMLTOPDF_TIMEOUT)
 
         if not pdf_path.exists():
             print("[report_generator] PDF generation completed but file not found:", pdf_path)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Logo upload latency at BrandingProcessor.MAX_DIMENSIONS.
+
+Builds a synthetic opaque logo (white background, coloured shapes, anti-aliased
+edges) at the maximum size, then times the full process_upload() and the two
+pixel passes on their own. With --legacy the per-pixel loops the processor
+used to run are timed too, for comparison.
+
+Usage:
+  python scripts/bench_branding.py [--runs 5] [--format PNG|JPEG] [--legacy]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import sys
+import time
+import warnings
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.branding_processor import BrandingProcessor  # noqa: E402
+
+
+def make_logo(size, fmt: str) -> bytes:
+    width, height = size
+    img = Image.new("RGB", size, (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((width // 8, height // 8, width * 5 // 8, height * 5 // 8), fill=(30, 90, 200))
+    draw.rectangle((width // 2, height // 2, width * 7 // 8, height * 7 // 8), fill=(220, 60, 40))
+    draw.polygon([(width // 10, height * 9 // 10), (width // 2, height // 3), (width * 9 // 10, height * 9 // 10)],
+                 fill=(250, 244, 246))
+    img = img.filter(ImageFilter.GaussianBlur(3))
+    output = io.BytesIO()
+    img.save(output, format=fmt, **({"quality": 90} if fmt == "JPEG" else {}))
+    return output.getvalue()
+
+
+def legacy_transparent(img: Image.Image) -> bytes:
+    """The old per-pixel loop, for comparison"""
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    data = img.load()
+    width, height = img.size
+    for y in range(height):
+        for x in range(width):
+            r, g, b, a = data[x, y]
+            if r > 240 and g > 240 and b > 240:
+                data[x, y] = (255, 255, 255, 0)
+    output = io.BytesIO()
+    img.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+def legacy_average(img: Image.Image):
+    """The old list(getdata()) average, for comparison"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        pixels = list(img.convert("RGB").getdata())
+    return tuple(sum(p[i] for p in pixels) // len(pixels) for i in range(3))
+
+
+def timed(fn, runs: int):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), min(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--format", default="PNG", choices=["PNG", "JPEG"])
+    parser.add_argument("--legacy", action="store_true", help="also time the old per-pixel loops")
+    args = parser.parse_args()
+
+    processor = BrandingProcessor()
+    size = processor.MAX_DIMENSIONS
+    data = make_logo(size, args.format)
+    mime = "image/png" if args.format == "PNG" else "image/jpeg"
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    print(f"{size[0]}x{size[1]} {args.format} logo, {len(data) / 1024:.0f} KB, {args.runs} runs (median / best ms)")
+
+    def upload():
+        with contextlib.redirect_stdout(io.StringIO()):  # process_upload prints debug lines
+            asyncio.run(processor.process_upload(data, "logo", mime))
+
+    rows = [
+        ("process_upload", timed(upload, args.runs)),
+        ("_simple_transparent", timed(lambda: processor._simple_transparent(img.copy()), args.runs)),
+        ("_extract_color", timed(lambda: processor._extract_color(img), args.runs)),
+    ]
+    if args.legacy:
+        region = img.crop((size[0] // 4, size[1] // 4, size[0] * 3 // 4, size[1] * 3 // 4))
+        rows += [
+            ("legacy transparent loop", timed(lambda: legacy_transparent(img.copy()), max(1, args.runs // 2))),
+            ("legacy getdata average", timed(lambda: legacy_average(region), max(1, args.runs // 2))),
+        ]
+    for name, (median, best) in rows:
+        print(f"  {name:<26} {median:9.1f} {best:9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Before any app import: never touch the project's epq.db, no background work
+os.environ.setdefault("DB_PATH", str(Path(tempfile.mkdtemp(prefix="epq-tests-")) / "epq.db"))
+os.environ.setdefault("JOB_WORKER_EMBEDDED", "false")
+os.environ.setdefault("SCORE_BACKFILL_ON_STARTUP", "false")
+os.environ.pop("DATABASE_URL", None)
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    """An initialized, migrated SQLite database of its own for one test."""
+    from app.services import db, db_pool
+
+    monkeypatch.setattr(db, "DB_PATH", tmp_path / "epq.db")
+    db.init_db()
+    yield db
+    db_pool.close_pool()
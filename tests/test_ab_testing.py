@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from app.services import ab_testing
+
+
+def test_posterior_is_uniform_prior_plus_counts():
+    assert ab_testing.posterior(0, 0) == (1.0, 1.0)
+    assert ab_testing.posterior(100, 30) == (31.0, 71.0)
+
+
+def test_posterior_clamps_bad_counts():
+    assert ab_testing.posterior(10, 25) == (11.0, 1.0)
+    assert ab_testing.posterior(None, -3) == (1.0, 1.0)
+
+
+def test_prob_beats_symmetric_and_complementary():
+    assert ab_testing.prob_beats(5, 5, 5, 5) == pytest.approx(0.5, abs=1e-9)
+    p = ab_testing.prob_beats(11, 91, 21, 81)
+    assert p > 0.95
+    assert ab_testing.prob_beats(21, 81, 11, 91) == pytest.approx(1 - p, abs=1e-9)
+
+
+def test_prob_beats_exact_matches_normal_approximation_at_scale():
+    exact = ab_testing.prob_beats(301, 701, 331, 671)
+    # Non-integer shapes take the normal approximation
+    approx = ab_testing.prob_beats(301.5, 701, 331.5, 671)
+    assert exact == pytest.approx(approx, abs=0.01)
+
+
+def test_prob_best_sums_to_one_and_ranks_arms():
+    best = ab_testing.prob_best([(11, 91), (21, 81), (16, 86)], seed=7)
+    assert sum(best) == pytest.approx(1.0)
+    assert max(range(3), key=best.__getitem__) == 1
+    assert ab_testing.prob_best([(3, 4)]) == [1.0]
+
+
+def test_msprt_no_evidence_without_data_or_difference():
+    assert ab_testing.msprt_p_value(0, 0, 100, 10, tau=0.05) == 1.0
+    assert ab_testing.msprt_p_value(1000, 100, 1000, 100, tau=0.05) == 1.0
+
+
+def test_msprt_crosses_boundary_as_evidence_grows():
+    # Same observed rates (10% vs 15%), ten times the traffic
+    small = ab_testing.msprt_p_value(200, 20, 200, 30, tau=0.05)
+    large = ab_testing.msprt_p_value(2000, 200, 2000, 300, tau=0.05)
+    assert small > 0.05
+    assert large < 0.05
+
+
+def test_decide_respects_min_views_and_bonferroni_threshold():
+    experiment = {"control_variant_id": "A", "alpha": 0.05, "min_views": 100}
+    variants = [{"id": "A", "views": 2000}, {"id": "B", "views": 2000}, {"id": "C", "views": 2000}]
+    means = [0.10, 0.15, 0.11]
+    # 0.04 clears alpha but not alpha / (k - 1) = 0.025
+    assert ab_testing._decide(experiment, variants, means, [None, 0.04, 0.5]) is None
+    winner, reason = ab_testing._decide(experiment, variants, means, [None, 0.01, 0.5])
+    assert winner == "B" and "beats control" in reason
+    variants[2]["views"] = 50
+    assert ab_testing._decide(experiment, variants, means, [None, 0.01, 0.5]) is None
+
+
+def _seed_variants(db, metrics):
+    with db.connection() as con:
+        for i, (views, completions) in enumerate(metrics):
+            vid = f"V{i}"
+            con.execute("""
+                INSERT INTO job_variants (id, role_id, employer_id, variant_name, title, description, created_at)
+                VALUES (?, 'R1', 'E1', ?, ?, '', ?)
+            """, (vid, vid, f"Title {i}", f"2026-01-01T00:00:0{i}"))
+            con.execute("""
+                INSERT INTO variant_metrics (id, variant_id, role_id, views, completions, updated_at)
+                VALUES (?, ?, 'R1', ?, ?, '2026-01-01T00:00:00')
+            """, (f"M{i}", vid, views, completions))
+
+
+def test_thompson_allocation_favours_the_better_arm(fresh_db):
+    _seed_variants(fresh_db, [(400, 40), (400, 80)])
+    random.seed(3)
+    picks = [ab_testing.assign("R1", "E1")["variant_id"] for _ in range(300)]
+    assert picks.count("V1") > 0.9 * len(picks)
+
+
+def test_thompson_allocation_explores_when_uncertain(fresh_db):
+    _seed_variants(fresh_db, [(0, 0), (0, 0)])
+    random.seed(3)
+    picks = [ab_testing.assign("R1", "E1")["variant_id"] for _ in range(400)]
+    assert 0.35 < picks.count("V0") / len(picks) < 0.65
+
+
+def test_stopped_experiment_always_serves_the_winner(fresh_db):
+    _seed_variants(fresh_db, [(3000, 300), (3000, 450)])
+    result = ab_testing.results("R1", "E1")
+    assert result["experiment"]["status"] == "stopped"
+    assert result["experiment"]["winner_variant_id"] == "V1"
+    assert {ab_testing.assign("R1", "E1")["variant_id"] for _ in range(50)} == {"V1"}
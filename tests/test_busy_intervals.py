@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+from app.services.scheduling_agent import BusyIntervals
+
+
+def at(hour, minute=0):
+    return datetime(2026, 3, 2, hour, minute)
+
+
+def test_overlaps_is_half_open():
+    busy = BusyIntervals([(at(9), at(10))])
+    assert busy.overlaps(at(9, 30), at(9, 45))
+    assert busy.overlaps(at(8, 30), at(9, 1))
+    assert not busy.overlaps(at(10), at(11))
+    assert not busy.overlaps(at(8), at(9))
+
+
+def test_overlaps_sees_long_interval_behind_short_ones():
+    # The 8-17 block starts first; later short intervals must not hide it
+    busy = BusyIntervals([(at(8), at(17)), (at(9), at(9, 30)), (at(10), at(10, 30))])
+    assert busy.overlaps(at(14), at(15))
+    assert not busy.overlaps(at(17), at(18))
+
+
+def test_empty_and_degenerate_intervals_are_ignored():
+    busy = BusyIntervals([(at(9), at(9)), (at(11), at(10))])
+    assert len(busy) == 0
+    assert not busy.overlaps(at(0), at(23))
+    assert busy.free_slots(at(9), at(12)) == [(at(9), at(12))]
+
+
+def test_free_slots_clip_to_window_and_merge_overlaps():
+    busy = BusyIntervals([
+        (at(7), at(9)),           # starts before the window
+        (at(10), at(11)),
+        (at(10, 30), at(11, 30)),  # double-booked with the one above
+        (at(16), at(19)),          # runs past the window
+    ])
+    assert busy.free_slots(at(8), at(17)) == [(at(9), at(10)), (at(11, 30), at(16))]
+
+
+def test_free_slots_skip_intervals_that_end_before_window():
+    busy = BusyIntervals([(at(1), at(2)), (at(3), at(4)), (at(12), at(13))])
+    assert busy.free_slots(at(9), at(15)) == [(at(9), at(12)), (at(13), at(15))]
+
+
+def test_add_and_remove_keep_queries_consistent():
+    busy = BusyIntervals([(at(9), at(10)), (at(13), at(14))])
+    busy.add(at(8), at(12))
+    assert busy.overlaps(at(11), at(11, 30))
+    assert busy.free_slots(at(8), at(15)) == [(at(12), at(13)), (at(14), at(15))]
+
+    busy.remove(at(8), at(12))
+    assert not busy.overlaps(at(11), at(11, 30))
+    assert busy.free_slots(at(8), at(15)) == [(at(8), at(9)), (at(10), at(13)), (at(14), at(15))]
+
+
+def test_add_matches_bulk_construction():
+    intervals = [(at(h), at(h) + timedelta(minutes=m)) for h, m in [(12, 30), (9, 240), (10, 15), (15, 60), (9, 30)]]
+    incremental = BusyIntervals()
+    for s, e in intervals:
+        incremental.add(s, e)
+    bulk = BusyIntervals(intervals)
+    assert incremental.starts == bulk.starts
+    assert incremental.max_end == bulk.max_end
+
+
+def test_starts_near_counts_strictly_within_gap():
+    busy = BusyIntervals([(at(9), at(10)), (at(10), at(11)), (at(13), at(14))])
+    assert busy.starts_near(at(10), timedelta(hours=1)) == 1
+    assert busy.starts_near(at(10), timedelta(minutes=61)) == 2
+    assert busy.starts_within(at(12, 30), timedelta(hours=1))
+    assert not busy.starts_within(at(12), timedelta(hours=1))
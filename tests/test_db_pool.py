@@ -0,0 +1,149 @@
+import sys
+import types
+
+import pytest
+
+from app.services import db_pool
+from app.services.db_pool import PostgresPool, SQLitePool, pg_query
+
+
+@pytest.fixture
+def pool(tmp_path):
+    p = SQLitePool(tmp_path / "pool.db", max_idle=2)
+    yield p
+    p.close_all()
+
+
+def test_sqlite_release_reuses_handle(pool):
+    con = pool.connect()
+    raw = con.raw
+    con.close()
+    con = pool.connect()
+    assert con.raw is raw
+    con.close()
+    assert pool.stats()["opened"] == 1 and pool.stats()["idle"] == 1
+
+
+def test_sqlite_release_rolls_back_uncommitted_work(pool):
+    with pool.connect() as con:
+        con.execute("CREATE TABLE t (x INTEGER)")
+    con = pool.connect()
+    con.execute("INSERT INTO t VALUES (1)")
+    con.close()
+    con = pool.connect()
+    assert con.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    con.close()
+
+
+def test_sqlite_closed_proxy_rejects_use(pool):
+    con = pool.connect()
+    con.close()
+    with pytest.raises(Exception):
+        con.cursor()
+
+
+def test_sqlite_keeps_at_most_max_idle(pool):
+    cons = [pool.connect() for _ in range(4)]
+    for con in cons:
+        con.close()
+    stats = pool.stats()
+    assert stats["idle"] == 2 and stats["discarded"] == 2 and stats["in_use"] == 0
+
+
+def test_sqlite_close_all_closes_idle_and_discards_on_release(pool):
+    out = pool.connect()
+    spare = pool.connect()
+    idle_raw = spare.raw
+    spare.close()
+
+    pool.close_all()
+    # The idle handle is closed at once; the checked-out one stays usable...
+    assert pool.stats()["idle"] == 0
+    with pytest.raises(Exception):
+        idle_raw.execute("SELECT 1")
+    out_raw = out.raw
+    assert out.execute("SELECT 1").fetchone()[0] == 1
+    # ...and is closed, not pooled, when it comes back
+    out.close()
+    assert pool.stats()["idle"] == 0 and pool.stats()["in_use"] == 0
+    with pytest.raises(Exception):
+        out_raw.execute("SELECT 1")
+
+
+class _FakePgConnection:
+    def __init__(self):
+        self.closed = 0
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def pg_pool(monkeypatch):
+    """PostgresPool over fake connections (no server or psycopg2 needed)."""
+    fake = types.ModuleType("psycopg2")
+    fake.connect = lambda dsn, cursor_factory=None: _FakePgConnection()
+    extras = types.ModuleType("psycopg2.extras")
+    extras.RealDictCursor = object
+    fake.extras = extras
+    monkeypatch.setitem(sys.modules, "psycopg2", fake)
+    monkeypatch.setitem(sys.modules, "psycopg2.extras", extras)
+    return PostgresPool("postgresql://test", minconn=1, maxconn=2, timeout=0.05)
+
+
+def test_pg_release_rolls_back_and_reuses(pg_pool):
+    con = pg_pool.connect()
+    raw = con.raw
+    con.close()
+    assert raw.rollbacks == 1
+    again = pg_pool.connect()
+    assert again.raw is raw
+    again.close()
+
+
+def test_pg_connect_waits_then_raises_when_exhausted(pg_pool):
+    held = [pg_pool.connect(), pg_pool.connect()]
+    with pytest.raises(db_pool.PoolExhausted):
+        pg_pool.connect()
+    held[0].close()
+    pg_pool.connect().close()
+    held[1].close()
+
+
+def test_pg_close_all_closes_idle_and_discards_on_release(pg_pool):
+    out = pg_pool.connect()
+    out_raw = out.raw
+    spare = pg_pool.connect()
+    spare.close()
+    idle_raw = pg_pool._idle[-1][0]
+
+    pg_pool.close_all()
+    assert idle_raw.closed and not out_raw.closed
+    out.close()
+    assert out_raw.closed
+    assert pg_pool.stats()["idle"] == 0 and pg_pool.stats()["in_use"] == 0
+
+
+def test_pg_release_discards_broken_connection(pg_pool):
+    con = pg_pool.connect()
+    con.raw.closed = 1
+    con.close()
+    assert pg_pool.stats()["idle"] == 0 and pg_pool.stats()["discarded"] == 1
+
+
+@pytest.mark.parametrize("query, with_params, expected", [
+    ("SELECT * FROM t WHERE a = ? AND b = ?", True, "SELECT * FROM t WHERE a = %s AND b = %s"),
+    ("SELECT '?' AS q, a FROM t WHERE b = ?", True, "SELECT '?' AS q, a FROM t WHERE b = %s"),
+    ('SELECT "we?ird" FROM t WHERE b = ?', True, 'SELECT "we?ird" FROM t WHERE b = %s'),
+    ("SELECT a -- why?\nFROM t /* or? */ WHERE b = ?", True, "SELECT a -- why?\nFROM t /* or? */ WHERE b = %s"),
+    ("SELECT 'it''s ?' FROM t WHERE b = ?", True, "SELECT 'it''s ?' FROM t WHERE b = %s"),
+    ("SELECT * FROM t WHERE name LIKE 'a%' AND b = ?", True, "SELECT * FROM t WHERE name LIKE 'a%%' AND b = %s"),
+    ("SELECT * FROM t WHERE name LIKE 'a%'", False, "SELECT * FROM t WHERE name LIKE 'a%'"),
+    ("SELECT a % 2 FROM t WHERE b = ?", True, "SELECT a %% 2 FROM t WHERE b = %s"),
+])
+def test_pg_query_translates_only_real_placeholders(query, with_params, expected):
+    assert pg_query(query, with_params) == expected
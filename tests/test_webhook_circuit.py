@@ -0,0 +1,79 @@
+import datetime
+
+import pytest
+
+from app.services import webhook_outbox as wo
+from app.services import webhooks
+
+
+@pytest.fixture
+def hook(fresh_db):
+    with fresh_db.connection() as con:
+        con.execute("""
+            INSERT INTO employers (employer_id, company_name, email, password_hash)
+            VALUES ('E1', 'Acme', 'e1@example.com', 'x')
+        """)
+    return webhooks.register_webhook("E1", "http://127.0.0.1:9/hook", "applicant.submitted")
+
+
+def _apply(db, webhook_id, failures, now):
+    with db.connection() as con:
+        wo._update_circuit(con.cursor(), webhook_id, failures, now)
+    return wo.get_circuit(webhook_id)
+
+
+def _at(circuit_field):
+    return datetime.datetime.fromisoformat(circuit_field.replace("Z", "+00:00"))
+
+
+def test_opens_at_threshold_and_success_resets(fresh_db, hook):
+    now = wo._now()
+    circuit = _apply(fresh_db, hook, wo.CIRCUIT_THRESHOLD - 1, now)
+    assert circuit["state"] == "closed"
+    assert circuit["consecutive_failures"] == wo.CIRCUIT_THRESHOLD - 1
+
+    circuit = _apply(fresh_db, hook, 0, now)
+    assert circuit["state"] == "closed" and circuit["consecutive_failures"] == 0
+
+    circuit = _apply(fresh_db, hook, wo.CIRCUIT_THRESHOLD, now)
+    assert circuit["state"] == "open" and circuit["open_count"] == 1
+    assert (_at(circuit["retry_after_utc"]) - now).total_seconds() == pytest.approx(wo.CIRCUIT_COOLDOWN, abs=1)
+
+
+def test_failed_probe_reopens_with_longer_pause(fresh_db, hook):
+    now = wo._now()
+    _apply(fresh_db, hook, wo.CIRCUIT_THRESHOLD, now)
+    later = now + datetime.timedelta(seconds=wo.CIRCUIT_COOLDOWN + 1)
+    circuit = _apply(fresh_db, hook, 1, later)
+    assert circuit["state"] == "open" and circuit["open_count"] == 2
+    expected = min(wo.CIRCUIT_MAX, 2 * wo.CIRCUIT_COOLDOWN)
+    assert (_at(circuit["retry_after_utc"]) - later).total_seconds() == pytest.approx(expected, abs=1)
+
+
+def test_successful_probe_closes(fresh_db, hook):
+    now = wo._now()
+    _apply(fresh_db, hook, wo.CIRCUIT_THRESHOLD, now)
+    circuit = _apply(fresh_db, hook, 0, now + datetime.timedelta(seconds=wo.CIRCUIT_COOLDOWN + 1))
+    assert circuit["state"] == "closed"
+    assert circuit["open_count"] == 0 and circuit["retry_after_utc"] is None
+
+
+def test_open_circuit_is_not_claimed_before_cooldown(fresh_db, hook):
+    wo.enqueue("E1", "applicant.submitted", {"n": 1})
+    _apply(fresh_db, hook, wo.CIRCUIT_THRESHOLD, wo._now())
+    assert wo._claim(100) == []
+
+
+def test_half_open_claims_one_probe_across_passes(fresh_db, hook):
+    for n in range(3):
+        wo.enqueue("E1", "applicant.submitted", {"n": n})
+    _apply(fresh_db, hook, wo.CIRCUIT_THRESHOLD, wo._now() - datetime.timedelta(seconds=wo.CIRCUIT_COOLDOWN + 1))
+
+    probe = wo._claim(100)
+    assert len(probe) == 1
+    # Probe still in flight: another pass (or worker) gets nothing for this endpoint
+    assert wo._claim(100) == []
+
+    wo._record(probe, [{"webhook_id": hook, "status_code": 200, "response_body": "ok", "error": None}])
+    assert wo.get_circuit(hook)["state"] == "closed"
+    assert len(wo._claim(100)) == 2